@@ -32,6 +32,7 @@ from controllers.material_controller import material_bp, material_global_bp
 from controllers.reference_file_controller import reference_file_bp
 from controllers.settings_controller import settings_bp
 from controllers import project_bp, page_bp, template_bp, user_template_bp, export_bp, file_bp
+from services.task_manager import task_manager
 
 
 # Enable SQLite WAL mode for all connections
@@ -136,6 +137,9 @@ def create_app():
         # Load settings from database and sync to app.config
         _load_settings_to_config(app)
 
+    # Bind the background task manager (leases/heartbeat need an app context)
+    task_manager.init_app(app)
+
     # Health check endpoint
     @app.route('/health')
     def health_check():
@@ -285,5 +289,8 @@ if __name__ == '__main__':
         f"Uploads: {app.config['UPLOAD_FOLDER']}"
     )
     
+    # Resume tasks left behind by a previous run (expired leases)
+    task_manager.start()
+    
     # Using absolute paths for database, so WSL path issues should not occur
     app.run(host='0.0.0.0', port=port, debug=debug, use_reloader=False)
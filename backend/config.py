@@ -55,6 +55,10 @@ class Config:
     # GenAI (Gemini) 格式专用配置
     GENAI_TIMEOUT = float(os.getenv('GENAI_TIMEOUT', '300.0'))  # Gemini 超时时间（秒）
     GENAI_MAX_RETRIES = int(os.getenv('GENAI_MAX_RETRIES', '2'))  # Gemini 最大重试次数（应用层实现）
+    # Gemini 显式上下文缓存：逐页描述的共享前缀（大纲/参考文件/规则）只上传一次，整批页面复用
+    GENAI_CONTEXT_CACHE_ENABLED = os.getenv('GENAI_CONTEXT_CACHE_ENABLED', 'false').lower() == 'true'
+    GENAI_CONTEXT_CACHE_TTL_SECONDS = int(os.getenv('GENAI_CONTEXT_CACHE_TTL_SECONDS', '900'))
+    GENAI_CONTEXT_CACHE_MIN_CHARS = int(os.getenv('GENAI_CONTEXT_CACHE_MIN_CHARS', '8000'))  # 前缀短于该值时不创建缓存
     
     # OpenAI 格式专用配置（当 AI_PROVIDER_FORMAT=openai 时使用）
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', '')  # 当 AI_PROVIDER_FORMAT=openai 时必须设置
@@ -69,6 +73,19 @@ class Config:
     # MinerU 文件解析服务配置
     MINERU_TOKEN = os.getenv('MINERU_TOKEN', '')
     MINERU_API_BASE = os.getenv('MINERU_API_BASE', 'https://mineru.net')
+    # 可编辑导出的 MinerU 结果缓存（按图片内容哈希复用 mineru_files/<extract_id>，见 services/image_editability/mineru_cache.py）
+    MINERU_CACHE_MAX_AGE_DAYS = int(os.getenv('MINERU_CACHE_MAX_AGE_DAYS', '30'))
+    MINERU_CACHE_MAX_MB = int(os.getenv('MINERU_CACHE_MAX_MB', '2048'))
+    # 可编辑导出时多页打包为一个PDF一次提交 MinerU：单个批次的页数 / 体积上限（MB）
+    MINERU_BATCH_MAX_PAGES = int(os.getenv('MINERU_BATCH_MAX_PAGES', '200'))
+    MINERU_BATCH_MAX_MB = int(os.getenv('MINERU_BATCH_MAX_MB', '150'))
+    # 解析结果轮询间隔（秒）：首次轮询按近期解析耗时安排，之后指数退避到上限
+    MINERU_POLL_MIN_INTERVAL = float(os.getenv('MINERU_POLL_MIN_INTERVAL', '1'))
+    MINERU_POLL_MAX_INTERVAL = float(os.getenv('MINERU_POLL_MAX_INTERVAL', '15'))
+    # 参考文件本地快速解析（docx/pptx/有文字层的pdf，扫描件/复杂版面仍走 MinerU）
+    LOCAL_PARSE_ENABLED = os.getenv('LOCAL_PARSE_ENABLED', 'true').lower() == 'true'
+    LOCAL_PARSE_WORKERS = int(os.getenv('LOCAL_PARSE_WORKERS', '2'))  # 同时运行的解析子进程数，0 表示在当前线程解析
+    LOCAL_PARSE_MIN_PDF_CHARS_PER_PAGE = int(os.getenv('LOCAL_PARSE_MIN_PDF_CHARS_PER_PAGE', '200'))
     
     # 图片识别模型配置
     IMAGE_CAPTION_MODEL = os.getenv('IMAGE_CAPTION_MODEL', 'gemini-3-flash-preview')
@@ -77,11 +94,72 @@ class Config:
     MAX_DESCRIPTION_WORKERS = int(os.getenv('MAX_DESCRIPTION_WORKERS', '5'))
     MAX_IMAGE_WORKERS = int(os.getenv('MAX_IMAGE_WORKERS', '8'))
     
+    # 后台任务队列配置（见 services/tasks/queue.py）
+    # 'local': Flask 进程自己执行可恢复任务；'external': 只入队，由 worker.py 进程执行
+    TASK_QUEUE_MODE = os.getenv('TASK_QUEUE_MODE', 'local')
+    TASK_LEASE_SECONDS = int(os.getenv('TASK_LEASE_SECONDS', '60'))  # 租约时长，心跳间隔为其 1/3
+    TASK_MAX_ATTEMPTS = int(os.getenv('TASK_MAX_ATTEMPTS', '3'))  # 可恢复任务最多执行次数
+    # 各调度通道并发数（见 services/tasks/scheduler.py），未列出的通道使用默认值
+    # 通道：interactive(单页生成/编辑) batch(批量生成) export(导出) parse(参考文件解析)
+    TASK_LANE_CONCURRENCY = os.getenv('TASK_LANE_CONCURRENCY', 'interactive=4,batch=2,export=1,parse=2')
+    # 通道内各项目的调度权重（项目ID=权重，逗号分隔），未列出的项目权重为 1，按 运行数/权重 轮流分配
+    TASK_PROJECT_WEIGHTS = os.getenv('TASK_PROJECT_WEIGHTS', '')
+    # 批量任务结果写库合并：每 N 个结果或每隔 M 毫秒提交一次（页面状态/版本记录/进度）
+    TASK_PROGRESS_FLUSH_EVERY = int(os.getenv('TASK_PROGRESS_FLUSH_EVERY', '10'))
+    TASK_PROGRESS_FLUSH_INTERVAL_MS = int(os.getenv('TASK_PROGRESS_FLUSH_INTERVAL_MS', '500'))
+    # 任务进度 SSE 推送的心跳间隔（秒）
+    TASK_EVENTS_KEEPALIVE_SECONDS = int(os.getenv('TASK_EVENTS_KEEPALIVE_SECONDS', '15'))
+    
+    # AI 服务调用限流（全局共享，按 provider/model 区分，见 services/ai_providers/rate_limiter.py）
+    PROVIDER_MAX_CONCURRENCY = int(os.getenv('PROVIDER_MAX_CONCURRENCY', '8'))  # 每个 provider/model 的并发上限
+    PROVIDER_RPM = int(os.getenv('PROVIDER_RPM', '0'))  # 每分钟请求数上限，0 表示不限
+    PROVIDER_LIMITS = os.getenv('PROVIDER_LIMITS', '')  # 单独覆盖，如 "gemini/gemini-3-pro-image-preview=4:20"
+    PROVIDER_LIMIT_LOCK_DIR = os.getenv('PROVIDER_LIMIT_LOCK_DIR', '')  # 设置后并发上限跨进程共享
+    # 批量生成任务使用 asyncio 事件循环代替线程池（见 services/tasks/async_runner.py）
+    ASYNC_GENERATION = os.getenv('ASYNC_GENERATION', 'false').lower() == 'true'
+    ASYNC_MAX_IN_FLIGHT = int(os.getenv('ASYNC_MAX_IN_FLIGHT', '64'))  # 单个任务同时进行中的 AI 调用上限
+    
+    # 文本生成响应缓存（按 模型+提示词+思考预算+附图摘要 哈希，见 services/response_cache.py）
+    RESPONSE_CACHE_BACKEND = os.getenv('RESPONSE_CACHE_BACKEND', 'memory')  # memory / sqlite / none
+    RESPONSE_CACHE_TTL_SECONDS = int(os.getenv('RESPONSE_CACHE_TTL_SECONDS', '3600'))
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '1000'))
+    RESPONSE_CACHE_MAX_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+    RESPONSE_CACHE_PATH = os.getenv('RESPONSE_CACHE_PATH', os.path.join(BASE_DIR, 'instance', 'response_cache.db'))
+    
+    # 参考文件图片描述缓存（按图片内容 sha256 + 感知哈希，跨参考文件/项目共享，见 services/caption_cache.py）
+    CAPTION_CACHE_ENABLED = os.getenv('CAPTION_CACHE_ENABLED', 'true').lower() == 'true'
+    CAPTION_CACHE_PATH = os.getenv('CAPTION_CACHE_PATH', os.path.join(BASE_DIR, 'instance', 'caption_cache.db'))
+    CAPTION_CACHE_MAX_ENTRIES = int(os.getenv('CAPTION_CACHE_MAX_ENTRIES', '20000'))
+    CAPTION_CACHE_MAX_DISTANCE = int(os.getenv('CAPTION_CACHE_MAX_DISTANCE', '4'))  # 感知哈希汉明距离阈值（64 位）
+    
+    # 逐页描述只携带与本页大纲相关的参考文件片段（BM25 本地检索，见 services/reference_index.py）
+    REFERENCE_CONTEXT_FULL_MAX_CHARS = int(os.getenv('REFERENCE_CONTEXT_FULL_MAX_CHARS', '12000'))  # 参考文件总字数不超过该值时仍传全文
+    REFERENCE_CONTEXT_TOP_K = int(os.getenv('REFERENCE_CONTEXT_TOP_K', '8'))
+    REFERENCE_CHUNK_CHARS = int(os.getenv('REFERENCE_CHUNK_CHARS', '1200'))
+    
     # 图片生成配置
     DEFAULT_ASPECT_RATIO = "16:9"
     DEFAULT_RESOLUTION = "2K"
     # 参考图压缩（仅压缩，不缩放）
     REF_IMAGE_JPEG_QUALITY = int(os.getenv('REF_IMAGE_JPEG_QUALITY', '80'))
+    # 参考图缓存（解码结果 + 各 provider 编码结果，按 路径/mtime/大小 失效）
+    REF_IMAGE_CACHE_MAX_BYTES = int(os.getenv('REF_IMAGE_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+    # 参考图最长边（像素），0 表示不缩放
+    REF_IMAGE_MAX_SIDE = int(os.getenv('REF_IMAGE_MAX_SIDE', '0'))
+    
+    # 流式导出（?stream=true）：生成文件在内存中最多保留的大小（MB），超出后落盘到临时文件
+    EXPORT_SPOOL_MAX_MEMORY_MB = int(os.getenv('EXPORT_SPOOL_MAX_MEMORY_MB', '32'))
+    # 导出文件缓存（按 当前图片版本 + 筛选参数 复用 exports/ 中已生成的 PPTX/PDF/ZIP，见 services/export_cache.py）
+    EXPORT_CACHE_ENABLED = os.getenv('EXPORT_CACHE_ENABLED', 'true').lower() == 'true'
+    EXPORT_CACHE_MAX_MB = int(os.getenv('EXPORT_CACHE_MAX_MB', '1024'))  # 每个项目 exports/ 目录的磁盘上限
+    EXPORT_CACHE_MAX_ENTRIES = int(os.getenv('EXPORT_CACHE_MAX_ENTRIES', '20'))  # 每个项目保留的缓存导出数
+    # 可编辑PPTX导出：复用图片内容与导出设置都未变的页面的版面分析结果（见 services/image_editability/analysis_cache.py）
+    EXPORT_ANALYSIS_CACHE_ENABLED = os.getenv('EXPORT_ANALYSIS_CACHE_ENABLED', 'true').lower() == 'true'
+    # 版面分析缓存（及其引用的 editable_images/<image_id>/ 目录）的保留天数 / 总容量上限（MB）
+    EXPORT_ANALYSIS_CACHE_MAX_AGE_DAYS = int(os.getenv('EXPORT_ANALYSIS_CACHE_MAX_AGE_DAYS', '30'))
+    EXPORT_ANALYSIS_CACHE_MAX_MB = int(os.getenv('EXPORT_ANALYSIS_CACHE_MAX_MB', '2048'))
+    # 可编辑PPTX导出：元素裁剪图在分析时即裁剪并保存在内存中（默认只记录裁剪区域，需要时再从页面裁剪，嵌入时才写PNG）
+    EDITABLE_ELEMENT_IMAGES_IN_MEMORY = os.getenv('EDITABLE_ELEMENT_IMAGES_IN_MEMORY', 'false').lower() == 'true'
     
     # 日志配置
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
@@ -7,19 +7,187 @@ import io
 import zipfile
 from datetime import datetime
 
-from flask import Blueprint, request, current_app
-from models import db, Project, Page, Task, XhsCardImageVersion
+from flask import Blueprint, request, current_app, send_file
+from models import db, Project, Page, PageImageVersion, Task, XhsCardImageVersion
 from utils import (
     error_response, not_found, bad_request, success_response,
     parse_page_ids_from_query, parse_page_ids_from_body, get_filtered_pages
 )
 from services import ExportService, FileService
 from services.ai_service_manager import get_ai_service
+from services.export_cache import ExportCache, image_token
+from services.export_stream import existing_image_paths, export_etag
 
 logger = logging.getLogger(__name__)
 
 export_bp = Blueprint('export', __name__, url_prefix='/api/projects')
 
+EXPORT_MIMETYPES = {
+    'pptx': 'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+    'pdf': 'application/pdf',
+}
+
+
+def _wants_stream() -> bool:
+    return request.args.get('stream', '').lower() in ('1', 'true', 'yes')
+
+
+def _stream_export(kind: str, image_paths, filename: str):
+    """
+    Build the export into a spooled temp file and stream it as an attachment.
+
+    The output is reproducible for unchanged images, so the ETag is derived from
+    the input files and Range / If-Range requests (resumed downloads) work.
+    """
+    image_paths = existing_image_paths(image_paths, f'{kind.upper()} export')
+    if not image_paths:
+        return bad_request("No generated images found for project")
+
+    max_memory = current_app.config.get('EXPORT_SPOOL_MAX_MEMORY_MB', 32) * 1024 * 1024
+    spooled = ExportService.spool_export(kind, image_paths, max_memory=max_memory)
+    spooled.seek(0, os.SEEK_END)
+    size = spooled.tell()
+    spooled.seek(0)
+
+    response = send_file(
+        spooled,
+        mimetype=EXPORT_MIMETYPES[kind],
+        as_attachment=True,
+        download_name=filename,
+        etag=export_etag(kind, image_paths),
+        conditional=False,
+    )
+    # send_file only knows the size of real paths / BytesIO; set it so Range requests work
+    response.content_length = size
+    response.call_on_close(spooled.close)
+    return response.make_conditional(request.environ, accept_ranges=True, complete_length=size)
+
+
+def _get_export_cache(exports_dir):
+    """Export artifact cache for a project's exports dir (None when disabled)"""
+    config = current_app.config
+    if not config.get('EXPORT_CACHE_ENABLED', True):
+        return None
+    return ExportCache(
+        exports_dir,
+        max_bytes=config.get('EXPORT_CACHE_MAX_MB', 1024) * 1024 * 1024,
+        max_entries=config.get('EXPORT_CACHE_MAX_ENTRIES', 20),
+    )
+
+
+def _page_image_tokens(pages, image_paths):
+    """Cache tokens for exported pages (current PageImageVersion id per page)"""
+    current_versions = dict(
+        db.session.query(PageImageVersion.page_id, PageImageVersion.id)
+        .filter(PageImageVersion.page_id.in_([page.id for page in pages]),
+                PageImageVersion.is_current.is_(True))
+        .all()
+    )
+    pages_with_images = [page for page in pages if page.generated_image_path]
+    return [image_token(current_versions.get(page.id), path) for page, path in zip(pages_with_images, image_paths)]
+
+
+def _write_export(output_path: str, write):
+    """Write via a hidden temp file and rename, so a download never sees a half-written file"""
+    directory, filename = os.path.split(output_path)
+    tmp_path = os.path.join(directory, f".{filename}.{os.getpid()}.tmp")
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _export_download_response(project_id: str, filename: str, message: str, cached: bool):
+    download_path = f"/files/{project_id}/exports/{filename}"
+    base_url = request.url_root.rstrip("/")
+    return success_response(
+        data={
+            "download_url": download_path,
+            "download_url_absolute": f"{base_url}{download_path}",
+            "cached": cached,
+        },
+        message=message
+    )
+
+
+def _export_deck(project_id: str, kind: str):
+    """Shared body of the PPTX / PDF export endpoints"""
+    project = Project.query.get(project_id)
+
+    if not project:
+        return not_found('Project')
+
+    # Get page_ids from query params and fetch filtered pages
+    selected_page_ids = parse_page_ids_from_query(request)
+    logger.debug(f"[export_{kind}] selected_page_ids: {selected_page_ids}")
+
+    pages = get_filtered_pages(project_id, selected_page_ids if selected_page_ids else None)
+    logger.debug(f"[export_{kind}] Exporting {len(pages)} pages")
+
+    if not pages:
+        return bad_request("No pages found for project")
+
+    # Get image paths
+    file_service = FileService(current_app.config['UPLOAD_FOLDER'])
+
+    image_paths = []
+    for page in pages:
+        if page.generated_image_path:
+            abs_path = file_service.get_absolute_path(page.generated_image_path)
+            image_paths.append(abs_path)
+
+    if not image_paths:
+        return bad_request("No generated images found for project")
+
+    # Determine export directory and filename
+    exports_dir = file_service._get_exports_dir(project_id)
+
+    # Get filename from query params or use default
+    filename = request.args.get('filename', f'presentation_{project_id}.{kind}')
+    if not filename.endswith(f'.{kind}'):
+        filename += f'.{kind}'
+
+    # 导出缓存：页面当前图片版本与筛选参数都没变时直接复用上次的文件
+    cache = _get_export_cache(exports_dir)
+    cache_key = None
+    cached_filename = None
+    if cache is not None:
+        cache_key = ExportCache.make_key(kind, _page_image_tokens(pages, image_paths), {
+            'page_ids': selected_page_ids or None,
+            'filename': filename,
+        })
+        cached_filename = cache.get(cache_key)
+
+    if _wants_stream():
+        if cached_filename:
+            return send_file(
+                os.path.join(exports_dir, cached_filename),
+                mimetype=EXPORT_MIMETYPES[kind],
+                as_attachment=True,
+                download_name=filename,
+                conditional=True,
+            )
+        return _stream_export(kind, image_paths, filename)
+
+    message = f"Export {kind.upper()} task created"
+    if cached_filename:
+        logger.info(f"[export_{kind}] Reusing cached export {cached_filename}")
+        return _export_download_response(project_id, cached_filename, message, cached=True)
+
+    output_path = os.path.join(exports_dir, filename)
+
+    # Generate file on disk
+    if kind == 'pptx':
+        _write_export(output_path, lambda path: ExportService.create_pptx_from_images(image_paths, output_file=path))
+    else:
+        _write_export(output_path, lambda path: ExportService.create_pdf_from_images(image_paths, output_file=path))
+    if cache is not None:
+        cache.put(cache_key, filename)
+
+    return _export_download_response(project_id, filename, message, cached=False)
+
 
 @export_bp.route('/<project_id>/export/pptx', methods=['GET'])
 def export_pptx(project_id):
@@ -29,72 +197,21 @@ def export_pptx(project_id):
     Query params:
         - filename: optional custom filename
         - page_ids: optional comma-separated page IDs to export (if not provided, exports all pages)
+        - stream: optional, "true" streams the file as the response (supports Range)
     
     Returns:
-        JSON with download URL, e.g.
+        The file itself when stream=true, otherwise JSON with download URL, e.g.
         {
             "success": true,
             "data": {
                 "download_url": "/files/{project_id}/exports/xxx.pptx",
-                "download_url_absolute": "http://host:port/files/{project_id}/exports/xxx.pptx"
+                "download_url_absolute": "http://host:port/files/{project_id}/exports/xxx.pptx",
+                "cached": false  // true when an unchanged earlier export was reused
             }
         }
     """
     try:
-        project = Project.query.get(project_id)
-        
-        if not project:
-            return not_found('Project')
-        
-        # Get page_ids from query params and fetch filtered pages
-        selected_page_ids = parse_page_ids_from_query(request)
-        logger.debug(f"[export_pptx] selected_page_ids: {selected_page_ids}")
-        
-        pages = get_filtered_pages(project_id, selected_page_ids if selected_page_ids else None)
-        logger.debug(f"[export_pptx] Exporting {len(pages)} pages")
-        
-        if not pages:
-            return bad_request("No pages found for project")
-        
-        # Get image paths
-        file_service = FileService(current_app.config['UPLOAD_FOLDER'])
-        
-        image_paths = []
-        for page in pages:
-            if page.generated_image_path:
-                abs_path = file_service.get_absolute_path(page.generated_image_path)
-                image_paths.append(abs_path)
-        
-        if not image_paths:
-            return bad_request("No generated images found for project")
-        
-        # Determine export directory and filename
-        file_service = FileService(current_app.config['UPLOAD_FOLDER'])
-        exports_dir = file_service._get_exports_dir(project_id)
-        
-        # Get filename from query params or use default
-        filename = request.args.get('filename', f'presentation_{project_id}.pptx')
-        if not filename.endswith('.pptx'):
-            filename += '.pptx'
-
-        output_path = os.path.join(exports_dir, filename)
-
-        # Generate PPTX file on disk
-        ExportService.create_pptx_from_images(image_paths, output_file=output_path)
-
-        # Build download URLs
-        download_path = f"/files/{project_id}/exports/{filename}"
-        base_url = request.url_root.rstrip("/")
-        download_url_absolute = f"{base_url}{download_path}"
-
-        return success_response(
-            data={
-                "download_url": download_path,
-                "download_url_absolute": download_url_absolute,
-            },
-            message="Export PPTX task created"
-        )
-    
+        return _export_deck(project_id, 'pptx')
     except Exception as e:
         return error_response('SERVER_ERROR', str(e), 500)
 
@@ -107,68 +224,21 @@ def export_pdf(project_id):
     Query params:
         - filename: optional custom filename
         - page_ids: optional comma-separated page IDs to export (if not provided, exports all pages)
+        - stream: optional, "true" streams the file as the response (supports Range)
     
     Returns:
-        JSON with download URL, e.g.
+        The file itself when stream=true, otherwise JSON with download URL, e.g.
         {
             "success": true,
             "data": {
                 "download_url": "/files/{project_id}/exports/xxx.pdf",
-                "download_url_absolute": "http://host:port/files/{project_id}/exports/xxx.pdf"
+                "download_url_absolute": "http://host:port/files/{project_id}/exports/xxx.pdf",
+                "cached": false  // true when an unchanged earlier export was reused
             }
         }
     """
     try:
-        project = Project.query.get(project_id)
-        
-        if not project:
-            return not_found('Project')
-        
-        # Get page_ids from query params and fetch filtered pages
-        selected_page_ids = parse_page_ids_from_query(request)
-        pages = get_filtered_pages(project_id, selected_page_ids if selected_page_ids else None)
-        
-        if not pages:
-            return bad_request("No pages found for project")
-        
-        # Get image paths
-        file_service = FileService(current_app.config['UPLOAD_FOLDER'])
-        
-        image_paths = []
-        for page in pages:
-            if page.generated_image_path:
-                abs_path = file_service.get_absolute_path(page.generated_image_path)
-                image_paths.append(abs_path)
-        
-        if not image_paths:
-            return bad_request("No generated images found for project")
-        
-        # Determine export directory and filename
-        exports_dir = file_service._get_exports_dir(project_id)
-
-        # Get filename from query params or use default
-        filename = request.args.get('filename', f'presentation_{project_id}.pdf')
-        if not filename.endswith('.pdf'):
-            filename += '.pdf'
-
-        output_path = os.path.join(exports_dir, filename)
-
-        # Generate PDF file on disk
-        ExportService.create_pdf_from_images(image_paths, output_file=output_path)
-
-        # Build download URLs
-        download_path = f"/files/{project_id}/exports/{filename}"
-        base_url = request.url_root.rstrip("/")
-        download_url_absolute = f"{base_url}{download_path}"
-
-        return success_response(
-            data={
-                "download_url": download_path,
-                "download_url_absolute": download_url_absolute,
-            },
-            message="Export PDF task created"
-        )
-    
+        return _export_deck(project_id, 'pdf')
     except Exception as e:
         return error_response('SERVER_ERROR', str(e), 500)
 
@@ -261,14 +331,7 @@ def export_editable_pptx(project_id):
         
         logger.info(f"Created export task {task.id} for project {project_id} (recursive analysis: depth={max_depth}, workers={max_workers})")
         
-        # Get services
-        from services.file_service import FileService
-        from services.task_manager import task_manager, export_editable_pptx_with_recursive_analysis_task
-        
-        file_service = FileService(current_app.config['UPLOAD_FOLDER'])
-        
-        # Get Flask app instance for background task
-        app = current_app._get_current_object()
+        from services.task_manager import task_manager
         
         # 读取项目的导出设置
         export_extractor_method = project.export_extractor_method or 'hybrid'
@@ -276,19 +339,16 @@ def export_editable_pptx(project_id):
         logger.info(f"Export settings: extractor={export_extractor_method}, inpaint={export_inpaint_method}")
         
         # 使用递归分析任务（不需要 ai_service，使用 ImageEditabilityService）
-        task_manager.submit_task(
-            task.id,
-            export_editable_pptx_with_recursive_analysis_task,
-            project_id=project_id,
-            filename=filename,
-            file_service=file_service,
-            page_ids=selected_page_ids if selected_page_ids else None,
-            max_depth=max_depth,
-            max_workers=max_workers,
-            export_extractor_method=export_extractor_method,
-            export_inpaint_method=export_inpaint_method,
-            app=app
-        )
+        # 以可恢复任务提交：进程重启后由存活的 worker 重新执行
+        task_manager.submit_durable_task(task.id, {
+            'project_id': project_id,
+            'filename': filename,
+            'page_ids': selected_page_ids if selected_page_ids else None,
+            'max_depth': max_depth,
+            'max_workers': max_workers,
+            'export_extractor_method': export_extractor_method,
+            'export_inpaint_method': export_inpaint_method,
+        })
         
         logger.info(f"Submitted recursive export task {task.id} to task manager")
         
@@ -349,6 +409,7 @@ def export_xhs_zip(project_id):
         )
 
         images_to_pack = []  # (zip_name, abs_path)
+        image_tokens = []
         for v in versions:
             if not v or not v.material:
                 continue
@@ -358,8 +419,10 @@ def export_xhs_zip(project_id):
             if not os.path.exists(abs_path):
                 continue
             images_to_pack.append((f"{v.index + 1:02d}.png", abs_path))
+            image_tokens.append(image_token(v.id, abs_path))
 
         if not images_to_pack:
+            image_tokens = []
             pages = Page.query.filter_by(project_id=project_id).order_by(Page.order_index.asc()).all()
             for i, p in enumerate(pages):
                 if not p.generated_image_path:
@@ -370,25 +433,32 @@ def export_xhs_zip(project_id):
                 if not os.path.exists(abs_path):
                     continue
                 images_to_pack.append((f"{i + 1:02d}.png", abs_path))
+                image_tokens.append(image_token(None, abs_path))
 
         if not images_to_pack:
             return bad_request("No generated xhs images found for project")
 
-        with zipfile.ZipFile(output_path, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
-            for zip_name, abs_path in images_to_pack:
-                zf.write(abs_path, arcname=zip_name)
+        # 导出缓存：当前卡片版本与所选序号都没变时复用上次的 ZIP
+        cache = _get_export_cache(exports_dir)
+        cache_key = None
+        if cache is not None:
+            cache_key = ExportCache.make_key('xhs', [name for name, _ in images_to_pack] + image_tokens,
+                                             {'indices': selected_indices})
+            cached_filename = cache.get(cache_key)
+            if cached_filename:
+                logger.info(f"[export_xhs] Reusing cached export {cached_filename}")
+                return _export_download_response(project_id, cached_filename, "Export XHS ZIP created", cached=True)
 
-        download_path = f"/files/{project_id}/exports/{filename}"
-        base_url = request.url_root.rstrip("/")
-        download_url_absolute = f"{base_url}{download_path}"
+        def write_zip(path):
+            with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+                for zip_name, abs_path in images_to_pack:
+                    zf.write(abs_path, arcname=zip_name)
 
-        return success_response(
-            data={
-                "download_url": download_path,
-                "download_url_absolute": download_url_absolute,
-            },
-            message="Export XHS ZIP created"
-        )
+        _write_export(output_path, write_zip)
+        if cache is not None:
+            cache.put(cache_key, filename)
+
+        return _export_download_response(project_id, filename, "Export XHS ZIP created", cached=False)
     except Exception as e:
         logger.exception("Error exporting XHS ZIP")
         return error_response('SERVER_ERROR', str(e), 500)
@@ -6,7 +6,8 @@ from flask import Blueprint, request, current_app
 from models import db, Project, Page, PageImageVersion, Task
 from utils import success_response, error_response, not_found, bad_request
 from services import FileService, ProjectContext
-from services.ai_service_manager import get_ai_service, get_cached_refined_template_style
+from services.ai_service_manager import get_ai_service
+from services.response_cache import bypass_response_cache
 from services.task_manager import task_manager, generate_single_page_image_task, edit_page_image_task
 from datetime import datetime
 from pathlib import Path
@@ -323,15 +324,17 @@ def generate_page_description(project_id, page_id):
         total_pages = Page.query.filter_by(project_id=project_id).count()
         from services.task_manager import infer_page_type
         
-        desc_text = ai_service.generate_page_description(
-            project_context,
-            outline,
-            page_data,
-            page.order_index + 1,
-            language=language,
-            page_type=infer_page_type(page, total_pages),
-            extra_requirements=extra_requirements
-        )
+        # force_regenerate：跳过响应缓存，强制重新调用模型
+        with bypass_response_cache(force_regenerate):
+            desc_text = ai_service.generate_page_description(
+                project_context,
+                outline,
+                page_data,
+                page.order_index + 1,
+                language=language,
+                page_type=infer_page_type(page, total_pages),
+                extra_requirements=extra_requirements
+            )
         
         # Save description
         desc_content = {
@@ -541,20 +544,13 @@ def generate_page_image(project_id, page_id):
                 db.session.commit()
             else:
                 # 2) 已有风格描述：不覆盖；仅在“批量开始的首次请求”做一次整理/补全，并缓存复用（保证风格统一）
-                effective_template_style = get_cached_refined_template_style(
-                    project_id=project_id,
+                effective_template_style = ai_service.refine_template_style(
+                    project_context=project_context,
                     base_style=effective_template_style,
                     outline_text=outline_text,
-                    extra_requirements=project.extra_requirements or "",
-                    language=language or "",
-                    generate_fn=lambda: ai_service.generate_template_style(
-                        project_context=project_context,
-                        outline_text=outline_text,
-                        extra_requirements=project.extra_requirements,
-                        existing_template_style=effective_template_style,
-                        language=language
-                    )
-                ).strip()
+                    extra_requirements=project.extra_requirements,
+                    language=language
+                )
 
         # 合并额外要求和风格描述
         combined_requirements = project.extra_requirements or ""
@@ -7,7 +7,7 @@ import traceback
 from datetime import datetime
 from pathlib import Path
 
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 from sqlalchemy import desc
 from sqlalchemy.orm import joinedload
 from werkzeug.exceptions import BadRequest
@@ -15,11 +15,12 @@ from werkzeug.exceptions import BadRequest
 from models import db, Project, Page, Task, ReferenceFile, Material, XhsCardImageVersion
 from services import ProjectContext
 from services.project_service import ProjectService
-from services.ai_service_manager import get_ai_service, get_cached_refined_template_style
+from services.ai_service_manager import get_ai_service
+from services.response_cache import bypass_response_cache
 from services.task_manager import (
     task_manager,
+    task_events,
     generate_descriptions_task,
-    generate_images_task,
     generate_infographic_task,
     generate_xhs_task,
     generate_xhs_single_card_task,
@@ -194,7 +195,8 @@ def generate_outline(project_id):
     Request body (optional):
     {
         "idea_prompt": "...",  # for idea type
-        "language": "zh"  # output language: zh, en, ja, auto
+        "language": "zh",  # output language: zh, en, ja, auto
+        "force_regenerate": false  # skip the response cache (regenerate with unchanged inputs)
     }
     """
     try:
@@ -209,6 +211,7 @@ def generate_outline(project_id):
         # Get request data and language parameter
         data = request.get_json() or {}
         language = data.get('language', current_app.config.get('OUTPUT_LANGUAGE', 'zh'))
+        force_regenerate = bool(data.get('force_regenerate', False))
         page_count = data.get('page_count')
         if page_count is not None:
             try:
@@ -235,7 +238,8 @@ def generate_outline(project_id):
             
             # Create project context and parse outline text into structured format
             project_context = ProjectContext(project, reference_files_content)
-            outline = ai_service.parse_outline_text(project_context, language=language)
+            with bypass_response_cache(force_regenerate):
+                outline = ai_service.parse_outline_text(project_context, language=language)
         elif project.creation_type == 'descriptions':
             # 从描述生成：这个类型应该使用专门的端点
             return bad_request("Use /generate/from-description endpoint for descriptions type")
@@ -258,12 +262,13 @@ def generate_outline(project_id):
             # If the project has image attachments (materials asset / image reference files),
             # pass them to the LLM directly so it can "see" the images.
             image_paths = ProjectService.collect_project_outline_image_attachments(project_id, max_images=10)
-            if image_paths:
-                from services.prompts import get_outline_generation_prompt
-                prompt = get_outline_generation_prompt(project_context, language, page_count)
-                outline = ai_service.generate_json_with_images(prompt, image_paths, thinking_budget=1000)
-            else:
-                outline = ai_service.generate_outline(project_context, language=language, page_count=page_count)
+            with bypass_response_cache(force_regenerate):
+                if image_paths:
+                    from services.prompts import get_outline_generation_prompt
+                    prompt = get_outline_generation_prompt(project_context, language, page_count)
+                    outline = ai_service.generate_json_with_images(prompt, image_paths, thinking_budget=1000)
+                else:
+                    outline = ai_service.generate_outline(project_context, language=language, page_count=page_count)
         
         # Flatten outline to pages
         pages_data = ai_service.flatten_outline(outline)
@@ -435,7 +440,8 @@ def generate_descriptions(project_id):
     Request body:
     {
         "max_workers": 5,
-        "language": "zh"  # output language: zh, en, ja, auto
+        "language": "zh",  # output language: zh, en, ja, auto
+        "force_regenerate": false  # skip the response cache (regenerate with unchanged inputs)
     }
     """
     try:
@@ -499,7 +505,8 @@ def generate_descriptions(project_id):
             outline,
             max_workers,
             app,
-            language
+            language,
+            use_cache=not data.get('force_regenerate', False)
         )
         
         # Update project status
@@ -518,6 +525,88 @@ def generate_descriptions(project_id):
         return error_response('SERVER_ERROR', str(e), 500)
 
 
+def _resolve_use_template(project, data: dict, file_service):
+    """
+    use_template 默认“自动”：未显式传时根据是否有模板资源决定
+    Returns (use_template, has_template_resource)
+    """
+    template_variants = project.get_template_variants() if hasattr(project, 'get_template_variants') else {}
+    has_variant_template = any(bool(v) for v in template_variants.values())
+    has_template_image = bool(file_service.get_template_path(project.id))
+    has_template_resource = has_template_image or has_variant_template
+
+    use_template_raw = data.get('use_template')
+    if use_template_raw is None:
+        use_template = has_template_resource
+    else:
+        use_template = use_template_raw
+        if isinstance(use_template, str):
+            use_template = use_template.lower() == 'true'
+        else:
+            use_template = bool(use_template)
+    return use_template, has_template_resource
+
+
+def _resolve_slide_aspect_ratio(project, data: dict) -> str:
+    """请求参数 > 项目 payload 中的比例 > 默认比例（幻灯片仅支持 16:9 / 4:3）"""
+    default_ratio = current_app.config.get('DEFAULT_ASPECT_RATIO', '16:9')
+    aspect_ratio = data.get('aspect_ratio')
+    if aspect_ratio is None:
+        try:
+            payload = json.loads(project.product_payload) if project.product_payload else {}
+        except Exception:
+            payload = {}
+        payload_ratio = (payload.get('aspect_ratio') or '').strip() if isinstance(payload, dict) else ''
+        if payload_ratio and payload_ratio != 'auto':
+            aspect_ratio = payload_ratio
+    aspect_ratio = (str(aspect_ratio).strip() if aspect_ratio else default_ratio)
+    if aspect_ratio not in ['16:9', '4:3']:
+        aspect_ratio = default_ratio
+    return aspect_ratio
+
+
+def _build_image_requirements(project, outline, no_template_mode: bool, language, ai_service):
+    """
+    额外要求 + 风格描述（无模板时准备“有效风格描述”：不覆盖用户手写风格，但仍可做智能整理/补全）
+    Returns the combined requirements, or None when empty
+    """
+    effective_template_style = (project.template_style or "").strip()
+
+    if no_template_mode:
+        reference_files_content = ProjectService.get_project_reference_files_content(project.id)
+        project_context = ProjectContext(project, reference_files_content)
+        outline_text = project.outline_text or ai_service.generate_outline_text(outline)
+
+        if not effective_template_style:
+            # 1) 没有风格描述：自动生成并写入（生成并锁定）
+            template_style = ai_service.generate_template_style(
+                project_context=project_context,
+                outline_text=outline_text,
+                extra_requirements=project.extra_requirements,
+                existing_template_style=None,
+                language=language
+            )
+            effective_template_style = (template_style or "").strip()
+            project.template_style = effective_template_style
+            db.session.commit()
+        else:
+            # 2) 已有风格描述：不覆盖；整理/补全结果做短期缓存，避免重复调用并保持风格一致
+            effective_template_style = ai_service.refine_template_style(
+                project_context=project_context,
+                base_style=effective_template_style,
+                outline_text=outline_text,
+                extra_requirements=project.extra_requirements,
+                language=language
+            )
+
+    # 合并额外要求和风格描述
+    combined_requirements = project.extra_requirements or ""
+    if effective_template_style:
+        style_requirement = f"\n\nppt页面风格描述：\n\n{effective_template_style}"
+        combined_requirements = combined_requirements + style_requirement
+    return combined_requirements if combined_requirements.strip() else None
+
+
 @project_bp.route('/<project_id>/generate/images', methods=['POST'])
 def generate_images(project_id):
     """
@@ -555,21 +644,7 @@ def generate_images(project_id):
         # 检查是否有模板图片或风格描述
         from services import FileService
         file_service = FileService(current_app.config['UPLOAD_FOLDER'])
-        template_variants = project.get_template_variants() if hasattr(project, 'get_template_variants') else {}
-        has_variant_template = any(bool(v) for v in template_variants.values())
-        has_template_image = bool(file_service.get_template_path(project_id))
-        has_template_resource = has_template_image or has_variant_template
-
-        # use_template 默认“自动”：未显式传时根据是否有模板资源决定
-        use_template_raw = data.get('use_template')
-        if use_template_raw is None:
-            use_template = has_template_resource
-        else:
-            use_template = use_template_raw
-            if isinstance(use_template, str):
-                use_template = use_template.lower() == 'true'
-            else:
-                use_template = bool(use_template)
+        use_template, has_template_resource = _resolve_use_template(project, data, file_service)
         
         # Reconstruct outline from pages with part structure
         outline = ProjectService.reconstruct_outline_from_pages(pages)
@@ -577,19 +652,7 @@ def generate_images(project_id):
         # 从配置中读取默认并发数，如果请求中提供了则使用请求的值
         max_workers = data.get('max_workers', current_app.config.get('MAX_IMAGE_WORKERS', 8))
         language = data.get('language', current_app.config.get('OUTPUT_LANGUAGE', 'zh'))
-        default_ratio = current_app.config.get('DEFAULT_ASPECT_RATIO', '16:9')
-        aspect_ratio = data.get('aspect_ratio')
-        if aspect_ratio is None:
-            try:
-                payload = json.loads(project.product_payload) if project.product_payload else {}
-            except Exception:
-                payload = {}
-            payload_ratio = (payload.get('aspect_ratio') or '').strip() if isinstance(payload, dict) else ''
-            if payload_ratio and payload_ratio != 'auto':
-                aspect_ratio = payload_ratio
-        aspect_ratio = (str(aspect_ratio).strip() if aspect_ratio else default_ratio)
-        if aspect_ratio not in ['16:9', '4:3']:
-            aspect_ratio = default_ratio
+        aspect_ratio = _resolve_slide_aspect_ratio(project, data)
         
         # Create task
         task = Task(
@@ -609,70 +672,22 @@ def generate_images(project_id):
         # Get singleton AI service instance
         ai_service = get_ai_service()
 
-        # 无模板时：准备“有效风格描述”（不覆盖用户手写风格，但仍可做智能整理/补全）
+        # 无模板时：准备“有效风格描述”，与额外要求合并
         no_template_mode = (not has_template_resource) or (use_template is False)
-        effective_template_style = (project.template_style or "").strip()
-
-        if no_template_mode:
-            reference_files_content = ProjectService.get_project_reference_files_content(project_id)
-            project_context = ProjectContext(project, reference_files_content)
-            outline_text = project.outline_text or ai_service.generate_outline_text(outline)
-
-            if not effective_template_style:
-                # 1) 没有风格描述：自动生成并写入（生成并锁定）
-                template_style = ai_service.generate_template_style(
-                    project_context=project_context,
-                    outline_text=outline_text,
-                    extra_requirements=project.extra_requirements,
-                    existing_template_style=None,
-                    language=language
-                )
-                effective_template_style = (template_style or "").strip()
-                project.template_style = effective_template_style
-                db.session.commit()
-            else:
-                # 2) 已有风格描述：不覆盖；整理/补全结果做短期缓存，避免重复调用并保持风格一致
-                effective_template_style = get_cached_refined_template_style(
-                    project_id=project_id,
-                    base_style=effective_template_style,
-                    outline_text=outline_text,
-                    extra_requirements=project.extra_requirements or "",
-                    language=language or "",
-                    generate_fn=lambda: ai_service.generate_template_style(
-                        project_context=project_context,
-                        outline_text=outline_text,
-                        extra_requirements=project.extra_requirements,
-                        existing_template_style=effective_template_style,
-                        language=language
-                    )
-                ).strip()
-        
-        # 合并额外要求和风格描述
-        combined_requirements = project.extra_requirements or ""
-        if effective_template_style:
-            style_requirement = f"\n\nppt页面风格描述：\n\n{effective_template_style}"
-            combined_requirements = combined_requirements + style_requirement
-        
-        # Get app instance for background task
-        app = current_app._get_current_object()
-        
-        # Submit background task
-        task_manager.submit_task(
-            task.id,
-            generate_images_task,
-            project_id,
-            ai_service,
-            file_service,
-            outline,
-            use_template,
-            max_workers,
-            aspect_ratio,
-            current_app.config['DEFAULT_RESOLUTION'],
-            app,
-            combined_requirements if combined_requirements.strip() else None,
-            language,
-            selected_page_ids if selected_page_ids else None
-        )
+        combined_requirements = _build_image_requirements(project, outline, no_template_mode, language, ai_service)
+        
+        # Submit durable background task (resumed page-by-page after a restart)
+        task_manager.submit_durable_task(task.id, {
+            'project_id': project_id,
+            'outline': outline,
+            'use_template': use_template,
+            'max_workers': max_workers,
+            'aspect_ratio': aspect_ratio,
+            'resolution': current_app.config['DEFAULT_RESOLUTION'],
+            'extra_requirements': combined_requirements,
+            'language': language,
+            'page_ids': selected_page_ids if selected_page_ids else None,
+        })
         
         # Update project status
         project.status = 'GENERATING_IMAGES'
@@ -690,6 +705,104 @@ def generate_images(project_id):
         return error_response('SERVER_ERROR', str(e), 500)
 
 
+@project_bp.route('/<project_id>/generate/deck', methods=['POST'])
+def generate_deck(project_id):
+    """
+    POST /api/projects/{project_id}/generate/deck - Generate descriptions and images as one pipeline
+
+    Each page's image starts as soon as its description is ready (instead of waiting for
+    all descriptions). Progress: {"total", "completed", "failed", "stages": {"descriptions": ..., "images": ...}}
+
+    Request body:
+    {
+        "max_description_workers": 5,  # optional, text stage concurrency
+        "max_image_workers": 8,        # optional, image stage concurrency
+        "use_template": true,          # optional (default: auto)
+        "aspect_ratio": "16:9",        # optional
+        "language": "zh",              # output language: zh, en, ja, auto
+        "force_regenerate": false      # regenerate existing descriptions, skipping the response cache
+    }
+
+    Pages that already have a description skip the description stage unless force_regenerate is set.
+    """
+    try:
+        project = Project.query.get(project_id)
+
+        if not project:
+            return not_found('Project')
+
+        if project.status not in ['OUTLINE_GENERATED', 'DRAFT', 'DESCRIPTIONS_GENERATED', 'COMPLETED']:
+            return bad_request("Project must have outline generated first")
+
+        # IMPORTANT: Expire cached objects to ensure fresh data
+        db.session.expire_all()
+
+        pages = Page.query.filter_by(project_id=project_id).order_by(Page.order_index).all()
+        if not pages:
+            return bad_request("No pages found for project")
+
+        data = request.get_json() or {}
+
+        from services import FileService
+        file_service = FileService(current_app.config['UPLOAD_FOLDER'])
+        use_template, has_template_resource = _resolve_use_template(project, data, file_service)
+
+        # Reconstruct outline from pages with part structure
+        outline = ProjectService.reconstruct_outline_from_pages(pages)
+
+        max_description_workers = data.get('max_description_workers',
+                                           current_app.config.get('MAX_DESCRIPTION_WORKERS', 5))
+        max_image_workers = data.get('max_image_workers', current_app.config.get('MAX_IMAGE_WORKERS', 8))
+        language = data.get('language', current_app.config.get('OUTPUT_LANGUAGE', 'zh'))
+        aspect_ratio = _resolve_slide_aspect_ratio(project, data)
+
+        task = Task(
+            project_id=project_id,
+            task_type='GENERATE_DECK',
+            status='PENDING'
+        )
+        task.set_progress({
+            'total': len(pages),
+            'completed': 0,
+            'failed': 0
+        })
+        db.session.add(task)
+        db.session.commit()
+
+        ai_service = get_ai_service()
+        no_template_mode = (not has_template_resource) or (use_template is False)
+        combined_requirements = _build_image_requirements(project, outline, no_template_mode, language, ai_service)
+
+        # Submit durable background task (resumed page-by-page after a restart)
+        task_manager.submit_durable_task(task.id, {
+            'project_id': project_id,
+            'outline': outline,
+            'use_template': use_template,
+            'max_description_workers': max_description_workers,
+            'max_image_workers': max_image_workers,
+            'aspect_ratio': aspect_ratio,
+            'resolution': current_app.config['DEFAULT_RESOLUTION'],
+            'extra_requirements': combined_requirements,
+            'language': language,
+            'use_cache': not data.get('force_regenerate', False),
+            'regenerate_descriptions': bool(data.get('force_regenerate', False)),
+        })
+
+        project.status = 'GENERATING_DESCRIPTIONS'
+        db.session.commit()
+
+        return success_response({
+            'task_id': task.id,
+            'status': 'GENERATING_DESCRIPTIONS',
+            'total_pages': len(pages)
+        }, status_code=202)
+
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"generate_deck failed: {str(e)}", exc_info=True)
+        return error_response('SERVER_ERROR', str(e), 500)
+
+
 @project_bp.route('/<project_id>/generate/infographic', methods=['POST'])
 def generate_infographic(project_id):
     """
@@ -1518,6 +1631,159 @@ def get_task_status(project_id, task_id):
         return error_response('SERVER_ERROR', str(e), 500)
 
 
+TASK_TERMINAL_STATUSES = ('COMPLETED', 'FAILED', 'PARTIAL')
+# 进程内没有该任务的事件时（例如任务在 worker.py 中执行），回退为按此间隔读库
+TASK_EVENTS_DB_FALLBACK_SECONDS = 3.0
+
+
+def _parse_event_id(value) -> int:
+    try:
+        return max(0, int(value))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _format_sse(event_type: str, data, event_id: int = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def _read_task_dict(project_id: str, task_id: str):
+    """Read the task row (fallback when this process has no events for it)"""
+    try:
+        task = Task.query.get(task_id)
+        if not task or task.project_id != project_id:
+            return None
+        return task.to_dict()
+    finally:
+        # 长连接期间不占用数据库连接
+        db.session.close()
+
+
+@project_bp.route('/<project_id>/tasks/<task_id>/events', methods=['GET'])
+def stream_task_events(project_id, task_id):
+    """
+    GET /api/projects/{project_id}/tasks/{task_id}/events - Task progress as Server-Sent Events
+
+    Events:
+    - task: full task status (same shape as GET .../tasks/{task_id})
+    - page: a single page finished, e.g. {"page_id": "...", "status": "COMPLETED", "image_url": "/files/..."}
+
+    Resumes after ``Last-Event-ID`` (or ``?since=``); the stream ends once the task completes or fails.
+    """
+    since = _parse_event_id(request.headers.get('Last-Event-ID') or request.args.get('since'))
+    snapshot = task_events.snapshot(task_id)
+    if snapshot is not None and snapshot['project_id'] not in (None, project_id):
+        return not_found('Task')
+    initial = None
+    if snapshot is None or since == 0:
+        initial = snapshot['data'] if snapshot else _read_task_dict(project_id, task_id)
+        if initial is None:
+            return not_found('Task')
+    if snapshot is not None and since > snapshot['id']:
+        since = 0  # 服务重启后的旧事件 ID
+    keepalive = current_app.config.get('TASK_EVENTS_KEEPALIVE_SECONDS', 15)
+
+    def _generate():
+        last_id = since
+        status = None
+        if initial is not None:
+            last_id = snapshot['id'] if snapshot else 0
+            status = initial.get('status')
+            yield _format_sse('task', initial, last_id or None)
+
+        last_fallback = initial
+        while status not in TASK_TERMINAL_STATUSES:
+            in_process = task_events.snapshot(task_id) is not None
+            timeout = keepalive if in_process else TASK_EVENTS_DB_FALLBACK_SECONDS
+            events = task_events.wait(task_id, since=last_id, timeout=timeout)
+            for event in events:
+                last_id = event['id']
+                if event['event'] == 'task':
+                    status = event['data'].get('status')
+                yield _format_sse(event['event'], event['data'], event['id'])
+            if events:
+                continue
+            if not in_process:
+                data = _read_task_dict(project_id, task_id)
+                if data is None:
+                    return
+                if data != last_fallback:
+                    last_fallback = data
+                    status = data.get('status')
+                    yield _format_sse('task', data)
+                    continue
+            yield ": keepalive\n\n"
+
+    db.session.close()
+    return Response(
+        stream_with_context(_generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@project_bp.route('/<project_id>/tasks/<task_id>/wait', methods=['GET'])
+def wait_task_events(project_id, task_id):
+    """
+    GET /api/projects/{project_id}/tasks/{task_id}/wait - Long-poll fallback for the SSE stream
+
+    Query params:
+    - since: last event id seen by the client (default 0)
+    - timeout: max seconds to wait for a new event (default 25, max 60)
+
+    Returns {"task": {...}, "events": [...], "last_event_id": n} as soon as there is an event
+    newer than ``since`` (or when the task is already finished / the timeout expires).
+    """
+    try:
+        since = _parse_event_id(request.args.get('since'))
+        try:
+            timeout = min(60.0, max(0.0, float(request.args.get('timeout', 25))))
+        except ValueError:
+            return bad_request("timeout must be a number")
+
+        snapshot = task_events.snapshot(task_id)
+        if snapshot is None:
+            # 本进程没有该任务的事件：读一次库，未结束则按回退间隔等待
+            task_data = _read_task_dict(project_id, task_id)
+            if task_data is None:
+                return not_found('Task')
+            if task_data.get('status') not in TASK_TERMINAL_STATUSES:
+                events = task_events.wait(task_id, since=since, timeout=timeout)
+                snapshot = task_events.snapshot(task_id)
+                if snapshot is None:
+                    task_data = _read_task_dict(project_id, task_id) or task_data
+                    return success_response({
+                        'task': task_data,
+                        'events': events,
+                        'last_event_id': events[-1]['id'] if events else since,
+                    })
+            else:
+                return success_response({'task': task_data, 'events': [], 'last_event_id': since})
+        elif snapshot['project_id'] not in (None, project_id):
+            return not_found('Task')
+        elif snapshot['data'].get('status') in TASK_TERMINAL_STATUSES and since >= snapshot['id']:
+            return success_response({'task': snapshot['data'], 'events': [], 'last_event_id': snapshot['id']})
+
+        if since > snapshot['id']:
+            since = 0  # 服务重启后的旧事件 ID
+        events = task_events.wait(task_id, since=since, timeout=timeout)
+        snapshot = task_events.snapshot(task_id) or snapshot
+        return success_response({
+            'task': snapshot['data'],
+            'events': events,
+            'last_event_id': events[-1]['id'] if events else since,
+        })
+
+    except Exception as e:
+        logger.error(f"wait_task_events failed: {str(e)}", exc_info=True)
+        return error_response('SERVER_ERROR', str(e), 500)
+
+
 @project_bp.route('/<project_id>/refine/outline', methods=['POST'])
 def refine_outline(project_id):
     """
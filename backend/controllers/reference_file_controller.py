@@ -11,11 +11,13 @@ from pathlib import Path
 from config import Config
 from datetime import datetime
 from urllib.parse import unquote
-import threading
 
 from models import db, ReferenceFile, Project
 from utils.response import success_response, error_response, bad_request, not_found
 from services.file_parser_service import FileParserService
+from services.reference_index import delete_file_index, reference_index_dir, save_file_index
+from services.task_manager import task_manager
+from services.tasks.scheduler import LANE_PARSE
 from services.ai_providers.ocr import create_baidu_accurate_ocr_provider
 
 logger = logging.getLogger(__name__)
@@ -86,10 +88,22 @@ def _parse_file_async(file_id: str, file_path: str, filename: str, app):
                     logger.warning(f"File parsing completed: {filename}, but {failed_image_count} images failed to generate captions")
                 else:
                     logger.info(f"File parsing completed: {filename}")
+                if parser.caption_stats['images']:
+                    logger.info(f"Image captions for {filename}: {parser.caption_stats}")
+                    reference_file.set_caption_stats(parser.caption_stats)
+                else:
+                    reference_file.set_caption_stats(None)
             
             reference_file.updated_at = datetime.utcnow()
             db.session.commit()
             
+            # Build the retrieval index once, so per-page prompts only load it
+            if reference_file.parse_status == 'completed' and markdown_content:
+                save_file_index(
+                    reference_index_dir(), file_id, markdown_content,
+                    max_chars=current_app.config.get('REFERENCE_CHUNK_CHARS', 1200)
+                )
+            
         except Exception as e:
             logger.error(f"Error in async file parsing: {str(e)}", exc_info=True)
             try:
@@ -269,6 +283,7 @@ def delete_reference_file(file_id):
                 logger.info(f"Deleted file from disk: {file_path}")
         except Exception as e:
             logger.warning(f"Failed to delete file from disk: {str(e)}")
+        delete_file_index(reference_index_dir(), file_id)
         
         # Delete from database
         db.session.delete(reference_file)
@@ -357,13 +372,14 @@ def trigger_file_parse(file_id):
         if not file_path.exists():
             return error_response('FILE_NOT_FOUND', f'File not found: {file_path}', 404)
         
-        # 启动异步解析
-        thread = threading.Thread(
-            target=_parse_file_async,
-            args=(reference_file.id, str(file_path), reference_file.filename, current_app._get_current_object())
+        # 启动异步解析（进入 parse 通道，与生成任务互不阻塞）
+        task_manager.submit_job(
+            f"parse:{reference_file.id}",
+            LANE_PARSE,
+            reference_file.project_id,
+            _parse_file_async,
+            reference_file.id, str(file_path), reference_file.filename, current_app._get_current_object()
         )
-        thread.daemon = True
-        thread.start()
         
         logger.info(f"Triggered parsing for file: {reference_file.filename} (ID: {file_id})")
         
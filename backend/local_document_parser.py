@@ -0,0 +1,291 @@
+"""
+Local fast path for reference documents (docx / pptx / text-layer pdf)
+
+MinerU is a remote pipeline (upload, queue, poll, download): tens of seconds
+even for a two-page .docx whose text could be read locally in milliseconds.
+``extract_document`` reads simple documents directly and writes the same
+output shape as a MinerU result: a markdown file whose image links point at
+``images/<sha256>.<ext>`` inside the extract directory, so FileParserService
+can rewrite them to ``/files/mineru/<extract_id>/...`` URLs and caption them
+exactly as it does for MinerU results.
+
+Documents are left to MinerU (``needs_mineru`` is set) when local extraction
+would lose content:
+    - pdf: no text layer / too little text per page (scanned), embedded
+      figures, or pdfminer not installed
+    - docx: equations, or almost no text next to pictures (pasted scans)
+    - pptx: almost no text next to pictures (slides exported as images)
+
+The module only depends on the standard library, python-pptx and (for pdf)
+pdfminer.six, and lives outside the ``services`` package (whose __init__ pulls
+in AIService / ExportService), so FileParserService runs it in a fresh
+interpreter without the Flask app:
+
+    python -m local_document_parser '<json [file_path, file_ext, output_dir, min_pdf_chars_per_page]>'
+
+prints the result dict as JSON on the last stdout line.
+"""
+import hashlib
+import json
+import logging
+import os
+import posixpath
+import re
+import sys
+import zipfile
+from typing import Any, Dict, List
+from xml.etree import ElementTree
+
+logger = logging.getLogger(__name__)
+
+LOCAL_PARSE_EXTENSIONS = ('docx', 'pptx', 'pdf')
+
+# 少于该字数且含图片时认为是扫描件/截图，交给 MinerU
+MIN_TEXT_CHARS_WITH_PICTURES = 50
+
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_R = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_A = '{http://schemas.openxmlformats.org/drawingml/2006/main}'
+_M = '{http://schemas.openxmlformats.org/officeDocument/2006/math}'
+_PKG_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+_HEADING_STYLE = re.compile(r'^(?:heading|标题)\s*(\d)$', re.IGNORECASE)
+
+
+def extract_document(file_path: str, file_ext: str, output_dir: str,
+                     min_pdf_chars_per_page: int = 200) -> Dict[str, Any]:
+    """
+    Extract markdown (+ images) from a document into output_dir.
+
+    Returns:
+        Dict with keys:
+            - markdown: markdown text (None when needs_mineru is set)
+            - needs_mineru: reason string if the document should go to MinerU, else None
+            - pages / chars / images: simple statistics for logging
+    """
+    file_ext = file_ext.lower()
+    if file_ext == 'docx':
+        return _extract_docx(file_path, output_dir)
+    if file_ext == 'pptx':
+        return _extract_pptx(file_path, output_dir)
+    if file_ext == 'pdf':
+        return _extract_pdf(file_path, output_dir, min_pdf_chars_per_page)
+    return _needs_mineru(f"unsupported type: {file_ext}")
+
+
+def _needs_mineru(reason: str, **stats) -> Dict[str, Any]:
+    return {'markdown': None, 'needs_mineru': reason, 'pages': 0, 'chars': 0, 'images': 0, **stats}
+
+
+def _result(blocks: List[str], pages: int, images: int, output_dir: str,
+            boilerplate_chars: int = 0) -> Dict[str, Any]:
+    """Join blocks into full.md; boilerplate_chars (e.g. generated slide headings) don't count as content"""
+    markdown = '\n\n'.join(block for block in blocks if block.strip()) + '\n'
+    chars = len(re.sub(r'!\[[^\]]*\]\([^)]*\)|\s', '', markdown))
+    if images and chars - boilerplate_chars < MIN_TEXT_CHARS_WITH_PICTURES:
+        return _needs_mineru('little text next to pictures (scanned or screenshot content)',
+                             pages=pages, chars=chars, images=images)
+    _write_markdown(output_dir, markdown)
+    return {'markdown': markdown, 'needs_mineru': None, 'pages': pages, 'chars': chars, 'images': images}
+
+
+def _write_markdown(output_dir: str, markdown: str):
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, 'full.md'), 'w', encoding='utf-8') as f:
+        f.write(markdown)
+
+
+def _save_image(blob: bytes, ext: str, output_dir: str) -> str:
+    """Store an embedded picture as images/<sha256>.<ext> (MinerU naming); returns the relative path"""
+    ext = (ext or 'png').lower().lstrip('.')
+    if ext == 'jpeg':
+        ext = 'jpg'
+    rel_path = f"images/{hashlib.sha256(blob).hexdigest()}.{ext}"
+    full_path = os.path.join(output_dir, rel_path)
+    if not os.path.exists(full_path):
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, 'wb') as f:
+            f.write(blob)
+    return rel_path
+
+
+def _markdown_table(rows: List[List[str]]) -> str:
+    rows = [[cell.replace('|', '\\|').replace('\n', ' ').strip() for cell in row] for row in rows if row]
+    if not rows:
+        return ''
+    width = max(len(row) for row in rows)
+    rows = [row + [''] * (width - len(row)) for row in rows]
+    lines = ['| ' + ' | '.join(rows[0]) + ' |', '|' + ' --- |' * width]
+    lines.extend('| ' + ' | '.join(row) + ' |' for row in rows[1:])
+    return '\n'.join(lines)
+
+
+# ---------------------------------------------------------------- docx
+
+def _extract_docx(file_path: str, output_dir: str) -> Dict[str, Any]:
+    with zipfile.ZipFile(file_path) as z:
+        body = ElementTree.fromstring(z.read('word/document.xml')).find(f'{_W}body')
+        if body is None:
+            return _needs_mineru('docx without body')
+        if body.find(f'.//{_M}oMath') is not None:
+            return _needs_mineru('docx contains equations')
+
+        rels = {}
+        try:
+            for rel in ElementTree.fromstring(z.read('word/_rels/document.xml.rels')).iter(f'{_PKG_REL}Relationship'):
+                if rel.get('TargetMode') != 'External':
+                    rels[rel.get('Id')] = posixpath.normpath(posixpath.join('word', rel.get('Target', '')))
+        except KeyError:
+            pass
+
+        images = 0
+
+        def paragraph(p) -> str:
+            nonlocal images
+            parts = []
+            for node in p.iter():
+                if node.tag == f'{_W}t':
+                    parts.append(node.text or '')
+                elif node.tag == f'{_W}tab':
+                    parts.append('\t')
+                elif node.tag in (f'{_W}br', f'{_W}cr'):
+                    parts.append('\n')
+                elif node.tag == f'{_A}blip':
+                    target = rels.get(node.get(f'{_R}embed'))
+                    if target and target in z.namelist():
+                        rel_path = _save_image(z.read(target), posixpath.splitext(target)[1], output_dir)
+                        parts.append(f"\n![]({rel_path})\n")
+                        images += 1
+            text = ''.join(parts).strip()
+            if not text:
+                return ''
+            style = p.find(f'{_W}pPr/{_W}pStyle')
+            match = _HEADING_STYLE.match(style.get(f'{_W}val', '')) if style is not None else None
+            if style is not None and style.get(f'{_W}val', '').lower() == 'title':
+                return f"# {text}"
+            if match:
+                return f"{'#' * min(max(int(match.group(1)), 1), 6)} {text}"
+            if p.find(f'{_W}pPr/{_W}numPr') is not None:
+                level = p.find(f'{_W}pPr/{_W}numPr/{_W}ilvl')
+                indent = '  ' * int(level.get(f'{_W}val', '0')) if level is not None else ''
+                return f"{indent}- {text}"
+            return text
+
+        blocks = []
+        for child in body:
+            if child.tag == f'{_W}p':
+                blocks.append(paragraph(child))
+            elif child.tag == f'{_W}tbl':
+                rows = []
+                for tr in child.iter(f'{_W}tr'):
+                    rows.append([
+                        ' '.join(filter(None, (paragraph(p) for p in tc.iter(f'{_W}p'))))
+                        for tc in tr.findall(f'{_W}tc')
+                    ])
+                blocks.append(_markdown_table(rows))
+
+    return _result(blocks, pages=1, images=images, output_dir=output_dir)
+
+
+# ---------------------------------------------------------------- pptx
+
+def _extract_pptx(file_path: str, output_dir: str) -> Dict[str, Any]:
+    from pptx import Presentation
+    from pptx.enum.shapes import MSO_SHAPE_TYPE
+
+    presentation = Presentation(file_path)
+    blocks: List[str] = []
+    images = 0
+
+    def shape_blocks(shape) -> List[str]:
+        nonlocal images
+        if shape.shape_type == MSO_SHAPE_TYPE.GROUP:
+            return [block for child in _reading_order(shape.shapes) for block in shape_blocks(child)]
+        if shape.shape_type == MSO_SHAPE_TYPE.PICTURE:
+            try:
+                image = shape.image
+            except (AttributeError, ValueError, KeyError):
+                return []  # 链接图片等没有内嵌数据
+            images += 1
+            return [f"![]({_save_image(image.blob, image.ext, output_dir)})"]
+        if getattr(shape, 'has_table', False) and shape.has_table:
+            return [_markdown_table([[cell.text for cell in row.cells] for row in shape.table.rows])]
+        if getattr(shape, 'has_text_frame', False) and shape.has_text_frame:
+            lines = []
+            for para in shape.text_frame.paragraphs:
+                text = ''.join(run.text for run in para.runs).strip() or para.text.strip()
+                if text:
+                    lines.append(f"{'  ' * (para.level - 1)}- {text}" if para.level else text)
+            return ['\n'.join(lines)] if lines else []
+        return []
+
+    for index, slide in enumerate(presentation.slides, start=1):
+        title_shape = slide.shapes.title
+        title = title_shape.text_frame.text.strip() if title_shape is not None and title_shape.has_text_frame else ''
+        blocks.append(f"## {title}" if title else f"## Slide {index}")
+        for shape in _reading_order(slide.shapes):
+            if title_shape is not None and shape.shape_id == title_shape.shape_id:
+                continue
+            blocks.extend(shape_blocks(shape))
+        if slide.has_notes_slide:
+            notes = slide.notes_slide.notes_text_frame.text.strip() if slide.notes_slide.notes_text_frame else ''
+            if notes:
+                blocks.append('> ' + notes.replace('\n', '\n> '))
+
+    # 只有标题行的演示文稿（每页一张图）同样交给 MinerU
+    return _result(blocks, pages=len(presentation.slides), images=images, output_dir=output_dir,
+                   boilerplate_chars=_slide_heading_chars(blocks))
+
+
+def _reading_order(shapes):
+    """Top-to-bottom, left-to-right (shapes without position keep document order at the end)"""
+    positioned = [s for s in shapes if s.top is not None and s.left is not None]
+    others = [s for s in shapes if s.top is None or s.left is None]
+    return sorted(positioned, key=lambda s: (s.top, s.left)) + others
+
+
+def _slide_heading_chars(blocks: List[str]) -> int:
+    return sum(len(re.sub(r'\s', '', block[3:])) for block in blocks if block.startswith('## '))
+
+
+# ---------------------------------------------------------------- pdf
+
+def _extract_pdf(file_path: str, output_dir: str, min_chars_per_page: int) -> Dict[str, Any]:
+    try:
+        from pdfminer.high_level import extract_pages
+        from pdfminer.layout import LTFigure, LTImage, LTTextContainer
+    except ImportError:
+        return _needs_mineru('pdfminer.six not installed')
+
+    def has_image(container) -> bool:
+        for item in container:
+            if isinstance(item, LTImage):
+                return True
+            if isinstance(item, LTFigure) and has_image(item):
+                return True
+        return False
+
+    pages: List[str] = []
+    for page_layout in extract_pages(file_path):
+        paragraphs = []
+        for element in page_layout:
+            if isinstance(element, LTTextContainer):
+                text = re.sub(r'-\n(?=\w)', '', element.get_text()).strip()
+                if text:
+                    paragraphs.append(' '.join(line.strip() for line in text.splitlines() if line.strip()))
+            elif isinstance(element, (LTFigure, LTImage)) and (isinstance(element, LTImage) or has_image(element)):
+                # 图片需要 MinerU 切图和版面识别
+                return _needs_mineru('pdf contains figures', pages=len(pages) + 1)
+        pages.append('\n\n'.join(paragraphs))
+
+    chars = sum(len(re.sub(r'\s', '', page)) for page in pages)
+    if not pages or chars < min_chars_per_page * len(pages):
+        return _needs_mineru('pdf has little or no text layer', pages=len(pages), chars=chars)
+    markdown = '\n\n'.join(page for page in pages if page) + '\n'
+    _write_markdown(output_dir, markdown)
+    return {'markdown': markdown, 'needs_mineru': None, 'pages': len(pages), 'chars': chars, 'images': 0}
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr)
+    print(json.dumps(extract_document(*json.loads(sys.argv[1])), ensure_ascii=False))
@@ -0,0 +1,46 @@
+"""Add durable queue lease columns to tasks
+
+Revision ID: 020_add_task_lease_columns
+Revises: 019_add_xhs_card_image_versions
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import text
+
+
+# revision identifiers, used by Alembic.
+revision = '020_add_task_lease_columns'
+down_revision = '019_add_xhs_card_image_versions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Idempotent migration: columns may already exist if the table was
+    # created by db.create_all() on a fresh database.
+    bind = op.get_bind()
+    cols = []
+    try:
+        rows = bind.execute(text("PRAGMA table_info(tasks)")).fetchall()
+        cols = [r[1] for r in rows]
+    except Exception:
+        cols = []
+
+    if 'payload' not in cols:
+        op.add_column('tasks', sa.Column('payload', sa.Text(), nullable=True))
+    if 'worker_id' not in cols:
+        op.add_column('tasks', sa.Column('worker_id', sa.String(length=100), nullable=True))
+    if 'lease_expires_at' not in cols:
+        op.add_column('tasks', sa.Column('lease_expires_at', sa.DateTime(), nullable=True))
+    if 'attempts' not in cols:
+        op.add_column('tasks', sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    # Best-effort: SQLite may not support dropping columns in older versions.
+    for col in ('attempts', 'lease_expires_at', 'worker_id', 'payload'):
+        try:
+            op.drop_column('tasks', col)
+        except Exception:
+            pass
@@ -0,0 +1,39 @@
+"""Add caption_stats to reference_files
+
+Revision ID: 021_add_reference_file_caption_stats
+Revises: 020_add_task_lease_columns
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import text
+
+
+# revision identifiers, used by Alembic.
+revision = '021_add_reference_file_caption_stats'
+down_revision = '020_add_task_lease_columns'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Idempotent migration: the column may already exist if the table was
+    # created by db.create_all() on a fresh database.
+    bind = op.get_bind()
+    cols = []
+    try:
+        rows = bind.execute(text("PRAGMA table_info(reference_files)")).fetchall()
+        cols = [r[1] for r in rows]
+    except Exception:
+        cols = []
+
+    if 'caption_stats' not in cols:
+        op.add_column('reference_files', sa.Column('caption_stats', sa.Text(), nullable=True))
+
+
+def downgrade():
+    # Best-effort: SQLite may not support dropping columns in older versions.
+    try:
+        op.drop_column('reference_files', 'caption_stats')
+    except Exception:
+        pass
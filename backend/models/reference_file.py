@@ -1,6 +1,7 @@
 """
 Reference File model - stores uploaded reference files and their parsed content
 """
+import json
 import uuid
 from datetime import datetime
 from . import db
@@ -22,6 +23,7 @@ class ReferenceFile(db.Model):
     markdown_content = db.Column(db.Text, nullable=True)  # Parsed markdown with enhanced image descriptions
     error_message = db.Column(db.Text, nullable=True)  # Error message if parsing failed
     mineru_batch_id = db.Column(db.String(100), nullable=True)  # Mineru service batch ID
+    caption_stats = db.Column(db.Text, nullable=True)  # JSON: image caption dedup / cache statistics of the last parse
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -51,6 +53,7 @@ class ReferenceFile(db.Model):
             'file_type': self.file_type,
             'parse_status': self.parse_status,
             'error_message': self.error_message,
+            'caption_stats': self.get_caption_stats(),
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
         }
@@ -64,6 +67,19 @@ class ReferenceFile(db.Model):
         
         return result
     
+    def get_caption_stats(self):
+        """Parse caption_stats from JSON string ({images, model_calls, cache_hits, hit_rate})"""
+        if self.caption_stats:
+            try:
+                return json.loads(self.caption_stats)
+            except json.JSONDecodeError:
+                return None
+        return None
+    
+    def set_caption_stats(self, data):
+        """Set caption_stats as JSON string"""
+        self.caption_stats = json.dumps(data) if data else None
+    
     def count_failed_image_captions(self) -> int:
         """
         Count images in markdown that don't have alt text (failed to generate captions)
@@ -15,13 +15,19 @@ class Task(db.Model):
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     project_id = db.Column(db.String(36), db.ForeignKey('projects.id'), nullable=False)
-    task_type = db.Column(db.String(50), nullable=False)  # GENERATE_DESCRIPTIONS|GENERATE_IMAGES
+    task_type = db.Column(db.String(50), nullable=False)  # GENERATE_DESCRIPTIONS|GENERATE_IMAGES|GENERATE_DECK
     status = db.Column(db.String(50), nullable=False, default='PENDING')
     progress = db.Column(db.Text, nullable=True)  # JSON string: {"total": 10, "completed": 5, "failed": 0}
     error_message = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     completed_at = db.Column(db.DateTime, nullable=True)
     
+    # Durable queue fields (see services/tasks/queue.py)
+    payload = db.Column(db.Text, nullable=True)  # JSON string: handler kwargs, only for resumable tasks
+    worker_id = db.Column(db.String(100), nullable=True)  # worker currently holding the lease
+    lease_expires_at = db.Column(db.DateTime, nullable=True)  # renewed by worker heartbeat
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    
     # Relationships
     project = db.relationship('Project', back_populates='tasks')
     
@@ -41,6 +47,22 @@ class Task(db.Model):
         else:
             self.progress = None
     
+    def get_payload(self):
+        """Parse queue payload from JSON string"""
+        if self.payload:
+            try:
+                return json.loads(self.payload)
+            except json.JSONDecodeError:
+                return {}
+        return {}
+    
+    def set_payload(self, data):
+        """Set queue payload as JSON string"""
+        if data:
+            self.payload = json.dumps(data, ensure_ascii=False)
+        else:
+            self.payload = None
+    
     def update_progress(self, completed=None, failed=None):
         """Update progress incrementally"""
         prog = self.get_progress()
@@ -31,13 +31,15 @@ from typing import Dict, Any
 
 from .text import TextProvider, GenAITextProvider, OpenAITextProvider
 from .image import ImageProvider, GenAIImageProvider, OpenAIImageProvider
+from .rate_limiter import get_provider_limiter, get_rate_limiter_stats
 
 logger = logging.getLogger(__name__)
 
 __all__ = [
     'TextProvider', 'GenAITextProvider', 'OpenAITextProvider',
     'ImageProvider', 'GenAIImageProvider', 'OpenAIImageProvider',
-    'get_text_provider', 'get_image_provider', 'get_provider_format'
+    'get_text_provider', 'get_image_provider', 'get_provider_format',
+    'get_provider_limiter', 'get_rate_limiter_stats'
 ]
 
 
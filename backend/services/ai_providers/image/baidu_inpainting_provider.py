@@ -13,6 +13,8 @@ from PIL import Image
 import io
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
+from ..rate_limiter import get_provider_limiter, BAIDU_QPS_LIMIT_CODES
+
 logger = logging.getLogger(__name__)
 
 
@@ -39,6 +41,7 @@ class BaiduInpaintingProvider:
         self.api_key = api_key
         self.api_secret = api_secret
         self.api_url = "https://aip.baidubce.com/rest/2.0/image-process/v1/inpainting"
+        self._limiter = get_provider_limiter('baidu_inpaint', 'inpainting')
         
         if api_key.startswith('bce-v3/'):
             logger.info("✅ 初始化百度图像修复 Provider (使用BCEv3 API Key)")
@@ -144,12 +147,13 @@ class BaiduInpaintingProvider:
             }
             
             logger.info("🌐 发送请求到百度图像修复API...")
-            response = requests.post(
-                url, 
-                headers=headers, 
-                json=request_body, 
-                timeout=60
-            )
+            with self._limiter.slot():
+                response = requests.post(
+                    url, 
+                    headers=headers, 
+                    json=request_body, 
+                    timeout=60
+                )
             response.raise_for_status()
             
             result = response.json()
@@ -158,6 +162,8 @@ class BaiduInpaintingProvider:
             if 'error_code' in result:
                 error_msg = result.get('error_msg', 'Unknown error')
                 error_code = result.get('error_code')
+                if error_code in BAIDU_QPS_LIMIT_CODES:
+                    self._limiter.report_throttled()
                 logger.error(f"❌ 百度API错误: [{error_code}] {error_msg}")
                 raise Exception(f"Baidu API error [{error_code}]: {error_msg}")
             
@@ -1,6 +1,7 @@
 """
 Abstract base class for image generation providers
 """
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Optional, List
 from PIL import Image
@@ -34,3 +35,23 @@ class ImageProvider(ABC):
             Generated PIL Image object, or None if failed
         """
         pass
+
+    async def agenerate_image(
+        self,
+        prompt: str,
+        ref_images: Optional[List[Image.Image]] = None,
+        aspect_ratio: str = "16:9",
+        resolution: str = "2K",
+        enable_thinking: bool = False,
+        thinking_budget: int = 0
+    ) -> Optional[Image.Image]:
+        """
+        Async variant of generate_image
+
+        Providers with a native async client override this; the default runs
+        the blocking call in the event loop's default executor.
+        """
+        return await asyncio.to_thread(
+            self.generate_image, prompt, ref_images, aspect_ratio, resolution,
+            enable_thinking, thinking_budget
+        )
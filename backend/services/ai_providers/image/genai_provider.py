@@ -13,6 +13,8 @@ from PIL import Image
 from io import BytesIO
 from tenacity import retry, stop_after_attempt, wait_exponential
 from .base import ImageProvider
+from .ref_image_cache import get_ref_image_cache, is_cached_ref_image
+from ..rate_limiter import get_provider_limiter
 from config import get_config
 
 logger = logging.getLogger(__name__)
@@ -65,6 +67,7 @@ class GenAIImageProvider(ImageProvider):
             )
 
         self.model = model
+        self._limiter = get_provider_limiter('vertex' if vertexai else 'gemini', model)
 
     @retry(
         stop=stop_after_attempt(get_config().GENAI_MAX_RETRIES + 1),
@@ -95,126 +98,195 @@ class GenAIImageProvider(ImageProvider):
             Generated PIL Image object, or None if failed
         """
         try:
-            # Build contents list with prompt and reference images
-            contents = []
+            contents = self._build_contents(prompt, ref_images)
+            config = self._build_config(aspect_ratio, resolution, enable_thinking, thinking_budget)
             
-            # Add reference images first (if any)
-            if ref_images:
-                for ref_img in ref_images:
-                    contents.append(ref_img)
-            
-            # Add text prompt
-            contents.append(prompt)
-            
-            logger.debug(f"Calling GenAI API for image generation with {len(ref_images) if ref_images else 0} reference images...")
-            logger.debug(f"Config - aspect_ratio: {aspect_ratio}, resolution: {resolution}, enable_thinking: {enable_thinking}")
-            
-            # Build config
-            config_params = {
-                'response_modalities': ['TEXT', 'IMAGE'],
-                'image_config': types.ImageConfig(
-                    aspect_ratio=aspect_ratio,
-                    image_size=resolution
-                )
-            }
-            
-            # Add thinking config if enabled
-            if enable_thinking:
-                # In Vertex AI (Gemini) Thinking mode, enabling include_thoughts=True requires explicitly setting thinking_budget
-                config_params['thinking_config'] = types.ThinkingConfig(  
-                    thinking_budget=thinking_budget, 
-                    include_thoughts=True  
-                )
-            
-            # Check if using GRSAI proxy - use stream mode for compatibility
-            api_base_str = str(self.client.client_config.http_options.api_endpoint) if hasattr(self.client, 'client_config') else ''
-            is_grsai = 'grsai' in api_base_str.lower()
-            
-            if is_grsai:
-                logger.info("Detected GRSAI proxy - using stream mode for Gemini-compatible endpoint")
-                # Use stream mode for GRSAI
-                response_stream = self.client.models.generate_content_stream(
-                    model=self.model,
-                    contents=contents,
-                    config=types.GenerateContentConfig(**config_params)
-                )
-                # Collect all chunks
-                response = None
-                for chunk in response_stream:
-                    response = chunk  # Last chunk has complete response
-                logger.debug("GenAI API stream call completed")
-            else:
-                # Use regular mode for official Gemini API
-                response = self.client.models.generate_content(
-                    model=self.model,
-                    contents=contents,
-                    config=types.GenerateContentConfig(**config_params)
-                )
-                logger.debug("GenAI API call completed")
+            with self._limiter.slot():
+                if self._is_grsai_proxy():
+                    logger.info("Detected GRSAI proxy - using stream mode for Gemini-compatible endpoint")
+                    # Use stream mode for GRSAI
+                    response_stream = self.client.models.generate_content_stream(
+                        model=self.model,
+                        contents=contents,
+                        config=config
+                    )
+                    # Collect all chunks
+                    response = None
+                    for chunk in response_stream:
+                        response = chunk  # Last chunk has complete response
+                    logger.debug("GenAI API stream call completed")
+                else:
+                    # Use regular mode for official Gemini API
+                    response = self.client.models.generate_content(
+                        model=self.model,
+                        contents=contents,
+                        config=config
+                    )
+                    logger.debug("GenAI API call completed")
             
-            # Check if response.parts is None (GRSAI proxy may return None)
-            if response.parts is None:
-                logger.error("Response.parts is None - GRSAI proxy returned non-standard response")
-                logger.error(f"Response type: {type(response)}")
-                # Try to get candidates
-                if hasattr(response, 'candidates'):
-                    logger.error(f"Response.candidates: {response.candidates}")
-                    if response.candidates:
-                        logger.error(f"First candidate: {response.candidates[0]}")
-                        if hasattr(response.candidates[0], 'content'):
-                            logger.error(f"Candidate content: {response.candidates[0].content}")
-                            if hasattr(response.candidates[0].content, 'parts'):
-                                logger.error(f"Candidate content parts: {response.candidates[0].content.parts}")
-                # Try to get JSON representation
-                try:
-                    json_dict = response.to_json_dict()
-                    logger.error(f"Response JSON: {json_dict}")
-                except Exception as e:
-                    logger.error(f"Failed to get JSON dict: {e}")
-                raise ValueError("GRSAI API returned response with None parts - incompatible with Gemini SDK format")
+            return self._extract_image(response)
             
-            # Extract the final image from the response.
-            # Earlier images are usually low resolution drafts 
-            # Therefore, always use the last image found.
-            last_image = None
+        except Exception as e:
+            error_detail = f"Error generating image with GenAI: {type(e).__name__}: {str(e)}"
+            logger.error(error_detail, exc_info=True)
+            raise Exception(error_detail) from e
+
+    @retry(
+        stop=stop_after_attempt(get_config().GENAI_MAX_RETRIES + 1),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        reraise=True
+    )
+    async def agenerate_image(
+        self,
+        prompt: str,
+        ref_images: Optional[List[Image.Image]] = None,
+        aspect_ratio: str = "16:9",
+        resolution: str = "2K",
+        enable_thinking: bool = True,
+        thinking_budget: int = 1024
+    ) -> Optional[Image.Image]:
+        """
+        Async variant of generate_image using the SDK's aio client (no thread held while waiting)
+        """
+        try:
+            contents = self._build_contents(prompt, ref_images)
+            config = self._build_config(aspect_ratio, resolution, enable_thinking, thinking_budget)
             
-            for i, part in enumerate(response.parts):
-                if part.text is not None:
-                    logger.debug(f"Part {i}: TEXT - {part.text[:100] if len(part.text) > 100 else part.text}")
+            async with self._limiter.aslot():
+                if self._is_grsai_proxy():
+                    response = None
+                    async for chunk in await self.client.aio.models.generate_content_stream(
+                        model=self.model,
+                        contents=contents,
+                        config=config
+                    ):
+                        response = chunk  # Last chunk has complete response
                 else:
-                    try:
-                        logger.debug(f"Part {i}: Attempting to extract image...")
-                        image = part.as_image()
-                        if image:
-                            # as_image() should return PIL Image directly (official SDK)
-                            # But proxy may return custom Image object, so we need fallbacks
-                            if isinstance(image, Image.Image):
-                                last_image = image
-                            elif hasattr(image, 'image_bytes') and image.image_bytes:
-                                last_image = Image.open(BytesIO(image.image_bytes))
-                            elif hasattr(image, '_pil_image') and image._pil_image:
-                                last_image = image._pil_image
-                            else:
-                                logger.warning(f"Part {i}: Image object type {type(image)} has no usable conversion method")
-                                continue
-                            logger.debug(f"Successfully extracted image from part {i}")
-                    except Exception as e:
-                        logger.warning(f"Part {i}: Failed to extract image - {type(e).__name__}: {str(e)}")
-            
-            # Return the last image found (highest quality in thinking chain scenarios)
-            if last_image:
-                return last_image
-            
-            # No image found in response
-            error_msg = "No image found in API response. "
-            if response.parts:
-                error_msg += f"Response had {len(response.parts)} parts but none contained valid images."
-            else:
-                error_msg += "Response had no parts."
+                    response = await self.client.aio.models.generate_content(
+                        model=self.model,
+                        contents=contents,
+                        config=config
+                    )
             
-            raise ValueError(error_msg)
+            return self._extract_image(response)
             
         except Exception as e:
             error_detail = f"Error generating image with GenAI: {type(e).__name__}: {str(e)}"
             logger.error(error_detail, exc_info=True)
             raise Exception(error_detail) from e
+
+    @staticmethod
+    def _build_contents(prompt: str, ref_images: Optional[List[Image.Image]]) -> list:
+        """Reference images first, then the text prompt"""
+        ref_cache = get_ref_image_cache()
+        contents = [GenAIImageProvider._ref_image_part(ref_cache, img) for img in ref_images or []]
+        contents.append(prompt)
+        logger.debug(f"Calling GenAI API for image generation with {len(ref_images) if ref_images else 0} reference images...")
+        return contents
+
+    @staticmethod
+    def _ref_image_part(ref_cache, image: Image.Image):
+        """Cached images are sent as pre-encoded bytes; others go through the SDK's PIL conversion"""
+        if not is_cached_ref_image(image):
+            return image
+
+        def _encode(img: Image.Image):
+            # Same choice as the SDK: keep JPEG sources as JPEG, everything else as PNG
+            image_format = 'JPEG' if img.format == 'JPEG' and img.mode in ('L', 'RGB') else 'PNG'
+            buffered = BytesIO()
+            img.save(buffered, format=image_format, **({'quality': 95} if image_format == 'JPEG' else {}))
+            return buffered.getvalue(), f"image/{image_format.lower()}"
+
+        data, mime_type = ref_cache.encode(image, 'genai', _encode)
+        return types.Part.from_bytes(data=data, mime_type=mime_type)
+
+    @staticmethod
+    def _build_config(aspect_ratio: str, resolution: str,
+                      enable_thinking: bool, thinking_budget: int) -> types.GenerateContentConfig:
+        logger.debug(f"Config - aspect_ratio: {aspect_ratio}, resolution: {resolution}, enable_thinking: {enable_thinking}")
+        config_params = {
+            'response_modalities': ['TEXT', 'IMAGE'],
+            'image_config': types.ImageConfig(
+                aspect_ratio=aspect_ratio,
+                image_size=resolution
+            )
+        }
+        
+        # Add thinking config if enabled
+        if enable_thinking:
+            # In Vertex AI (Gemini) Thinking mode, enabling include_thoughts=True requires explicitly setting thinking_budget
+            config_params['thinking_config'] = types.ThinkingConfig(  
+                thinking_budget=thinking_budget, 
+                include_thoughts=True  
+            )
+        return types.GenerateContentConfig(**config_params)
+
+    def _is_grsai_proxy(self) -> bool:
+        """GRSAI proxy only works in stream mode"""
+        api_base_str = str(self.client.client_config.http_options.api_endpoint) if hasattr(self.client, 'client_config') else ''
+        return 'grsai' in api_base_str.lower()
+
+    @staticmethod
+    def _extract_image(response) -> Image.Image:
+        """Pick the final image from a generate_content response"""
+        # Check if response.parts is None (GRSAI proxy may return None)
+        if response.parts is None:
+            logger.error("Response.parts is None - GRSAI proxy returned non-standard response")
+            logger.error(f"Response type: {type(response)}")
+            # Try to get candidates
+            if hasattr(response, 'candidates'):
+                logger.error(f"Response.candidates: {response.candidates}")
+                if response.candidates:
+                    logger.error(f"First candidate: {response.candidates[0]}")
+                    if hasattr(response.candidates[0], 'content'):
+                        logger.error(f"Candidate content: {response.candidates[0].content}")
+                        if hasattr(response.candidates[0].content, 'parts'):
+                            logger.error(f"Candidate content parts: {response.candidates[0].content.parts}")
+            # Try to get JSON representation
+            try:
+                json_dict = response.to_json_dict()
+                logger.error(f"Response JSON: {json_dict}")
+            except Exception as e:
+                logger.error(f"Failed to get JSON dict: {e}")
+            raise ValueError("GRSAI API returned response with None parts - incompatible with Gemini SDK format")
+        
+        # Extract the final image from the response.
+        # Earlier images are usually low resolution drafts 
+        # Therefore, always use the last image found.
+        last_image = None
+        
+        for i, part in enumerate(response.parts):
+            if part.text is not None:
+                logger.debug(f"Part {i}: TEXT - {part.text[:100] if len(part.text) > 100 else part.text}")
+            else:
+                try:
+                    logger.debug(f"Part {i}: Attempting to extract image...")
+                    image = part.as_image()
+                    if image:
+                        # as_image() should return PIL Image directly (official SDK)
+                        # But proxy may return custom Image object, so we need fallbacks
+                        if isinstance(image, Image.Image):
+                            last_image = image
+                        elif hasattr(image, 'image_bytes') and image.image_bytes:
+                            last_image = Image.open(BytesIO(image.image_bytes))
+                        elif hasattr(image, '_pil_image') and image._pil_image:
+                            last_image = image._pil_image
+                        else:
+                            logger.warning(f"Part {i}: Image object type {type(image)} has no usable conversion method")
+                            continue
+                        logger.debug(f"Successfully extracted image from part {i}")
+                except Exception as e:
+                    logger.warning(f"Part {i}: Failed to extract image - {type(e).__name__}: {str(e)}")
+        
+        # Return the last image found (highest quality in thinking chain scenarios)
+        if last_image:
+            return last_image
+        
+        # No image found in response
+        error_msg = "No image found in API response. "
+        if response.parts:
+            error_msg += f"Response had {len(response.parts)} parts but none contained valid images."
+        else:
+            error_msg += "Response had no parts."
+        
+        raise ValueError(error_msg)
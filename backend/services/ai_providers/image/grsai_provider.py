@@ -2,15 +2,19 @@
 GRSAI Nano Banana Image Provider
 Uses GRSAI's dedicated /v1/draw/nano-banana API endpoint
 """
+import asyncio
 import logging
 import time
+import httpx
 import requests
 import base64
 from io import BytesIO
-from typing import Optional, List
+from typing import Any, Dict, List, Optional, Tuple
 from PIL import Image
 
 from .base import ImageProvider
+from .ref_image_cache import get_ref_image_cache
+from ..rate_limiter import get_provider_limiter, get_retry_after
 from config import get_config
 
 logger = logging.getLogger(__name__)
@@ -49,6 +53,10 @@ class GRSAIImageProvider(ImageProvider):
         "nano-banana-pro-vip": "nano-banana-pro-vip",
         "nano-banana-pro-4k-vip": "nano-banana-pro-4k-vip"
     }
+
+    # Result polling: up to MAX_POLLS * POLL_INTERVAL seconds
+    MAX_POLLS = 60
+    POLL_INTERVAL = 2
     
     def __init__(self, api_key: str, api_base: str = "https://grsai.dakka.com.cn", model: str = "nano-banana-pro-cl"):
         """
@@ -62,6 +70,7 @@ class GRSAIImageProvider(ImageProvider):
         self.api_key = api_key
         self.api_base = api_base.rstrip('/')
         self.model = model if model in self.MODEL_MAP else "nano-banana-pro-cl"
+        self._limiter = get_provider_limiter('grsai', self.model)
         logger.info(f"GRSAI ImageProvider initialized - api_base={self.api_base}, model={self.model}")
     
     def _image_to_base64(self, image: Image.Image) -> str:
@@ -113,41 +122,67 @@ class GRSAIImageProvider(ImageProvider):
         Returns:
             Generated PIL Image, or None if failed
         """
+        # The slot covers submission + polling: one slot per in-flight generation
+        with self._limiter.slot():
+            return self._generate_image(prompt, ref_images, aspect_ratio, resolution)
+
+    async def agenerate_image(
+        self,
+        prompt: str,
+        ref_images: Optional[List[Image.Image]] = None,
+        aspect_ratio: str = "16:9",
+        resolution: str = "2K",
+        enable_thinking: bool = False,
+        thinking_budget: int = 0
+    ) -> Optional[Image.Image]:
+        """
+        Async variant of generate_image (httpx): polling waits on the event loop instead of a thread
+        """
+        async with self._limiter.aslot():
+            try:
+                url, headers, request_body = self._build_request(prompt, ref_images, aspect_ratio, resolution)
+                async with httpx.AsyncClient() as client:
+                    response = await client.post(url, headers=headers, json=request_body, timeout=30)
+                    task_id = self._parse_submit_response(response)
+                    if not task_id:
+                        return None
+
+                    for i in range(self.MAX_POLLS):
+                        await asyncio.sleep(self.POLL_INTERVAL)
+                        try:
+                            result_response = await client.post(
+                                f"{self.api_base}/v1/draw/result",
+                                headers=headers,
+                                json={"id": task_id},
+                                timeout=10
+                            )
+                            done, image_url = self._parse_poll_response(result_response, i)
+                        except Exception as e:
+                            logger.warning(f"Poll {i+1} exception: {type(e).__name__}: {str(e)}")
+                            continue
+                        if done:
+                            if not image_url:
+                                return None
+                            image_response = await client.get(image_url, timeout=30)
+                            image_response.raise_for_status()
+                            return Image.open(BytesIO(image_response.content))
+
+                logger.error(f"Polling timed out after {self.MAX_POLLS * self.POLL_INTERVAL} seconds")
+                return None
+
+            except Exception as e:
+                logger.error(f"Error generating image with GRSAI: {type(e).__name__}: {str(e)}", exc_info=True)
+                return None
+
+    def _generate_image(
+        self,
+        prompt: str,
+        ref_images: Optional[List[Image.Image]],
+        aspect_ratio: str,
+        resolution: str
+    ) -> Optional[Image.Image]:
         try:
-            # Build request
-            grsai_aspect_ratio = self.ASPECT_RATIO_MAP.get(aspect_ratio, "auto")
-            grsai_resolution = self.RESOLUTION_MAP.get(resolution, "2K")
-            
-            # Prepare request body
-            request_body = {
-                "model": self.model,
-                "prompt": prompt,
-                "aspectRatio": grsai_aspect_ratio,
-                "imageSize": grsai_resolution,
-                "shutProgress": True  # Only return final result
-            }
-            
-            # Add reference images if provided
-            if ref_images and len(ref_images) > 0:
-                request_body["urls"] = []
-                for img in ref_images:
-                    base64_str = self._image_to_base64(img)
-                    request_body["urls"].append(f"data:image/jpeg;base64,{base64_str}")
-            
-            logger.info(f"Calling GRSAI API - model={self.model}, aspectRatio={grsai_aspect_ratio}, imageSize={grsai_resolution}")
-            
-            # Use polling mode: set webHook to "-1" to get task ID immediately
-            request_body["webHook"] = "-1"
-            request_body["shutProgress"] = True
-            
-            logger.debug(f"Request body: {request_body}")
-            
-            # Call API to submit task
-            url = f"{self.api_base}/v1/draw/nano-banana"
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {self.api_key}"
-            }
+            url, headers, request_body = self._build_request(prompt, ref_images, aspect_ratio, resolution)
             
             response = requests.post(
                 url,
@@ -155,35 +190,15 @@ class GRSAIImageProvider(ImageProvider):
                 json=request_body,
                 timeout=30  # Short timeout for submission
             )
-            
-            logger.info(f"GRSAI API submit response status: {response.status_code}")
-            
-            if response.status_code != 200:
-                logger.error(f"GRSAI API error: {response.status_code} - {response.text}")
-                return None
-            
-            # Parse submission response to get task ID
-            submit_result = response.json()
-            logger.debug(f"GRSAI API submit response: {submit_result}")
-            
-            if submit_result.get("code") != 0:
-                logger.error(f"GRSAI API submission failed: {submit_result}")
-                return None
-            
-            task_id = submit_result.get("data", {}).get("id")
+            task_id = self._parse_submit_response(response)
             if not task_id:
-                logger.error("No task ID in submission response")
                 return None
             
-            logger.info(f"Task submitted successfully, task_id: {task_id}, polling for result...")
-            
             # Poll for result
             result_url = f"{self.api_base}/v1/draw/result"
-            max_polls = 60  # Poll for up to 60 times (5 minutes total if 5s interval)
-            poll_interval = 2  # Poll every 2 seconds
             
-            for i in range(max_polls):
-                time.sleep(poll_interval)
+            for i in range(self.MAX_POLLS):
+                time.sleep(self.POLL_INTERVAL)
                 
                 try:
                     result_response = requests.post(
@@ -192,52 +207,126 @@ class GRSAIImageProvider(ImageProvider):
                         json={"id": task_id},
                         timeout=10
                     )
-                    
-                    if result_response.status_code != 200:
-                        logger.warning(f"Poll {i+1}: Status {result_response.status_code}")
-                        continue
-                    
-                    result = result_response.json()
-                    
-                    if result.get("code") == -22:
-                        logger.warning(f"Poll {i+1}: Task not found yet")
-                        continue
-                    
-                    if result.get("code") != 0:
-                        logger.error(f"Poll {i+1}: Unexpected response: {result}")
-                        continue
-                    
-                    data = result.get("data", {})
-                    status = data.get("status")
-                    progress = data.get("progress", 0)
-                    
-                    logger.info(f"Poll {i+1}: status={status}, progress={progress}%")
-                    
-                    if status == "succeeded":
-                        results = data.get("results", [])
-                        if results and len(results) > 0:
-                            image_url = results[0].get("url")
-                            if image_url:
-                                logger.info(f"Image generated successfully, downloading from: {image_url}")
-                                return self._download_image(image_url)
-                        logger.error("No image URL in successful response")
-                        return None
-                    
-                    elif status == "failed":
-                        failure_reason = data.get("failure_reason", "")
-                        error = data.get("error", "")
-                        logger.error(f"GRSAI generation failed - reason={failure_reason}, error={error}")
-                        return None
-                    
-                    # Status is "running", continue polling
-                    
+                    done, image_url = self._parse_poll_response(result_response, i)
                 except Exception as e:
                     logger.warning(f"Poll {i+1} exception: {type(e).__name__}: {str(e)}")
                     continue
+                if done:
+                    return self._download_image(image_url) if image_url else None
             
-            logger.error(f"Polling timed out after {max_polls * poll_interval} seconds")
+            logger.error(f"Polling timed out after {self.MAX_POLLS * self.POLL_INTERVAL} seconds")
             return None
                 
         except Exception as e:
             logger.error(f"Error generating image with GRSAI: {type(e).__name__}: {str(e)}", exc_info=True)
             return None
+
+    def _build_request(
+        self,
+        prompt: str,
+        ref_images: Optional[List[Image.Image]],
+        aspect_ratio: str,
+        resolution: str
+    ) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
+        """Build (url, headers, body) for the submission call"""
+        grsai_aspect_ratio = self.ASPECT_RATIO_MAP.get(aspect_ratio, "auto")
+        grsai_resolution = self.RESOLUTION_MAP.get(resolution, "2K")
+        
+        # Prepare request body
+        request_body = {
+            "model": self.model,
+            "prompt": prompt,
+            "aspectRatio": grsai_aspect_ratio,
+            "imageSize": grsai_resolution,
+            "shutProgress": True  # Only return final result
+        }
+        
+        # Add reference images if provided
+        if ref_images and len(ref_images) > 0:
+            request_body["urls"] = []
+            ref_cache = get_ref_image_cache()
+            fmt = f"grsai:jpeg{get_config().REF_IMAGE_JPEG_QUALITY}"
+            for img in ref_images:
+                base64_str = ref_cache.encode(img, fmt, self._image_to_base64)
+                request_body["urls"].append(f"data:image/jpeg;base64,{base64_str}")
+        
+        logger.info(f"Calling GRSAI API - model={self.model}, aspectRatio={grsai_aspect_ratio}, imageSize={grsai_resolution}")
+        
+        # Use polling mode: set webHook to "-1" to get task ID immediately
+        request_body["webHook"] = "-1"
+        request_body["shutProgress"] = True
+        
+        url = f"{self.api_base}/v1/draw/nano-banana"
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}"
+        }
+        return url, headers, request_body
+
+    def _parse_submit_response(self, response) -> Optional[str]:
+        """Return the GRSAI task id from a submission response (requests or httpx)"""
+        logger.info(f"GRSAI API submit response status: {response.status_code}")
+        
+        if response.status_code != 200:
+            logger.error(f"GRSAI API error: {response.status_code} - {response.text}")
+            if response.status_code == 429:
+                self._limiter.report_throttled(get_retry_after(response))
+            return None
+        
+        # Parse submission response to get task ID
+        submit_result = response.json()
+        logger.debug(f"GRSAI API submit response: {submit_result}")
+        
+        if submit_result.get("code") != 0:
+            logger.error(f"GRSAI API submission failed: {submit_result}")
+            return None
+        
+        task_id = submit_result.get("data", {}).get("id")
+        if not task_id:
+            logger.error("No task ID in submission response")
+            return None
+        
+        logger.info(f"Task submitted successfully, task_id: {task_id}, polling for result...")
+        return task_id
+
+    @staticmethod
+    def _parse_poll_response(result_response, i: int) -> Tuple[bool, Optional[str]]:
+        """Return (done, image_url) for one poll; done with no url means the task failed"""
+        if result_response.status_code != 200:
+            logger.warning(f"Poll {i+1}: Status {result_response.status_code}")
+            return False, None
+        
+        result = result_response.json()
+        
+        if result.get("code") == -22:
+            logger.warning(f"Poll {i+1}: Task not found yet")
+            return False, None
+        
+        if result.get("code") != 0:
+            logger.error(f"Poll {i+1}: Unexpected response: {result}")
+            return False, None
+        
+        data = result.get("data", {})
+        status = data.get("status")
+        progress = data.get("progress", 0)
+        
+        logger.info(f"Poll {i+1}: status={status}, progress={progress}%")
+        
+        if status == "succeeded":
+            results = data.get("results", [])
+            if results and len(results) > 0:
+                image_url = results[0].get("url")
+                if image_url:
+                    logger.info(f"Image generated successfully, downloading from: {image_url}")
+                    return True, image_url
+            logger.error("No image URL in successful response")
+            return True, None
+        
+        elif status == "failed":
+            failure_reason = data.get("failure_reason", "")
+            error = data.get("error", "")
+            logger.error(f"GRSAI generation failed - reason={failure_reason}, error={error}")
+            return True, None
+        
+        # Status is "running", continue polling
+        return False, None
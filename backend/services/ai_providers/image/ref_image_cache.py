@@ -0,0 +1,164 @@
+"""
+Shared cache for reference images
+
+Every page of a batch sends the same template (and often the same material /
+MinerU images) as reference images. Without a cache each page re-opens and
+decodes the file and each provider call re-encodes it to JPEG/base64.
+
+Entries are keyed by (absolute path, mtime, size), so replacing a file on disk
+invalidates it. The cache holds:
+    - the decoded (and optionally downscaled, REF_IMAGE_MAX_SIDE) PIL image
+    - the encoded payload per provider format (e.g. "openai:jpeg95")
+
+Images returned by :meth:`RefImageCache.load` are shared between threads and
+must be treated as read-only (``convert()`` / ``copy()`` before modifying).
+Images that did not come from the cache (downloads, in-memory images) are
+encoded on every call, as before.
+"""
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# Attribute set on cached images so providers can look up their encoded bytes
+_CACHE_KEY_ATTR = '_ref_cache_key'
+
+
+class RefImageCache:
+    """Size-bounded LRU of decoded reference images and their encoded payloads"""
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, max_side: int = 0):
+        self.max_bytes = max_bytes
+        self.max_side = max_side
+        self._data: "OrderedDict[Tuple, Tuple[Any, int]]" = OrderedDict()  # key -> (value, nbytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Tuple, threading.Lock] = {}
+        self._stats = {'hits': 0, 'misses': 0}
+
+    @staticmethod
+    def file_key(path: str) -> Tuple[str, int, int]:
+        stat = os.stat(path)
+        return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+    def load(self, path: str) -> Image.Image:
+        """Open, decode and (optionally) downscale ``path`` once per file version"""
+        file_key = self.file_key(path)
+        key = ('decoded',) + file_key
+        return self._get_or_create(key, lambda: self._decode(path, file_key))
+
+    def encode(self, image: Image.Image, fmt: str, encoder: Callable[[Image.Image], Any]) -> Any:
+        """
+        Return ``encoder(image)``, reusing the stored result for cached images.
+        ``fmt`` must identify the encoder output (format, quality ...).
+        """
+        file_key = getattr(image, _CACHE_KEY_ATTR, None)
+        if file_key is None:
+            return encoder(image)
+        return self._get_or_create(('encoded', fmt) + file_key, lambda: encoder(image))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats, entries=len(self._data), bytes=self._bytes)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def _decode(self, path: str, file_key: Tuple) -> Image.Image:
+        with Image.open(path) as opened:
+            opened.load()
+            image = opened.copy()
+            image.format = opened.format
+        if self.max_side and max(image.size) > self.max_side:
+            image.thumbnail((self.max_side, self.max_side))
+        setattr(image, _CACHE_KEY_ATTR, file_key)
+        return image
+
+    def _get_or_create(self, key: Tuple, create: Callable[[], Any]) -> Any:
+        value = self._get(key)
+        if value is not None:
+            return value
+        # One creator per key: a batch starting 30 pages at once encodes the template once
+        with self._key_lock(key):
+            value = self._get(key)
+            if value is not None:
+                return value
+            with self._lock:
+                self._stats['misses'] += 1
+            value = create()
+            self._put(key, value)
+            return value
+
+    def _get(self, key: Tuple) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            self._data.move_to_end(key)
+            self._stats['hits'] += 1
+            return item[0]
+
+    def _put(self, key: Tuple, value: Any):
+        nbytes = _size_of(value)
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._data[key] = (value, nbytes)
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes and self._data:
+                _, (_, evicted) = self._data.popitem(last=False)
+                self._bytes -= evicted
+
+    def _key_lock(self, key: Tuple) -> threading.Lock:
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                if len(self._key_locks) > 1024:
+                    for k in [k for k, l in self._key_locks.items() if not l.locked()]:
+                        del self._key_locks[k]
+                lock = self._key_locks[key] = threading.Lock()
+            return lock
+
+
+def _size_of(value: Any) -> int:
+    if isinstance(value, Image.Image):
+        return value.width * value.height * len(value.getbands())
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, tuple):
+        return sum(_size_of(item) for item in value)
+    return 0
+
+
+def is_cached_ref_image(image: Any) -> bool:
+    """Whether ``image`` came from :meth:`RefImageCache.load` (and so has reusable encodings)"""
+    return getattr(image, _CACHE_KEY_ATTR, None) is not None
+
+
+_ref_image_cache: Optional[RefImageCache] = None
+_ref_image_cache_lock = threading.Lock()
+
+
+def get_ref_image_cache() -> RefImageCache:
+    """Shared cache built from REF_IMAGE_CACHE_MAX_BYTES / REF_IMAGE_MAX_SIDE"""
+    global _ref_image_cache
+    if _ref_image_cache is None:
+        with _ref_image_cache_lock:
+            if _ref_image_cache is None:
+                from config import get_config
+                config = get_config()
+                _ref_image_cache = RefImageCache(
+                    max_bytes=getattr(config, 'REF_IMAGE_CACHE_MAX_BYTES', 256 * 1024 * 1024),
+                    max_side=getattr(config, 'REF_IMAGE_MAX_SIDE', 0),
+                )
+    return _ref_image_cache
@@ -12,6 +12,8 @@ from typing import Optional
 from PIL import Image
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
+from ..rate_limiter import get_provider_limiter
+
 logger = logging.getLogger(__name__)
 
 
@@ -34,6 +36,7 @@ class VolcengineInpaintingProvider:
         self.access_key = access_key
         self.secret_key = secret_key
         self.timeout = timeout
+        self._limiter = get_provider_limiter('volcengine', 'inpainting')
         logger.info("火山引擎 Inpainting Provider 初始化（直接HTTP模式）")
         
     def _encode_image_to_base64(self, image: Image.Image, is_mask: bool = False) -> str:
@@ -145,11 +148,12 @@ class VolcengineInpaintingProvider:
             
             try:
                 # 使用SDK的通用API调用方法
-                response = service.json(
-                    "CVProcess",
-                    {},  # query params
-                    json.dumps(request_body)  # body
-                )
+                with self._limiter.slot():
+                    response = service.json(
+                        "CVProcess",
+                        {},  # query params
+                        json.dumps(request_body)  # body
+                    )
                 
                 # 解析响应
                 if isinstance(response, str):
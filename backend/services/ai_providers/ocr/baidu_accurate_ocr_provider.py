@@ -12,6 +12,7 @@ from typing import Dict, List, Any, Optional, Literal
 from PIL import Image
 import io
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from ..rate_limiter import get_provider_limiter, BAIDU_QPS_LIMIT_CODES
 
 logger = logging.getLogger(__name__)
 
@@ -76,6 +77,7 @@ class BaiduAccurateOCRProvider:
         self.api_key = api_key
         self.api_secret = api_secret
         self.api_url = "https://aip.baidubce.com/rest/2.0/ocr/v1/accurate"
+        self._limiter = get_provider_limiter('baidu_ocr', 'accurate')
         
         if api_key.startswith('bce-v3/'):
             logger.info("✅ 初始化百度高精度OCR Provider (使用BCEv3 API Key)")
@@ -207,7 +209,8 @@ class BaiduAccurateOCRProvider:
             data = '&'.join([f"{k}={v}" for k, v in form_data.items()])
             
             logger.info("🌐 发送请求到百度高精度OCR API...")
-            response = requests.post(url, headers=headers, data=data, timeout=60)
+            with self._limiter.slot():
+                response = requests.post(url, headers=headers, data=data, timeout=60)
             response.raise_for_status()
             
             result = response.json()
@@ -216,6 +219,8 @@ class BaiduAccurateOCRProvider:
             if 'error_code' in result:
                 error_msg = result.get('error_msg', 'Unknown error')
                 error_code = result.get('error_code')
+                if error_code in BAIDU_QPS_LIMIT_CODES:
+                    self._limiter.report_throttled()
                 logger.error(f"❌ 百度API错误: [{error_code}] {error_msg}")
                 raise Exception(f"Baidu API error [{error_code}]: {error_msg}")
             
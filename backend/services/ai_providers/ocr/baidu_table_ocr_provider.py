@@ -12,6 +12,7 @@ from typing import Dict, List, Any, Optional
 from PIL import Image
 import io
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from ..rate_limiter import get_provider_limiter, BAIDU_QPS_LIMIT_CODES
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +31,7 @@ class BaiduTableOCRProvider:
         self.api_key = api_key
         self.api_secret = api_secret
         self.api_url = "https://aip.baidubce.com/rest/2.0/ocr/v1/table"
+        self._limiter = get_provider_limiter('baidu_ocr', 'table')
         
         if api_key.startswith('bce-v3/'):
             logger.info("✅ 初始化百度表格OCR Provider (使用BCEv3 API Key)")
@@ -123,7 +125,8 @@ class BaiduTableOCRProvider:
             data = f"image={image_encoded}&cell_contents={'true' if cell_contents else 'false'}&return_excel={'true' if return_excel else 'false'}"
             
             logger.info(f"🌐 发送请求到百度表格OCR API...")
-            response = requests.post(url, headers=headers, data=data, timeout=60)
+            with self._limiter.slot():
+                response = requests.post(url, headers=headers, data=data, timeout=60)
             response.raise_for_status()
             
             result = response.json()
@@ -132,6 +135,8 @@ class BaiduTableOCRProvider:
             if 'error_code' in result:
                 error_msg = result.get('error_msg', 'Unknown error')
                 error_code = result.get('error_code')
+                if error_code in BAIDU_QPS_LIMIT_CODES:
+                    self._limiter.report_throttled()
                 logger.error(f"❌ 百度API错误: [{error_code}] {error_msg}")
                 raise Exception(f"Baidu API error [{error_code}]: {error_msg}")
             
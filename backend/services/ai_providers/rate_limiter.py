@@ -0,0 +1,318 @@
+"""
+Process-wide concurrency + rate limiting for AI provider calls
+
+Every provider call runs inside ``limiter.slot()`` (or ``limiter.aslot()`` for
+async providers). Limiters are shared per
+``provider/model`` key, so all tasks (image pools, description pools, caption
+pools, editability workers ...) draw from the same budget instead of each
+ThreadPoolExecutor multiplying in-flight calls.
+
+Each limiter combines:
+    - a concurrency cap (semaphore; optionally cross-process via flock slot files)
+    - a token bucket for requests-per-minute
+    - adaptive backoff: a 429 / Retry-After pauses the key and halves the
+      effective rate, which then recovers gradually on success
+
+Configuration (see Config):
+    PROVIDER_MAX_CONCURRENCY: default concurrent calls per key
+    PROVIDER_RPM: default requests per minute per key (0 = unlimited)
+    PROVIDER_LIMITS: per-key overrides, e.g.
+        "gemini/gemini-3-pro-image-preview=4:20,baidu_ocr/*=2:600"
+        (value is concurrency[:rpm])
+    PROVIDER_LIMIT_LOCK_DIR: if set, concurrency is shared by all processes
+        using the same directory (POSIX only; RPM stays per process)
+"""
+import asyncio
+import logging
+import os
+import random
+import re
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import fcntl  # POSIX only
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_MIN_RATE_FACTOR = 0.1
+_MAX_BACKOFF_SECONDS = 60.0
+
+# Baidu AI returns HTTP 200 with these error codes when over quota (4: cluster limit, 18: QPS limit)
+BAIDU_QPS_LIMIT_CODES = (4, 18)
+
+
+def parse_provider_limits(raw: str) -> Dict[str, Tuple[int, int]]:
+    """Parse ``"key=concurrency[:rpm],..."`` into ``{key: (concurrency, rpm)}``"""
+    result = {}
+    for item in (raw or '').split(','):
+        key, _, value = item.partition('=')
+        key = key.strip()
+        if not key or not value:
+            continue
+        parts = value.split(':')
+        try:
+            concurrency = int(parts[0])
+            rpm = int(parts[1]) if len(parts) > 1 else 0
+        except ValueError:
+            continue
+        if concurrency > 0:
+            result[key] = (concurrency, max(rpm, 0))
+    return result
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """Best-effort detection of HTTP 429 / quota errors across SDKs"""
+    for attr in ('status_code', 'code', 'status'):
+        if getattr(error, attr, None) == 429:
+            return True
+    response = getattr(error, 'response', None)
+    if getattr(response, 'status_code', None) == 429:
+        return True
+    text = str(error)
+    return bool(re.search(r'\b429\b', text)) or 'RESOURCE_EXHAUSTED' in text or 'Too Many Requests' in text
+
+
+def get_retry_after(error: Any) -> Optional[float]:
+    """Read a Retry-After header (seconds) from an SDK / requests exception or a response"""
+    # requests.Response is falsy for 4xx/5xx, so `or` would drop it
+    response = getattr(error, 'response', None)
+    if response is None:
+        response = error
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+    try:
+        value = headers.get('retry-after') or headers.get('Retry-After')
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class ProviderLimiter:
+    """Concurrency cap + token bucket + adaptive backoff for one provider/model key"""
+
+    def __init__(self, key: str, max_concurrency: int = 8, rpm: int = 0, lock_dir: Optional[str] = None):
+        self.key = key
+        self.max_concurrency = max(1, max_concurrency)
+        self.rpm = max(0, rpm)
+        self.lock_dir = lock_dir if (lock_dir and fcntl is not None) else None
+
+        self._semaphore = threading.BoundedSemaphore(self.max_concurrency)
+        self._lock = threading.Lock()
+        self._capacity = float(max(1, min(self.rpm, self.max_concurrency))) if self.rpm else 0.0
+        self._tokens = self._capacity
+        self._last_refill = time.monotonic()
+        self._rate_factor = 1.0
+        self._blocked_until = 0.0
+        self._consecutive_throttles = 0
+
+        # metrics
+        self._in_flight = 0
+        self._calls = 0
+        self._throttled = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, exist_ok=True)
+
+    @contextmanager
+    def slot(self):
+        """Hold one concurrency slot + one request token for the duration of a call"""
+        start = time.monotonic()
+        self._semaphore.acquire()
+        lock_file = None
+        try:
+            lock_file = self._acquire_process_slot()
+            self._wait_for_token()
+            self._on_enter(start)
+            try:
+                yield
+            except Exception as e:
+                self._on_error(e)
+                raise
+            else:
+                self.report_success()
+            finally:
+                self._on_exit()
+        finally:
+            self._release(lock_file)
+
+    @asynccontextmanager
+    async def aslot(self):
+        """Async variant of :meth:`slot`: waits without blocking the event loop"""
+        start = time.monotonic()
+        # The semaphore is shared with threaded callers, so poll instead of blocking
+        while not self._semaphore.acquire(blocking=False):
+            await asyncio.sleep(0.02 + random.random() * 0.03)
+        lock_file = None
+        try:
+            while self.lock_dir and lock_file is None:
+                lock_file = self._try_process_slot()
+                if lock_file is None:
+                    await asyncio.sleep(0.05 + random.random() * 0.1)
+            while True:
+                delay = self._token_delay()
+                if delay <= 0:
+                    break
+                await asyncio.sleep(min(delay, 5.0))
+            self._on_enter(start)
+            try:
+                yield
+            except Exception as e:
+                self._on_error(e)
+                raise
+            else:
+                self.report_success()
+            finally:
+                self._on_exit()
+        finally:
+            self._release(lock_file)
+
+    def _on_enter(self, start: float):
+        waited = time.monotonic() - start
+        with self._lock:
+            self._in_flight += 1
+            self._calls += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        if waited > 1.0:
+            logger.info(f"[RateLimit] {self.key} waited {waited:.1f}s for a slot")
+
+    def _on_error(self, error: Exception):
+        if is_rate_limit_error(error):
+            self.report_throttled(get_retry_after(error))
+
+    def _on_exit(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def _release(self, lock_file):
+        if lock_file is not None:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            finally:
+                lock_file.close()
+        self._semaphore.release()
+
+    def report_throttled(self, retry_after: Optional[float] = None):
+        """Back off after a 429 / quota error (also callable for non-exception signals)"""
+        with self._lock:
+            self._throttled += 1
+            self._consecutive_throttles += 1
+            self._rate_factor = max(_MIN_RATE_FACTOR, self._rate_factor * 0.5)
+            if retry_after is None:
+                retry_after = min(_MAX_BACKOFF_SECONDS, 2 ** self._consecutive_throttles)
+            # Jitter so that waiting threads don't retry in lockstep
+            delay = retry_after * (1.0 + random.random() * 0.25)
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+            self._tokens = 0.0
+            self._last_refill = self._blocked_until
+        logger.warning(f"[RateLimit] {self.key} throttled by provider, pausing {delay:.1f}s "
+                       f"(rate factor {self._rate_factor:.2f})")
+
+    def report_success(self):
+        with self._lock:
+            self._consecutive_throttles = 0
+            if self._rate_factor < 1.0:
+                self._rate_factor = min(1.0, self._rate_factor + 0.05)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'max_concurrency': self.max_concurrency,
+                'rpm': self.rpm,
+                'in_flight': self._in_flight,
+                'calls': self._calls,
+                'throttled': self._throttled,
+                'rate_factor': round(self._rate_factor, 2),
+                'avg_wait_seconds': round(self._wait_total / self._calls, 3) if self._calls else 0.0,
+                'max_wait_seconds': round(self._wait_max, 3),
+            }
+
+    def _token_delay(self) -> float:
+        """Take a token if one is available (returns 0), else return how long to wait"""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._blocked_until:
+                return self._blocked_until - now
+            if not self.rpm:
+                return 0.0
+            rate = self.rpm * self._rate_factor / 60.0
+            self._tokens = min(self._capacity, self._tokens + (now - self._last_refill) * rate)
+            self._last_refill = now
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return 0.0
+            return (1.0 - self._tokens) / rate
+
+    def _wait_for_token(self):
+        while True:
+            delay = self._token_delay()
+            if delay <= 0:
+                return
+            time.sleep(min(delay, 5.0))
+
+    def _try_process_slot(self):
+        """Try to take one of N flock'ed slot files so the cap holds across processes"""
+        safe_key = re.sub(r'[^A-Za-z0-9_.-]', '_', self.key)
+        for i in range(self.max_concurrency):
+            handle = open(os.path.join(self.lock_dir, f"{safe_key}.{i}.lock"), 'a+')
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return handle
+            except OSError:
+                handle.close()
+        return None
+
+    def _acquire_process_slot(self):
+        if not self.lock_dir:
+            return None
+        while True:
+            handle = self._try_process_slot()
+            if handle is not None:
+                return handle
+            time.sleep(0.05 + random.random() * 0.1)
+
+
+_limiters: Dict[str, ProviderLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_provider_limiter(provider: str, model: str = '*') -> ProviderLimiter:
+    """
+    Get the shared limiter for ``provider/model``
+
+    Limits are resolved from PROVIDER_LIMITS (exact key, then ``provider/*``),
+    falling back to PROVIDER_MAX_CONCURRENCY / PROVIDER_RPM.
+    """
+    key = f"{provider}/{model or '*'}"
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            from config import get_config
+            config = get_config()
+            overrides = parse_provider_limits(getattr(config, 'PROVIDER_LIMITS', ''))
+            concurrency, rpm = overrides.get(key) or overrides.get(f"{provider}/*") or (
+                getattr(config, 'PROVIDER_MAX_CONCURRENCY', 8),
+                getattr(config, 'PROVIDER_RPM', 0),
+            )
+            limiter = ProviderLimiter(
+                key, max_concurrency=concurrency, rpm=rpm,
+                lock_dir=getattr(config, 'PROVIDER_LIMIT_LOCK_DIR', '') or None
+            )
+            _limiters[key] = limiter
+            logger.info(f"[RateLimit] {key}: concurrency={limiter.max_concurrency}, rpm={limiter.rpm or 'unlimited'}")
+        return limiter
+
+
+def get_rate_limiter_stats() -> Dict[str, Dict[str, Any]]:
+    """Snapshot of all limiter metrics (queue wait time, throttling, in-flight calls)"""
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {limiter.key: limiter.stats() for limiter in limiters}
@@ -1,6 +1,7 @@
 """
 Abstract base class for text generation providers
 """
+import asyncio
 from abc import ABC, abstractmethod
 
 
@@ -20,3 +21,27 @@ class TextProvider(ABC):
             Generated text content
         """
         pass
+
+    async def agenerate_text(self, prompt: str, thinking_budget: int = 1000) -> str:
+        """
+        Async variant of generate_text
+
+        Providers with a native async client override this; the default runs
+        the blocking call in the event loop's default executor.
+        """
+        return await asyncio.to_thread(self.generate_text, prompt, thinking_budget)
+
+    def generate_text_with_prefix(self, prefix: str, suffix: str, thinking_budget: int = 1000) -> str:
+        """
+        Generate text for prefix + suffix, where prefix is shared by many calls
+
+        Per-page prompts put the project-wide content first so provider-side
+        prefix caching can reuse it across pages. The default sends the
+        concatenation (OpenAI-compatible APIs cache identical prefixes
+        automatically); GenAITextProvider can attach an explicit cache.
+        """
+        return self.generate_text(prefix + suffix, thinking_budget)
+
+    async def agenerate_text_with_prefix(self, prefix: str, suffix: str, thinking_budget: int = 1000) -> str:
+        """Async variant of generate_text_with_prefix"""
+        return await self.agenerate_text(prefix + suffix, thinking_budget)
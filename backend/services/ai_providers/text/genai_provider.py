@@ -5,11 +5,17 @@ Supports two modes:
 - Google AI Studio: Uses API key authentication
 - Vertex AI: Uses GCP service account authentication
 """
+import asyncio
+import hashlib
 import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple
 from google import genai
 from google.genai import types
 from tenacity import retry, stop_after_attempt, wait_exponential
 from .base import TextProvider
+from ..rate_limiter import get_provider_limiter
 from config import get_config
 
 logger = logging.getLogger(__name__)
@@ -62,6 +68,17 @@ class GenAITextProvider(TextProvider):
             )
 
         self.model = model
+        self._limiter = get_provider_limiter('vertex' if vertexai else 'gemini', model)
+
+        # 显式上下文缓存（cachedContents）：同一共享前缀只创建一次，供整批页面复用
+        config = get_config()
+        self._context_cache_enabled = getattr(config, 'GENAI_CONTEXT_CACHE_ENABLED', False)
+        self._context_cache_ttl = getattr(config, 'GENAI_CONTEXT_CACHE_TTL_SECONDS', 900)
+        self._context_cache_min_chars = getattr(config, 'GENAI_CONTEXT_CACHE_MIN_CHARS', 8000)
+        # 前缀哈希 -> (cachedContent 名称，创建失败时为 None, 过期时间)
+        self._context_caches: Dict[str, Tuple[Optional[str], float]] = {}
+        self._context_cache_locks: Dict[str, threading.Lock] = {}
+        self._context_cache_lock = threading.Lock()
     
     def _build_config(self, thinking_budget: int = 0, response_mime_type: str | None = None):
         """
@@ -73,6 +90,53 @@ class GenAITextProvider(TextProvider):
         if response_mime_type:
             config_params['response_mime_type'] = response_mime_type
         return types.GenerateContentConfig(**config_params) if config_params else None
+
+    def _cached_prefix(self, prefix: str) -> Optional[str]:
+        """
+        cachedContent name holding prefix (created on first use), or None
+
+        Prefixes shorter than GENAI_CONTEXT_CACHE_MIN_CHARS are not cached (the
+        API rejects small caches); a prefix whose cache could not be created is
+        not retried until the TTL has passed.
+        """
+        if not self._context_cache_enabled or len(prefix) < self._context_cache_min_chars:
+            return None
+        key = hashlib.sha256(f"{self.model}\0{prefix}".encode('utf-8')).hexdigest()
+        with self._context_cache_lock:
+            entry = self._context_caches.get(key)
+            if entry is not None and entry[1] > time.time():
+                return entry[0]
+            key_lock = self._context_cache_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            entry = self._context_caches.get(key)
+            if entry is not None and entry[1] > time.time():
+                return entry[0]
+            name = None
+            try:
+                cached = self.client.caches.create(
+                    model=self.model,
+                    config=types.CreateCachedContentConfig(
+                        contents=[prefix],
+                        ttl=f"{self._context_cache_ttl}s",
+                        display_name=f"prompt-prefix-{key[:16]}",
+                    ),
+                )
+                name = cached.name
+                logger.info(f"Created GenAI context cache {name} for {len(prefix)}-char prompt prefix")
+            except Exception as e:
+                logger.warning(f"GenAI context cache unavailable, sending full prompts: {e}")
+            # 提前一分钟视为过期，避免引用服务端刚失效的缓存
+            expires_at = time.time() + max(self._context_cache_ttl - 60, 0)
+            with self._context_cache_lock:
+                self._context_caches[key] = (name, expires_at)
+                self._context_cache_locks.pop(key, None)
+            return name
+
+    def _drop_cached_prefix(self, name: str):
+        with self._context_cache_lock:
+            for key, (cached_name, _) in list(self._context_caches.items()):
+                if cached_name == name:
+                    del self._context_caches[key]
     
     @retry(
         stop=stop_after_attempt(get_config().GENAI_MAX_RETRIES + 1),
@@ -90,22 +154,108 @@ class GenAITextProvider(TextProvider):
         Returns:
             Generated text
         """
-        response = self.client.models.generate_content(
-            model=self.model,
-            contents=prompt,
-            config=self._build_config(thinking_budget=thinking_budget),
-        )
+        with self._limiter.slot():
+            response = self.client.models.generate_content(
+                model=self.model,
+                contents=prompt,
+                config=self._build_config(thinking_budget=thinking_budget),
+            )
+        return response.text
+
+    @retry(
+        stop=stop_after_attempt(get_config().GENAI_MAX_RETRIES + 1),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        reraise=True
+    )
+    async def agenerate_text(self, prompt: str, thinking_budget: int = 0) -> str:
+        """
+        Async variant of generate_text using the SDK's aio client
+        """
+        async with self._limiter.aslot():
+            response = await self.client.aio.models.generate_content(
+                model=self.model,
+                contents=prompt,
+                config=self._build_config(thinking_budget=thinking_budget),
+            )
         return response.text
     
+    @retry(
+        stop=stop_after_attempt(get_config().GENAI_MAX_RETRIES + 1),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        reraise=True
+    )
+    def generate_text_with_prefix(self, prefix: str, suffix: str, thinking_budget: int = 0) -> str:
+        """
+        Generate text, serving the shared prefix from a context cache when enabled
+
+        Falls back to sending prefix + suffix if no cache is available or the
+        cached call fails (e.g. the cache expired server-side).
+        """
+        cache_name = self._cached_prefix(prefix)
+        if cache_name:
+            config = self._build_config(thinking_budget=thinking_budget) or types.GenerateContentConfig()
+            config.cached_content = cache_name
+            try:
+                with self._limiter.slot():
+                    response = self.client.models.generate_content(
+                        model=self.model,
+                        contents=suffix,
+                        config=config,
+                    )
+                return response.text
+            except Exception as e:
+                logger.warning(f"Cached-content call failed ({cache_name}), retrying with full prompt: {e}")
+                self._drop_cached_prefix(cache_name)
+        with self._limiter.slot():
+            response = self.client.models.generate_content(
+                model=self.model,
+                contents=prefix + suffix,
+                config=self._build_config(thinking_budget=thinking_budget),
+            )
+        return response.text
+
+    @retry(
+        stop=stop_after_attempt(get_config().GENAI_MAX_RETRIES + 1),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        reraise=True
+    )
+    async def agenerate_text_with_prefix(self, prefix: str, suffix: str, thinking_budget: int = 0) -> str:
+        """
+        Async variant of generate_text_with_prefix
+        """
+        cache_name = await asyncio.to_thread(self._cached_prefix, prefix)
+        if cache_name:
+            config = self._build_config(thinking_budget=thinking_budget) or types.GenerateContentConfig()
+            config.cached_content = cache_name
+            try:
+                async with self._limiter.aslot():
+                    response = await self.client.aio.models.generate_content(
+                        model=self.model,
+                        contents=suffix,
+                        config=config,
+                    )
+                return response.text
+            except Exception as e:
+                logger.warning(f"Cached-content call failed ({cache_name}), retrying with full prompt: {e}")
+                self._drop_cached_prefix(cache_name)
+        async with self._limiter.aslot():
+            response = await self.client.aio.models.generate_content(
+                model=self.model,
+                contents=prefix + suffix,
+                config=self._build_config(thinking_budget=thinking_budget),
+            )
+        return response.text
+
     def generate_text_json(self, prompt: str, thinking_budget: int = 0) -> str:
         """
         Generate text with JSON response MIME type.
         """
-        response = self.client.models.generate_content(
-            model=self.model,
-            contents=prompt,
-            config=self._build_config(thinking_budget=thinking_budget, response_mime_type="application/json"),
-        )
+        with self._limiter.slot():
+            response = self.client.models.generate_content(
+                model=self.model,
+                contents=prompt,
+                config=self._build_config(thinking_budget=thinking_budget, response_mime_type="application/json"),
+            )
         return response.text
     
     @retry(
@@ -133,11 +283,12 @@ class GenAITextProvider(TextProvider):
         # 构建多模态内容
         contents = [img, prompt]
         
-        response = self.client.models.generate_content(
-            model=self.model,
-            contents=contents,
-            config=self._build_config(thinking_budget=thinking_budget),
-        )
+        with self._limiter.slot():
+            response = self.client.models.generate_content(
+                model=self.model,
+                contents=contents,
+                config=self._build_config(thinking_budget=thinking_budget),
+            )
         return response.text
     
     def generate_text_json_with_images(self, prompt: str, images: list, thinking_budget: int = 0) -> str:
@@ -152,9 +303,10 @@ class GenAITextProvider(TextProvider):
             except Exception:
                 continue
         contents.append(prompt)
-        response = self.client.models.generate_content(
-            model=self.model,
-            contents=contents,
-            config=self._build_config(thinking_budget=thinking_budget, response_mime_type="application/json"),
-        )
+        with self._limiter.slot():
+            response = self.client.models.generate_content(
+                model=self.model,
+                contents=contents,
+                config=self._build_config(thinking_budget=thinking_budget, response_mime_type="application/json"),
+            )
         return response.text
\ No newline at end of file
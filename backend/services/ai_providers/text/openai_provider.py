@@ -8,8 +8,9 @@ from pathlib import Path
 from typing import List, Optional
 
 from PIL import Image
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 from .base import TextProvider
+from ..rate_limiter import get_provider_limiter
 from config import get_config
 
 logger = logging.getLogger(__name__)
@@ -78,6 +79,21 @@ class OpenAITextProvider(TextProvider):
             max_retries=get_config().OPENAI_MAX_RETRIES  # set max retries from config
         )
         self.model = model
+        self._limiter = get_provider_limiter('openai', model)
+        self._async_client_kwargs = dict(
+            api_key=api_key,
+            base_url=api_base,
+            timeout=get_config().OPENAI_TIMEOUT,
+            max_retries=get_config().OPENAI_MAX_RETRIES
+        )
+        self._async_client = None
+
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """Lazily created: only async batch runs need it"""
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(**self._async_client_kwargs)
+        return self._async_client
     
     def generate_text(self, prompt: str, thinking_budget: int = 0) -> str:
         """
@@ -90,12 +106,26 @@ class OpenAITextProvider(TextProvider):
         Returns:
             Generated text
         """
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "user", "content": prompt}
-            ]
-        )
+        with self._limiter.slot():
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ]
+            )
+        return response.choices[0].message.content
+
+    async def agenerate_text(self, prompt: str, thinking_budget: int = 0) -> str:
+        """
+        Async variant of generate_text
+        """
+        async with self._limiter.aslot():
+            response = await self.async_client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ]
+            )
         return response.choices[0].message.content
 
     def generate_with_image(self, prompt: str, image_path: str, thinking_budget: int = 0) -> str:
@@ -121,16 +151,17 @@ class OpenAITextProvider(TextProvider):
         if not image_parts:
             return self.generate_text(prompt, thinking_budget=thinking_budget)
 
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        *image_parts,
-                        {"type": "text", "text": prompt},
-                    ],
-                }
-            ],
-        )
+        with self._limiter.slot():
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": [
+                            *image_parts,
+                            {"type": "text", "text": prompt},
+                        ],
+                    }
+                ],
+            )
         return response.choices[0].message.content
@@ -6,16 +6,17 @@ TODO: use structured output API
 import os
 import json
 import re
+import asyncio
 import logging
 import requests
-from typing import List, Dict, Optional, Union, Any
+from typing import List, Dict, Optional, Union, Any, Callable, Awaitable, Tuple
 from textwrap import dedent
 from PIL import Image
 from tenacity import retry, stop_after_attempt, retry_if_exception_type
 from .prompts import (
     get_outline_generation_prompt,
     get_outline_parsing_prompt,
-    get_page_description_prompt,
+    get_page_description_prompt_parts,
     get_image_generation_prompt,
     get_image_edit_prompt,
     get_template_style_prompt,
@@ -29,6 +30,8 @@ from .prompts import (
     get_xhs_image_prompt
 )
 from .ai_providers import get_text_provider, get_image_provider, TextProvider, ImageProvider
+from .ai_providers.image.ref_image_cache import get_ref_image_cache
+from .response_cache import get_memory_response_cache, get_response_cache
 from config import get_config
 
 logger = logging.getLogger(__name__)
@@ -96,6 +99,15 @@ def _extract_json_candidate(text: str) -> str:
     return raw[start:].strip()
 
 
+def _parse_json(cleaned_text: str) -> Union[Dict, List]:
+    """json.loads with a warning; raising lets @retry regenerate (and keeps it out of the cache)"""
+    try:
+        return json.loads(cleaned_text)
+    except json.JSONDecodeError as e:
+        logger.warning(f"JSON解析失败，将重新生成。原始文本: {cleaned_text[:200]}... 错误: {str(e)}")
+        raise
+
+
 class ProjectContext:
     """项目上下文数据类，统一管理 AI 需要的所有项目信息"""
     
@@ -126,6 +138,41 @@ class ProjectContext:
             self.template_style = project_or_dict.get('template_style')
         
         self.reference_files_content = reference_files_content or []
+        self._reference_retriever = None
+    
+    def reference_files_for(self, query: str) -> List[Dict[str, str]]:
+        """
+        参考文件中与 query（通常是某一页的大纲）相关的部分，用于逐页的提示词
+        
+        参考文件总长度不超过 REFERENCE_CONTEXT_FULL_MAX_CHARS 时原样返回全部内容；
+        否则只返回 BM25 检索出的 top-k 文本块（见 services/reference_index.py）；
+        没有任何文本块命中时（如中文参考文件 + 英文大纲），退回到各文件开头的文本块。
+        检索索引在同一个 ProjectContext 内只构建一次，供整份 deck 的所有页面复用。
+        """
+        config = get_config()
+        if self.uses_full_reference_files():
+            return self.reference_files_content
+        try:
+            if self._reference_retriever is None:
+                from .reference_index import ReferenceRetriever, reference_index_dir
+                self._reference_retriever = ReferenceRetriever(
+                    self.reference_files_content,
+                    index_dir=reference_index_dir(),
+                    max_chars=getattr(config, 'REFERENCE_CHUNK_CHARS', 1200),
+                )
+            return self._reference_retriever.select(
+                query,
+                top_k=getattr(config, 'REFERENCE_CONTEXT_TOP_K', 8),
+                fallback_chars=getattr(config, 'REFERENCE_CONTEXT_FULL_MAX_CHARS', 12000),
+            )
+        except Exception as e:
+            logger.warning(f"参考文件检索失败，使用完整内容: {e}")
+            return self.reference_files_content
+    
+    def uses_full_reference_files(self) -> bool:
+        """参考文件总长度不超过 REFERENCE_CONTEXT_FULL_MAX_CHARS 时，每一页都使用全文（可放入共享前缀）"""
+        total_chars = sum(len(f.get('content') or '') for f in self.reference_files_content)
+        return total_chars <= getattr(get_config(), 'REFERENCE_CONTEXT_FULL_MAX_CHARS', 12000)
     
     def to_dict(self) -> Dict:
         """转换为字典，方便传递"""
@@ -198,6 +245,35 @@ class AIService:
             如果启用图像推理则返回配置的 budget，否则返回 0
         """
         return self.image_thinking_budget if self.enable_image_reasoning else 0
+
+    def _text_cache_model(self) -> str:
+        return f"{type(self.text_provider).__name__}:{getattr(self.text_provider, 'model', self.text_model)}"
+
+    def _cached_text(self, kind: str, prompt: str, thinking_budget: int, generate: Callable[[], str],
+                     image_paths: Optional[List[str]] = None,
+                     validate: Optional[Callable[[str], Any]] = None) -> str:
+        """
+        通过响应缓存执行文本生成（相同模型/提示词/思考预算/附图时直接复用结果）
+
+        validate 抛出异常时结果不会写入缓存（如 JSON 解析失败）
+        """
+        cache = get_response_cache()
+        if cache is None:
+            value = generate()
+            if validate is not None:
+                validate(value)
+            return value
+        key = cache.make_key(self._text_cache_model(), kind, prompt, thinking_budget, image_paths)
+        return cache.get_or_compute(key, generate, validate)
+
+    async def _acached_text(self, kind: str, prompt: str, thinking_budget: int,
+                            generate: Callable[[], Awaitable[str]]) -> str:
+        """Async variant of _cached_text (no single-flight: concurrent misses each call the model)"""
+        cache = get_response_cache()
+        if cache is None:
+            return await generate()
+        key = cache.make_key(self._text_cache_model(), kind, prompt, thinking_budget)
+        return await cache.aget_or_compute(key, generate)
     
     @staticmethod
     def extract_image_urls_from_markdown(text: str) -> List[str]:
@@ -276,17 +352,16 @@ class AIService:
         """
         # 调用AI生成文本（根据 enable_text_reasoning 配置调整 thinking_budget）
         actual_budget = self._get_text_thinking_budget()
-        if hasattr(self.text_provider, 'generate_text_json'):
-            response_text = self.text_provider.generate_text_json(prompt, thinking_budget=actual_budget)
-        else:
-            response_text = self.text_provider.generate_text(prompt, thinking_budget=actual_budget)
 
-        cleaned_text = _extract_json_candidate(response_text)
-        try:
-            return json.loads(cleaned_text)
-        except json.JSONDecodeError as e:
-            logger.warning(f"JSON解析失败，将重新生成。原始文本: {cleaned_text[:200]}... 错误: {str(e)}")
-            raise
+        def _generate() -> str:
+            if hasattr(self.text_provider, 'generate_text_json'):
+                response_text = self.text_provider.generate_text_json(prompt, thinking_budget=actual_budget)
+            else:
+                response_text = self.text_provider.generate_text(prompt, thinking_budget=actual_budget)
+            return _extract_json_candidate(response_text)
+
+        cleaned_text = self._cached_text('json', prompt, actual_budget, _generate, validate=_parse_json)
+        return json.loads(cleaned_text)
     
     @retry(
         stop=stop_after_attempt(3),
@@ -311,34 +386,34 @@ class AIService:
         """
         # 调用AI生成文本（带图片），根据 enable_text_reasoning 配置调整 thinking_budget
         actual_budget = self._get_text_thinking_budget()
-        if hasattr(self.text_provider, 'generate_text_json_with_images'):
-            response_text = self.text_provider.generate_text_json_with_images(
-                prompt=prompt,
-                images=[image_path],
-                thinking_budget=actual_budget
-            )
-        elif hasattr(self.text_provider, 'generate_with_image'):
-            response_text = self.text_provider.generate_with_image(
-                prompt=prompt,
-                image_path=image_path,
-                thinking_budget=actual_budget
-            )
-        elif hasattr(self.text_provider, 'generate_text_with_images'):
-            response_text = self.text_provider.generate_text_with_images(
-                prompt=prompt,
-                images=[image_path],
-                thinking_budget=actual_budget
-            )
-        else:
-            raise ValueError("text_provider 不支持图片输入")
-        
-        cleaned_text = _extract_json_candidate(response_text)
-        
-        try:
-            return json.loads(cleaned_text)
-        except json.JSONDecodeError as e:
-            logger.warning(f"JSON解析失败（带图片），将重新生成。原始文本: {cleaned_text[:200]}... 错误: {str(e)}")
-            raise
+
+        def _generate() -> str:
+            if hasattr(self.text_provider, 'generate_text_json_with_images'):
+                response_text = self.text_provider.generate_text_json_with_images(
+                    prompt=prompt,
+                    images=[image_path],
+                    thinking_budget=actual_budget
+                )
+            elif hasattr(self.text_provider, 'generate_with_image'):
+                response_text = self.text_provider.generate_with_image(
+                    prompt=prompt,
+                    image_path=image_path,
+                    thinking_budget=actual_budget
+                )
+            elif hasattr(self.text_provider, 'generate_text_with_images'):
+                response_text = self.text_provider.generate_text_with_images(
+                    prompt=prompt,
+                    images=[image_path],
+                    thinking_budget=actual_budget
+                )
+            else:
+                raise ValueError("text_provider 不支持图片输入")
+            return _extract_json_candidate(response_text)
+
+        cleaned_text = self._cached_text(
+            'json', prompt, actual_budget, _generate, image_paths=[image_path], validate=_parse_json
+        )
+        return json.loads(cleaned_text)
 
     @retry(
         stop=stop_after_attempt(3),
@@ -353,39 +428,39 @@ class AIService:
         actual_budget = self._get_text_thinking_budget()
         image_paths = [p for p in (image_paths or []) if p]
 
-        if not image_paths:
-            # Fallback to text-only
-            if hasattr(self.text_provider, 'generate_text_json'):
-                response_text = self.text_provider.generate_text_json(prompt, thinking_budget=actual_budget)
+        def _generate() -> str:
+            if not image_paths:
+                # Fallback to text-only
+                if hasattr(self.text_provider, 'generate_text_json'):
+                    response_text = self.text_provider.generate_text_json(prompt, thinking_budget=actual_budget)
+                else:
+                    response_text = self.text_provider.generate_text(prompt, thinking_budget=actual_budget)
+            elif hasattr(self.text_provider, 'generate_text_json_with_images'):
+                response_text = self.text_provider.generate_text_json_with_images(
+                    prompt=prompt,
+                    images=image_paths,
+                    thinking_budget=actual_budget
+                )
+            elif hasattr(self.text_provider, 'generate_text_with_images'):
+                response_text = self.text_provider.generate_text_with_images(
+                    prompt=prompt,
+                    images=image_paths,
+                    thinking_budget=actual_budget
+                )
+            elif hasattr(self.text_provider, 'generate_with_image') and len(image_paths) == 1:
+                response_text = self.text_provider.generate_with_image(
+                    prompt=prompt,
+                    image_path=image_paths[0],
+                    thinking_budget=actual_budget
+                )
             else:
-                response_text = self.text_provider.generate_text(prompt, thinking_budget=actual_budget)
-        elif hasattr(self.text_provider, 'generate_text_json_with_images'):
-            response_text = self.text_provider.generate_text_json_with_images(
-                prompt=prompt,
-                images=image_paths,
-                thinking_budget=actual_budget
-            )
-        elif hasattr(self.text_provider, 'generate_text_with_images'):
-            response_text = self.text_provider.generate_text_with_images(
-                prompt=prompt,
-                images=image_paths,
-                thinking_budget=actual_budget
-            )
-        elif hasattr(self.text_provider, 'generate_with_image') and len(image_paths) == 1:
-            response_text = self.text_provider.generate_with_image(
-                prompt=prompt,
-                image_path=image_paths[0],
-                thinking_budget=actual_budget
-            )
-        else:
-            raise ValueError("text_provider 不支持多图输入")
+                raise ValueError("text_provider 不支持多图输入")
+            return _extract_json_candidate(response_text)
 
-        cleaned_text = _extract_json_candidate(response_text)
-        try:
-            return json.loads(cleaned_text)
-        except json.JSONDecodeError as e:
-            logger.warning(f"JSON解析失败（多图），将重新生成。原始文本: {cleaned_text[:200]}... 错误: {str(e)}")
-            raise
+        cleaned_text = self._cached_text(
+            'json', prompt, actual_budget, _generate, image_paths=image_paths, validate=_parse_json
+        )
+        return json.loads(cleaned_text)
     
     @staticmethod
     def _convert_mineru_path_to_local(mineru_path: str) -> Optional[str]:
@@ -494,9 +569,47 @@ class AIService:
         Returns:
             Text description for the page
         """
+        prefix, suffix = self._page_description_prompt(
+            project_context, outline, page_outline, page_index,
+            language=language, page_type=page_type, extra_requirements=extra_requirements
+        )
+        
+        # 根据 enable_text_reasoning 配置调整 thinking_budget
+        actual_budget = self._get_text_thinking_budget()
+        # 共享前缀单独传给 provider，便于各页复用服务端上下文缓存
+        response_text = self._cached_text(
+            'text', prefix + suffix, actual_budget,
+            lambda: self.text_provider.generate_text_with_prefix(prefix, suffix, thinking_budget=actual_budget)
+        )
+        
+        return dedent(response_text)
+
+    async def agenerate_page_description(self, project_context: ProjectContext, outline: List[Dict],
+                                         page_outline: Dict, page_index: int,
+                                         language='zh', page_type: str = None,
+                                         extra_requirements: Optional[str] = None) -> str:
+        """
+        Async variant of generate_page_description
+        """
+        prefix, suffix = self._page_description_prompt(
+            project_context, outline, page_outline, page_index,
+            language=language, page_type=page_type, extra_requirements=extra_requirements
+        )
+        actual_budget = self._get_text_thinking_budget()
+        response_text = await self._acached_text(
+            'text', prefix + suffix, actual_budget,
+            lambda: self.text_provider.agenerate_text_with_prefix(prefix, suffix, thinking_budget=actual_budget)
+        )
+        return dedent(response_text)
+
+    @staticmethod
+    def _page_description_prompt(project_context: ProjectContext, outline: List[Dict],
+                                 page_outline: Dict, page_index: int,
+                                 language='zh', page_type: str = None,
+                                 extra_requirements: Optional[str] = None) -> Tuple[str, str]:
         part_info = f"\nThis page belongs to: {page_outline['part']}" if 'part' in page_outline else ""
         
-        desc_prompt = get_page_description_prompt(
+        return get_page_description_prompt_parts(
             project_context=project_context,
             outline=outline,
             page_outline=page_outline,
@@ -506,12 +619,6 @@ class AIService:
             page_type=page_type,
             extra_requirements=extra_requirements
         )
-        
-        # 根据 enable_text_reasoning 配置调整 thinking_budget
-        actual_budget = self._get_text_thinking_budget()
-        response_text = self.text_provider.generate_text(desc_prompt, thinking_budget=actual_budget)
-        
-        return dedent(response_text)
 
     def generate_template_style(self, project_context: ProjectContext,
                                 outline_text: str = "",
@@ -537,9 +644,54 @@ class AIService:
             existing_template_style=existing_template_style,
             language=language
         )
+        return self._generate_template_style_from_prompt(style_prompt)
+
+    def _generate_template_style_from_prompt(self, style_prompt: str) -> str:
         actual_budget = self._get_text_thinking_budget()
-        response_text = self.text_provider.generate_text(style_prompt, thinking_budget=actual_budget)
+        response_text = self._cached_text(
+            'text', style_prompt, actual_budget,
+            lambda: self.text_provider.generate_text(style_prompt, thinking_budget=actual_budget)
+        )
         return dedent(response_text).strip()
+
+    def refine_template_style(self, project_context: ProjectContext, base_style: str,
+                              outline_text: str = "",
+                              extra_requirements: Optional[str] = None,
+                              language: str = None) -> str:
+        """
+        整理/补全用户已有的风格描述（不落库，不覆盖用户手写风格）
+
+        批量生成在前端是逐页请求：结果通过响应缓存（'refine_style' 类型）按风格提示词复用，
+        只有第一页触发调用，保证各页风格一致；关闭响应缓存时改用进程内缓存，同样生效。
+        force_regenerate（bypass_response_cache）时重新整理；
+        调用失败时回退到原始风格描述（不写入缓存，下一页会重试）
+        """
+        base_style = (base_style or "").strip()
+        if not base_style:
+            return ""
+        style_prompt = get_template_style_prompt(
+            project_context=project_context,
+            outline_text=outline_text,
+            extra_requirements=extra_requirements,
+            existing_template_style=base_style,
+            language=language
+        )
+        actual_budget = self._get_text_thinking_budget()
+
+        def generate() -> str:
+            return dedent(self.text_provider.generate_text(style_prompt, thinking_budget=actual_budget) or "").strip()
+
+        def validate(refined: str):
+            if not refined:
+                raise ValueError("empty refined template style")
+
+        cache = get_response_cache() or get_memory_response_cache()
+        key = cache.make_key(self._text_cache_model(), 'refine_style', style_prompt, actual_budget)
+        try:
+            return cache.get_or_compute(key, generate, validate)
+        except Exception:
+            logger.exception("Failed to refine template style; falling back to base style")
+            return base_style
     
     def generate_outline_text(self, outline: List[Dict]) -> str:
         """
@@ -617,19 +769,50 @@ class AIService:
         """
         Generate infographic blueprint text to compress content before image generation.
         """
-        cleaned_page_desc = self.remove_markdown_images(page_desc or "")
         blueprint_prompt = get_infographic_blueprint_prompt(
             project_context=project_context,
             outline_text=outline_text,
             page_title=page_title,
-            page_desc=cleaned_page_desc,
+            page_desc=self.remove_markdown_images(page_desc or ""),
             mode=mode,
             extra_requirements=extra_requirements,
             template_style=template_style,
             language=language
         )
         actual_budget = self._get_text_thinking_budget()
-        response_text = self.text_provider.generate_text(blueprint_prompt, thinking_budget=actual_budget)
+        response_text = self._cached_text(
+            'text', blueprint_prompt, actual_budget,
+            lambda: self.text_provider.generate_text(blueprint_prompt, thinking_budget=actual_budget)
+        )
+        return dedent(response_text).strip()
+
+    async def agenerate_infographic_blueprint(self,
+                                              project_context: ProjectContext,
+                                              outline_text: str = "",
+                                              page_title: str = "",
+                                              page_desc: str = "",
+                                              mode: str = "single",
+                                              extra_requirements: str = "",
+                                              template_style: str = "",
+                                              language: str = None) -> str:
+        """
+        Async variant of generate_infographic_blueprint
+        """
+        blueprint_prompt = get_infographic_blueprint_prompt(
+            project_context=project_context,
+            outline_text=outline_text,
+            page_title=page_title,
+            page_desc=self.remove_markdown_images(page_desc or ""),
+            mode=mode,
+            extra_requirements=extra_requirements,
+            template_style=template_style,
+            language=language
+        )
+        actual_budget = self._get_text_thinking_budget()
+        response_text = await self._acached_text(
+            'text', blueprint_prompt, actual_budget,
+            lambda: self.text_provider.agenerate_text(blueprint_prompt, thinking_budget=actual_budget)
+        )
         return dedent(response_text).strip()
 
     def generate_infographic_image_prompt(self,
@@ -721,54 +904,7 @@ class AIService:
                 logger.debug(f"Additional reference images: {len(additional_ref_images)}")
             logger.debug(f"Config - aspect_ratio: {aspect_ratio}, resolution: {resolution}")
 
-            # 构建参考图片列表
-            ref_images = []
-            
-            # 添加主参考图片（如果提供了路径）
-            if ref_image_path:
-                if not os.path.exists(ref_image_path):
-                    raise FileNotFoundError(f"Reference image not found: {ref_image_path}")
-                main_ref_image = Image.open(ref_image_path)
-                ref_images.append(main_ref_image)
-            
-            # 添加额外的参考图片
-            if additional_ref_images:
-                for ref_img in additional_ref_images:
-                    if isinstance(ref_img, Image.Image):
-                        # 已经是 PIL Image 对象
-                        ref_images.append(ref_img)
-                    elif isinstance(ref_img, str):
-                        # 可能是本地路径或 URL
-                        if os.path.exists(ref_img):
-                            # 本地路径
-                            ref_images.append(Image.open(ref_img))
-                        elif ref_img.startswith('http://') or ref_img.startswith('https://'):
-                            # URL，需要下载
-                            downloaded_img = self.download_image_from_url(ref_img)
-                            if downloaded_img:
-                                ref_images.append(downloaded_img)
-                            else:
-                                logger.warning(f"Failed to download image from URL: {ref_img}, skipping...")
-                        elif ref_img.startswith('/files/mineru/'):
-                            # MinerU 本地文件路径，需要转换为文件系统路径（支持前缀匹配）
-                            local_path = self._convert_mineru_path_to_local(ref_img)
-                            if local_path and os.path.exists(local_path):
-                                ref_images.append(Image.open(local_path))
-                                logger.debug(f"Loaded MinerU image from local path: {local_path}")
-                            else:
-                                logger.warning(f"MinerU image file not found (with prefix matching): {ref_img}, skipping...")
-                        elif ref_img.startswith('/files/'):
-                            # 上传目录内的本地文件（materials/pages/templates 等）
-                            from config import Config
-                            relative_path = ref_img.removeprefix('/files/').lstrip('/')
-                            local_path = os.path.join(Config.UPLOAD_FOLDER, relative_path)
-                            if os.path.exists(local_path):
-                                ref_images.append(Image.open(local_path))
-                                logger.debug(f"Loaded uploaded image from local path: {local_path}")
-                            else:
-                                logger.warning(f"Uploaded image file not found: {ref_img}, skipping...")
-                        else:
-                            logger.warning(f"Invalid image reference: {ref_img}, skipping...")
+            ref_images = self._load_ref_images(ref_image_path, additional_ref_images)
             
             logger.debug(f"Calling image provider for generation with {len(ref_images)} reference images...")
             logger.debug(f"Enable image reasoning/thinking: {self.enable_image_reasoning}, budget: {self._get_image_thinking_budget()}")
@@ -789,6 +925,87 @@ class AIService:
             logger.error(error_detail, exc_info=True)
             raise Exception(error_detail) from e
     
+    def _load_ref_images(self, ref_image_path: Optional[str],
+                         additional_ref_images: Optional[List[Union[str, Image.Image]]]) -> List[Image.Image]:
+        """
+        加载参考图片（模板图 + 额外参考图：本地路径、URL、/files/ 路径或 PIL Image）
+
+        本地文件经共享缓存加载（按路径 + mtime + 大小），同一批次的各页复用同一份解码结果，
+        provider 侧的编码结果也随之复用；返回的图片只读，不要原地修改。
+        """
+        ref_cache = get_ref_image_cache()
+        # 构建参考图片列表
+        ref_images = []
+        
+        # 添加主参考图片（如果提供了路径）
+        if ref_image_path:
+            if not os.path.exists(ref_image_path):
+                raise FileNotFoundError(f"Reference image not found: {ref_image_path}")
+            main_ref_image = ref_cache.load(ref_image_path)
+            ref_images.append(main_ref_image)
+        
+        # 添加额外的参考图片
+        if additional_ref_images:
+            for ref_img in additional_ref_images:
+                if isinstance(ref_img, Image.Image):
+                    # 已经是 PIL Image 对象
+                    ref_images.append(ref_img)
+                elif isinstance(ref_img, str):
+                    # 可能是本地路径或 URL
+                    if os.path.exists(ref_img):
+                        # 本地路径
+                        ref_images.append(ref_cache.load(ref_img))
+                    elif ref_img.startswith('http://') or ref_img.startswith('https://'):
+                        # URL，需要下载
+                        downloaded_img = self.download_image_from_url(ref_img)
+                        if downloaded_img:
+                            ref_images.append(downloaded_img)
+                        else:
+                            logger.warning(f"Failed to download image from URL: {ref_img}, skipping...")
+                    elif ref_img.startswith('/files/mineru/'):
+                        # MinerU 本地文件路径，需要转换为文件系统路径（支持前缀匹配）
+                        local_path = self._convert_mineru_path_to_local(ref_img)
+                        if local_path and os.path.exists(local_path):
+                            ref_images.append(ref_cache.load(local_path))
+                            logger.debug(f"Loaded MinerU image from local path: {local_path}")
+                        else:
+                            logger.warning(f"MinerU image file not found (with prefix matching): {ref_img}, skipping...")
+                    elif ref_img.startswith('/files/'):
+                        # 上传目录内的本地文件（materials/pages/templates 等）
+                        from config import Config
+                        relative_path = ref_img.removeprefix('/files/').lstrip('/')
+                        local_path = os.path.join(Config.UPLOAD_FOLDER, relative_path)
+                        if os.path.exists(local_path):
+                            ref_images.append(ref_cache.load(local_path))
+                            logger.debug(f"Loaded uploaded image from local path: {local_path}")
+                        else:
+                            logger.warning(f"Uploaded image file not found: {ref_img}, skipping...")
+                    else:
+                        logger.warning(f"Invalid image reference: {ref_img}, skipping...")
+        return ref_images
+
+    async def agenerate_image(self, prompt: str, ref_image_path: Optional[str] = None,
+                              aspect_ratio: str = "16:9", resolution: str = "2K",
+                              additional_ref_images: Optional[List[Union[str, Image.Image]]] = None) -> Optional[Image.Image]:
+        """
+        Async variant of generate_image, used by the asyncio batch runner
+        """
+        try:
+            # 参考图加载涉及磁盘/网络 IO，放到线程中执行，避免阻塞事件循环
+            ref_images = await asyncio.to_thread(self._load_ref_images, ref_image_path, additional_ref_images)
+            return await self.image_provider.agenerate_image(
+                prompt=prompt,
+                ref_images=ref_images if ref_images else None,
+                aspect_ratio=aspect_ratio,
+                resolution=resolution,
+                enable_thinking=self.enable_image_reasoning,
+                thinking_budget=self._get_image_thinking_budget()
+            )
+        except Exception as e:
+            error_detail = f"Error generating image: {type(e).__name__}: {str(e)}"
+            logger.error(error_detail, exc_info=True)
+            raise Exception(error_detail) from e
+
     def edit_image(self, prompt: str, current_image_path: str,
                   aspect_ratio: str = "16:9", resolution: str = "2K",
                   original_description: str = None,
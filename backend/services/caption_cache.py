@@ -0,0 +1,176 @@
+"""
+Caption cache for reference-file images
+
+FileParserService captions every image without alt text found in parsed
+markdown. The same logo / figure often repeats across pages of one document
+and across documents uploaded to different projects; each repeat used to cost
+a model call (up to 3 with retries).
+
+Captions are stored in a small SQLite file (shared by all projects and
+processes) keyed by the caption model plus:
+    - the exact sha256 of the image bytes, and
+    - a 64-bit difference hash (dHash) of the image, so re-encoded or slightly
+      resized copies of the same figure (Hamming distance <= threshold) also hit
+
+Only non-empty captions are stored; failures are retried on the next parse.
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+
+def image_fingerprint(data: bytes, image: Image.Image) -> Tuple[str, int]:
+    """(sha256 of the raw bytes, 64-bit dHash of the decoded image)"""
+    return hashlib.sha256(data).hexdigest(), dhash(image)
+
+
+def dhash(image: Image.Image, hash_size: int = 8) -> int:
+    """Difference hash: compare adjacent pixels of a (hash_size+1) x hash_size grayscale thumbnail"""
+    small = image.convert('L').resize((hash_size + 1, hash_size), Image.Resampling.LANCZOS)
+    pixels = small.tobytes()  # mode L: one byte per pixel
+    value = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+class CaptionCache:
+    """sha256 / perceptual-hash -> caption, per caption model"""
+
+    def __init__(self, path: str, max_entries: int = 20000, max_distance: int = 4):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # model -> {phash: sha}，近似匹配时在内存中扫描（每个模型至多 max_entries 个整数）
+        self._phashes: Dict[str, Dict[int, str]] = {}
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS image_captions ("
+                " model TEXT NOT NULL, sha TEXT NOT NULL, phash INTEGER NOT NULL,"
+                " caption TEXT NOT NULL, accessed_at REAL NOT NULL, PRIMARY KEY (model, sha))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_image_captions_accessed ON image_captions(accessed_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, model: str, sha: str, phash: int) -> Optional[str]:
+        """Exact match by sha first, then the nearest stored phash within max_distance"""
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT caption FROM image_captions WHERE model = ? AND sha = ?", (model, sha)
+        ).fetchone()
+        if row is None:
+            near_sha = self._nearest(model, phash)
+            if near_sha is None:
+                return None
+            row = conn.execute(
+                "SELECT caption FROM image_captions WHERE model = ? AND sha = ?", (model, near_sha)
+            ).fetchone()
+            if row is None:
+                return None
+            sha = near_sha
+        with conn:
+            conn.execute(
+                "UPDATE image_captions SET accessed_at = ? WHERE model = ? AND sha = ?",
+                (time.time(), model, sha)
+            )
+        return row[0]
+
+    def put(self, model: str, sha: str, phash: int, caption: str):
+        if not caption:
+            return
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO image_captions (model, sha, phash, caption, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (model, sha, _to_signed(phash), caption, time.time())
+            )
+            evicted = self._evict(conn)
+        with self._lock:
+            phashes = self._phashes.get(model)
+            if phashes is not None:
+                phashes[phash] = sha
+            if evicted:
+                self._phashes.clear()  # 下次查询时重新加载
+
+    def _nearest(self, model: str, phash: int) -> Optional[str]:
+        with self._lock:
+            phashes = self._phashes.get(model)
+            if phashes is None:
+                rows = self._conn().execute(
+                    "SELECT phash, sha FROM image_captions WHERE model = ?", (model,)
+                ).fetchall()
+                phashes = self._phashes[model] = {_to_unsigned(p): s for p, s in rows}
+            best, best_distance = None, self.max_distance + 1
+            for candidate, sha in phashes.items():
+                distance = (candidate ^ phash).bit_count()
+                if distance < best_distance:
+                    best, best_distance = sha, distance
+            return best
+
+    def _evict(self, conn: sqlite3.Connection) -> int:
+        (count,) = conn.execute("SELECT COUNT(*) FROM image_captions").fetchone()
+        excess = count - self.max_entries
+        if excess <= 0:
+            return 0
+        conn.execute(
+            "DELETE FROM image_captions WHERE rowid IN"
+            " (SELECT rowid FROM image_captions ORDER BY accessed_at LIMIT ?)", (excess,)
+        )
+        return excess
+
+
+def _to_signed(value: int) -> int:
+    # SQLite INTEGER 是有符号 64 位
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def _to_unsigned(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+_caption_cache: Optional[CaptionCache] = None
+_caption_cache_lock = threading.Lock()
+
+
+def get_caption_cache() -> Optional[CaptionCache]:
+    """Shared cache built from CAPTION_CACHE_* config (None when disabled or unavailable)"""
+    global _caption_cache
+    if _caption_cache is None:
+        with _caption_cache_lock:
+            if _caption_cache is None:
+                from config import get_config
+                config = get_config()
+                if not getattr(config, 'CAPTION_CACHE_ENABLED', True):
+                    return None
+                try:
+                    _caption_cache = CaptionCache(
+                        config.CAPTION_CACHE_PATH,
+                        max_entries=getattr(config, 'CAPTION_CACHE_MAX_ENTRIES', 20000),
+                        max_distance=getattr(config, 'CAPTION_CACHE_MAX_DISTANCE', 4),
+                    )
+                except (OSError, sqlite3.Error) as e:
+                    logger.warning(f"Caption cache unavailable: {e}")
+                    return None
+    return _caption_cache
@@ -0,0 +1,160 @@
+"""
+Export artifact cache
+
+``/export/pptx``, ``/export/pdf`` and ``/export/xhs`` used to rebuild the file
+on every call. Artifacts are now recorded per project in
+``exports/.export_cache.json`` under a key made of:
+
+    - the export type ('pptx' / 'pdf' / 'xhs')
+    - the ordered list of image tokens, one per exported page / card: the id of
+      its current ``PageImageVersion`` / ``XhsCardImageVersion`` plus the image
+      path (pages without a version record use path + mtime)
+    - the filter params (selected page ids / indices, requested filename)
+
+Regenerating an image or switching versions flips ``is_current``, which changes
+the token list and therefore the key: the next export misses and rebuilds.
+Switching back to an earlier version hits the artifact built for it, if still
+kept.
+
+After every store, the exports dir is trimmed by LRU: cached artifacts by last
+use, other files (editable PPTX, old ZIPs) by mtime, until it is under
+EXPORT_CACHE_MAX_BYTES and the index has at most EXPORT_CACHE_MAX_ENTRIES.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILENAME = '.export_cache.json'
+
+# Untracked files younger than this are never collected (may still be written / downloaded)
+_UNTRACKED_MIN_AGE_SECONDS = 3600
+
+_index_lock = threading.Lock()
+
+
+class ExportCache:
+    """Index of export artifacts in one project's exports dir"""
+
+    def __init__(self, exports_dir: str, max_bytes: int = 1024 * 1024 * 1024, max_entries: int = 20):
+        self.exports_dir = Path(exports_dir)
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.index_path = self.exports_dir / INDEX_FILENAME
+
+    @staticmethod
+    def make_key(kind: str, image_tokens: Iterable[str], params: Optional[Dict[str, Any]] = None) -> str:
+        payload = json.dumps(
+            {'kind': kind, 'images': list(image_tokens), 'params': params or {}},
+            sort_keys=True, ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Filename of the cached artifact for ``key``, or None (also drops entries whose file is gone)"""
+        with _index_lock:
+            index = self._load()
+            entry = index.get(key)
+            if entry is None:
+                return None
+            path = self.exports_dir / entry['filename']
+            try:
+                size = path.stat().st_size
+            except OSError:
+                size = None
+            if size != entry.get('size'):
+                # File deleted or overwritten outside the cache
+                del index[key]
+                self._save(index)
+                return None
+            entry['last_used'] = time.time()
+            self._save(index)
+            return entry['filename']
+
+    def put(self, key: str, filename: str):
+        """Record ``filename`` (already written to the exports dir) for ``key``, then collect garbage"""
+        with _index_lock:
+            index = self._load()
+            # The file at this name now has new content: older keys pointing to it are stale
+            for stale in [k for k, e in index.items() if e['filename'] == filename]:
+                del index[stale]
+            now = time.time()
+            index[key] = {
+                'filename': filename,
+                'size': (self.exports_dir / filename).stat().st_size,
+                'created': now,
+                'last_used': now,
+            }
+            self._collect(index, keep=filename)
+            self._save(index)
+
+    def _collect(self, index: Dict[str, Dict[str, Any]], keep: str):
+        """Delete least recently used artifacts until the entry and byte limits hold"""
+        for missing in [k for k, e in index.items() if not (self.exports_dir / e['filename']).exists()]:
+            del index[missing]
+        tracked = {entry['filename']: key for key, entry in index.items()}
+        candidates = []  # (last_used, filename, size)
+        total = 0
+        now = time.time()
+        for path in self.exports_dir.iterdir():
+            if not path.is_file() or path.name == INDEX_FILENAME or path.name.startswith('.'):
+                continue
+            stat = path.stat()
+            total += stat.st_size
+            if path.name == keep:
+                continue
+            key = tracked.get(path.name)
+            if key is not None:
+                candidates.append((index[key]['last_used'], path.name, stat.st_size))
+            elif now - stat.st_mtime > _UNTRACKED_MIN_AGE_SECONDS:
+                candidates.append((stat.st_mtime, path.name, stat.st_size))
+
+        candidates.sort()
+        removed: List[str] = []
+        for _, name, size in candidates:
+            if total <= self.max_bytes and len(index) <= self.max_entries:
+                break
+            if name not in tracked and total <= self.max_bytes:
+                continue  # only the entry limit is exceeded: untracked files do not count
+            try:
+                (self.exports_dir / name).unlink()
+            except OSError as e:
+                logger.warning(f"Export cache: failed to delete {name}: {e}")
+                continue
+            total -= size
+            removed.append(name)
+            key = tracked.get(name)
+            if key is not None:
+                index.pop(key, None)
+        if removed:
+            logger.info(f"Export cache: removed {len(removed)} old artifact(s) from {self.exports_dir}")
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            return index if isinstance(index, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, index: Dict[str, Dict[str, Any]]):
+        tmp_path = self.index_path.with_name(f"{INDEX_FILENAME}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self.index_path)
+
+
+def image_token(version_id: Optional[str], abs_path: str) -> str:
+    """Cache token for one exported image: current version id (+ path), or path + mtime"""
+    if version_id:
+        return f"{version_id}:{abs_path}"
+    try:
+        return f"{abs_path}:{os.stat(abs_path).st_mtime_ns}"
+    except OSError:
+        return abs_path
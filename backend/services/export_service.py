@@ -6,17 +6,13 @@ import os
 import json
 import logging
 import tempfile
-from datetime import datetime, timezone
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple
 from textwrap import dedent
 from dataclasses import dataclass, field
-from pptx import Presentation
-from pptx.util import Inches
-from PIL import Image
 import io
 import tempfile
-import img2pdf
+from services.export_stream import spool_export, write_pdf_from_images, write_pptx_from_images
 logger = logging.getLogger(__name__)
 
 
@@ -139,6 +135,9 @@ class ExportService:
         """
         Create PPTX file from image paths
         Based on demo.py create_pptx_from_images()
+
+        Slide images are streamed from disk into the zip (see services/export_stream.py),
+        so memory use does not grow with the number of pages when writing to a file.
         
         Args:
             image_paths: List of absolute paths to images
@@ -147,59 +146,21 @@ class ExportService:
         Returns:
             PPTX file as bytes if output_file is None
         """
-        # Create presentation
-        prs = Presentation()
-        
-        # Set author/date metadata for exported PPTX
-        try:
-            core = prs.core_properties
-            now = datetime.now(timezone.utc)
-            core.author = "banana-slides"
-            core.last_modified_by = "banana-slides"
-            core.created = now
-            core.modified = now
-            core.last_printed = None
-        except Exception as e:
-            logger.warning(f"Failed to set core properties: {e}")
-        
-        # Set slide dimensions to 16:9 (width 10 inches, height 5.625 inches)
-        prs.slide_width = Inches(10)
-        prs.slide_height = Inches(5.625)
-        
-        # Add each image as a slide
-        for image_path in image_paths:
-            if not os.path.exists(image_path):
-                logger.warning(f"Image not found: {image_path}")
-                continue
-            
-            # Add blank slide layout (layout 6 is typically blank)
-            blank_slide_layout = prs.slide_layouts[6]
-            slide = prs.slides.add_slide(blank_slide_layout)
-            
-            # Add image to fill entire slide
-            slide.shapes.add_picture(
-                image_path,
-                left=0,
-                top=0,
-                width=prs.slide_width,
-                height=prs.slide_height
-            )
-        
-        # Save or return bytes
         if output_file:
-            prs.save(output_file)
+            with open(output_file, 'wb') as f:
+                write_pptx_from_images(image_paths, f)
             return None
-        else:
-            # Save to bytes
-            pptx_bytes = io.BytesIO()
-            prs.save(pptx_bytes)
-            pptx_bytes.seek(0)
-            return pptx_bytes.getvalue()
+        pptx_bytes = io.BytesIO()
+        write_pptx_from_images(image_paths, pptx_bytes)
+        return pptx_bytes.getvalue()
     
     @staticmethod
     def create_pdf_from_images(image_paths: List[str], output_file: str = None) -> Optional[bytes]:
         """
-        Create PDF file from image paths using img2pdf (low memory usage)
+        Create PDF file from image paths, one page at a time (low memory usage)
+
+        JPEG / PNG data is embedded without re-encoding where possible, other
+        formats are decoded page by page (see services/export_stream.py).
 
         Args:
             image_paths: List of absolute paths to images
@@ -208,92 +169,24 @@ class ExportService:
         Returns:
             PDF file as bytes if output_file is None, otherwise None
         """
-        # Validate images exist and log warnings for missing files
-        valid_paths = []
-        for p in image_paths:
-            if os.path.exists(p):
-                valid_paths.append(p)
-            else:
-                logger.warning(f"Image not found and will be skipped for PDF export: {p}")
-
-        if not valid_paths:
-            raise ValueError("No valid images found for PDF export")
-
-        try:
-            logger.info(f"Using img2pdf for PDF export ({len(valid_paths)} pages, low memory mode)")
-
-            # Set page layout: 16:9 aspect ratio (10 inches × 5.625 inches)
-            layout_fun = img2pdf.get_layout_fun(
-                pagesize=(img2pdf.in_to_pt(10), img2pdf.in_to_pt(5.625))
-            )
-
-            # Convert images to PDF
-            pdf_bytes = img2pdf.convert(valid_paths, layout_fun=layout_fun)
-
-            if output_file:
-                with open(output_file, "wb") as f:
-                    f.write(pdf_bytes)
-                return None
-            else:
-                return pdf_bytes
-        except (img2pdf.ImageOpenError, ValueError, IOError) as e:
-            logger.warning(f"img2pdf conversion failed: {e}. Falling back to Pillow (high memory usage).")
-            return ExportService.create_pdf_from_images_pillow(valid_paths, output_file)
+        logger.info(f"Streaming PDF export ({len(image_paths)} pages)")
+        if output_file:
+            with open(output_file, 'wb') as f:
+                write_pdf_from_images(image_paths, f)
+            return None
+        pdf_bytes = io.BytesIO()
+        write_pdf_from_images(image_paths, pdf_bytes)
+        return pdf_bytes.getvalue()
 
     @staticmethod
-    def create_pdf_from_images_pillow(image_paths: List[str], output_file: str = None) -> Optional[bytes]:
+    def spool_export(kind: str, image_paths: List[str], max_memory: int = 32 * 1024 * 1024,
+                     tmp_dir: Optional[str] = None):
         """
-        Create PDF file from image paths using Pillow (original method)
-
-        Note: This method loads all images into memory at once.
-        For large projects (50+ pages with 20MB/page), use create_pdf_from_images instead.
-
-        Args:
-            image_paths: List of absolute paths to images
-            output_file: Optional output file path (if None, returns bytes)
-
-        Returns:
-            PDF file as bytes if output_file is None, otherwise None
+        Build a 'pptx' / 'pdf' export into a SpooledTemporaryFile (in memory up to
+        ``max_memory`` bytes, then on disk), rewound and ready to stream.
+        The caller is responsible for closing it.
         """
-        images = []
-
-        # Load all images
-        for image_path in image_paths:
-            if not os.path.exists(image_path):
-                logger.warning(f"Image not found: {image_path}")
-                continue
-
-            img = Image.open(image_path)
-
-            # Convert to RGB if necessary (PDF requires RGB)
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
-
-            images.append(img)
-
-        if not images:
-            raise ValueError("No valid images found for PDF export")
-
-        # Save as PDF
-        if output_file:
-            images[0].save(
-                output_file,
-                save_all=True,
-                append_images=images[1:],
-                format='PDF'
-            )
-            return None
-        else:
-            # Save to bytes
-            pdf_bytes = io.BytesIO()
-            images[0].save(
-                pdf_bytes,
-                save_all=True,
-                append_images=images[1:],
-                format='PDF'
-            )
-            pdf_bytes.seek(0)
-            return pdf_bytes.getvalue()
+        return spool_export(kind, image_paths, max_memory=max_memory, tmp_dir=tmp_dir)
        
     @staticmethod
     def _add_mineru_text_to_slide(builder, slide, text_item: Dict[str, Any], scale_x: float = 1.0, scale_y: float = 1.0):
@@ -545,7 +438,8 @@ class ExportService:
             depth: 当前递归深度
         
         Returns:
-            元组列表，每个元组为 (element_id, image_path, text_content)
+            元组列表，每个元组为 (element_id, element, text_content)；
+            裁剪图在真正识别时才通过 element.get_image() 生成
         """
         text_items = []
         
@@ -554,10 +448,10 @@ class ExportService:
             
             # 文本类型元素需要提取样式
             if elem_type in ['text', 'title', 'table_cell', 'list', 'paragraph', 'header', 'footer', 'heading', 'table_caption', 'image_caption']:
-                if elem.content and elem.image_path and os.path.exists(elem.image_path):
+                if elem.content and elem.has_image():
                     text = elem.content.strip()
                     if text:
-                        text_items.append((elem.element_id, elem.image_path, text))
+                        text_items.append((elem.element_id, elem, text))
             
             # 递归处理子元素
             if hasattr(elem, 'children') and elem.children:
@@ -584,7 +478,7 @@ class ExportService:
         备选方案：_batch_extract_text_styles_with_full_image 可一次性分析全图所有文本。
         
         Args:
-            text_items: 元组列表，每个元组为 (element_id, image_path, text_content)
+            text_items: 元组列表，每个元组为 (element_id, element, text_content)
             text_attribute_extractor: 文本属性提取器
             max_workers: 并发数
         
@@ -601,10 +495,10 @@ class ExportService:
         results = {}
         
         def extract_single(item):
-            element_id, image_path, text_content = item
+            element_id, element, text_content = item
             try:
                 style = text_attribute_extractor.extract(
-                    image=image_path,
+                    image=element.get_image(),
                     text_content=text_content
                 )
                 return element_id, style
@@ -814,7 +708,7 @@ class ExportService:
         logger.info(f"  - 单个识别: font_color")
         
         # Step 1: 收集所有文本元素
-        all_text_items = []  # 用于单个裁剪识别 (element_id, image_path, content)
+        all_text_items = []  # 用于单个裁剪识别 (element_id, element, content)
         page_text_elements = {}  # 用于全局识别 {page_idx: [text_elements]}
         
         for page_idx, editable_img in enumerate(editable_images):
@@ -854,10 +748,10 @@ class ExportService:
         
         def extract_local_single(item):
             """单个裁剪识别"""
-            element_id, image_path, text_content = item
+            element_id, element, text_content = item
             try:
                 style = text_attribute_extractor.extract(
-                    image=image_path,
+                    image=element.get_image(),
                     text_content=text_content
                 )
                 # 只要 style 不为 None 就算成功（黑色也是有效颜色）
@@ -956,7 +850,8 @@ class ExportService:
         text_attribute_extractor = None,  # 可选：文字属性提取器，用于提取颜色、粗体、斜体等样式
         progress_callback = None,  # 可选：进度回调函数 (step, message, percent) -> None
         export_extractor_method: str = 'hybrid',  # 组件提取方法: mineru, hybrid
-        export_inpaint_method: str = 'hybrid'  # 背景修复方法: generative, baidu, hybrid
+        export_inpaint_method: str = 'hybrid',  # 背景修复方法: generative, baidu, hybrid
+        use_analysis_cache: bool = True  # 复用内容与导出设置都未变的页面的版面分析结果
     ) -> Tuple[Optional[bytes], ExportWarnings]:
         """
         使用递归图片可编辑化服务创建可编辑PPTX
@@ -981,6 +876,8 @@ class ExportService:
                 可通过 TextAttributeExtractorFactory.create_caption_model_extractor() 创建
             export_extractor_method: 组件提取方法 ('mineru' 或 'hybrid'，默认 'hybrid')
             export_inpaint_method: 背景修复方法 ('generative', 'baidu', 'hybrid'，默认 'hybrid')
+            use_analysis_cache: 是否复用已缓存的页面分析结果（按图片内容哈希 + 导出设置，
+                见 services/image_editability/analysis_cache.py），只改了一页时只重新分析这一页
         
         Returns:
             (pptx_bytes, warnings): 元组，包含 PPTX 字节流和警告信息
@@ -988,6 +885,7 @@ class ExportService:
             - warnings: ExportWarnings 对象，包含所有警告信息
         """
         from services.image_editability import ServiceConfig, ImageEditabilityService
+        from services.image_editability.analysis_cache import EditableImageCache
         from utils.pptx_builder import PPTXBuilder
         
         # 初始化警告收集器
@@ -1023,23 +921,48 @@ class ExportService:
             )
             editability_service = ImageEditabilityService(config)
             
-            # 2. 并发处理所有页面，生成EditableImage结构
-            report_progress("版面分析", f"开始分析 {total_pages} 张图片（并发数: {max_workers}）...", 5)
+            # 2. 先复用缓存中内容未变的页面，再并发分析其余页面，生成EditableImage结构
+            results = [None] * len(image_paths)
+            analysis_cache = None
+            if use_analysis_cache:
+                from config import get_config
+                app_config = get_config()
+                analysis_cache = EditableImageCache(
+                    config.upload_folder, export_extractor_method, export_inpaint_method, max_depth,
+                    max_age_seconds=getattr(app_config, 'EXPORT_ANALYSIS_CACHE_MAX_AGE_DAYS', 30) * 86400,
+                    max_bytes=getattr(app_config, 'EXPORT_ANALYSIS_CACHE_MAX_MB', 2048) * 1024 * 1024
+                )
+                for idx, img_path in enumerate(image_paths):
+                    results[idx] = analysis_cache.get(img_path)
+            completed_count = sum(1 for result in results if result is not None)
+            pending = [idx for idx, result in enumerate(results) if result is None]
+            if completed_count:
+                logger.info(f"复用 {completed_count}/{total_pages} 页的版面分析缓存")
+                report_progress("版面分析", f"复用 {completed_count}/{total_pages} 页已有分析结果", 5)
+            
+            # 多页一次提交版面分析（MinerU 多页PDF），之后每页直接命中提取器缓存
+            if len(pending) > 1:
+                report_progress("版面分析", f"批量提交 {len(pending)} 页进行版面识别...", 5)
+                try:
+                    editability_service.prefetch([image_paths[idx] for idx in pending])
+                except Exception as e:
+                    logger.warning(f"批量版面识别失败，改为逐页识别: {e}")
+            
+            report_progress("版面分析", f"开始分析 {len(pending)} 张图片（并发数: {max_workers}）...", 5)
             from concurrent.futures import ThreadPoolExecutor, as_completed
             
-            editable_images = []
-            completed_count = 0
             with ThreadPoolExecutor(max_workers=max_workers) as executor:
                 futures = {
-                    executor.submit(editability_service.make_image_editable, img_path): idx
-                    for idx, img_path in enumerate(image_paths)
+                    executor.submit(editability_service.make_image_editable, image_paths[idx]): idx
+                    for idx in pending
                 }
                 
-                results = [None] * len(image_paths)
                 for future in as_completed(futures):
                     idx = futures[future]
                     try:
                         results[idx] = future.result()
+                        if analysis_cache is not None:
+                            analysis_cache.put(image_paths[idx], results[idx])
                         completed_count += 1
                         # 版面分析占 5% - 40% 的进度
                         percent = 5 + int(35 * completed_count / total_pages)
@@ -1195,7 +1118,7 @@ class ExportService:
             text_styles_cache: 预提取的文本样式缓存（可选），由 _batch_extract_text_styles 生成
         
         Note:
-            elem.image_path 现在是绝对路径，无需额外的目录参数
+            elem.get_image_path() 返回绝对路径（首次调用时才写出裁剪图），无需额外的目录参数
         """
         if text_styles_cache is None:
             text_styles_cache = {}
@@ -1302,12 +1225,12 @@ class ExportService:
                     )
                 else:
                     # 没有子元素，添加整体表格图片
-                    # elem.image_path 现在是绝对路径
-                    if elem.image_path and os.path.exists(elem.image_path):
+                    # 裁剪图在嵌入时才写出（绝对路径）
+                    if elem.has_image():
                         try:
                             builder.add_image_element(
                                 slide=slide,
-                                image_path=elem.image_path,
+                                image_path=elem.get_image_path(),
                                 bbox=bbox_list
                             )
                         except Exception as e:
@@ -1366,12 +1289,12 @@ class ExportService:
                     )
                 else:
                     # 没有子元素或子元素占比过大，直接添加原图
-                    # elem.image_path 现在是绝对路径
-                    if elem.image_path and os.path.exists(elem.image_path):
+                    # 裁剪图在嵌入时才写出（绝对路径）
+                    if elem.has_image():
                         try:
                             builder.add_image_element(
                                 slide=slide,
-                                image_path=elem.image_path,
+                                image_path=elem.get_image_path(),
                                 bbox=bbox_list
                             )
                         except Exception as e:
@@ -0,0 +1,351 @@
+"""
+Streaming PPTX / PDF writers for image-only decks
+
+``Presentation.add_picture`` keeps every slide image in memory until
+``prs.save()``, and the Pillow PDF path decodes every page up front, so peak
+memory grew with the page count. The writers here write into any binary file
+object and hold at most one page at a time:
+
+    - PPTX: python-pptx builds a skeleton deck whose pictures are tiny
+      placeholders; the zip is then rewritten into the output, streaming each
+      real slide image from disk in place of its placeholder.
+    - PDF: pages are appended one by one. JPEGs are embedded as-is (DCTDecode),
+      8-bit non-interlaced RGB/gray PNGs reuse their IDAT data (FlateDecode with
+      the PNG predictor), anything else is decoded and deflated in row strips.
+
+Output only depends on the input files, so repeated exports of unchanged images
+are byte-identical (``export_etag`` can be used for HTTP Range / If-Range).
+"""
+import hashlib
+import logging
+import os
+import shutil
+import struct
+import tempfile
+import zipfile
+import zlib
+from datetime import datetime, timezone
+from io import BytesIO
+from typing import BinaryIO, Iterable, List, Optional, Tuple
+
+from PIL import Image
+from pptx import Presentation
+from pptx.util import Inches
+
+logger = logging.getLogger(__name__)
+
+# 16:9 slide / page size (10in x 5.625in)
+SLIDE_WIDTH_IN = 10
+SLIDE_HEIGHT_IN = 5.625
+
+# Fixed zip timestamps keep the PPTX output reproducible
+_ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+_COPY_CHUNK = 1024 * 1024
+_PDF_STRIP_ROWS = 256
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def existing_image_paths(image_paths: Iterable[str], kind: str = 'export') -> List[str]:
+    """Drop missing files (with a warning), keeping order"""
+    valid = []
+    for path in image_paths:
+        if os.path.exists(path):
+            valid.append(path)
+        else:
+            logger.warning(f"Image not found and will be skipped for {kind}: {path}")
+    return valid
+
+
+def export_etag(kind: str, image_paths: Iterable[str]) -> str:
+    """Strong ETag for an export of ``image_paths`` (path, mtime, size of every image)"""
+    digest = hashlib.sha256(kind.encode('utf-8'))
+    for path in image_paths:
+        stat = os.stat(path)
+        digest.update(f"\0{os.path.abspath(path)}\0{stat.st_mtime_ns}\0{stat.st_size}".encode('utf-8'))
+    return digest.hexdigest()[:32]
+
+
+def spool_export(kind: str, image_paths: List[str], max_memory: int = 32 * 1024 * 1024,
+                 tmp_dir: Optional[str] = None) -> tempfile.SpooledTemporaryFile:
+    """
+    Write a 'pptx' / 'pdf' export into a spooled temp file (kept in memory up to
+    ``max_memory`` bytes, then on disk) and return it rewound. The caller closes it.
+    """
+    writer = {'pptx': write_pptx_from_images, 'pdf': write_pdf_from_images}[kind]
+    spooled = tempfile.SpooledTemporaryFile(max_size=max_memory, dir=tmp_dir)
+    try:
+        writer(image_paths, spooled)
+        spooled.seek(0)
+        return spooled
+    except Exception:
+        spooled.close()
+        raise
+
+
+# --- PPTX ----------------------------------------------------------------------
+
+def write_pptx_from_images(image_paths: List[str], fileobj: BinaryIO):
+    """Write a PPTX with one full-slide picture per image into ``fileobj``"""
+    image_paths = existing_image_paths(image_paths, 'PPTX export')
+    if not image_paths:
+        raise ValueError("No valid images found for PPTX export")
+
+    prs = Presentation()
+    prs.slide_width = Inches(SLIDE_WIDTH_IN)
+    prs.slide_height = Inches(SLIDE_HEIGHT_IN)
+    _set_core_properties(prs, image_paths)
+
+    blank_slide_layout = prs.slide_layouts[6]
+    replacements = {}  # zip member name -> real image path
+    for index, image_path in enumerate(image_paths):
+        slide = prs.slides.add_slide(blank_slide_layout)
+        placeholder = _placeholder_image(image_path, index)
+        picture = slide.shapes.add_picture(
+            placeholder or image_path,
+            left=0,
+            top=0,
+            width=prs.slide_width,
+            height=prs.slide_height
+        )
+        if placeholder is not None:
+            image_part = slide.part.related_part(picture._element.blip_rId)
+            replacements[image_part.partname.lstrip('/')] = image_path
+
+    skeleton = BytesIO()
+    prs.save(skeleton)
+    del prs
+    skeleton.seek(0)
+
+    with zipfile.ZipFile(skeleton) as zin, \
+            zipfile.ZipFile(fileobj, 'w', compression=zipfile.ZIP_DEFLATED) as zout:
+        for item in zin.infolist():
+            source = replacements.get(item.filename)
+            if source is None:
+                info = zipfile.ZipInfo(item.filename, date_time=_ZIP_DATE_TIME)
+                info.compress_type = zipfile.ZIP_DEFLATED
+                zout.writestr(info, zin.read(item.filename))
+                continue
+            # Slide images are already compressed: store them, streaming from disk
+            info = zipfile.ZipInfo(item.filename, date_time=_ZIP_DATE_TIME)
+            info.compress_type = zipfile.ZIP_STORED
+            info.file_size = os.path.getsize(source)
+            with open(source, 'rb') as src, zout.open(info, 'w') as dst:
+                shutil.copyfileobj(src, dst, _COPY_CHUNK)
+
+
+def _set_core_properties(prs, image_paths: List[str]):
+    """Author metadata; created/modified = newest slide image, so output is reproducible"""
+    try:
+        core = prs.core_properties
+        newest = max(os.path.getmtime(path) for path in image_paths)
+        timestamp = datetime.fromtimestamp(int(newest), tz=timezone.utc)
+        core.author = "banana-slides"
+        core.last_modified_by = "banana-slides"
+        core.created = timestamp
+        core.modified = timestamp
+    except Exception as e:
+        logger.warning(f"Failed to set core properties: {e}")
+
+
+def _placeholder_image(image_path: str, index: int) -> Optional[BytesIO]:
+    """
+    Tiny stand-in with the same format (so the same media extension / content type).
+    The slide index is appended after the image data, so python-pptx does not
+    de-duplicate placeholders of different slides. None = embed the real image.
+    """
+    try:
+        with Image.open(image_path) as img:
+            image_format = img.format
+    except Exception:
+        return None
+    if image_format not in ('PNG', 'JPEG'):
+        return None
+    buffer = BytesIO()
+    Image.new('RGB', (1, 1)).save(buffer, format=image_format)
+    buffer.write(f"slide-{index}".encode('ascii'))
+    buffer.seek(0)
+    return buffer
+
+
+# --- PDF -----------------------------------------------------------------------
+
+def write_pdf_from_images(image_paths: List[str], fileobj: BinaryIO):
+    """Write a PDF with one 16:9 page per image (image fitted and centered) into ``fileobj``"""
+    image_paths = existing_image_paths(image_paths, 'PDF export')
+    if not image_paths:
+        raise ValueError("No valid images found for PDF export")
+
+    writer = StreamingPDFWriter(fileobj, page_size=(SLIDE_WIDTH_IN * 72, SLIDE_HEIGHT_IN * 72))
+    for image_path in image_paths:
+        writer.add_image(image_path)
+    writer.close()
+
+
+class StreamingPDFWriter:
+    """Minimal PDF writer that appends image pages without keeping earlier pages in memory"""
+
+    _CATALOG_ID = 1
+    _PAGES_ID = 2
+
+    def __init__(self, fileobj: BinaryIO, page_size: Tuple[float, float]):
+        self.fileobj = fileobj
+        self.page_width, self.page_height = page_size
+        self._offset = 0
+        self._offsets = {}  # object id -> byte offset
+        self._next_id = 3
+        self._page_ids: List[int] = []
+        self._write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+    def add_image(self, image_path: str, fit_page: bool = False):
+        """Append one page; ``fit_page`` sizes the page to the image aspect ratio (same width)"""
+        with Image.open(image_path) as img:
+            width, height = img.size
+            image_format, mode = img.format, img.mode
+            png_colors = _png_passthrough_colors(image_path) if image_format == 'PNG' else 0
+
+            if image_format == 'JPEG' and mode in ('L', 'RGB', 'CMYK'):
+                colorspace = {'L': '/DeviceGray', 'RGB': '/DeviceRGB', 'CMYK': '/DeviceCMYK'}[mode]
+                # CMYK JPEGs written by Adobe (APP14 marker) store inverted values; plain ones do not
+                extra = ' /Decode [1 0 1 0 1 0 1 0]' if mode == 'CMYK' and 'adobe' in img.info else ''
+                image_id = self._write_stream(
+                    f"/Type /XObject /Subtype /Image /Width {width} /Height {height} "
+                    f"/ColorSpace {colorspace} /BitsPerComponent 8 /Filter /DCTDecode{extra}",
+                    _file_chunks(image_path)
+                )
+            elif png_colors:
+                colorspace = '/DeviceRGB' if png_colors == 3 else '/DeviceGray'
+                image_id = self._write_stream(
+                    f"/Type /XObject /Subtype /Image /Width {width} /Height {height} "
+                    f"/ColorSpace {colorspace} /BitsPerComponent 8 /Filter /FlateDecode "
+                    f"/DecodeParms << /Predictor 15 /Colors {png_colors} /BitsPerComponent 8 /Columns {width} >>",
+                    _png_idat_chunks(image_path)
+                )
+            else:
+                if mode not in ('RGB', 'L'):
+                    img = img.convert('RGB')
+                colorspace = '/DeviceGray' if img.mode == 'L' else '/DeviceRGB'
+                image_id = self._write_stream(
+                    f"/Type /XObject /Subtype /Image /Width {width} /Height {height} "
+                    f"/ColorSpace {colorspace} /BitsPerComponent 8 /Filter /FlateDecode",
+                    _deflated_strips(img)
+                )
+
+        page_width, page_height = self.page_width, self.page_height
+        if fit_page:
+            page_height = page_width * height / width
+
+        # Fit into the page keeping the aspect ratio, centered
+        scale = min(page_width / width, page_height / height)
+        draw_w, draw_h = width * scale, height * scale
+        x, y = (page_width - draw_w) / 2, (page_height - draw_h) / 2
+        content = f"q {draw_w:.4f} 0 0 {draw_h:.4f} {x:.4f} {y:.4f} cm /Im0 Do Q".encode('ascii')
+        content_id = self._write_stream('', [content])
+
+        page_id = self._new_id()
+        self._write_object(
+            page_id,
+            f"<< /Type /Page /Parent {self._PAGES_ID} 0 R "
+            f"/MediaBox [0 0 {page_width:.4f} {page_height:.4f}] "
+            f"/Resources << /XObject << /Im0 {image_id} 0 R >> >> /Contents {content_id} 0 R >>"
+        )
+        self._page_ids.append(page_id)
+
+    def close(self):
+        """Write the page tree, catalog, xref table and trailer"""
+        kids = ' '.join(f"{page_id} 0 R" for page_id in self._page_ids)
+        self._write_object(self._PAGES_ID, f"<< /Type /Pages /Kids [{kids}] /Count {len(self._page_ids)} >>")
+        self._write_object(self._CATALOG_ID, f"<< /Type /Catalog /Pages {self._PAGES_ID} 0 R >>")
+
+        xref_offset = self._offset
+        size = self._next_id
+        lines = [f"xref\n0 {size}\n", "0000000000 65535 f \n"]
+        for object_id in range(1, size):
+            lines.append(f"{self._offsets[object_id]:010d} 00000 n \n")
+        lines.append(f"trailer\n<< /Size {size} /Root {self._CATALOG_ID} 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n")
+        self._write(''.join(lines).encode('ascii'))
+
+    def _new_id(self) -> int:
+        object_id = self._next_id
+        self._next_id += 1
+        return object_id
+
+    def _write(self, data: bytes):
+        self.fileobj.write(data)
+        self._offset += len(data)
+
+    def _write_object(self, object_id: int, body: str):
+        self._offsets[object_id] = self._offset
+        self._write(f"{object_id} 0 obj\n{body}\nendobj\n".encode('latin-1'))
+
+    def _write_stream(self, dictionary: str, chunks: Iterable[bytes]) -> int:
+        """Write a stream object; its /Length is an indirect object written afterwards"""
+        object_id, length_id = self._new_id(), self._new_id()
+        self._offsets[object_id] = self._offset
+        self._write(f"{object_id} 0 obj\n<< {dictionary} /Length {length_id} 0 R >>\nstream\n".encode('latin-1'))
+        length = 0
+        for chunk in chunks:
+            self._write(chunk)
+            length += len(chunk)
+        self._write(b"\nendstream\nendobj\n")
+        self._write_object(length_id, str(length))
+        return object_id
+
+
+def _file_chunks(path: str) -> Iterable[bytes]:
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_COPY_CHUNK), b''):
+            yield chunk
+
+
+def _png_chunks(path: str) -> Iterable[Tuple[bytes, int, BinaryIO]]:
+    """Yield (type, length, file positioned at the chunk data) for every PNG chunk"""
+    with open(path, 'rb') as f:
+        if f.read(8) != _PNG_SIGNATURE:
+            return
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                return
+            length, chunk_type = struct.unpack('>I4s', header)
+            data_start = f.tell()
+            yield chunk_type, length, f
+            if chunk_type == b'IEND':
+                return
+            f.seek(data_start + length + 4)  # skip data (if unread) and CRC
+
+
+def _png_passthrough_colors(path: str) -> int:
+    """Number of color channels if the PNG's IDAT data can be embedded as-is, else 0"""
+    for chunk_type, length, f in _png_chunks(path):
+        if chunk_type != b'IHDR':
+            return 0
+        _, _, bit_depth, color_type, _, _, interlace = struct.unpack('>IIBBBBB', f.read(13))
+        if bit_depth != 8 or interlace != 0:
+            return 0
+        return {0: 1, 2: 3}.get(color_type, 0)
+    return 0
+
+
+def _png_idat_chunks(path: str) -> Iterable[bytes]:
+    for chunk_type, length, f in _png_chunks(path):
+        if chunk_type != b'IDAT':
+            continue
+        remaining = length
+        while remaining:
+            data = f.read(min(remaining, _COPY_CHUNK))
+            if not data:
+                raise ValueError(f"Truncated PNG: {path}")
+            remaining -= len(data)
+            yield data
+
+
+def _deflated_strips(img: Image.Image) -> Iterable[bytes]:
+    """Raw pixels deflated a strip of rows at a time (no full-image byte copy)"""
+    compressor = zlib.compressobj(6)
+    width, height = img.size
+    for top in range(0, height, _PDF_STRIP_ROWS):
+        strip = img.crop((0, top, width, min(height, top + _PDF_STRIP_ROWS))).tobytes()
+        data = compressor.compress(strip)
+        if data:
+            yield data
+    yield compressor.flush()
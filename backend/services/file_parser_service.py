@@ -8,6 +8,12 @@ import logging
 import zipfile
 import io
 import base64
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
 import requests
 from pathlib import Path
 from PIL import UnidentifiedImageError
@@ -21,8 +27,46 @@ except Exception:
     pass
 from markitdown import MarkItDown
 
+from .caption_cache import get_caption_cache, image_fingerprint
+from local_document_parser import LOCAL_PARSE_EXTENSIONS, extract_document
+from .mineru_poller import MinerUPollError, get_mineru_poller
+
 logger = logging.getLogger(__name__)
 
+# MinerU 结果 zip 中需要解压的文本结果，以及从中引用的图片文件名
+_TEXT_RESULT_EXTENSIONS = ('.md', '.json')
+_IMAGE_NAME_PATTERN = re.compile(r'[\w\-.]+\.(?:jpe?g|png|gif|webp|bmp)', re.IGNORECASE)
+
+# 本地解析在独立的 Python 进程中运行（python -m local_document_parser）：
+# 不导入 Flask 应用 / services 包，解析崩溃或内存峰值不影响服务进程
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_LOCAL_PARSE_TIMEOUT_SECONDS = 300
+_local_parse_slots: Optional[threading.BoundedSemaphore] = None
+_local_parse_slots_lock = threading.Lock()
+
+
+def _get_local_parse_slots(workers: int) -> Optional[threading.BoundedSemaphore]:
+    """Caps concurrent local parse processes (None: run in the calling thread)"""
+    global _local_parse_slots
+    if workers <= 0:
+        return None
+    with _local_parse_slots_lock:
+        if _local_parse_slots is None:
+            _local_parse_slots = threading.BoundedSemaphore(workers)
+        return _local_parse_slots
+
+
+def _extract_document_in_subprocess(args: tuple) -> dict:
+    """Run extract_document in a fresh interpreter and return its result dict"""
+    completed = subprocess.run(
+        [sys.executable, '-m', 'local_document_parser', json.dumps(args)],
+        cwd=_BACKEND_DIR, capture_output=True, text=True, encoding='utf-8',
+        timeout=_LOCAL_PARSE_TIMEOUT_SECONDS
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"local parser exited with {completed.returncode}: {completed.stderr.strip()[-500:]}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
 
 def _get_ai_provider_format(provider_format: str = None) -> str:
     """Get the configured AI provider format
@@ -57,6 +101,8 @@ def _get_ai_provider_format(provider_format: str = None) -> str:
 class FileParserService:
     """Service for parsing files using MinerU and enhancing with image captions"""
     
+    DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+    
     def __init__(self, mineru_token: str, mineru_api_base: str = "https://mineru.net",
                  google_api_key: str = "", google_api_base: str = "",
                  openai_api_key: str = "", openai_api_base: str = "",
@@ -94,6 +140,9 @@ class FileParserService:
         self._gemini_client = None
         self._openai_client = None
         self._provider_format = _get_ai_provider_format(provider_format)
+        
+        # Caption dedup / cache statistics of the last parse (see _generate_captions_parallel)
+        self.caption_stats = {'images': 0, 'model_calls': 0, 'cache_hits': 0, 'hit_rate': 0.0}
     
     def _get_gemini_client(self):
         """Lazily initialize Gemini client"""
@@ -123,13 +172,16 @@ class FileParserService:
         else:
             return bool(self._google_api_key)
     
-    def parse_file(self, file_path: str, filename: str) -> tuple[Optional[str], Optional[str], Optional[str], Optional[str], int]:
+    def parse_file(self, file_path: str, filename: str,
+                   local_fast_path: bool = True) -> tuple[Optional[str], Optional[str], Optional[str], Optional[str], int]:
         """
         Parse a file using MinerU service and enhance with image captions
         
         Args:
             file_path: Path to the file to parse
             filename: Original filename
+            local_fast_path: Try local extraction for simple docx/pptx/pdf first
+                (callers that need MinerU's layout.json must pass False)
             
         Returns:
             Tuple of (batch_id, markdown_content, extract_id, error_message, failed_image_count)
@@ -152,6 +204,12 @@ class FileParserService:
                 logger.info(f"File {filename} is a spreadsheet file, using markitdown...")
                 return self._parse_spreadsheet_file(file_path, filename)
             
+            # Simple office documents / text-layer PDFs: extract locally
+            if local_fast_path and file_ext in LOCAL_PARSE_EXTENSIONS:
+                local_result = self._parse_locally(file_path, filename, file_ext)
+                if local_result is not None:
+                    return local_result
+            
             # For other file types, use MinerU service
             logger.info(f"File {filename} requires MinerU parsing...")
             
@@ -197,6 +255,50 @@ class FileParserService:
             logger.error(error_msg, exc_info=True)
             return None, None, None, error_msg, 0
     
+    def _parse_locally(self, file_path: str, filename: str,
+                       file_ext: str) -> Optional[tuple[Optional[str], Optional[str], Optional[str], Optional[str], int]]:
+        """Local fast path (see local_document_parser.py); None means use MinerU"""
+        from config import get_config
+        config = get_config()
+        if not getattr(config, 'LOCAL_PARSE_ENABLED', True):
+            return None
+        
+        import uuid
+        extract_id = str(uuid.uuid4())[:8]
+        output_dir = self._mineru_storage_root() / extract_id
+        start_time = time.time()
+        try:
+            args = (os.path.abspath(file_path), file_ext, str(output_dir.resolve()),
+                    getattr(config, 'LOCAL_PARSE_MIN_PDF_CHARS_PER_PAGE', 200))
+            slots = _get_local_parse_slots(getattr(config, 'LOCAL_PARSE_WORKERS', 2))
+            if slots is None:
+                result = extract_document(*args)
+            else:
+                with slots:
+                    try:
+                        result = _extract_document_in_subprocess(args)
+                    except OSError as e:
+                        # 无法启动子进程：本次在当前线程解析
+                        logger.warning(f"Local parse process could not start, parsing in-process: {str(e)}")
+                        result = extract_document(*args)
+        except Exception as e:
+            logger.warning(f"Local parsing of {filename} failed, falling back to MinerU: {str(e)}")
+            shutil.rmtree(output_dir, ignore_errors=True)
+            return None
+        
+        if result['needs_mineru']:
+            logger.info(f"File {filename} needs MinerU: {result['needs_mineru']}")
+            shutil.rmtree(output_dir, ignore_errors=True)
+            return None
+        logger.info(f"Parsed {filename} locally in {time.time() - start_time:.2f}s "
+                    f"({result['pages']} pages, {result['chars']} chars, {result['images']} images)")
+        
+        markdown_content = self._replace_image_paths(result['markdown'], 'full.md', extract_id)
+        if self._can_generate_captions():
+            enhanced_content, failed_count = self._enhance_markdown_with_captions(markdown_content)
+            return None, enhanced_content, extract_id, None, failed_count
+        return None, markdown_content, extract_id, None, 0
+    
     def _parse_text_file(self, file_path: str, filename: str) -> tuple[Optional[str], Optional[str], Optional[str], Optional[str], int]:
         """
         Parse plain text file directly without MinerU
@@ -341,107 +443,70 @@ class FileParserService:
             return error_msg
     
     def _poll_result(self, batch_id: str, max_wait_time: int = 600) -> tuple[Optional[str], Optional[str], Optional[str]]:
-        """Poll for parsing result
+        """Wait for parsing result via the shared MinerU poller
         
         Returns:
             Tuple of (markdown_content, extract_id, error_message)
         """
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.mineru_token}"
-        }
-        
-        result_url = self.get_result_api_template.format(batch_id)
-        start_time = time.time()
+        poller = get_mineru_poller(self.mineru_api_base, self.mineru_token)
+        try:
+            extract_result = poller.wait(batch_id, max_wait_time)
+        except MinerUPollError as e:
+            return None, None, str(e)
         
-        while True:
-            if time.time() - start_time > max_wait_time:
-                error_msg = f"Parsing timeout after {max_wait_time} seconds"
-                logger.error(error_msg)
-                return None, None, error_msg
-            
-            try:
-                response = requests.get(result_url, headers=headers, timeout=30)
-                response.raise_for_status()
-                task_info = response.json()
-                
-                if task_info.get("code") != 0:
-                    error_msg = f"Failed to query task status: {task_info.get('msg')}"
-                    logger.error(error_msg)
-                    return None, None, error_msg
-                
-                task_status = task_info["data"]["extract_result"][0]["state"]
-                
-                if task_status == "done":
-                    logger.info("File parsing completed!")
-                    full_zip_url = task_info["data"]["extract_result"][0]["full_zip_url"]
-                    # Download and extract markdown
-                    return self._download_markdown(full_zip_url)
-                elif task_status == "failed":
-                    err_msg = task_info["data"]["extract_result"][0].get("err_msg", "Unknown error")
-                    error_msg = f"File parsing failed: {err_msg}"
-                    logger.error(error_msg)
-                    return None, None, error_msg
-                else:
-                    logger.debug(f"Current task status: {task_status}, waiting...")
-                    time.sleep(2)  # Wait 2 seconds before next poll
-                    
-            except requests.exceptions.RequestException as e:
-                logger.warning(f"Network error while polling result: {str(e)}, retrying...")
-                time.sleep(2)
+        logger.info("File parsing completed!")
+        # Download and extract markdown
+        return self._download_markdown(extract_result["full_zip_url"])
     
     def _download_markdown(self, zip_url: str) -> tuple[Optional[str], Optional[str], Optional[str]]:
         """Download and extract markdown from result zip, save images to local server
         
+        The zip is streamed to a temp file in bounded chunks (never held in memory),
+        and only the markdown / JSON files plus the images they reference are extracted.
+        
         Returns:
             Tuple of (markdown_content, extract_id, error_message)
         """
         try:
-            response = requests.get(zip_url, timeout=60)
-            response.raise_for_status()
-            
             # Generate unique directory name for this extraction
             import uuid
             extract_id = str(uuid.uuid4())[:8]
             
-            # Get upload folder from Flask config (we'll need to pass this)
-            # For now, use a hardcoded path relative to project root
-            import os
-            from pathlib import Path
-            
-            # Navigate to project root (assuming this file is in backend/services/)
-            current_file = Path(__file__).resolve()
-            backend_dir = current_file.parent.parent
-            project_root = backend_dir.parent
-            
-            # Create directory for mineru extracts
-            mineru_storage = project_root / 'uploads' / 'mineru_files' / extract_id
-            mineru_storage.mkdir(parents=True, exist_ok=True)
+            mineru_root = self._mineru_storage_root()
+            mineru_root.mkdir(parents=True, exist_ok=True)
+            mineru_storage = mineru_root / extract_id
             
-            logger.info(f"Extracting ZIP to: {mineru_storage}")
+            with tempfile.TemporaryFile(dir=mineru_root) as zip_file:
+                self._stream_download(zip_url, zip_file)
+                
+                # Create directory for mineru extracts (only after a complete download)
+                mineru_storage.mkdir(parents=True, exist_ok=True)
+                logger.info(f"Extracting ZIP to: {mineru_storage}")
+                with zipfile.ZipFile(zip_file) as z:
+                    members = self._select_zip_members(z)
+                    for info in members:
+                        extracted = Path(z.extract(info, mineru_storage))
+                        if extracted.stat().st_size != info.file_size:
+                            raise zipfile.BadZipFile(f"Size mismatch for {info.filename}")
+                    logger.info(f"Extracted {len(members)}/{len(z.infolist())} files from ZIP")
             
             markdown_content = None
             markdown_file_path = None
             
-            with zipfile.ZipFile(io.BytesIO(response.content)) as z:
-                # Extract all files
-                z.extractall(mineru_storage)
-                logger.info(f"Extracted {len(z.namelist())} files from ZIP")
-                
-                # Find markdown file (usually full.md or similar)
-                for name in z.namelist():
-                    if name.endswith('.md') or name.endswith('.MD'):
-                        markdown_file_path = name
-                        md_full_path = mineru_storage / name
-                        with open(md_full_path, 'r', encoding='utf-8') as f:
-                            markdown_content = f.read()
-                        logger.info(f"Found markdown file: {name}")
-                        break
-                
-                if not markdown_content:
-                    error_msg = "No markdown file found in result zip"
-                    logger.error(error_msg)
-                    return None, None, error_msg
+            # Find markdown file (usually full.md or similar)
+            for info in members:
+                name = info.filename
+                if name.endswith('.md') or name.endswith('.MD'):
+                    markdown_file_path = name
+                    with open(mineru_storage / name, 'r', encoding='utf-8') as f:
+                        markdown_content = f.read()
+                    logger.info(f"Found markdown file: {name}")
+                    break
+            
+            if not markdown_content:
+                error_msg = "No markdown file found in result zip"
+                logger.error(error_msg)
+                return None, None, error_msg
             
             # Replace relative image paths with local server URLs
             markdown_content = self._replace_image_paths(
@@ -465,6 +530,55 @@ class FileParserService:
             logger.error(error_msg)
             return None, None, error_msg
     
+    @staticmethod
+    def _mineru_storage_root() -> Path:
+        """uploads/mineru_files under the project root (this file is in backend/services/)"""
+        project_root = Path(__file__).resolve().parent.parent.parent
+        return project_root / 'uploads' / 'mineru_files'
+    
+    def _stream_download(self, url: str, fileobj) -> int:
+        """Stream url into fileobj in DOWNLOAD_CHUNK_SIZE chunks, verifying Content-Length"""
+        start_time = time.time()
+        received = 0
+        with requests.get(url, stream=True, timeout=60) as response:
+            response.raise_for_status()
+            for chunk in response.iter_content(chunk_size=self.DOWNLOAD_CHUNK_SIZE):
+                fileobj.write(chunk)
+                received += len(chunk)
+            expected = response.headers.get('Content-Length')
+        # Content-Encoding 为 gzip 等时 Content-Length 是压缩后大小，只对未编码响应校验
+        if expected and expected.isdigit() and not response.headers.get('Content-Encoding') \
+                and int(expected) != received:
+            raise requests.exceptions.ContentDecodingError(
+                f"Incomplete download: got {received} of {expected} bytes"
+            )
+        fileobj.seek(0)
+        elapsed = max(time.time() - start_time, 1e-6)
+        logger.info(f"Downloaded result zip: {received / 1024 / 1024:.1f} MB in {elapsed:.1f}s "
+                    f"({received / 1024 / 1024 / elapsed:.1f} MB/s)")
+        return received
+    
+    @staticmethod
+    def _select_zip_members(z: zipfile.ZipFile) -> List[zipfile.ZipInfo]:
+        """Markdown / JSON results plus images referenced from them (by file name)
+        
+        layout.json and *_content_list.json are kept because the image editability
+        extractors read them; the origin PDF and unreferenced images are skipped.
+        """
+        infos = [info for info in z.infolist() if not info.is_dir()]
+        text_members = [info for info in infos if info.filename.lower().endswith(_TEXT_RESULT_EXTENSIONS)]
+        referenced = set()
+        for info in text_members:
+            with z.open(info) as f:
+                text = f.read().decode('utf-8', errors='ignore')
+            referenced.update(_IMAGE_NAME_PATTERN.findall(text))
+        images = [
+            info for info in infos
+            if not info.filename.lower().endswith(_TEXT_RESULT_EXTENSIONS)
+            and os.path.basename(info.filename) in referenced
+        ]
+        return text_members + images
+    
     def _replace_image_paths(self, markdown_content: str, markdown_file_path: str, extract_id: str) -> str:
         """Replace relative image paths in markdown with local server URLs"""
         import os
@@ -574,6 +688,13 @@ class FileParserService:
         """
         Generate captions for multiple images in parallel with retry mechanism
         
+        Identical images (same bytes) and near-duplicates (perceptual hash) share one
+        caption; captions already in the shared caption cache cost no model call.
+        Each image is read once: fingerprinting decodes it and releases the decoded
+        image right away, keeping only the raw bytes; cluster representatives are
+        decoded again inside the caption workers, so at most ``max_workers`` decoded
+        images are held at a time. Hit statistics are kept in ``self.caption_stats``.
+        
         Args:
             image_urls: List of image URLs
             max_workers: Maximum number of parallel workers
@@ -583,45 +704,137 @@ class FileParserService:
             Tuple of (list of captions, number of failed images)
         """
         captions = [""] * len(image_urls)
-        failed_count = 0
+        cache = get_caption_cache()
+        cache_model = f"{self._provider_format}:{self.image_caption_model}"
+        
+        # Step 1: fingerprint every distinct URL (sha256 of bytes + dHash)
+        unique_urls = list(dict.fromkeys(image_urls))
+        
+        def fingerprint(url: str) -> tuple[Optional[tuple[str, int]], Optional[bytes]]:
+            loaded = self._load_caption_image(url)
+            if loaded is None:
+                return None, None
+            data, image = loaded
+            try:
+                return image_fingerprint(data, image), data
+            except Exception as e:
+                logger.warning(f"Failed to fingerprint image {url}: {str(e)}")
+                return None, None
+            finally:
+                image.close()
         
-        def generate_with_retry(url: str, idx: int) -> tuple[int, str, bool]:
-            """Generate caption with retry logic"""
-            for attempt in range(max_retries):
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            loaded_by_url = dict(zip(unique_urls, executor.map(fingerprint, unique_urls)))
+        fingerprints = {url: fp for url, (fp, _) in loaded_by_url.items()}
+        
+        # Step 2: group URLs by content, resolve groups from the cache
+        urls_by_sha: dict[str, list[str]] = {}
+        phash_by_sha: dict[str, int] = {}
+        data_by_sha: dict[str, bytes] = {}
+        for url, (fp, data) in loaded_by_url.items():
+            if fp is not None:
+                urls_by_sha.setdefault(fp[0], []).append(url)
+                phash_by_sha[fp[0]] = fp[1]
+                data_by_sha.setdefault(fp[0], data)
+        del loaded_by_url
+        
+        caption_by_sha: dict[str, str] = {}
+        cache_hits = 0
+        if cache is not None:
+            for sha, phash in phash_by_sha.items():
                 try:
-                    caption = self._generate_single_caption(url)
-                    if caption:
-                        logger.debug(f"Generated caption for image {idx + 1}/{len(image_urls)} (attempt {attempt + 1})")
-                        return (idx, caption, True)
-                    else:
-                        logger.warning(f"Empty caption for image {idx + 1} (attempt {attempt + 1}/{max_retries})")
+                    cached = cache.get(cache_model, sha, phash)
                 except Exception as e:
-                    logger.warning(f"Failed to generate caption for image {idx + 1} (attempt {attempt + 1}/{max_retries}): {str(e)}")
-                    if attempt < max_retries - 1:
-                        import time
-                        time.sleep(1 * (attempt + 1))  # Exponential backoff: 1s, 2s, 3s
+                    logger.warning(f"Caption cache read failed: {str(e)}")
+                    cached = None
+                if cached:
+                    caption_by_sha[sha] = cached
+                    cache_hits += 1
+        
+        # Step 3: near-duplicates within this batch share one model call
+        max_distance = cache.max_distance if cache is not None else 4
+        clusters: list[list[str]] = []  # each: [representative sha, *near-duplicate shas]
+        for sha, phash in phash_by_sha.items():
+            if sha in caption_by_sha:
+                continue
+            for cluster in clusters:
+                if (phash_by_sha[cluster[0]] ^ phash).bit_count() <= max_distance:
+                    cluster.append(sha)
+                    break
+            else:
+                clusters.append([sha])
+        # Only cluster representatives are sent to the model; release the other images' bytes
+        data_by_sha = {cluster[0]: data_by_sha[cluster[0]] for cluster in clusters}
+        
+        def generate_with_retry(url: str, data: bytes, idx: int) -> tuple[int, str, bool]:
+            """Decode the representative image, then generate its caption with retry logic"""
+            try:
+                image = Image.open(io.BytesIO(data))
+                image.load()
+            except Exception as e:
+                logger.error(f"Failed to decode image {url}: {str(e)}")
+                return (idx, "", False)
+            with image:
+                for attempt in range(max_retries):
+                    try:
+                        caption = self._caption_image(image, url)
+                        if caption:
+                            logger.debug(f"Generated caption for image {idx + 1}/{len(clusters)} (attempt {attempt + 1})")
+                            return (idx, caption, True)
+                        else:
+                            logger.warning(f"Empty caption for image {idx + 1} (attempt {attempt + 1}/{max_retries})")
+                    except Exception as e:
+                        logger.warning(f"Failed to generate caption for image {idx + 1} (attempt {attempt + 1}/{max_retries}): {str(e)}")
+                        if attempt < max_retries - 1:
+                            time.sleep(1 * (attempt + 1))  # Exponential backoff: 1s, 2s, 3s
             
             # All retries failed
             logger.error(f"Failed to generate caption for image {idx + 1} after {max_retries} attempts")
             return (idx, "", False)
         
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_idx = {
-                executor.submit(generate_with_retry, url, idx): idx
-                for idx, url in enumerate(image_urls)
-            }
-            
-            for future in as_completed(future_to_idx):
-                try:
-                    idx, caption, success = future.result()
-                    captions[idx] = caption
-                    if not success:
-                        failed_count += 1
-                except Exception as e:
+        if clusters:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                future_to_idx = {
+                    executor.submit(generate_with_retry, urls_by_sha[cluster[0]][0], data_by_sha[cluster[0]], idx): idx
+                    for idx, cluster in enumerate(clusters)
+                }
+                
+                for future in as_completed(future_to_idx):
                     idx = future_to_idx[future]
-                    logger.error(f"Unexpected error generating caption for image {idx + 1}: {str(e)}")
-                    failed_count += 1
+                    try:
+                        _, caption, success = future.result()
+                    except Exception as e:
+                        logger.error(f"Unexpected error generating caption for image {idx + 1}: {str(e)}")
+                        continue
+                    if not success:
+                        continue
+                    for sha in clusters[idx]:
+                        caption_by_sha[sha] = caption
+                    if cache is not None:
+                        representative = clusters[idx][0]
+                        try:
+                            cache.put(cache_model, representative, phash_by_sha[representative], caption)
+                        except Exception as e:
+                            logger.warning(f"Caption cache write failed: {str(e)}")
         
+        failed_count = 0
+        for i, url in enumerate(image_urls):
+            fp = fingerprints.get(url)
+            captions[i] = caption_by_sha.get(fp[0], "") if fp is not None else ""
+            if not captions[i]:
+                failed_count += 1
+        
+        # hit_rate: share of readable images that needed no model call of their own
+        model_calls = len(clusters)
+        readable = sum(1 for url in image_urls if fingerprints.get(url) is not None)
+        self.caption_stats = {
+            'images': len(image_urls),
+            'model_calls': model_calls,
+            'cache_hits': cache_hits,
+            'hit_rate': round(1 - model_calls / readable, 3) if readable else 0.0,
+        }
+        logger.info(f"Caption cache: {len(image_urls)} images, {model_calls} model calls, "
+                    f"{cache_hits} cached, hit rate {self.caption_stats['hit_rate']:.0%}")
         return captions, failed_count
     
     def _generate_single_caption(self, image_url: str) -> str:
@@ -634,20 +847,27 @@ class FileParserService:
         Returns:
             Generated caption
         """
+        loaded = self._load_caption_image(image_url)
+        if loaded is None:
+            return ""
+        return self._caption_image(loaded[1], image_url)
+    
+    def _load_caption_image(self, image_url: str) -> Optional[tuple[bytes, Image.Image]]:
+        """Read and decode an image referenced from markdown; None if unavailable"""
         try:
             # Load image based on URL type
             if image_url.startswith('http://') or image_url.startswith('https://'):
                 response = requests.get(image_url, timeout=30)
                 response.raise_for_status()
-                image = Image.open(io.BytesIO(response.content))
+                data = response.content
             elif image_url.startswith('/files/mineru/'):
                 from utils.path_utils import find_mineru_file_with_prefix
 
                 img_path = find_mineru_file_with_prefix(image_url)
                 if img_path is None or not img_path.exists():
                     logger.warning(f"Local mineru image file not found: {image_url}")
-                    return ""
-                image = Image.open(img_path)
+                    return None
+                data = img_path.read_bytes()
             elif image_url.startswith('/files/'):
                 # Uploaded files URL -> local filesystem path under upload folder
                 from config import Config
@@ -655,28 +875,32 @@ class FileParserService:
                 img_path = Path(Config.UPLOAD_FOLDER) / relative_path
                 if not img_path.exists():
                     logger.warning(f"Local uploaded image file not found: {image_url} -> {img_path}")
-                    return ""
-                image = Image.open(img_path)
+                    return None
+                data = img_path.read_bytes()
             else:
                 local_path = Path(image_url)
                 if local_path.exists():
-                    image = Image.open(local_path)
+                    data = local_path.read_bytes()
                 else:
                     logger.warning(f"Local image file not found: {image_url}")
-                    return ""
+                    return None
 
+            image = Image.open(io.BytesIO(data))
             # Force decode to surface image errors early (including HEIC)
             image.load()
+            return data, image
         except FileNotFoundError:
             logger.warning(f"Local image file not found: {image_url}")
-            return ""
+            return None
         except UnidentifiedImageError as e:
             logger.warning(f"Unsupported or corrupt image file: {image_url}. {str(e)}")
-            return ""
+            return None
         except Exception as e:
             logger.warning(f"Failed to open image for captioning: {image_url}. {str(e)}")
-            return ""
-
+            return None
+    
+    def _caption_image(self, image: Image.Image, image_url: str) -> str:
+        """Ask the caption model to describe an already decoded image"""
         prompt = "请用一句简短的中文描述这张图片的主要内容。只返回描述文字，不要其他解释。"
 
         # Normalize image for AI providers (RGB + downscale for very large images)
@@ -0,0 +1,217 @@
+"""
+版面分析结果缓存 - 可编辑PPTX导出时复用未变化页面的 EditableImage
+
+make_image_editable 对每页都要走 MinerU 上传/轮询、百度 OCR、inpaint 和生成式质量增强，
+导出一个 30 页的 deck 只改了一页时，其余 29 页的分析结果完全可以复用。
+
+缓存键 = 页面图片内容哈希 + 导出设置（extractor_method / inpaint_method / max_depth）。
+每条缓存是 EditableImage.to_dict() 的 JSON，存放在
+``{upload_folder}/editable_images/_analysis_cache/{key}.json``；
+它引用的 clean background、已写出的元素裁剪图、子图背景都在同一个 editable_images 目录下，
+读取时任何一个文件缺失就视为未命中，重新分析；尚未写出的裁剪图是根页面上的裁剪区域
+（ElementImage），命中后照常按需裁剪。
+
+缓存条目会让它引用的 ``editable_images/<image_id>/`` 目录一直保留，因此和 MinerU 结果缓存一样淘汰：
+    - 创建超过 EXPORT_ANALYSIS_CACHE_MAX_AGE_DAYS 的条目、以及超出 EXPORT_ANALYSIS_CACHE_MAX_MB 时
+      最久未使用（命中时更新缓存文件的 mtime）的条目会被删除
+    - 被淘汰条目引用的 editable_images/<image_id>/ 目录随之删除，仍被其他条目引用的目录保留
+      （只删除缓存条目登记过的目录，缓存关闭时的分析结果不受影响）
+    - 每个实例（一次导出）第一次写入时淘汰一次；本次导出读取 / 写入过的条目不会被淘汰
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set
+
+from .data_models import EditableElement, EditableImage
+
+logger = logging.getLogger(__name__)
+
+# 分析流程或数据结构变化时递增，使旧缓存失效
+CACHE_VERSION = 2
+
+
+class EditableImageCache:
+    """按图片内容 + 导出设置缓存 EditableImage（线程安全：每个键一个文件，原子写入）"""
+
+    def __init__(self, upload_folder, extractor_method: str, inpaint_method: str, max_depth: int,
+                 max_age_seconds: float = 30 * 86400, max_bytes: int = 2 * 1024 * 1024 * 1024):
+        self.root = Path(upload_folder) / 'editable_images'
+        self.cache_dir = self.root / '_analysis_cache'
+        self.settings = f"v{CACHE_VERSION}:{extractor_method}:{inpaint_method}:{max_depth}"
+        self.max_age_seconds = max_age_seconds
+        self.max_bytes = max_bytes
+        self._used: Set[str] = set()
+        self._evicted = False
+        self._lock = threading.Lock()
+
+    def key_for(self, image_path: str) -> str:
+        digest = hashlib.sha256(self.settings.encode('utf-8'))
+        with open(image_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def get(self, image_path: str) -> Optional[EditableImage]:
+        """返回该图片已缓存的分析结果；未命中或引用的文件已丢失时返回 None"""
+        try:
+            key = self.key_for(image_path)
+            cache_path = self.cache_dir / f"{key}.json"
+            if not cache_path.exists():
+                return None
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                editable_image = EditableImage.from_dict(json.load(f)['editable_image'])
+        except Exception as e:
+            logger.warning(f"读取版面分析缓存失败 {image_path}: {e}")
+            return None
+
+        missing = [path for path in _referenced_files(editable_image) if not os.path.exists(path)]
+        if missing:
+            logger.info(f"版面分析缓存引用的文件已丢失（{len(missing)} 个），重新分析: {image_path}")
+            return None
+
+        with self._lock:
+            self._used.add(key)
+        try:
+            os.utime(cache_path)  # mtime 记录最近使用时间，按容量淘汰时最后删除
+        except OSError:
+            pass
+
+        # 同样内容的图片可能换了路径（例如切换回旧版本），以当前路径为准（包括裁剪图句柄引用的根页面）
+        _rebind_element_images(editable_image.elements, editable_image.image_path, image_path)
+        editable_image.image_path = image_path
+        return editable_image
+
+    def put(self, image_path: str, editable_image: EditableImage):
+        """写入分析结果，并按时间/容量淘汰旧条目"""
+        try:
+            payload = json.dumps({'created': time.time(), 'editable_image': editable_image.to_dict()},
+                                 ensure_ascii=False)
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            key = self.key_for(image_path)
+            cache_path = self.cache_dir / f"{key}.json"
+            tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(payload)
+            os.replace(tmp_path, cache_path)
+        except Exception as e:
+            logger.warning(f"写入版面分析缓存失败 {image_path}: {e}")
+            return
+
+        with self._lock:
+            self._used.add(key)
+            if self._evicted:
+                return
+            self._evicted = True
+            try:
+                self._evict()
+            except Exception as e:
+                logger.warning(f"淘汰版面分析缓存失败: {e}")
+
+    def _evict(self):
+        now = time.time()
+        # 键 -> (创建时间, 最近使用时间, 缓存文件大小, 引用的 image_id 目录)
+        entries: Dict[str, tuple] = {}
+        for cache_path in self.cache_dir.glob('*.json'):
+            try:
+                stat = cache_path.stat()
+                with open(cache_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                created = data['created']
+                dirs = self._image_dirs(EditableImage.from_dict(data['editable_image']))
+            except Exception:
+                # 旧版本 / 损坏的缓存文件：不会再命中，直接删除（引用的目录无从得知，保留）
+                cache_path.unlink(missing_ok=True)
+                continue
+            entries[cache_path.stem] = (created, stat.st_mtime, stat.st_size, dirs)
+
+        dir_sizes = {name: _dir_size(self.root / name) for e in entries.values() for name in e[3]}
+
+        def total_size(keys) -> int:
+            names = {name for k in keys for name in entries[k][3]}
+            return sum(entries[k][2] for k in keys) + sum(dir_sizes[name] for name in names)
+
+        expired = [k for k, e in entries.items() if k not in self._used and now - e[0] > self.max_age_seconds]
+        remaining = [k for k in entries if k not in expired]
+        victims = list(expired)
+        by_last_used = sorted((entries[k][1], k) for k in remaining if k not in self._used)
+        total = total_size(remaining)
+        for _, k in by_last_used:
+            if total <= self.max_bytes:
+                break
+            victims.append(k)
+            remaining.remove(k)
+            total = total_size(remaining)
+        if not victims:
+            return
+
+        in_use = {name for k in remaining for name in entries[k][3]}
+        for k in victims:
+            (self.cache_dir / f"{k}.json").unlink(missing_ok=True)
+            for name in entries[k][3] - in_use:
+                shutil.rmtree(self.root / name, ignore_errors=True)
+                in_use.add(name)  # 多个被淘汰条目共享目录时只删除一次
+        logger.info(f"版面分析缓存淘汰 {len(victims)} 个条目")
+
+    def _image_dirs(self, editable_image: EditableImage) -> Set[str]:
+        """条目引用的 editable_images/<image_id> 目录名（包括尚未写出的裁剪图所在目录）"""
+        root = self.root.resolve()
+        names = set()
+        for path in _entry_paths(editable_image):
+            try:
+                rel = Path(path).resolve().relative_to(root)
+            except ValueError:
+                continue  # 不在 editable_images 下（例如 MinerU 结果里的图片）
+            if len(rel.parts) > 1 and rel.parts[0] != self.cache_dir.name:
+                names.add(rel.parts[0])
+        return names
+
+
+def _referenced_files(editable_image: EditableImage) -> Iterator[str]:
+    if editable_image.clean_background:
+        yield editable_image.clean_background
+    yield from _element_files(editable_image.elements)
+
+
+def _entry_paths(editable_image: EditableImage) -> Iterator[str]:
+    yield from _referenced_files(editable_image)
+    yield from _image_ref_outputs(editable_image.elements)
+
+
+def _image_ref_outputs(elements: List[EditableElement]) -> Iterator[str]:
+    for element in elements:
+        if element.image_ref is not None:
+            yield element.image_ref.output_path
+        yield from _image_ref_outputs(element.children)
+
+
+def _dir_size(path: Path) -> int:
+    size = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                size += os.path.getsize(os.path.join(dirpath, filename))
+            except OSError:
+                pass
+    return size
+
+
+def _rebind_element_images(elements: List[EditableElement], old_path: str, new_path: str):
+    for element in elements:
+        if element.image_ref is not None and element.image_ref.source_path == old_path:
+            element.image_ref.source_path = new_path
+        _rebind_element_images(element.children, old_path, new_path)
+
+
+def _element_files(elements: List[EditableElement]) -> Iterator[str]:
+    for element in elements:
+        if element.image_path:
+            yield element.image_path
+        if element.inpainted_background_path:
+            yield element.inpainted_background_path
+        yield from _element_files(element.children)
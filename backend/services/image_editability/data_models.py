@@ -1,9 +1,14 @@
 """
 数据模型 - 图片可编辑化服务的核心数据结构
 """
+import os
 from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass, field
 
+from PIL import Image
+
+from .element_images import ElementImage
+
 
 @dataclass
 class BBox:
@@ -38,6 +43,11 @@ class BBox:
             'y1': self.y1
         }
     
+    @classmethod
+    def from_dict(cls, data: Dict[str, float]) -> 'BBox':
+        """从字典恢复（to_dict 的逆操作）"""
+        return cls(x0=data['x0'], y0=data['y0'], x1=data['x1'], y1=data['y1'])
+    
     def scale(self, scale_x: float, scale_y: float) -> 'BBox':
         """缩放bbox"""
         return BBox(
@@ -65,7 +75,10 @@ class EditableElement:
     bbox: BBox  # 在父容器（EditableImage）坐标系中的位置
     bbox_global: BBox  # 在根图片（最顶层EditableImage）坐标系中的位置（预计算存储，避免前端/后续使用时重新遍历计算）
     content: Optional[str] = None  # 文字内容、HTML表格等
-    image_path: Optional[str] = None  # 图片路径（MinerU提取的）
+    image_path: Optional[str] = None  # 图片路径（已写出的裁剪图）
+    
+    # 裁剪图的延迟句柄（需要像素 / 文件时才裁剪 / 写出，见 get_image / get_image_path）
+    image_ref: Optional[ElementImage] = field(default=None, repr=False, compare=False)
     
     # 递归子元素（如果是图片或图表，可能有子元素）
     children: List['EditableElement'] = field(default_factory=list)
@@ -76,6 +89,24 @@ class EditableElement:
     # 元数据
     metadata: Dict[str, Any] = field(default_factory=dict)
     
+    def has_image(self) -> bool:
+        """是否有裁剪图可用（延迟句柄或已存在的文件）"""
+        return self.image_ref is not None or bool(self.image_path and os.path.exists(self.image_path))
+    
+    def get_image(self) -> Optional[Image.Image]:
+        """裁剪图像素（优先使用延迟句柄，不写文件）"""
+        if self.image_ref is not None:
+            return self.image_ref.load()
+        if self.image_path and os.path.exists(self.image_path):
+            return Image.open(self.image_path)
+        return None
+    
+    def get_image_path(self) -> Optional[str]:
+        """裁剪图文件路径（首次调用时才写出PNG）"""
+        if self.image_ref is not None and not (self.image_path and os.path.exists(self.image_path)):
+            self.image_path = self.image_ref.save()
+        return self.image_path
+    
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典（可序列化）"""
         result = {
@@ -85,11 +116,28 @@ class EditableElement:
             'bbox_global': self.bbox_global.to_dict(),
             'content': self.content,
             'image_path': self.image_path,
+            'image_ref': self.image_ref.to_dict() if self.image_ref is not None else None,
             'inpainted_background_path': self.inpainted_background_path,
             'metadata': self.metadata,
             'children': [child.to_dict() for child in self.children]
         }
         return result
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'EditableElement':
+        """从字典恢复（to_dict 的逆操作，递归恢复子元素）"""
+        return cls(
+            element_id=data['element_id'],
+            element_type=data['element_type'],
+            bbox=BBox.from_dict(data['bbox']),
+            bbox_global=BBox.from_dict(data['bbox_global']),
+            content=data.get('content'),
+            image_path=data.get('image_path'),
+            image_ref=ElementImage.from_dict(data['image_ref']) if data.get('image_ref') else None,
+            children=[cls.from_dict(child) for child in data.get('children') or []],
+            inpainted_background_path=data.get('inpainted_background_path'),
+            metadata=data.get('metadata') or {}
+        )
 
 
 @dataclass
@@ -129,3 +177,17 @@ class EditableImage:
             'metadata': self.metadata
         }
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'EditableImage':
+        """从字典恢复（to_dict 的逆操作）"""
+        return cls(
+            image_id=data['image_id'],
+            image_path=data['image_path'],
+            width=data['width'],
+            height=data['height'],
+            elements=[EditableElement.from_dict(elem) for elem in data.get('elements') or []],
+            clean_background=data.get('clean_background'),
+            depth=data.get('depth', 0),
+            parent_id=data.get('parent_id'),
+            metadata=data.get('metadata') or {}
+        )
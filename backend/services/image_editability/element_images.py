@@ -0,0 +1,97 @@
+"""
+元素裁剪图的延迟句柄
+
+_convert_to_editable_elements 过去为每个元素（包括每一行OCR文字）都裁剪并保存一张PNG，
+而下游只有少数消费方真正读取像素：文字样式识别（裁剪图）、嵌入PPTX的图片 / 表格元素。
+ElementImage 只记录元素在根页面图片上的裁剪区域：
+- load()：需要像素时才裁剪（根页面按需解码，最近使用的几页保留在内存中）
+- save()：需要文件路径时（嵌入PPTX）才写出PNG，之后复用同一文件
+- keep_in_memory：创建时直接从已解码的图片裁剪并持有，之后不再解码页面
+句柄可序列化（to_dict / from_dict），版面分析缓存命中后仍可按需重建裁剪图。
+"""
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# 按需解码的根页面：(路径, mtime, 大小) -> 已解码图片；同一页的元素通常连续读取
+_PAGE_CACHE_SIZE = 4
+_pages: 'OrderedDict[Tuple, Image.Image]' = OrderedDict()
+_pages_lock = threading.Lock()
+
+
+def _load_page(path: str) -> Image.Image:
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    # 解码也在锁内：并发读取同一页的线程只解码一次
+    with _pages_lock:
+        page = _pages.get(key)
+        if page is not None:
+            _pages.move_to_end(key)
+            return page
+        page = Image.open(path)
+        page.load()
+        _pages[key] = page
+        while len(_pages) > _PAGE_CACHE_SIZE:
+            _pages.popitem(last=False)
+        return page
+
+
+class ElementImage:
+    """元素裁剪图：根页面图片上的一个裁剪区域，按需裁剪 / 写文件"""
+
+    def __init__(
+        self,
+        source_path: str,
+        crop_box: Tuple[int, int, int, int],
+        output_path: str,
+        image: Optional[Image.Image] = None
+    ):
+        """
+        Args:
+            source_path: 根页面图片路径
+            crop_box: 在根页面图片上的裁剪区域 (x0, y0, x1, y1)
+            output_path: 需要文件时写出的PNG路径
+            image: 已裁剪好的图片（keep_in_memory 时传入，之后直接使用）
+        """
+        self.source_path = source_path
+        self.crop_box = tuple(int(v) for v in crop_box)
+        self.output_path = output_path
+        self._image = image
+        self._lock = threading.Lock()
+
+    def load(self) -> Image.Image:
+        """裁剪图（内存中持有的图片，或从根页面按需裁剪）"""
+        if self._image is not None:
+            return self._image
+        return _load_page(self.source_path).crop(self.crop_box)
+
+    def save(self) -> str:
+        """写出PNG（已存在则直接复用），返回文件路径"""
+        with self._lock:
+            if not os.path.exists(self.output_path):
+                os.makedirs(os.path.dirname(self.output_path), exist_ok=True)
+                tmp_path = f"{self.output_path}.{os.getpid()}.{threading.get_ident()}.tmp.png"
+                self.load().save(tmp_path)
+                os.replace(tmp_path, self.output_path)
+            return self.output_path
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'source_path': self.source_path,
+            'crop_box': list(self.crop_box),
+            'output_path': self.output_path
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ElementImage':
+        return cls(
+            source_path=data['source_path'],
+            crop_box=tuple(data['crop_box']),
+            output_path=data['output_path']
+        )
@@ -18,6 +18,8 @@ from typing import Dict, Any, List, Optional, Tuple, Type
 from pathlib import Path
 from PIL import Image
 
+from .mineru_cache import get_mineru_result_cache
+
 logger = logging.getLogger(__name__)
 
 
@@ -149,16 +151,20 @@ class MinerUElementExtractor(ElementExtractor):
         img = Image.open(image_path)
         image_size = img.size  # (width, height)
         
-        # 1. 检查缓存
-        cached_dir = self._find_cache(image_path)
-        if cached_dir:
-            logger.info(f"{'  ' * depth}使用MinerU缓存")
-            mineru_result_dir = cached_dir
-        else:
-            # 2. 解析图片
-            mineru_result_dir = self._parse_image(image_path, depth)
-            if not mineru_result_dir:
-                return ExtractionResult(elements=[])
+        # 1. 检查缓存（按图片内容哈希；同一内容并发请求时只解析一次）
+        cache = get_mineru_result_cache(self._upload_folder)
+        cache_key = cache.key_for(image_path)
+        with cache.key_lock(cache_key):
+            cached_dir = self._find_cache(image_path, cache_key)
+            if cached_dir:
+                logger.info(f"{'  ' * depth}使用MinerU缓存")
+                mineru_result_dir = cached_dir
+            else:
+                # 2. 解析图片
+                mineru_result_dir = self._parse_image(image_path, depth)
+                if not mineru_result_dir:
+                    return ExtractionResult(elements=[])
+                cache.put(cache_key, mineru_result_dir)
         
         # 3. 提取元素
         elements = self._extract_from_result(
@@ -175,23 +181,13 @@ class MinerUElementExtractor(ElementExtractor):
         
         return ExtractionResult(elements=elements, context=context)
     
-    def _find_cache(self, image_path: str) -> Optional[str]:
-        """查找缓存的MinerU结果"""
+    def _find_cache(self, image_path: str, cache_key: Optional[str] = None) -> Optional[str]:
+        """查找缓存的MinerU结果（内容相同的图片复用同一个 mineru_files/<extract_id>）"""
         try:
-            import hashlib
-            import time
-            
-            img_path = Path(image_path)
-            if not img_path.exists():
-                return None
-            
-            mineru_files_dir = self._upload_folder / 'mineru_files'
-            if not mineru_files_dir.exists():
+            if not Path(image_path).exists():
                 return None
-            
-            # 简单策略：不使用缓存（更安全）
-            return None
-            
+            cache = get_mineru_result_cache(self._upload_folder)
+            return cache.get(cache_key or cache.key_for(image_path))
         except Exception as e:
             logger.debug(f"查找缓存失败: {e}")
             return None
@@ -210,7 +206,7 @@ class MinerUElementExtractor(ElementExtractor):
             # 调用MinerU解析
             image_id = str(uuid.uuid4())[:8]
             batch_id, markdown_content, extract_id, error_message, failed_image_count = \
-                self._parser_service.parse_file(pdf_path, f"image_{image_id}.pdf")
+                self._parser_service.parse_file(pdf_path, f"image_{image_id}.pdf", local_fast_path=False)
             
             if error_message or not extract_id:
                 logger.error(f"{'  ' * depth}MinerU解析失败: {error_message}")
@@ -227,6 +223,141 @@ class MinerUElementExtractor(ElementExtractor):
             if os.path.exists(pdf_path):
                 os.remove(pdf_path)
     
+    def prefetch(self, image_paths: List[str]) -> int:
+        """
+        批量解析：把尚未缓存的多张图片（如一个 deck 的所有页面）打包成一个多页PDF，
+        只调用一次 MinerU，再把 layout.json 的 pdf_info 按页拆分成单页结果目录登记到缓存，
+        之后每页的 extract() 直接命中缓存。返回经批量解析的图片数。
+        
+        失败不抛异常：未能拆分的页面会在 extract() 时按单张图片解析。
+        """
+        from contextlib import ExitStack
+        from config import get_config
+        
+        config = get_config()
+        max_pages = getattr(config, 'MINERU_BATCH_MAX_PAGES', 200)
+        max_bytes = getattr(config, 'MINERU_BATCH_MAX_MB', 150) * 1024 * 1024
+        cache = get_mineru_result_cache(self._upload_folder)
+        
+        pending = {}  # key -> image_path（内容相同的图片只解析一次）
+        for image_path in image_paths:
+            try:
+                key = cache.key_for(image_path)
+            except OSError as e:
+                logger.warning(f"批量解析跳过无法读取的图片 {image_path}: {e}")
+                continue
+            if key not in pending:
+                pending[key] = image_path
+        if len(pending) < 2:
+            return 0
+        
+        parsed = 0
+        with ExitStack() as stack:
+            # 按键排序加锁，避免与其他批次死锁；单张 extract() 只持有一把锁
+            for key in sorted(pending):
+                stack.enter_context(cache.key_lock(key))
+            items = [(key, path) for key, path in pending.items() if cache.get(key) is None]
+            
+            # 按页数和文件大小分块（MinerU 单文件有页数/体积上限）
+            chunks, chunk, chunk_bytes = [], [], 0
+            for key, path in items:
+                size = os.path.getsize(path)
+                if chunk and (len(chunk) >= max_pages or chunk_bytes + size > max_bytes):
+                    chunks.append(chunk)
+                    chunk, chunk_bytes = [], 0
+                chunk.append((key, path))
+                chunk_bytes += size
+            if chunk:
+                chunks.append(chunk)
+            
+            for chunk in chunks:
+                if len(chunk) < 2:
+                    continue
+                try:
+                    parsed += self._parse_batch(chunk, cache)
+                except Exception as e:
+                    logger.warning(f"MinerU批量解析失败，回退为逐页解析: {e}", exc_info=True)
+        return parsed
+    
+    def _parse_batch(self, items: List[Tuple[str, str]], cache) -> int:
+        """把 items 打包成多页PDF解析一次，拆分结果并登记缓存，返回成功拆分的页数"""
+        import shutil
+        from services.export_stream import StreamingPDFWriter, SLIDE_WIDTH_IN, SLIDE_HEIGHT_IN
+        
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp_pdf:
+            pdf_path = tmp_pdf.name
+        try:
+            with open(pdf_path, 'wb') as f:
+                writer = StreamingPDFWriter(f, page_size=(SLIDE_WIDTH_IN * 72, SLIDE_HEIGHT_IN * 72))
+                for _, image_path in items:
+                    # 每页与图片同比例，bbox 按 page_size 缩放即可还原到图片坐标
+                    writer.add_image(image_path, fit_page=True)
+                writer.close()
+            
+            logger.info(f"MinerU批量解析 {len(items)} 张图片（1 次上传）")
+            batch_id, markdown_content, extract_id, error_message, failed_image_count = \
+                self._parser_service.parse_file(
+                    pdf_path, f"images_batch_{str(uuid.uuid4())[:8]}.pdf", local_fast_path=False)
+        finally:
+            if os.path.exists(pdf_path):
+                os.remove(pdf_path)
+        
+        if error_message or not extract_id:
+            logger.error(f"MinerU批量解析失败: {error_message}")
+            return 0
+        
+        result_dir = (self._upload_folder / 'mineru_files' / extract_id).resolve()
+        try:
+            page_dirs = self._split_batch_result(result_dir, len(items))
+            for (key, _), page_dir in zip(items, page_dirs):
+                cache.put(key, str(page_dir))
+            return len(page_dirs)
+        finally:
+            # 各页需要的文件已复制到单页目录
+            shutil.rmtree(result_dir, ignore_errors=True)
+    
+    @staticmethod
+    def _split_batch_result(result_dir: Path, page_count: int) -> List[Path]:
+        """把多页结果目录拆分为 <extract_id>_p<N> 单页目录（layout.json + content_list + 引用的图片）"""
+        import shutil
+        
+        with open(result_dir / 'layout.json', 'r', encoding='utf-8') as f:
+            layout_data = json.load(f)
+        pdf_info = layout_data.get('pdf_info') or []
+        if len(pdf_info) != page_count:
+            raise ValueError(f"MinerU返回 {len(pdf_info)} 页，期望 {page_count} 页")
+        
+        content_list_files = list(result_dir.glob("*_content_list.json"))
+        content_list = []
+        content_list_name = 'batch_content_list.json'
+        if content_list_files:
+            content_list_name = content_list_files[0].name
+            with open(content_list_files[0], 'r', encoding='utf-8') as f:
+                content_list = json.load(f)
+        
+        images_dir = result_dir / 'images'
+        image_files = [p for p in images_dir.iterdir() if p.is_file()] if images_dir.exists() else []
+        
+        page_dirs = []
+        for i, page_info in enumerate(pdf_info):
+            page_idx = page_info.get('page_idx', i)
+            page_content = [dict(item, page_idx=0) for item in content_list if item.get('page_idx') == page_idx]
+            
+            page_dir = result_dir.parent / f"{result_dir.name}_p{i + 1}"
+            page_dir.mkdir(parents=True, exist_ok=True)
+            with open(page_dir / 'layout.json', 'w', encoding='utf-8') as f:
+                json.dump({**layout_data, 'pdf_info': [dict(page_info, page_idx=0)]}, f, ensure_ascii=False)
+            with open(page_dir / content_list_name, 'w', encoding='utf-8') as f:
+                json.dump(page_content, f, ensure_ascii=False)
+            
+            referenced = json.dumps([page_info, page_content], ensure_ascii=False)
+            for image_file in image_files:
+                if image_file.name in referenced:
+                    (page_dir / 'images').mkdir(exist_ok=True)
+                    shutil.copy2(image_file, page_dir / 'images' / image_file.name)
+            page_dirs.append(page_dir)
+        return page_dirs
+    
     def _extract_from_result(
         self,
         mineru_result_dir: str,
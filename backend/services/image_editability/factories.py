@@ -464,7 +464,8 @@ class ServiceConfig:
         inpaint_registry: InpaintProviderRegistry,
         max_depth: int = 1,
         min_image_size: int = 200,
-        min_image_area: int = 40000
+        min_image_area: int = 40000,
+        keep_element_images_in_memory: bool = False
     ):
         """
         初始化服务配置
@@ -476,6 +477,8 @@ class ServiceConfig:
             max_depth: 最大递归深度（默认1）
             min_image_size: 最小图片尺寸
             min_image_area: 最小图片面积
+            keep_element_images_in_memory: 元素裁剪图是否在分析时即裁剪并保存在内存中
+                （默认 False：只记录裁剪区域，需要时再从根页面裁剪）
         """
         self.upload_folder = upload_folder
         self.extractor_registry = extractor_registry
@@ -483,6 +486,7 @@ class ServiceConfig:
         self.max_depth = max_depth
         self.min_image_size = min_image_size
         self.min_image_area = min_image_area
+        self.keep_element_images_in_memory = keep_element_images_in_memory
     
     @classmethod
     def from_defaults(
@@ -531,6 +535,7 @@ class ServiceConfig:
                 - max_depth: 最大递归深度（默认1）
                 - min_image_size: 最小图片尺寸（默认200）
                 - min_image_area: 最小图片面积（默认40000）
+                - keep_element_images_in_memory: 元素裁剪图是否保存在内存中（默认从 Flask config 获取，否则False）
                 - contain_threshold: 混合提取器包含判断阈值（默认0.8）
                 - intersection_threshold: 混合提取器交集判断阈值（默认0.3）
                 - enhance_quality: 混合Inpaint是否启用画质提升（默认True）
@@ -555,6 +560,10 @@ class ServiceConfig:
                 mineru_api_base = current_app.config.get('MINERU_API_BASE', 'https://mineru.net')
             if upload_folder is None:
                 upload_folder = current_app.config.get('UPLOAD_FOLDER', './uploads')
+            kwargs.setdefault(
+                'keep_element_images_in_memory',
+                current_app.config.get('EDITABLE_ELEMENT_IMAGES_IN_MEMORY', False)
+            )
         else:
             # 回退到默认值
             if mineru_api_base is None:
@@ -668,7 +677,8 @@ class ServiceConfig:
             inpaint_registry=inpaint_registry,
             max_depth=kwargs.get('max_depth', 1),
             min_image_size=kwargs.get('min_image_size', 200),
-            min_image_area=kwargs.get('min_image_area', 40000)
+            min_image_area=kwargs.get('min_image_area', 40000),
+            keep_element_images_in_memory=kwargs.get('keep_element_images_in_memory', False)
         )
 
 
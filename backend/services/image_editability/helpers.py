@@ -4,8 +4,11 @@
 纯函数，不依赖任何具体实现
 """
 import logging
+import math
 import tempfile
-from typing import List
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
 from PIL import Image
 
 from .data_models import EditableElement, BBox
@@ -31,29 +34,48 @@ def collect_bboxes_from_elements(elements: List[EditableElement]) -> List[tuple]
     return bboxes
 
 
+def load_image(image_path: str) -> Image.Image:
+    """
+    打开并解码图片（解码后文件句柄即关闭，之后只在内存中裁剪 / 传递）
+    
+    Args:
+        image_path: 图片路径
+        
+    Returns:
+        已解码的PIL图像
+    """
+    img = Image.open(image_path)
+    img.load()
+    return img
+
+
 def crop_element_from_image(
-    source_image_path: str,
+    source_image: Image.Image,
     bbox: BBox
-) -> str:
+) -> Image.Image:
     """
-    从源图片中裁剪出元素区域
+    从源图片中裁剪出元素区域（内存中，不写文件）
     
     Args:
-        source_image_path: 源图片路径
+        source_image: 已解码的源图片
         bbox: 裁剪区域
         
     Returns:
-        裁剪后图片的临时文件路径
+        裁剪后的图片
     """
-    img = Image.open(source_image_path)
-    
-    # 裁剪
     crop_box = (int(bbox.x0), int(bbox.y0), int(bbox.x1), int(bbox.y1))
-    cropped = img.crop(crop_box)
+    return source_image.crop(crop_box)
+
+
+def save_image_to_temp(image: Image.Image) -> str:
+    """
+    将图片保存为临时PNG文件（仅用于需要文件路径的提取器，调用方负责删除）
     
-    # 保存到临时文件
+    Returns:
+        临时文件路径
+    """
     with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp:
-        cropped.save(tmp.name)
+        image.save(tmp.name)
         return tmp.name
 
 
@@ -103,3 +125,84 @@ def should_recurse_into_element(
         return False
     
     return True
+
+
+class BBoxIndex:
+    """
+    bbox 空间索引（均匀网格，坐标存放在 NumPy 数组中）
+    
+    用于替代"每个 bbox 与其余所有 bbox 两两比较"的嵌套循环：
+    - 网格边长默认取 bbox 尺寸（宽高较大者）的中位数，每个 bbox 登记到它覆盖的格子
+    - 覆盖格子过多的大 bbox（以及坐标颠倒的 bbox）单独存放，每次查询都作为候选
+    - 查询时只收集查询框覆盖格子内的 bbox，再精确比较坐标（查询框很大时向量化过滤全部 bbox）
+    
+    query 返回与查询框相交或相接（闭区间）的 bbox 下标，是任何"有正面积交集"判断的超集，
+    调用方可在结果上继续应用精确的包含/重叠比例判断。
+    """
+    
+    def __init__(self, bboxes: Sequence, cell_size: Optional[float] = None, max_cells_per_box: int = 64):
+        """
+        Args:
+            bboxes: bbox 列表 [(x0, y0, x1, y1), ...]，空值 / 非 4 元组会被忽略（查询时不返回）
+            cell_size: 网格边长（像素），默认按 bbox 尺寸中位数
+            max_cells_per_box: 覆盖格子数超过该值的 bbox 不登记到网格
+        """
+        ids, coords = [], []
+        for i, bbox in enumerate(bboxes):
+            if bbox is not None and len(bbox) == 4:
+                ids.append(i)
+                coords.append(bbox)
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.boxes = np.asarray(coords, dtype=np.float64).reshape(-1, 4)
+        # 候选较少时逐个比较 Python 元组比 NumPy 花式索引更快
+        self._id_list = ids
+        self._box_list = [tuple(box) for box in self.boxes.tolist()]
+        
+        if cell_size is None:
+            sizes = np.maximum(self.boxes[:, 2] - self.boxes[:, 0], self.boxes[:, 3] - self.boxes[:, 1])
+            cell_size = float(np.median(sizes)) if len(sizes) else 1.0
+        self.cell_size = max(cell_size, 1.0)
+        
+        self._grid: Dict[Tuple[int, int], List[int]] = {}
+        self._large: List[int] = []
+        cells = np.floor(self.boxes / self.cell_size).astype(np.int64)
+        for pos, (cx0, cy0, cx1, cy1) in enumerate(cells.tolist()):
+            if cx1 < cx0 or cy1 < cy0 or (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > max_cells_per_box:
+                self._large.append(pos)
+                continue
+            for gx in range(cx0, cx1 + 1):
+                for gy in range(cy0, cy1 + 1):
+                    self._grid.setdefault((gx, gy), []).append(pos)
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def query(self, bbox: Sequence, margin: float = 0.0) -> List[int]:
+        """
+        与 bbox（四边各外扩 margin）相交或相接的 bbox 原始下标（升序）
+        
+        即满足 x0 <= qx1 + margin and x1 >= qx0 - margin（y 方向同理）的 bbox
+        """
+        if bbox is None or len(bbox) != 4 or not len(self.ids):
+            return []
+        qx0, qy0, qx1, qy1 = (bbox[0] - margin, bbox[1] - margin, bbox[2] + margin, bbox[3] + margin)
+        cx0, cy0 = math.floor(qx0 / self.cell_size), math.floor(qy0 / self.cell_size)
+        cx1, cy1 = math.floor(qx1 / self.cell_size), math.floor(qy1 / self.cell_size)
+        
+        if cx1 < cx0 or cy1 < cy0 or (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self._grid):
+            # 查询框坐标颠倒，或覆盖的格子比已占用的格子还多：直接向量化过滤全部 bbox
+            boxes = self.boxes
+            hit = (boxes[:, 0] <= qx1) & (boxes[:, 2] >= qx0) & (boxes[:, 1] <= qy1) & (boxes[:, 3] >= qy0)
+            return self.ids[hit].tolist()
+        
+        found = set(self._large)
+        for gx in range(cx0, cx1 + 1):
+            for gy in range(cy0, cy1 + 1):
+                found.update(self._grid.get((gx, gy), ()))
+        result = []
+        for pos in found:
+            x0, y0, x1, y1 = self._box_list[pos]
+            if x0 <= qx1 and x1 >= qx0 and y0 <= qy1 and y1 >= qy0:
+                result.append(self._id_list[pos])
+        result.sort()
+        return result
@@ -13,6 +13,7 @@ from typing import Dict, Any, List, Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from PIL import Image
 
+from .helpers import BBoxIndex
 from .extractors import (
     ElementExtractor, 
     ExtractionResult, 
@@ -192,6 +193,10 @@ class HybridElementExtractor(ElementExtractor):
         """混合提取器支持所有类型"""
         return True
     
+    def prefetch(self, image_paths: List[str]) -> int:
+        """批量预解析MinerU部分（见 MinerUElementExtractor.prefetch），百度OCR仍按页调用"""
+        return self._mineru_extractor.prefetch(image_paths)
+    
     def extract(
         self,
         image_path: str,
@@ -321,11 +326,15 @@ class HybridElementExtractor(ElementExtractor):
         baidu_to_keep = set(range(len(baidu_elements)))  # 初始全部保留
         baidu_in_table = set()  # 在表格内的百度OCR元素
         
+        # 百度OCR bbox 空间索引：每个 MinerU bbox 只与和它相交的OCR行比较
+        baidu_bboxes = [baidu_elem.get('bbox', []) for baidu_elem in baidu_elements]
+        baidu_index = BBoxIndex(baidu_bboxes)
+        
         # 规则1: 图片类型bbox里包含的百度OCR bbox → 删除
         for img_elem in image_elements:
             img_bbox = img_elem.get('bbox', [])
-            for idx, baidu_elem in enumerate(baidu_elements):
-                baidu_bbox = baidu_elem.get('bbox', [])
+            for idx in baidu_index.query(img_bbox):
+                baidu_bbox = baidu_bboxes[idx]
                 if BBoxUtils.is_contained(baidu_bbox, img_bbox, self._contain_threshold):
                     baidu_to_keep.discard(idx)
                     logger.debug(f"{indent}    百度OCR[{idx}]被图片包含，删除")
@@ -335,8 +344,8 @@ class HybridElementExtractor(ElementExtractor):
         for table_idx, table_elem in enumerate(table_elements):
             table_bbox = table_elem.get('bbox', [])
             has_contained_text = False
-            for idx, baidu_elem in enumerate(baidu_elements):
-                baidu_bbox = baidu_elem.get('bbox', [])
+            for idx in baidu_index.query(table_bbox):
+                baidu_bbox = baidu_bboxes[idx]
                 if BBoxUtils.is_contained(baidu_bbox, table_bbox, self._contain_threshold):
                     baidu_in_table.add(idx)
                     has_contained_text = True
@@ -350,10 +359,10 @@ class HybridElementExtractor(ElementExtractor):
         other_to_remove = set()
         for other_idx, other_elem in enumerate(other_elements):
             other_bbox = other_elem.get('bbox', [])
-            for idx, baidu_elem in enumerate(baidu_elements):
+            for idx in baidu_index.query(other_bbox):
                 if idx not in baidu_to_keep:
                     continue
-                baidu_bbox = baidu_elem.get('bbox', [])
+                baidu_bbox = baidu_bboxes[idx]
                 if BBoxUtils.has_intersection(other_bbox, baidu_bbox, self._intersection_threshold):
                     other_to_remove.add(other_idx)
                     logger.debug(f"{indent}    MinerU其他[{other_idx}]与百度OCR[{idx}]有交集，使用百度OCR")
@@ -0,0 +1,173 @@
+"""
+MinerU 解析结果缓存 - 相同图片不重复上传 MinerU
+
+MinerUElementExtractor 每次提取都要把图片转成单页 PDF 上传 MinerU 并轮询结果。
+同一页在多次导出之间、以及递归分析中重复出现的子图裁剪，内容完全相同，
+结果也完全相同。
+
+缓存以图片内容的 sha256 为键，值为 ``mineru_files/<extract_id>`` 目录：
+    - 索引文件 ``mineru_files/.extractor_cache.json`` 记录 键 -> extract_id、
+      创建/最近使用时间、目录内每个文件的大小
+    - 命中时校验 layout.json / *_content_list.json 存在且文件大小与索引一致，
+      校验失败则删除索引项并重新解析
+    - 超过 MINERU_CACHE_MAX_AGE_DAYS 的条目、以及超出 MINERU_CACHE_MAX_MB 时
+      最久未使用的条目会连同目录一起删除（只删除本缓存登记过的目录，
+      参考文件解析产生的目录不受影响）
+    - 同一键并发请求时只有一个线程真正调用 MinerU，其余等待其结果
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILENAME = '.extractor_cache.json'
+
+# PDF 转换方式或解析参数变化时递增，使旧缓存失效
+CACHE_VERSION = 1
+
+
+class MinerUResultCache:
+    """mineru_files 目录下按图片内容哈希索引的解析结果"""
+
+    def __init__(self, mineru_files_dir, max_age_seconds: float = 30 * 86400,
+                 max_bytes: int = 2 * 1024 * 1024 * 1024):
+        self.root = Path(mineru_files_dir)
+        self.index_path = self.root / INDEX_FILENAME
+        self.max_age_seconds = max_age_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+
+    @staticmethod
+    def key_for(image_path: str) -> str:
+        digest = hashlib.sha256(f"mineru-v{CACHE_VERSION}\0".encode('utf-8'))
+        with open(image_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def key_lock(self, key: str) -> threading.Lock:
+        """同一键的 查找 -> 解析 -> 登记 需要串行，避免重复调用 MinerU"""
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                if len(self._key_locks) > 1024:
+                    for k in [k for k, l in self._key_locks.items() if not l.locked()]:
+                        del self._key_locks[k]
+                lock = self._key_locks[key] = threading.Lock()
+            return lock
+
+    def get(self, key: str) -> Optional[str]:
+        """返回缓存的结果目录（已校验完整性），未命中返回 None"""
+        with self._lock:
+            index = self._load()
+            entry = index.get(key)
+            if entry is None:
+                return None
+            result_dir = self.root / entry['extract_id']
+            if not self._is_intact(result_dir, entry):
+                logger.warning(f"MinerU缓存已损坏，重新解析: {entry['extract_id']}")
+                del index[key]
+                self._save(index)
+                return None
+            entry['last_used'] = time.time()
+            self._save(index)
+            return str(result_dir.resolve())
+
+    def put(self, key: str, result_dir: str):
+        """登记新解析的结果目录，并按时间/容量淘汰旧条目"""
+        result_dir = Path(result_dir)
+        try:
+            files = {
+                str(path.relative_to(result_dir)): path.stat().st_size
+                for path in result_dir.rglob('*') if path.is_file()
+            }
+        except OSError as e:
+            logger.warning(f"登记MinerU缓存失败 {result_dir}: {e}")
+            return
+        now = time.time()
+        with self._lock:
+            index = self._load()
+            index[key] = {
+                'extract_id': result_dir.name,
+                'created': now,
+                'last_used': now,
+                'size': sum(files.values()),
+                'files': files,
+            }
+            self._evict(index, keep=key)
+            self._save(index)
+
+    def _is_intact(self, result_dir: Path, entry: Dict[str, Any]) -> bool:
+        if not (result_dir / 'layout.json').is_file() or not list(result_dir.glob('*_content_list.json')):
+            return False
+        for rel_path, size in (entry.get('files') or {}).items():
+            try:
+                if (result_dir / rel_path).stat().st_size != size:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def _evict(self, index: Dict[str, Dict[str, Any]], keep: str):
+        now = time.time()
+        expired = [k for k, e in index.items() if k != keep and now - e['created'] > self.max_age_seconds]
+        total = sum(e.get('size', 0) for e in index.values())
+        by_last_used = sorted((e['last_used'], k) for k, e in index.items() if k != keep and k not in expired)
+        victims = list(expired)
+        total -= sum(index[k].get('size', 0) for k in expired)
+        for _, k in by_last_used:
+            if total <= self.max_bytes:
+                break
+            victims.append(k)
+            total -= index[k].get('size', 0)
+        for k in victims:
+            entry = index.pop(k)
+            # 其他键可能指向同一目录（理论上不会），仍在使用时不删除
+            if any(e['extract_id'] == entry['extract_id'] for e in index.values()):
+                continue
+            shutil.rmtree(self.root / entry['extract_id'], ignore_errors=True)
+        if victims:
+            logger.info(f"MinerU缓存淘汰 {len(victims)} 个条目")
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            return index if isinstance(index, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, index: Dict[str, Dict[str, Any]]):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_name(f"{INDEX_FILENAME}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self.index_path)
+
+
+_caches: Dict[str, MinerUResultCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_mineru_result_cache(upload_folder) -> MinerUResultCache:
+    """每个 mineru_files 目录一个共享实例（锁在所有提取器之间共享）"""
+    root = str((Path(upload_folder) / 'mineru_files').resolve())
+    with _caches_lock:
+        cache = _caches.get(root)
+        if cache is None:
+            from config import get_config
+            config = get_config()
+            cache = _caches[root] = MinerUResultCache(
+                root,
+                max_age_seconds=getattr(config, 'MINERU_CACHE_MAX_AGE_DAYS', 30) * 86400,
+                max_bytes=getattr(config, 'MINERU_CACHE_MAX_MB', 2048) * 1024 * 1024,
+            )
+        return cache
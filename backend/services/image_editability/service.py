@@ -8,16 +8,21 @@
 4. 零具体实现依赖 - 完全依赖抽象接口
 """
 import logging
+import os
 import uuid
 from typing import List, Optional, Tuple
 from PIL import Image
 
 from .data_models import BBox, EditableElement, EditableImage
+from .element_images import ElementImage
 from .coordinate_mapper import CoordinateMapper
 from .extractors import ElementExtractor, ExtractionResult
 from .inpaint_providers import InpaintProvider
 from .factories import ServiceConfig
-from .helpers import collect_bboxes_from_elements, should_recurse_into_element, crop_element_from_image
+from .helpers import (
+    collect_bboxes_from_elements, should_recurse_into_element,
+    load_image, crop_element_from_image, save_image_to_temp
+)
 
 logger = logging.getLogger(__name__)
 
@@ -59,6 +64,7 @@ class ImageEditabilityService:
         self._min_image_size = config.min_image_size
         self._min_image_area = config.min_image_area
         self._max_child_coverage_ratio = 0.85
+        self._keep_element_images_in_memory = config.keep_element_images_in_memory
         
         extractors = self._extractor_registry.get_all_extractors()
         inpaint_providers = self._inpaint_registry.get_all_providers()
@@ -76,7 +82,10 @@ class ImageEditabilityService:
         parent_bbox: Optional[BBox] = None,
         root_image_size: Optional[Tuple[int, int]] = None,
         element_type: Optional[str] = None,
-        root_image_path: Optional[str] = None
+        root_image_path: Optional[str] = None,
+        image: Optional[Image.Image] = None,
+        root_image: Optional[Image.Image] = None,
+        image_offset: Tuple[int, int] = (0, 0)
     ) -> EditableImage:
         """
         将图片转换为可编辑结构（递归）
@@ -91,6 +100,9 @@ class ImageEditabilityService:
             root_image_size: 根图片尺寸（内部使用）
             element_type: 元素类型，用于选择提取器（内部使用）
             root_image_path: 根图片路径（内部使用）
+            image: 已解码的当前图片（内部使用，与 image_path 内容一致，避免重复解码）
+            root_image: 已解码的根图片（内部使用）
+            image_offset: 当前图片左上角在根图片中的像素位置（内部使用）
         
         Returns:
             EditableImage对象
@@ -102,19 +114,23 @@ class ImageEditabilityService:
         image_id = str(uuid.uuid4())[:8]
         logger.info(f"{'  ' * depth}[{image_id}] 开始处理")
         
-        # 1. 加载图片
-        try:
-            img = Image.open(image_path)
-            width, height = img.size
-        except Exception as e:
-            logger.error(f"无法加载图片 {image_path}: {e}")
-            raise
+        # 1. 加载图片（每张图片只解码一次，裁剪 / 重绘 / 递归都复用内存中的图像）
+        img = image
+        if img is None:
+            try:
+                img = load_image(image_path)
+            except Exception as e:
+                logger.error(f"无法加载图片 {image_path}: {e}")
+                raise
+        width, height = img.size
         
         # 记录根图片信息
         if root_image_size is None:
             root_image_size = (width, height)
         if root_image_path is None:
             root_image_path = image_path
+        if root_image is None:
+            root_image = img if root_image_path == image_path else load_image(root_image_path)
         
         # 2. 提取元素
         extraction_result = self._extract_elements(
@@ -132,7 +148,9 @@ class ImageEditabilityService:
             parent_bbox=parent_bbox,
             image_size=extracted_image_size,
             root_image_size=root_image_size,
-            source_image_path=image_path  # 传入源图片路径用于裁剪
+            source_image=img,  # 传入已解码的源图片用于裁剪
+            root_image_path=root_image_path,
+            image_offset=image_offset
         )
         
         logger.info(f"{'  ' * depth}提取到 {len(elements)} 个元素")
@@ -141,13 +159,12 @@ class ImageEditabilityService:
         clean_background = None
         if self._inpaint_registry and elements:
             clean_background = self._generate_clean_background(
-                image_path=image_path,
+                image=img,
                 elements=elements,
                 image_id=image_id,
                 depth=depth,
                 parent_bbox=parent_bbox,
-                root_image_path=root_image_path,
-                image_size=(width, height),
+                root_image=root_image,
                 element_type=element_type  # 传递元素类型以选择对应的重绘方法
             )
         
@@ -156,12 +173,13 @@ class ImageEditabilityService:
         if depth + 1 < self._max_depth:
             self._process_children(
                 elements=elements,
-                current_image_path=image_path,
+                current_image=img,
                 depth=depth,
                 image_id=image_id,
                 root_image_size=root_image_size,
-                current_image_size=(width, height),
-                root_image_path=root_image_path
+                root_image_path=root_image_path,
+                root_image=root_image,
+                image_offset=image_offset
             )
         
         # 5. 构建结果
@@ -179,6 +197,19 @@ class ImageEditabilityService:
         logger.info(f"{'  ' * depth}[{image_id}] 处理完成")
         return editable_image
     
+    def prefetch(self, image_paths: List[str]) -> int:
+        """
+        为多张根图片批量预取版面分析结果（如果默认提取器支持，例如 MinerU 多页PDF一次解析）
+        
+        之后对这些图片调用 make_image_editable() 时直接命中提取器缓存。
+        返回预取成功的图片数；不支持批量的提取器返回 0。
+        """
+        extractor = self._select_extractor(None)
+        prefetch = getattr(extractor, 'prefetch', None)
+        if prefetch is None:
+            return 0
+        return prefetch(image_paths)
+    
     def _extract_elements(
         self,
         image_path: str,
@@ -212,26 +243,25 @@ class ImageEditabilityService:
         parent_bbox: Optional[BBox],
         image_size: Tuple[int, int],
         root_image_size: Tuple[int, int],
-        source_image_path: Optional[str] = None
+        source_image: Optional[Image.Image] = None,
+        root_image_path: Optional[str] = None,
+        image_offset: Tuple[int, int] = (0, 0)
     ) -> List[EditableElement]:
         """
         将提取器返回的字典转换为EditableElement对象
         
-        对每个元素根据 bbox 从原图裁剪并保存图片，不依赖 MinerU 提取的图片。
-        这样所有元素（包括文字）都有 image_path，可用于样式提取。
+        每个元素根据 bbox 从原图裁剪，不依赖 MinerU 提取的图片，这样所有元素（包括文字）
+        都有裁剪图可用于样式提取。裁剪图是延迟句柄（ElementImage，记录在根图片上的裁剪区域），
+        只有消费方需要像素 / 文件时才裁剪 / 写出PNG；keep_element_images_in_memory 时直接在内存中裁剪持有。
         """
         elements = []
         
-        # 准备输出目录
+        # 裁剪图写出目录（需要文件时才创建）
         output_dir = None
-        source_img = None
-        if source_image_path:
+        source_img = source_image
+        if source_img is not None and root_image_path:
             output_dir = self._upload_folder / 'editable_images' / image_id / 'elements'
-            output_dir.mkdir(parents=True, exist_ok=True)
-            try:
-                source_img = Image.open(source_image_path)
-            except Exception as e:
-                logger.warning(f"无法加载源图片进行裁剪: {e}")
+        offset_x, offset_y = image_offset
         
         for idx, elem_dict in enumerate(element_dicts):
             bbox_list = elem_dict['bbox']
@@ -253,8 +283,8 @@ class ImageEditabilityService:
                     parent_image_size=root_image_size
                 )
             
-            # 为每个元素裁剪并保存图片（统一使用自己裁剪的图片）
-            element_image_path = None
+            # 为每个元素记录裁剪区域（统一使用自己裁剪的图片）
+            element_image = None
             if source_img and output_dir:
                 try:
                     # 裁剪元素区域
@@ -267,9 +297,14 @@ class ImageEditabilityService:
                     
                     # 检查裁剪区域有效性
                     if crop_box[2] > crop_box[0] and crop_box[3] > crop_box[1]:
-                        cropped = source_img.crop(crop_box)
-                        element_image_path = str(output_dir / f"{idx}_{elem_dict['type']}.png")
-                        cropped.save(element_image_path)
+                        # 子图是当前图片的整数平移裁剪，换算到根图片坐标后裁剪结果完全一致
+                        element_image = ElementImage(
+                            source_path=root_image_path,
+                            crop_box=(crop_box[0] + offset_x, crop_box[1] + offset_y,
+                                      crop_box[2] + offset_x, crop_box[3] + offset_y),
+                            output_path=str(output_dir / f"{idx}_{elem_dict['type']}.png"),
+                            image=source_img.crop(crop_box) if self._keep_element_images_in_memory else None
+                        )
                 except Exception as e:
                     logger.warning(f"裁剪元素 {idx} 失败: {e}")
             
@@ -279,27 +314,22 @@ class ImageEditabilityService:
                 bbox=local_bbox,
                 bbox_global=global_bbox,
                 content=elem_dict.get('content'),
-                image_path=element_image_path,  # 使用自己裁剪的图片路径
+                image_ref=element_image,  # 自己裁剪的图片（延迟写出）
                 metadata=elem_dict.get('metadata', {})
             )
             
             elements.append(element)
         
-        # 关闭源图片
-        if source_img:
-            source_img.close()
-        
         return elements
     
     def _generate_clean_background(
         self,
-        image_path: str,
+        image: Image.Image,
         elements: List[EditableElement],
         image_id: str,
         depth: int,
         parent_bbox: Optional[BBox],
-        root_image_path: str,
-        image_size: Tuple[int, int],
+        root_image: Image.Image,
         element_type: Optional[str] = None
     ) -> Optional[str]:
         """
@@ -319,7 +349,7 @@ class ImageEditabilityService:
         
         try:
             bboxes = collect_bboxes_from_elements(elements)
-            img = Image.open(image_path)
+            img = image
             img_width, img_height = img.size
             element_types = [elem.element_type for elem in elements]
             
@@ -336,10 +366,8 @@ class ImageEditabilityService:
             else:
                 crop_box = None
             
-            # 加载完整页面图像
-            full_page_img = None
-            if root_image_path != image_path:
-                full_page_img = Image.open(root_image_path)
+            # 完整页面图像（子图时传入已解码的根图片）
+            full_page_img = root_image if root_image is not image else None
             
             # 过滤覆盖过大的bbox
             filtered_bboxes = []
@@ -387,14 +415,20 @@ class ImageEditabilityService:
     def _process_children(
         self,
         elements: List[EditableElement],
-        current_image_path: str,
+        current_image: Image.Image,
         depth: int,
         image_id: str,
         root_image_size: Tuple[int, int],
-        current_image_size: Tuple[int, int],
-        root_image_path: str
+        root_image_path: str,
+        root_image: Image.Image,
+        image_offset: Tuple[int, int] = (0, 0)
     ):
-        """递归处理子元素（通过裁剪原图获取子图，并行处理多个子元素）"""
+        """
+        递归处理子元素（在内存中裁剪当前图片获取子图，并行处理多个子元素）
+        
+        子图只为提取器写一份临时文件（提取器需要上传 / 读取文件），处理完即删除；
+        子图本身以内存中的图像传入递归，不再重新解码。
+        """
         logger.info(f"{'  ' * depth}递归处理子元素...")
         
         # 筛选需要递归的元素
@@ -402,7 +436,7 @@ class ImageEditabilityService:
         for element in elements:
             if should_recurse_into_element(
                 element=element,
-                parent_image_size=current_image_size,
+                parent_image_size=current_image.size,
                 min_image_size=self._min_image_size,
                 min_image_area=self._min_image_area,
                 max_child_coverage_ratio=self._max_child_coverage_ratio
@@ -417,12 +451,14 @@ class ImageEditabilityService:
         
         def process_single_element(element):
             """处理单个子元素"""
+            child_image_path = None
             try:
                 # 从当前图片裁剪出子区域
-                child_image_path = crop_element_from_image(
-                    source_image_path=current_image_path,
+                child_image = crop_element_from_image(
+                    source_image=current_image,
                     bbox=element.bbox
                 )
+                child_image_path = save_image_to_temp(child_image)
                 
                 child_editable = self.make_image_editable(
                     image_path=child_image_path,
@@ -431,13 +467,23 @@ class ImageEditabilityService:
                     parent_bbox=element.bbox_global,
                     root_image_size=root_image_size,
                     element_type=element.element_type,
-                    root_image_path=root_image_path
+                    root_image_path=root_image_path,
+                    image=child_image,
+                    root_image=root_image,
+                    image_offset=(image_offset[0] + int(element.bbox.x0), image_offset[1] + int(element.bbox.y0))
                 )
                 
                 return element, child_editable, None
             
             except Exception as e:
                 return element, None, e
+            
+            finally:
+                if child_image_path:
+                    try:
+                        os.remove(child_image_path)
+                    except OSError:
+                        pass
         
         logger.info(f"{'  ' * depth}  并行处理 {len(elements_to_process)} 个子元素...")
         
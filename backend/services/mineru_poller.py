@@ -0,0 +1,223 @@
+"""
+Shared poller for MinerU batch extraction results
+
+FileParserService used to poll each batch on its own thread with a fixed 2 s
+sleep and a fresh HTTP connection per request, so 20 simultaneous reference
+file uploads meant 20 sleeping threads and a TLS handshake every 2 seconds
+each.
+
+MinerUResultPoller tracks any number of batch_ids in one background loop:
+    - requests go through a pooled ``requests.Session`` (HTTP keep-alive)
+    - each batch is polled on its own schedule: the first poll is placed at a
+      fraction of the recently observed parse duration, subsequent polls back
+      off exponentially (with jitter) up to ``max_interval``
+    - callers get a ``Future`` resolving to the batch's ``extract_result``
+      entry (state ``done``), or raising MinerUPollError on failure / timeout
+
+Use ``get_mineru_poller(api_base, token)`` to share one poller per account.
+"""
+import logging
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+class MinerUPollError(Exception):
+    """MinerU reported a failure, or the batch did not finish in time"""
+
+
+class _Batch:
+    __slots__ = ('batch_id', 'future', 'submitted', 'deadline', 'next_poll', 'interval')
+
+    def __init__(self, batch_id: str, future: Future, submitted: float, deadline: float,
+                 first_delay: float):
+        self.batch_id = batch_id
+        self.future = future
+        self.submitted = submitted
+        self.deadline = deadline
+        self.next_poll = submitted + first_delay
+        self.interval = first_delay
+
+
+class MinerUResultPoller:
+    """One polling loop for all pending MinerU batches of an account"""
+
+    def __init__(self, api_base: str, token: str, min_interval: float = 1.0,
+                 max_interval: float = 15.0, backoff: float = 1.6, jitter: float = 0.2,
+                 max_concurrent_requests: int = 4):
+        self.result_api_template = f"{api_base}/api/v4/extract-results/batch/{{}}"
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self.max_concurrent_requests = max_concurrent_requests
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=max_concurrent_requests)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {token}",
+        })
+
+        self._batches: Dict[str, _Batch] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        # 最近完成的解析耗时（指数滑动平均），用于安排首次轮询
+        self._avg_duration: Optional[float] = None
+
+    def submit(self, batch_id: str, max_wait_time: float = 600) -> Future:
+        """Start tracking a batch; the same batch_id submitted twice shares one Future"""
+        with self._cond:
+            batch = self._batches.get(batch_id)
+            if batch is not None:
+                return batch.future
+            now = time.time()
+            batch = _Batch(batch_id, Future(), now, now + max_wait_time, self._first_delay())
+            self._batches[batch_id] = batch
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='mineru-poller', daemon=True)
+                self._thread.start()
+            self._cond.notify()
+            return batch.future
+
+    def wait(self, batch_id: str, max_wait_time: float = 600) -> Dict[str, Any]:
+        """Block until the batch is done; returns its extract_result entry"""
+        future = self.submit(batch_id, max_wait_time)
+        try:
+            # 兜底超时：即使轮询线程异常退出，调用方也不会永久等待
+            return future.result(timeout=max_wait_time + self.max_interval + 30)
+        except FutureTimeoutError:
+            with self._cond:
+                batch = self._batches.get(batch_id)
+                if batch is not None and batch.future is future:
+                    self._batches.pop(batch_id, None)
+            raise MinerUPollError(f"Parsing timeout after {int(max_wait_time)} seconds")
+
+    def pending_count(self) -> int:
+        with self._cond:
+            return len(self._batches)
+
+    def _first_delay(self) -> float:
+        if self._avg_duration is None:
+            return self.min_interval
+        return min(max(self._avg_duration * 0.5, self.min_interval), self.max_interval)
+
+    def _next_interval(self, interval: float) -> float:
+        interval = min(interval * self.backoff, self.max_interval)
+        return max(self.min_interval, interval * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+    def _run(self):
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_concurrent_requests,
+                                    thread_name_prefix='mineru-poll') as executor:
+                while True:
+                    with self._cond:
+                        if not self._batches:
+                            self._thread = None
+                            return
+                        now = time.time()
+                        due = [b for b in self._batches.values() if b.next_poll <= now or b.deadline <= now]
+                        if not due:
+                            wake_at = min(min(b.next_poll, b.deadline) for b in self._batches.values())
+                            self._cond.wait(timeout=max(0.0, wake_at - now))
+                            continue
+
+                    # _poll_once 自身不抛异常；这里再兜底一层，任何一个批次出错都不能让轮询线程退出
+                    polls = [(batch, executor.submit(self._poll_once, batch)) for batch in due]
+                    for batch, poll in polls:
+                        try:
+                            result, error = poll.result()
+                        except Exception as e:
+                            result, error = None, f"Unexpected error while polling result of {batch.batch_id}: {e}"
+                        try:
+                            self._handle(batch, result, error)
+                        except Exception as e:
+                            logger.error(f"Failed to resolve MinerU batch {batch.batch_id}: {e}", exc_info=True)
+                            with self._cond:
+                                self._batches.pop(batch.batch_id, None)
+                            if not batch.future.done():
+                                batch.future.set_exception(MinerUPollError(str(e)))
+        finally:
+            with self._cond:
+                if self._thread is threading.current_thread():
+                    self._thread = None
+
+    def _poll_once(self, batch: _Batch) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Returns (extract_result entry or None if still running, error message); never raises"""
+        try:
+            return self._query(batch)
+        except Exception as e:
+            return None, f"Unexpected error while polling result of {batch.batch_id}: {e}"
+
+    def _query(self, batch: _Batch) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        if time.time() >= batch.deadline:
+            return None, f"Parsing timeout after {int(batch.deadline - batch.submitted)} seconds"
+        try:
+            response = self.session.get(self.result_api_template.format(batch.batch_id), timeout=30)
+            response.raise_for_status()
+            task_info = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.warning(f"Network error while polling result of {batch.batch_id}: {str(e)}, retrying...")
+            return None, None
+
+        if not isinstance(task_info, dict):
+            return None, f"Malformed result response for {batch.batch_id}: {task_info!r:.200}"
+        if task_info.get("code") != 0:
+            return None, f"Failed to query task status: {task_info.get('msg')}"
+
+        extract_results = (task_info.get("data") or {}).get("extract_result") or []
+        result = extract_results[0] if isinstance(extract_results, list) and extract_results else None
+        if not isinstance(result, dict):
+            return None, f"Malformed result response for {batch.batch_id}: {task_info!r:.200}"
+        state = result.get("state")
+        if state == "done":
+            return result, None
+        if state == "failed":
+            return None, f"File parsing failed: {result.get('err_msg', 'Unknown error')}"
+        logger.debug(f"Batch {batch.batch_id} status: {state}, waiting...")
+        return None, None
+
+    def _handle(self, batch: _Batch, result: Optional[Dict[str, Any]], error: Optional[str]):
+        with self._cond:
+            if result is None and error is None:
+                batch.interval = self._next_interval(batch.interval)
+                batch.next_poll = time.time() + batch.interval
+                return
+            self._batches.pop(batch.batch_id, None)
+            if result is not None:
+                duration = time.time() - batch.submitted
+                self._avg_duration = duration if self._avg_duration is None \
+                    else 0.7 * self._avg_duration + 0.3 * duration
+        if result is not None:
+            batch.future.set_result(result)
+        else:
+            logger.error(error)
+            batch.future.set_exception(MinerUPollError(error))
+
+
+_pollers: Dict[Tuple[str, str], MinerUResultPoller] = {}
+_pollers_lock = threading.Lock()
+
+
+def get_mineru_poller(api_base: str, token: str) -> MinerUResultPoller:
+    """Shared poller per (api_base, token), so all parser instances use one loop"""
+    with _pollers_lock:
+        poller = _pollers.get((api_base, token))
+        if poller is None:
+            from config import get_config
+            config = get_config()
+            poller = _pollers[(api_base, token)] = MinerUResultPoller(
+                api_base, token,
+                min_interval=getattr(config, 'MINERU_POLL_MIN_INTERVAL', 1.0),
+                max_interval=getattr(config, 'MINERU_POLL_MAX_INTERVAL', 15.0),
+            )
+        return poller
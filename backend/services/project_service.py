@@ -213,6 +213,7 @@ class ProjectService:
         for ref_file in reference_files:
             if ref_file.markdown_content:
                 files_content.append({
+                    'id': ref_file.id,
                     'filename': ref_file.filename,
                     'content': ref_file.markdown_content
                 })
@@ -346,7 +347,7 @@ class ProjectService:
         """
         from flask import current_app
         from services import FileService
-        from services.ai_service_manager import get_ai_service, get_cached_refined_template_style
+        from services.ai_service_manager import get_ai_service
 
         project = Project.query.get(project_id)
         if not project:
@@ -399,20 +400,13 @@ class ProjectService:
                 db.session.commit()
             else:
                 # Has style description: use cached refined version
-                effective_template_style = get_cached_refined_template_style(
-                    project_id=project_id,
+                effective_template_style = ai_service.refine_template_style(
+                    project_context=project_context,
                     base_style=effective_template_style,
                     outline_text=outline_text,
-                    extra_requirements=project.extra_requirements or "",
-                    language=language or "",
-                    generate_fn=lambda: ai_service.generate_template_style(
-                        project_context=project_context,
-                        outline_text=outline_text,
-                        extra_requirements=project.extra_requirements,
-                        existing_template_style=effective_template_style,
-                        language=language
-                    )
-                ).strip()
+                    extra_requirements=project.extra_requirements,
+                    language=language
+                )
 
         # Merge extra requirements with style description
         combined_requirements = project.extra_requirements or ""
@@ -24,6 +24,7 @@ from .outline_prompts import (
 # 描述相关
 from .description_prompts import (
     get_page_description_prompt,
+    get_page_description_prompt_parts,
     get_description_to_outline_prompt,
     get_description_split_prompt,
     get_descriptions_refinement_prompt,
@@ -70,6 +71,7 @@ __all__ = [
     'get_outline_refinement_prompt',
     # 描述
     'get_page_description_prompt',
+    'get_page_description_prompt_parts',
     'get_description_to_outline_prompt',
     'get_description_split_prompt',
     'get_descriptions_refinement_prompt',
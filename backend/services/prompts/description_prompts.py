@@ -4,7 +4,7 @@
 """
 import json
 import logging
-from typing import List, Dict, Optional, TYPE_CHECKING
+from typing import List, Dict, Optional, Tuple, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from services.ai_service import ProjectContext
@@ -14,26 +14,41 @@ from .base import format_reference_files_xml, get_language_instruction
 logger = logging.getLogger(__name__)
 
 
-def get_page_description_prompt(project_context: 'ProjectContext', outline: list, 
-                                page_outline: dict, page_index: int, 
-                                part_info: str = "",
-                                language: str = None,
-                                page_type: str = None,
-                                extra_requirements: str = None) -> str:
+def get_page_description_prompt_parts(project_context: 'ProjectContext', outline: list,
+                                      page_outline: dict, page_index: int,
+                                      part_info: str = "",
+                                      language: str = None,
+                                      page_type: str = None,
+                                      extra_requirements: str = None) -> Tuple[str, str]:
     """
-    生成单个页面描述的 prompt
-    
+    生成单个页面描述的 prompt，拆分为 (共享前缀, 本页后缀)
+
+    前缀只包含同一项目所有页面都相同的内容（参考文件全文、原始需求、完整大纲、
+    规则与输出格式），且放在最前面，便于服务端前缀缓存（Gemini 上下文缓存 /
+    OpenAI prompt caching）在整份 deck 的各页之间复用；页码、本页大纲、页面类型、
+    按页检索的参考片段等放在后缀中。
+
     Args:
         project_context: 项目上下文对象，包含所有原始信息
         outline: 完整大纲
         page_outline: 当前页面的大纲
         page_index: 页面编号（从1开始）
         part_info: 可选的章节信息
-        
+
     Returns:
-        格式化后的 prompt 字符串
+        (prefix, suffix)，prefix + suffix 即完整 prompt
     """
-    files_xml = format_reference_files_xml(project_context.reference_files_content)
+    # 参考文件较短时全文放入共享前缀；否则只在后缀中携带与本页大纲相关的片段
+    if project_context.uses_full_reference_files():
+        shared_files_xml = format_reference_files_xml(project_context.reference_files_content)
+        page_files_xml = ""
+    else:
+        page_query = ' '.join(
+            [str(page_outline.get('title', '')), str(page_outline.get('part', ''))]
+            + [str(point) for point in page_outline.get('points', []) or []]
+        )
+        shared_files_xml = ""
+        page_files_xml = format_reference_files_xml(project_context.reference_files_for(page_query))
     # 根据项目类型选择最相关的原始输入
     if project_context.creation_type == 'idea' and project_context.idea_prompt:
         original_input = project_context.idea_prompt
@@ -48,7 +63,6 @@ def get_page_description_prompt(project_context: 'ProjectContext', outline: list
     if normalized_page_type == '':
         # 仅当 page_type 为空时才兼容旧逻辑：第 1 页按封面处理
         normalized_page_type = 'cover' if page_index == 1 else 'content'
-    is_cover = normalized_page_type == 'cover'
 
     # 页面类型 brief：让"描述"阶段就体现封面/内容/过渡/结尾差异
     desc_type_notes = {
@@ -56,6 +70,7 @@ def get_page_description_prompt(project_context: 'ProjectContext', outline: list
             "【页面类型：封面 Cover】\n"
             "- 只输出极少文字：主标题（必须）、副标题（可选）、一句极短标语/标签（可选）。\n"
             "- 不要堆叠要点列表，不要安排大量信息；突出层级与气质。\n"
+            "- 输出格式中可在页面标题后增加一行副标题，例如：副标题：人类祖先和自然的相处之道\n"
         ),
         'content': (
             "【页面类型：内容 Content】\n"
@@ -91,14 +106,10 @@ def get_page_description_prompt(project_context: 'ProjectContext', outline: list
         render_note = '生成的“页面文字”部分会直接渲染到PPT页面上，因此请务必注意：'
         avoid_note = ""
 
-    prompt = (f"""\
+    prefix = shared_files_xml + (f"""\
 {product_intro}
 用户的原始需求是：\n{original_input}\n
-我们已经有了完整的大纲：\n{outline}\n{part_info}
-现在请为第 {page_index} 页生成描述：
-{page_outline}
-{desc_type_notes.get(normalized_page_type, "")}
-{extra_req_block}
+我们已经有了完整的大纲：\n{outline}\n
 
 【事实性内容 & 联网要求（必须遵守）】
 1) 只要涉及"事实/数据/日期/排名/政策/产品规格/公司现状/最新进展"等时效性强的信息，你必须优先使用以下来源：
@@ -124,7 +135,6 @@ def get_page_description_prompt(project_context: 'ProjectContext', outline: list
 
 输出格式示例：
 页面标题：原始社会：与自然共生
-{"副标题：人类祖先和自然的相处之道" if is_cover else ""}
 
 页面文字：
 - 人类以狩猎采集为生，活动规模小，影响有限
@@ -138,10 +148,33 @@ def get_page_description_prompt(project_context: 'ProjectContext', outline: list
 
 {get_language_instruction(language)}
 """)
-    
-    final_prompt = files_xml + prompt
-    logger.debug(f"[get_page_description_prompt] Final prompt:\n{final_prompt}")
-    return final_prompt
+
+    suffix = page_files_xml + (f"""\
+{part_info}
+现在请为第 {page_index} 页生成描述：
+{page_outline}
+{desc_type_notes.get(normalized_page_type, "")}
+{extra_req_block}""")
+
+    logger.debug(f"[get_page_description_prompt] Final prompt:\n{prefix}{suffix}")
+    return prefix, suffix
+
+
+def get_page_description_prompt(project_context: 'ProjectContext', outline: list, 
+                                page_outline: dict, page_index: int, 
+                                part_info: str = "",
+                                language: str = None,
+                                page_type: str = None,
+                                extra_requirements: str = None) -> str:
+    """
+    生成单个页面描述的 prompt（完整字符串，见 get_page_description_prompt_parts）
+    """
+    prefix, suffix = get_page_description_prompt_parts(
+        project_context, outline, page_outline, page_index,
+        part_info=part_info, language=language, page_type=page_type,
+        extra_requirements=extra_requirements
+    )
+    return prefix + suffix
 
 
 def get_template_style_prompt(project_context: 'ProjectContext',
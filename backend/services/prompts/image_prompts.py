@@ -80,19 +80,15 @@ def get_image_generation_prompt(page_desc: str, outline_text: str,
         ),
     }
 
-    prompt = (f"""\
+    # 整份 PPT 共享的内容（角色、大纲、约束、偏好、额外要求）放在前面，
+    # 本页内容放在最后，使各页 prompt 共享同一前缀，便于服务端前缀缓存
+    shared_prefix = (f"""\
 你是一位专家级UI UX演示设计师，专注于生成设计良好的PPT页面。
-当前PPT页面的页面描述如下:
-<page_description>
-{page_desc}
-</page_description>
 
 <reference_information>
 以下内容仅用于理解上下文，不得出现在最终画面中：
 整个PPT的大纲为：
 {outline_text}
-
-当前位于章节：{current_section}
 </reference_information>
 
 
@@ -104,7 +100,7 @@ def get_image_generation_prompt(page_desc: str, outline_text: str,
 4) 如非必要，禁止出现 markdown 符号（如 #、* 等）。
 5) {template_style_guideline}
 6) 除非 <page_description> 明确要求，否则禁止出现页眉/页脚/页码/面包屑/导航条/水印/打印页码等页面装饰。
-7) 禁止渲染 <reference_information> 中的任何文字（包括"当前位于章节：..."），除非 <page_description> 明确要求展示章节/面包屑/导航信息。
+7) 禁止渲染 <reference_information> 与 <current_section> 中的任何文字（包括章节名），除非 <page_description> 明确要求展示章节/面包屑/导航信息。
 {forbidden_template_text_guidline}</constraints>
 
 <preferences>
@@ -112,10 +108,21 @@ def get_image_generation_prompt(page_desc: str, outline_text: str,
 - 让版式层级清晰、对齐统一、留白自然；优先保证可读性与信息节奏。
 - 装饰元素可用但要克制且与整体风格一致：只在需要时补空，不要喧宾夺主。
 </preferences>
-{get_ppt_language_instruction(language)}
-{material_images_note}{extra_req_text}
-{page_type_notes.get(normalized_page_type, "")}
+{get_ppt_language_instruction(language)}{extra_req_text}
+""")
+
+    page_suffix = (f"""\
+{page_type_notes.get(normalized_page_type, "")}{material_images_note}
+<current_section>
+当前位于章节：{current_section}
+</current_section>
+
+当前PPT页面的页面描述如下:
+<page_description>
+{page_desc}
+</page_description>
 """)
+    prompt = shared_prefix + page_suffix
     
     logger.debug(f"[get_image_generation_prompt] Final prompt:\n{prompt}")
     return prompt
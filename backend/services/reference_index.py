@@ -0,0 +1,235 @@
+"""
+Reference-file retrieval for per-page prompts
+
+Every per-page description prompt used to embed the full markdown of every
+reference file, i.e. O(pages x total reference size) prompt tokens per deck.
+For large references each page now only carries the chunks most relevant to
+its outline:
+
+    - at parse time each ReferenceFile's markdown is split into chunks
+      (heading / paragraph aware, ~REFERENCE_CHUNK_CHARS) and the chunk term
+      frequencies are persisted to ``{UPLOAD_FOLDER}/reference_index/<id>.json``
+      (rebuilt lazily if missing or if the markdown changed)
+    - ReferenceRetriever combines the chunks of all project files and ranks
+      them with BM25 against the page outline (local, no network); CJK text is
+      tokenized as character bigrams, other text as lower-cased words
+    - small references (total <= REFERENCE_CONTEXT_FULL_MAX_CHARS) are still
+      sent in full, so short documents behave exactly as before
+"""
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 分块 / 分词方式变化时递增，使旧索引失效
+INDEX_VERSION = 1
+
+_WORD = re.compile(r'[a-z0-9]+(?:[.\-][a-z0-9]+)*')
+_CJK_RUN = re.compile(r'[\u3400-\u9fff\uf900-\ufaff]+')
+_HEADING = re.compile(r'^#{1,6}\s')
+_IMAGE_LINK = re.compile(r'!\[([^\]]*)\]\([^)]*\)')
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased words + CJK character bigrams (single chars for 1-char runs)"""
+    text = _IMAGE_LINK.sub(r'\1', text or '').lower()
+    tokens = _WORD.findall(text)
+    for run in _CJK_RUN.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def chunk_markdown(text: str, max_chars: int = 1200) -> List[str]:
+    """Split markdown at headings / blank lines into chunks of at most ~max_chars"""
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+
+    def flush():
+        nonlocal current, size
+        if current:
+            chunks.append('\n\n'.join(current).strip())
+        current, size = [], 0
+
+    for block in re.split(r'\n\s*\n', text or ''):
+        block = block.strip()
+        if not block:
+            continue
+        # 标题开启新块（连续的标题保留在同一块），使每块尽量对应一个小节
+        if _HEADING.match(block) and not all(_HEADING.match(part) for part in current):
+            flush()
+        while len(block) > max_chars:
+            flush()
+            cut = max(block.rfind('\n', 0, max_chars), block.rfind('。', 0, max_chars), block.rfind('. ', 0, max_chars))
+            cut = cut + 1 if cut > max_chars // 2 else max_chars
+            chunks.append(block[:cut].strip())
+            block = block[cut:].strip()
+        if size + len(block) > max_chars:
+            flush()
+        if block:
+            current.append(block)
+            size += len(block) + 2
+    flush()
+    return [chunk for chunk in chunks if chunk]
+
+
+def build_file_index(content: str, max_chars: int = 1200) -> Dict[str, Any]:
+    """Chunks of one reference file with their term frequencies"""
+    chunks = chunk_markdown(content, max_chars)
+    return {
+        'version': INDEX_VERSION,
+        'content_sha': _content_sha(content, max_chars),
+        'chunks': [{'text': chunk, 'tf': dict(Counter(tokenize(chunk)))} for chunk in chunks],
+    }
+
+
+def _content_sha(content: str, max_chars: int) -> str:
+    return hashlib.sha256(f"v{INDEX_VERSION}:{max_chars}\0{content or ''}".encode('utf-8')).hexdigest()
+
+
+def _index_path(index_dir: str, reference_file_id: str) -> str:
+    return os.path.join(index_dir, f"{reference_file_id}.json")
+
+
+def save_file_index(index_dir: str, reference_file_id: str, content: str, max_chars: int = 1200) -> Dict[str, Any]:
+    """Build and persist the index of one reference file (called after parsing)"""
+    index = build_file_index(content, max_chars)
+    try:
+        os.makedirs(index_dir, exist_ok=True)
+        path = _index_path(index_dir, reference_file_id)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Failed to persist reference index for {reference_file_id}: {e}")
+    return index
+
+
+def load_file_index(index_dir: str, reference_file_id: str, content: str, max_chars: int = 1200) -> Dict[str, Any]:
+    """Persisted index if it matches the current content, otherwise rebuild (and persist) it"""
+    try:
+        with open(_index_path(index_dir, reference_file_id), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if index.get('content_sha') == _content_sha(content, max_chars):
+            return index
+    except (OSError, ValueError):
+        pass
+    return save_file_index(index_dir, reference_file_id, content, max_chars)
+
+
+def delete_file_index(index_dir: str, reference_file_id: str):
+    try:
+        os.remove(_index_path(index_dir, reference_file_id))
+    except OSError:
+        pass
+
+
+def reference_index_dir() -> str:
+    """{UPLOAD_FOLDER}/reference_index (Flask app.config if available, else Config)"""
+    try:
+        from flask import current_app, has_app_context
+        if has_app_context():
+            return os.path.join(current_app.config['UPLOAD_FOLDER'], 'reference_index')
+    except ImportError:
+        pass
+    from config import get_config
+    return os.path.join(get_config().UPLOAD_FOLDER, 'reference_index')
+
+
+class ReferenceRetriever:
+    """BM25 over the chunks of all reference files of a project"""
+
+    def __init__(self, reference_files_content: List[Dict[str, str]], index_dir: Optional[str] = None,
+                 max_chars: int = 1200, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        # (文件序号, 块序号, 文本, 词频, 长度)
+        self.chunks: List[tuple] = []
+        self.files = reference_files_content
+        for file_idx, file_info in enumerate(reference_files_content):
+            content = file_info.get('content', '') or ''
+            if file_info.get('id') and index_dir:
+                index = load_file_index(index_dir, file_info['id'], content, max_chars)
+            else:
+                index = build_file_index(content, max_chars)
+            for chunk_idx, chunk in enumerate(index['chunks']):
+                tf = chunk['tf']
+                self.chunks.append((file_idx, chunk_idx, chunk['text'], tf, sum(tf.values())))
+        self.avg_len = (sum(c[4] for c in self.chunks) / len(self.chunks)) if self.chunks else 0.0
+        df: Counter = Counter()
+        for chunk in self.chunks:
+            df.update(chunk[3].keys())
+        n = len(self.chunks)
+        self.idf = {term: math.log(1 + (n - freq + 0.5) / (freq + 0.5)) for term, freq in df.items()}
+
+    def search(self, query: str, top_k: int = 8) -> List[tuple]:
+        """Top-k chunks as (file_idx, chunk_idx, text, score), best first"""
+        terms = set(tokenize(query))
+        scored = []
+        for file_idx, chunk_idx, text, tf, length in self.chunks:
+            score = 0.0
+            for term in terms:
+                freq = tf.get(term)
+                if freq:
+                    norm = self.k1 * (1 - self.b + self.b * length / (self.avg_len or 1))
+                    score += self.idf[term] * freq * (self.k1 + 1) / (freq + norm)
+            if score > 0:
+                scored.append((file_idx, chunk_idx, text, score))
+        scored.sort(key=lambda item: -item[3])
+        return scored[:top_k]
+
+    def leading(self, top_k: int = 8, max_chars: Optional[int] = None) -> List[tuple]:
+        """
+        Leading chunks of each file, taken round-robin across files, as
+        (file_idx, chunk_idx, text, 0.0); at most top_k chunks and (after the
+        first chunk) at most max_chars characters in total
+        """
+        by_file: Dict[int, List[tuple]] = {}
+        for file_idx, chunk_idx, text, _, _ in self.chunks:
+            by_file.setdefault(file_idx, []).append((chunk_idx, text))
+        picked: List[tuple] = []
+        total = 0
+        depth = 0
+        while len(picked) < top_k and any(depth < len(chunks) for chunks in by_file.values()):
+            for file_idx in sorted(by_file):
+                if depth >= len(by_file[file_idx]) or len(picked) >= top_k:
+                    continue
+                chunk_idx, text = by_file[file_idx][depth]
+                if picked and max_chars is not None and total + len(text) > max_chars:
+                    return picked
+                picked.append((file_idx, chunk_idx, text, 0.0))
+                total += len(text)
+            depth += 1
+        return picked
+
+    def select(self, query: str, top_k: int = 8, fallback_chars: Optional[int] = None) -> List[Dict[str, str]]:
+        """
+        Reference files restricted to the chunks relevant to query, in the
+        format_reference_files_xml input shape (chunks kept in document order).
+
+        When no chunk matches the query at all (e.g. a Chinese reference with an
+        English outline) the leading chunks of each file are used instead, so the
+        page never silently loses its reference context.
+        """
+        hits = self.search(query, top_k) or self.leading(top_k, fallback_chars)
+        by_file: Dict[int, List[tuple]] = {}
+        for file_idx, chunk_idx, text, _ in hits:
+            by_file.setdefault(file_idx, []).append((chunk_idx, text))
+        selected = []
+        for file_idx in sorted(by_file):
+            parts = [text for _, text in sorted(by_file[file_idx])]
+            selected.append({
+                'filename': self.files[file_idx].get('filename', 'unknown'),
+                'content': '\n\n[...]\n\n'.join(parts),
+            })
+        return selected
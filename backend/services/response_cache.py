@@ -0,0 +1,346 @@
+"""
+Content-addressed cache for text generation responses
+
+AIService text calls are keyed by a hash of (provider/model, call kind, prompt,
+thinking budget, digests of attached images), so re-running a generation with
+unchanged inputs returns the stored response instead of calling the model again.
+
+Backends:
+    - MemoryLRUBackend: in-process LRU (default)
+    - SQLiteBackend: on-disk, shared by all processes using the same file
+
+Both evict by TTL and by size (entry count / total bytes). Concurrent callers
+asking for the same key wait for the first one instead of issuing duplicate
+calls (e.g. per-page requests of a "batch" that all refine the same style).
+
+get_memory_response_cache() is a small in-process cache that stays on even with
+RESPONSE_CACHE_BACKEND=none, for results that must be shared within one batch.
+
+Use ``with bypass_response_cache():`` (or ``force_regenerate`` on the API) to
+skip reads for an explicit "regenerate"; the fresh response still replaces the
+stored one.
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+_bypass: ContextVar[bool] = ContextVar('response_cache_bypass', default=False)
+
+
+@contextmanager
+def bypass_response_cache(enabled: bool = True):
+    """Skip cache reads for calls made inside this block (current thread / task only)"""
+    token = _bypass.set(bool(enabled) or _bypass.get())
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+class MemoryLRUBackend:
+    """In-process LRU with TTL, bounded by entry count and total bytes"""
+
+    def __init__(self, max_entries: int = 1000, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.time():
+                self._remove(key)
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: int):
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (time.time() + ttl, value)
+            self._bytes += len(value.encode('utf-8'))
+            while self._data and (len(self._data) > self.max_entries or self._bytes > self.max_bytes):
+                self._remove(next(iter(self._data)))
+
+    def delete(self, key: str):
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def size(self) -> Dict[str, int]:
+        with self._lock:
+            return {'entries': len(self._data), 'bytes': self._bytes}
+
+    def _remove(self, key: str):
+        _, value = self._data.pop(key)
+        self._bytes -= len(value.encode('utf-8'))
+
+
+class SQLiteBackend:
+    """On-disk cache (separate SQLite file, not the app database)"""
+
+    def __init__(self, path: str, max_entries: int = 1000, max_bytes: int = 64 * 1024 * 1024):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+                " expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_response_cache_accessed ON response_cache(accessed_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT value, expires_at FROM response_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        with conn:
+            if expires_at < time.time():
+                conn.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE response_cache SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        return value
+
+    def set(self, key: str, value: str, ttl: int):
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, size, expires_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value.encode('utf-8')), now + ttl, now)
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        conn.execute("DELETE FROM response_cache WHERE expires_at < ?", (now,))
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM response_cache").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        # Drop least recently used rows until both limits hold
+        for key, size in conn.execute("SELECT key, size FROM response_cache ORDER BY accessed_at").fetchall():
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+            count -= 1
+            total -= size
+
+    def delete(self, key: str):
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+
+    def clear(self):
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM response_cache")
+
+    def size(self) -> Dict[str, int]:
+        count, total = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM response_cache"
+        ).fetchone()
+        return {'entries': count, 'bytes': total}
+
+
+class ResponseCache:
+    """Key building, single-flight lookups and hit/miss metrics over a backend"""
+
+    def __init__(self, backend, ttl: int = 3600):
+        self.backend = backend
+        self.ttl = ttl
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'bypassed': 0, 'errors': 0}
+
+    @staticmethod
+    def make_key(model: str, kind: str, prompt: str, thinking_budget: int = 0,
+                 image_paths: Optional[Iterable[str]] = None) -> str:
+        digest = hashlib.sha256()
+        for part in (model or '', kind, str(thinking_budget), prompt or ''):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        for path in image_paths or []:
+            digest.update(_file_digest(path).encode('utf-8'))
+        return digest.hexdigest()
+
+    def get_or_compute(self, key: str, compute: Callable[[], str],
+                       validate: Optional[Callable[[str], Any]] = None) -> str:
+        """
+        Return the cached value for ``key`` or compute, validate and store it.
+        ``validate`` may raise to keep a bad response (e.g. invalid JSON) out of the cache.
+        """
+        if _bypass.get():
+            self._count('bypassed')
+            return self._compute_and_store(key, compute, validate)
+
+        cached = self._get(key)
+        if cached is not None:
+            self._count('hits')
+            return cached
+
+        with self._key_lock(key):
+            # Another caller may have filled it while we waited
+            cached = self._get(key)
+            if cached is not None:
+                self._count('hits')
+                return cached
+            self._count('misses')
+            return self._compute_and_store(key, compute, validate)
+
+    async def aget_or_compute(self, key: str, compute: Callable[[], Awaitable[str]]) -> str:
+        """Async variant of get_or_compute (without single-flight)"""
+        if _bypass.get():
+            self._count('bypassed')
+        else:
+            cached = self._get(key)
+            if cached is not None:
+                self._count('hits')
+                return cached
+            self._count('misses')
+        value = await compute()
+        if isinstance(value, str) and value:
+            self._set(key, value)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        with self._locks_lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        try:
+            stats.update(self.backend.size())
+        except Exception:
+            pass
+        return stats
+
+    def clear(self):
+        self.backend.clear()
+
+    def _compute_and_store(self, key: str, compute: Callable[[], str],
+                           validate: Optional[Callable[[str], Any]]) -> str:
+        value = compute()
+        if validate is not None:
+            validate(value)
+        if isinstance(value, str) and value:
+            self._set(key, value)
+        return value
+
+    def _set(self, key: str, value: str):
+        try:
+            self.backend.set(key, value, self.ttl)
+        except Exception as e:
+            self._count('errors')
+            logger.warning(f"Response cache write failed: {e}")
+
+    def _get(self, key: str) -> Optional[str]:
+        try:
+            return self.backend.get(key)
+        except Exception as e:
+            self._count('errors')
+            logger.warning(f"Response cache read failed: {e}")
+            return None
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._locks_lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                if len(self._key_locks) > 1024:
+                    # Drop idle locks so the dict does not grow without bound
+                    for k in [k for k, l in self._key_locks.items() if not l.locked()]:
+                        del self._key_locks[k]
+                lock = self._key_locks[key] = threading.Lock()
+            return lock
+
+    def _count(self, name: str):
+        with self._locks_lock:
+            self._stats[name] += 1
+
+
+def _file_digest(path: str) -> str:
+    """Digest of an attached image (content hash; path + mtime if unreadable)"""
+    try:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    except OSError:
+        try:
+            return f"{path}:{os.path.getmtime(path)}"
+        except OSError:
+            return path
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Shared cache built from RESPONSE_CACHE_* config (None when disabled)"""
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                from config import get_config
+                config = get_config()
+                backend_name = (getattr(config, 'RESPONSE_CACHE_BACKEND', 'memory') or 'none').lower()
+                max_entries = getattr(config, 'RESPONSE_CACHE_MAX_ENTRIES', 1000)
+                max_bytes = getattr(config, 'RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024)
+                if backend_name == 'memory':
+                    backend = MemoryLRUBackend(max_entries, max_bytes)
+                elif backend_name == 'sqlite':
+                    backend = SQLiteBackend(config.RESPONSE_CACHE_PATH, max_entries, max_bytes)
+                else:
+                    return None
+                _response_cache = ResponseCache(backend, ttl=getattr(config, 'RESPONSE_CACHE_TTL_SECONDS', 3600))
+                logger.info(f"Response cache enabled: backend={backend_name}, ttl={_response_cache.ttl}s")
+    return _response_cache
+
+
+_memory_cache: Optional[ResponseCache] = None
+
+
+def get_memory_response_cache() -> ResponseCache:
+    """Always-on in-process cache (used when per-batch reuse must not depend on RESPONSE_CACHE_BACKEND)"""
+    global _memory_cache
+    if _memory_cache is None:
+        with _response_cache_lock:
+            if _memory_cache is None:
+                _memory_cache = ResponseCache(MemoryLRUBackend(max_entries=256, max_bytes=4 * 1024 * 1024),
+                                              ttl=15 * 60)
+    return _memory_cache
@@ -7,12 +7,14 @@ This module re-exports the task manager and task functions after refactor.
 from services.tasks import (
     TaskManager,
     task_manager,
+    task_events,
     infer_page_type,
     update_xhs_payload_material,
     generate_descriptions_task,
     generate_images_task,
     generate_single_page_image_task,
     edit_page_image_task,
+    generate_deck_task,
     generate_infographic_task,
     generate_xhs_task,
     generate_xhs_single_card_task,
@@ -27,12 +29,14 @@ from services.tasks import (
 __all__ = [
     "TaskManager",
     "task_manager",
+    "task_events",
     "infer_page_type",
     "update_xhs_payload_material",
     "generate_descriptions_task",
     "generate_images_task",
     "generate_single_page_image_task",
     "edit_page_image_task",
+    "generate_deck_task",
     "generate_infographic_task",
     "generate_xhs_task",
     "generate_xhs_single_card_task",
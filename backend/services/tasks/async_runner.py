@@ -0,0 +1,123 @@
+"""
+Asyncio batch runner for generation tasks.
+
+A single event loop thread is shared by all tasks in the process. Per-page
+work is submitted as coroutines that await the providers' async APIs, so an
+in-flight generation call holds no OS thread (a thread pool per task would
+pin one thread per call for up to GENAI_TIMEOUT seconds). Short blocking
+steps (DB reads/writes, saving images) run via ``asyncio.to_thread``.
+
+Results come back as ``concurrent.futures.Future`` objects, so task code keeps
+its ``as_completed`` loop and does its progress bookkeeping in its own thread.
+Provider concurrency is still capped by the shared rate limiter.
+"""
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Iterable, Iterator, List, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncBatchRunner:
+    """Owns one background event loop and runs coroutines on it"""
+
+    def __init__(self):
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or not self._thread.is_alive():
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def _run():
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+
+                self._thread = threading.Thread(target=_run, name='async-batch-runner', daemon=True)
+                self._thread.start()
+                ready.wait()
+                self._loop = loop
+                logger.info("Async batch runner event loop started")
+            return self._loop
+
+    def submit(self, coro: Awaitable) -> Future:
+        """Schedule a coroutine on the shared loop"""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def map(self, func: Callable[..., Awaitable], items: Iterable[Sequence[Any]],
+            max_in_flight: int) -> List[Future]:
+        """
+        Run ``func(*item)`` for every item with at most ``max_in_flight``
+        coroutines of this batch running at once.
+        """
+        loop = self._ensure_loop()
+        semaphore = asyncio.Semaphore(max(1, max_in_flight))
+
+        async def _bounded(args):
+            async with semaphore:
+                return await func(*args)
+
+        return [asyncio.run_coroutine_threadsafe(_bounded(tuple(item)), loop) for item in items]
+
+    def shutdown(self):
+        with self._lock:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._loop = None
+
+
+# Global runner instance
+async_runner = AsyncBatchRunner()
+
+
+def use_async_generation(app) -> bool:
+    """Whether batch tasks should run on the asyncio runner (ASYNC_GENERATION)"""
+    return bool(app.config.get('ASYNC_GENERATION', False))
+
+
+@contextmanager
+def generation_batch(app, func: Callable, afunc: Callable[..., Awaitable],
+                     items: Iterable[Sequence[Any]], max_workers: int) -> Iterator[List[Future]]:
+    """
+    Run one batch of per-item work and yield its futures.
+
+    With ASYNC_GENERATION the coroutine ``afunc`` runs on the shared loop (up to
+    ASYNC_MAX_IN_FLIGHT at once); otherwise ``func`` runs on a thread pool of
+    ``max_workers`` threads, as before.
+    """
+    items = [tuple(item) for item in items]
+    if use_async_generation(app):
+        yield async_runner.map(afunc, items, app.config.get('ASYNC_MAX_IN_FLIGHT', 64))
+        return
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        yield [executor.submit(func, *item) for item in items]
+
+
+@contextmanager
+def generation_stage(app, func: Callable, afunc: Callable[..., Awaitable],
+                     max_workers: int) -> Iterator[Callable[..., Future]]:
+    """
+    Like :func:`generation_batch`, but for work that arrives over time (pipelines):
+    yields ``submit(*args) -> Future``.
+
+    At most ``max_workers`` items of this stage run at once in both modes, so
+    pipeline stages keep independent limits.
+    """
+    if use_async_generation(app):
+        semaphore = asyncio.Semaphore(max(1, max_workers))
+
+        async def _bounded(args):
+            async with semaphore:
+                return await afunc(*args)
+
+        yield lambda *args: async_runner.submit(_bounded(args))
+        return
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        yield lambda *args: executor.submit(func, *args)
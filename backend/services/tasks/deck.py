@@ -0,0 +1,306 @@
+import asyncio
+import logging
+from concurrent.futures import FIRST_COMPLETED, wait
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import Dict, List
+
+from models import db, Task, Page, Project
+from services import ProjectContext
+from services.response_cache import bypass_response_cache
+
+from .async_runner import generation_stage
+from .descriptions import build_page_description_kwargs, description_content
+from .events import task_events
+from .helpers import (
+    _get_project_reference_files_content, next_page_image_version,
+    record_page_image_version, save_page_image_files
+)
+from .images import build_page_image_kwargs, get_page_description_text
+from .progress import ProgressAggregator
+from .queue import register_task_handler
+
+logger = logging.getLogger(__name__)
+
+
+def generate_deck_task(task_id: str, project_id: str, ai_service, file_service,
+                       outline: List[Dict], use_template: bool = True,
+                       max_description_workers: int = 5, max_image_workers: int = 8,
+                       aspect_ratio: str = "16:9", resolution: str = "2K", app=None,
+                       extra_requirements: str = None, language: str = None,
+                       use_cache: bool = True, regenerate_descriptions: bool = False):
+    """
+    Background task generating page descriptions and images as one pipeline.
+
+    A page's image generation starts as soon as its description is ready, so
+    a slow description only delays its own page instead of the whole image
+    batch. The description and image stages have independent concurrency limits.
+    Pages that already have a description go straight to the image stage unless
+    regenerate_descriptions is set.
+
+    Progress keeps the usual {"total", "completed", "failed"} keys (completed =
+    pages with an image, failed = pages that failed at either stage) plus
+    per-stage counters and failed page ids under "stages".
+    """
+    if app is None:
+        raise ValueError("Flask app instance must be provided")
+
+    with app.app_context():
+        try:
+            task = Task.query.get(task_id)
+            if not task:
+                return
+
+            task.status = 'PROCESSING'
+            db.session.commit()
+
+            project = Project.query.get(project_id)
+            if not project:
+                raise ValueError(f"Project {project_id} not found")
+
+            pages = Page.query.filter_by(project_id=project_id).order_by(Page.order_index).all()
+            pages_data = ai_service.flatten_outline(outline)
+            if len(pages) != len(pages_data):
+                raise ValueError("Page count mismatch")
+            total_pages = len(pages)
+            page_data_by_id = {page.id: page_data for page, page_data in zip(pages, pages_data)}
+
+            project_context = ProjectContext(project, _get_project_reference_files_content(project_id))
+
+            # 断点续跑：已出图的页面跳过；已有描述的页面直接进入出图阶段
+            previous = task.get_progress()
+            completed_page_ids = [pid for pid in (previous.get('completed_page_ids') or []) if pid in page_data_by_id]
+            described_page_ids = [pid for pid in (previous.get('described_page_ids') or []) if pid in page_data_by_id]
+            for pid in completed_page_ids:
+                if pid not in described_page_ids:
+                    described_page_ids.append(pid)
+            if completed_page_ids or described_page_ids:
+                logger.info(f"Task {task_id} resuming: {len(described_page_ids)} described, "
+                            f"{len(completed_page_ids)} illustrated of {total_pages} pages")
+
+            # 已有描述的页面不重新生成（除非显式要求），直接出图
+            skipped = 0
+            if not regenerate_descriptions:
+                for page in pages:
+                    if page.id not in described_page_ids and get_page_description_text(page):
+                        described_page_ids.append(page.id)
+                        skipped += 1
+
+            stages = {
+                "descriptions": {"completed": len(described_page_ids) - skipped, "skipped": skipped,
+                                 "failed": 0, "failed_page_ids": []},
+                "images": {"completed": len(completed_page_ids), "failed": 0, "failed_page_ids": []},
+            }
+            completed = len(completed_page_ids)
+            failed = 0
+
+            task.set_progress({
+                "total": total_pages,
+                "completed": completed,
+                "failed": failed,
+                "completed_page_ids": completed_page_ids,
+                "described_page_ids": described_page_ids,
+                "stages": stages
+            })
+            db.session.commit()
+
+            # --- description stage ---
+
+            def prepare_description(page_id) -> Dict:
+                with app.app_context():
+                    page_obj = Page.query.get(page_id)
+                    if not page_obj:
+                        raise ValueError(f"Page {page_id} not found")
+                    return build_page_description_kwargs(
+                        page_obj, project_context, outline, page_data_by_id[page_id], total_pages, language
+                    )
+
+            def generate_description(page_id):
+                with app.app_context(), bypass_response_cache(not use_cache):
+                    try:
+                        desc_text = ai_service.generate_page_description(**prepare_description(page_id))
+                        return ('description', page_id, description_content(desc_text), None)
+                    except Exception as e:
+                        logger.error(f"Failed to generate description for page {page_id}: {e}", exc_info=True)
+                        return ('description', page_id, None, str(e))
+
+            async def agenerate_description(page_id):
+                try:
+                    kwargs = await asyncio.to_thread(prepare_description, page_id)
+                    with bypass_response_cache(not use_cache):
+                        desc_text = await ai_service.agenerate_page_description(**kwargs)
+                    return ('description', page_id, description_content(desc_text), None)
+                except Exception as e:
+                    logger.error(f"Failed to generate description for page {page_id}: {e}", exc_info=True)
+                    return ('description', page_id, None, str(e))
+
+            # --- image stage ---
+
+            def prepare_image(page_id, desc_text) -> Dict:
+                with app.app_context():
+                    page_obj = Page.query.get(page_id)
+                    if not page_obj:
+                        raise ValueError(f"Page {page_id} not found")
+                    return build_page_image_kwargs(
+                        ai_service, file_service, project_id, page_obj, page_data_by_id[page_id], desc_text,
+                        outline, total_pages, use_template=use_template, extra_requirements=extra_requirements,
+                        language=language, aspect_ratio=aspect_ratio, resolution=resolution
+                    )
+
+            def save_image(page_id, image) -> Dict:
+                if not image:
+                    raise ValueError("Failed to generate image")
+                with app.app_context():
+                    version_number = next_page_image_version(page_id)
+                    image_path, cached_image_path = save_page_image_files(
+                        image, project_id, page_id, file_service, version_number
+                    )
+                    return dict(image_path=image_path, cached_image_path=cached_image_path,
+                                version_number=version_number)
+
+            def generate_image(page_id, desc_text):
+                try:
+                    image = ai_service.generate_image(**prepare_image(page_id, desc_text))
+                    return ('image', page_id, save_image(page_id, image), None)
+                except Exception as e:
+                    logger.error(f"Failed to generate image for page {page_id}: {e}", exc_info=True)
+                    return ('image', page_id, None, str(e))
+
+            async def agenerate_image(page_id, desc_text):
+                try:
+                    kwargs = await asyncio.to_thread(prepare_image, page_id, desc_text)
+                    image = await ai_service.agenerate_image(**kwargs)
+                    return ('image', page_id, await asyncio.to_thread(save_image, page_id, image), None)
+                except Exception as e:
+                    logger.error(f"Failed to generate image for page {page_id}: {e}", exc_info=True)
+                    return ('image', page_id, None, str(e))
+
+            # --- batched DB writes ---
+
+            def _mark_failed(page_id):
+                Page.query.filter_by(id=page_id).update({'status': 'FAILED'})
+
+            def _save_description(page_id, desc_content):
+                page = Page.query.get(page_id)
+                if page:
+                    page.set_description_content(desc_content)
+                    # 描述完成后立即进入出图阶段
+                    page.status = 'GENERATING'
+
+            def _record_version(page_id, saved):
+                record_page_image_version(page_id, page_obj=Page.query.get(page_id), **saved)
+
+            with ProgressAggregator(task_id) as progress, \
+                    generation_stage(app, generate_description, agenerate_description,
+                                     max_description_workers) as submit_description, \
+                    generation_stage(app, generate_image, agenerate_image, max_image_workers) as submit_image:
+                pending = set()
+                for page in pages:
+                    if page.id in completed_page_ids:
+                        continue
+                    desc_text = get_page_description_text(page) if page.id in described_page_ids else None
+                    if desc_text:
+                        pending.add(submit_image(page.id, desc_text))
+                    else:
+                        pending.add(submit_description(page.id))
+
+                while pending:
+                    done, pending = wait(pending, timeout=progress.wait_timeout(), return_when=FIRST_COMPLETED)
+                    if not done:
+                        # 下一页还要很久：先提交已完成的结果，避免进度停滞
+                        progress.flush()
+                        continue
+                    for future in done:
+                        stage, page_id, result, error = future.result()
+                        event = {'page_id': page_id, 'stage': stage}
+
+                        if error:
+                            failed += 1
+                            stage_counts = stages["descriptions" if stage == 'description' else "images"]
+                            stage_counts["failed"] += 1
+                            stage_counts["failed_page_ids"].append(page_id)
+                            write = partial(_mark_failed, page_id)
+                            event.update(status='FAILED', error=error)
+                        elif stage == 'description':
+                            stages["descriptions"]["completed"] += 1
+                            described_page_ids.append(page_id)
+                            write = partial(_save_description, page_id, result)
+                            # 流水线：该页描述一完成就开始出图
+                            pending.add(submit_image(page_id, result["text"]))
+                            event.update(status='DESCRIPTION_GENERATED')
+                        else:
+                            completed += 1
+                            stages["images"]["completed"] += 1
+                            completed_page_ids.append(page_id)
+                            write = partial(_record_version, page_id, result)
+                            event.update(status='COMPLETED', image_url=file_service.get_file_url(
+                                project_id, 'pages', Path(result['cached_image_path'] or result['image_path']).name
+                            ))
+
+                        task_events.publish(task_id, 'page', event)
+                        progress.update(
+                            write,
+                            completed=completed,
+                            failed=failed,
+                            completed_page_ids=list(completed_page_ids),
+                            described_page_ids=list(described_page_ids),
+                            stages=_copy_stages(stages)
+                        )
+                        logger.info(f"Deck Progress: {stages['descriptions']['completed']} described, "
+                                    f"{completed}/{total_pages} pages completed")
+
+            # Mark task as completed
+            task = Task.query.get(task_id)
+            if task:
+                task.status = 'COMPLETED'
+                task.completed_at = datetime.utcnow()
+                db.session.commit()
+                logger.info(f"Task {task_id} COMPLETED - {completed} pages generated, "
+                            f"{stages['descriptions']['failed']} failed at descriptions, "
+                            f"{stages['images']['failed']} failed at images")
+
+            project = Project.query.get(project_id)
+            if project and failed == 0:
+                project.status = 'COMPLETED'
+                db.session.commit()
+                logger.info(f"Project {project_id} status updated to COMPLETED")
+
+        except Exception as e:
+            # Mark task as failed
+            task = Task.query.get(task_id)
+            if task:
+                task.status = 'FAILED'
+                task.error_message = str(e)
+                task.completed_at = datetime.utcnow()
+                db.session.commit()
+
+
+def _copy_stages(stages: Dict) -> Dict:
+    return {name: {key: list(value) if isinstance(value, list) else value for key, value in counts.items()}
+            for name, counts in stages.items()}
+
+
+@register_task_handler('GENERATE_DECK')
+def _run_generate_deck_task(task_id: str, app, payload: Dict):
+    """Durable entry point: rebuild services from config and (re)run generate_deck_task"""
+    from services.ai_service_manager import get_ai_service
+    from services.file_service import FileService
+
+    with app.app_context():
+        ai_service = get_ai_service()
+        file_service = FileService(app.config['UPLOAD_FOLDER'])
+
+    generate_deck_task(
+        task_id, payload['project_id'], ai_service, file_service, payload['outline'],
+        use_template=payload.get('use_template', True),
+        max_description_workers=payload.get('max_description_workers', 5),
+        max_image_workers=payload.get('max_image_workers', 8),
+        aspect_ratio=payload.get('aspect_ratio', '16:9'),
+        resolution=payload.get('resolution', '2K'),
+        app=app,
+        extra_requirements=payload.get('extra_requirements'),
+        language=payload.get('language'),
+        use_cache=payload.get('use_cache', True),
+        regenerate_descriptions=payload.get('regenerate_descriptions', False),
+    )
@@ -1,21 +1,49 @@
+import asyncio
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
 from datetime import datetime
 from typing import Dict, List
 
 from models import db, Task, Page, Project
+from services.response_cache import bypass_response_cache
 
+from .async_runner import generation_batch
+from .events import task_events
 from .helpers import infer_page_type
+from .progress import ProgressAggregator
 
 logger = logging.getLogger(__name__)
 
 
+def build_page_description_kwargs(page_obj: Page, project_context, outline: List[Dict],
+                                   page_outline: Dict, total_pages: int, language: str = None) -> Dict:
+    """generate_page_description kwargs for one page"""
+    return dict(
+        project_context=project_context,
+        outline=outline,
+        page_outline=page_outline,
+        page_index=page_obj.order_index + 1,
+        language=language,
+        page_type=infer_page_type(page_obj, total_pages)
+    )
+
+
+def description_content(desc_text: str) -> Dict:
+    """Page.description_content for a generated description"""
+    return {
+        "text": desc_text,
+        "generated_at": datetime.utcnow().isoformat()
+    }
+
+
 def generate_descriptions_task(task_id: str, project_id: str, ai_service,
                                project_context, outline: List[Dict],
                                max_workers: int = 5, app=None,
-                               language: str = None):
+                               language: str = None, use_cache: bool = True):
     """
     Background task for generating page descriptions.
+
+    use_cache=False bypasses the text response cache (explicit regenerate).
     """
     if app is None:
         raise ValueError("Flask app instance must be provided")
@@ -55,76 +83,85 @@ def generate_descriptions_task(task_id: str, project_id: str, ai_service,
             failed = 0
             total_pages = len(pages)
 
-            def generate_single_desc(page_id, page_outline, page_index):
+            def prepare_single_desc(page_id, page_outline) -> Dict:
                 """
-                Generate description for a single page
+                Build generate_page_description kwargs for a single page
                 注意：只传递 page_id（字符串），不传递 ORM 对象，避免跨线程会话问题
                 """
                 # 关键修复：在子线程中也需要应用上下文
                 with app.app_context():
+                    # Get page from database in this thread (for page_type / order_index)
+                    page_obj = Page.query.get(page_id)
+                    if not page_obj:
+                        raise ValueError(f"Page {page_id} not found")
+
+                    return build_page_description_kwargs(
+                        page_obj, project_context, outline, page_outline, total_pages, language
+                    )
+
+            def generate_single_desc(page_id, page_outline, page_index):
+                """Generate description for a single page (thread pool mode)"""
+                with app.app_context(), bypass_response_cache(not use_cache):
                     try:
-                        # Get page from database in this thread (for page_type / order_index)
-                        page_obj = Page.query.get(page_id)
-                        if not page_obj:
-                            raise ValueError(f"Page {page_id} not found")
+                        kwargs = prepare_single_desc(page_id, page_outline)
 
                         # Get singleton AI service instance
                         from services.ai_service_manager import get_ai_service
                         ai_service = get_ai_service()
 
-                        desc_text = ai_service.generate_page_description(
-                            project_context,
-                            outline,
-                            page_outline,
-                            page_obj.order_index + 1,
-                            language=language,
-                            page_type=infer_page_type(page_obj, total_pages)
-                        )
-
-                        desc_content = {
-                            "text": desc_text,
-                            "generated_at": datetime.utcnow().isoformat()
-                        }
-
-                        return (page_id, desc_content, None)
+                        desc_text = ai_service.generate_page_description(**kwargs)
+                        return (page_id, description_content(desc_text), None)
                     except Exception as e:
                         import traceback
                         error_detail = traceback.format_exc()
                         logger.error(f"Failed to generate description for page {page_id}: {error_detail}")
                         return (page_id, None, str(e))
 
-            # Use ThreadPoolExecutor for parallel generation
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                futures = [
-                    executor.submit(generate_single_desc, page.id, page_data, i)
-                    for i, (page, page_data) in enumerate(zip(pages, pages_data), 1)
-                ]
-
-                # Process results as they complete
-                for future in as_completed(futures):
+            async def agenerate_single_desc(page_id, page_outline, page_index):
+                """Generate description for a single page (asyncio mode)"""
+                try:
+                    kwargs = await asyncio.to_thread(prepare_single_desc, page_id, page_outline)
+                    with bypass_response_cache(not use_cache):
+                        desc_text = await ai_service.agenerate_page_description(**kwargs)
+                    return (page_id, description_content(desc_text), None)
+                except Exception as e:
+                    import traceback
+                    error_detail = traceback.format_exc()
+                    logger.error(f"Failed to generate description for page {page_id}: {error_detail}")
+                    return (page_id, None, str(e))
+
+            def _apply_result(page_id, desc_content, error):
+                page = Page.query.get(page_id)
+                if not page:
+                    return
+                if error:
+                    page.status = 'FAILED'
+                else:
+                    page.set_description_content(desc_content)
+                    page.status = 'DESCRIPTION_GENERATED'
+
+            # Generate in parallel (thread pool, or asyncio when ASYNC_GENERATION is enabled)
+            with ProgressAggregator(task_id) as progress, generation_batch(
+                app, generate_single_desc, agenerate_single_desc,
+                [(page.id, page_data, i) for i, (page, page_data) in enumerate(zip(pages, pages_data), 1)],
+                max_workers
+            ) as futures:
+                # Process results as they complete; page and progress writes are batched
+                for future in progress.as_completed(futures):
                     page_id, desc_content, error = future.result()
-
-                    db.session.expire_all()
-
-                    # Update page in database
-                    page = Page.query.get(page_id)
-                    if page:
-                        if error:
-                            page.status = 'FAILED'
-                            failed += 1
-                        else:
-                            page.set_description_content(desc_content)
-                            page.status = 'DESCRIPTION_GENERATED'
-                            completed += 1
-
-                        db.session.commit()
-
-                    # Update task progress
-                    task = Task.query.get(task_id)
-                    if task:
-                        task.update_progress(completed=completed, failed=failed)
-                        db.session.commit()
-                        logger.info(f"Description Progress: {completed}/{len(pages)} pages completed")
+                    if error:
+                        failed += 1
+                    else:
+                        completed += 1
+                    task_events.publish(task_id, 'page', {
+                        'page_id': page_id,
+                        'status': 'FAILED' if error else 'DESCRIPTION_GENERATED',
+                        'error': error,
+                    })
+
+                    progress.update(partial(_apply_result, page_id, desc_content, error),
+                                    completed=completed, failed=failed)
+                    logger.info(f"Description Progress: {completed}/{len(pages)} pages completed")
 
             # Mark task as completed
             task = Task.query.get(task_id)
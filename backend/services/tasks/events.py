@@ -0,0 +1,129 @@
+"""
+In-process pub/sub for task progress.
+
+Every commit that changes a ``Task`` row publishes a ``task`` event with the
+row's ``to_dict()`` snapshot (see the SQLAlchemy hooks at the bottom), and
+batch tasks publish ``page`` events as soon as a page result is in. The SSE
+and long-poll endpoints in project_controller wait on this bus instead of
+querying the tasks table on every poll.
+
+Events carry a per-task sequence number (``id``), so a client can resume
+with ``Last-Event-ID`` / ``since`` after a reconnect. Only tasks running in
+this process are seen here; when tasks run in ``worker.py`` the endpoints
+fall back to re-reading the task row at a slow interval.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from models import Task
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ('COMPLETED', 'FAILED', 'PARTIAL')
+
+
+class _TaskChannel:
+    def __init__(self, history_size: int):
+        self.seq = 0
+        self.events: deque = deque(maxlen=history_size)
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self.project_id: Optional[str] = None
+        self.finished_at: Optional[float] = None
+
+
+class TaskEventBus:
+    """Per-task event history with blocking waits (thread-safe)"""
+
+    def __init__(self, history_size: int = 500, retention_seconds: int = 300):
+        self.history_size = history_size
+        self.retention_seconds = retention_seconds
+        self._channels: Dict[str, _TaskChannel] = {}
+        self._cond = threading.Condition()
+
+    def publish(self, task_id: str, event_type: str, data: Dict[str, Any],
+                project_id: Optional[str] = None) -> int:
+        """Append an event for ``task_id`` and wake up waiters; returns its sequence id"""
+        with self._cond:
+            channel = self._channels.get(task_id)
+            if channel is None:
+                channel = self._channels[task_id] = _TaskChannel(self.history_size)
+            if project_id:
+                channel.project_id = project_id
+            channel.seq += 1
+            channel.events.append({'id': channel.seq, 'event': event_type, 'data': data})
+            if event_type == 'task':
+                channel.snapshot = data
+                if data.get('status') in TERMINAL_STATUSES:
+                    channel.finished_at = time.monotonic()
+            self._prune()
+            self._cond.notify_all()
+            return channel.seq
+
+    def wait(self, task_id: str, since: int = 0, timeout: float = 25.0) -> List[Dict[str, Any]]:
+        """Return events newer than ``since``, blocking up to ``timeout`` seconds for the first one"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                channel = self._channels.get(task_id)
+                if channel is not None and channel.seq > since:
+                    if channel.events and channel.events[0]['id'] > since + 1 and channel.snapshot:
+                        # History was truncated: start from the latest snapshot
+                        return [{'id': channel.seq, 'event': 'task', 'data': channel.snapshot}]
+                    return [e for e in channel.events if e['id'] > since]
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return []
+                self._cond.wait(remaining)
+
+    def snapshot(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Latest published ``task`` snapshot and its sequence id, if this process has seen the task"""
+        with self._cond:
+            channel = self._channels.get(task_id)
+            if channel is None or channel.snapshot is None:
+                return None
+            return {'id': channel.seq, 'data': channel.snapshot, 'project_id': channel.project_id}
+
+    def _prune(self):
+        now = time.monotonic()
+        expired = [
+            task_id for task_id, channel in self._channels.items()
+            if channel.finished_at and now - channel.finished_at > self.retention_seconds
+        ]
+        for task_id in expired:
+            del self._channels[task_id]
+
+
+# Global event bus instance
+task_events = TaskEventBus()
+
+
+# --- publish Task row changes on commit -------------------------------------
+
+_PENDING_KEY = 'pending_task_events'
+
+
+@event.listens_for(Task, 'after_insert')
+@event.listens_for(Task, 'after_update')
+def _queue_task_snapshot(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, {})[target.id] = (target.project_id, target.to_dict())
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_task_snapshots(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    for task_id, (project_id, data) in (pending or {}).items():
+        task_events.publish(task_id, 'task', data, project_id=project_id)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_task_snapshots(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
+
@@ -3,6 +3,8 @@ import logging
 from models import db, Task
 from utils import get_filtered_pages
 
+from .queue import register_task_handler
+
 logger = logging.getLogger(__name__)
 
 
@@ -148,7 +150,8 @@ def export_editable_pptx_with_recursive_analysis_task(
                 text_attribute_extractor=text_attribute_extractor,
                 progress_callback=progress_callback,
                 export_extractor_method=export_extractor_method,
-                export_inpaint_method=export_inpaint_method
+                export_inpaint_method=export_inpaint_method,
+                use_analysis_cache=app.config.get('EXPORT_ANALYSIS_CACHE_ENABLED', True)
             )
 
             logger.info(f"✓ 可编辑PPTX已创建: {output_path}")
@@ -199,3 +202,23 @@ def export_editable_pptx_with_recursive_analysis_task(
                 task.error_message = str(e)
                 task.completed_at = datetime.utcnow()
                 db.session.commit()
+
+
+@register_task_handler('EXPORT_EDITABLE_PPTX')
+def _run_export_editable_pptx_task(task_id: str, app, payload: dict):
+    """Durable entry point: rebuild FileService from config and (re)run the export"""
+    from services.file_service import FileService
+
+    file_service = FileService(app.config['UPLOAD_FOLDER'])
+    export_editable_pptx_with_recursive_analysis_task(
+        task_id,
+        project_id=payload['project_id'],
+        filename=payload['filename'],
+        file_service=file_service,
+        page_ids=payload.get('page_ids'),
+        max_depth=payload.get('max_depth', 2),
+        max_workers=payload.get('max_workers', 4),
+        export_extractor_method=payload.get('export_extractor_method', 'hybrid'),
+        export_inpaint_method=payload.get('export_inpaint_method', 'hybrid'),
+        app=app
+    )
@@ -74,6 +74,7 @@ def _get_project_reference_files_content(project_id: str) -> List[Dict[str, str]
     for ref_file in reference_files:
         if ref_file.markdown_content:
             files_content.append({
+                'id': ref_file.id,
                 'filename': ref_file.filename,
                 'content': ref_file.markdown_content
             })
@@ -126,32 +127,60 @@ def save_image_with_version(image, project_id: str, page_id: str, file_service,
     """
     保存图片并创建历史版本记录的公共函数
     """
-    # 使用 MAX 查询确保版本号安全（即使有版本被删除也不会重复）
+    next_version = next_page_image_version(page_id)
+    image_path, cached_image_path = save_page_image_files(
+        image, project_id, page_id, file_service, next_version, image_format
+    )
+    record_page_image_version(page_id, image_path, cached_image_path, next_version, page_obj=page_obj)
+
+    # 提交事务
+    db.session.commit()
+
+    logger.debug(f"Page {page_id} image saved as version {next_version}: {image_path}, cached: {cached_image_path}")
+
+    return image_path, next_version
+
+
+def next_page_image_version(page_id: str) -> int:
+    """下一个版本号（使用 MAX 查询，即使有版本被删除也不会重复）"""
     max_version = db.session.query(func.max(PageImageVersion.version_number)).filter_by(page_id=page_id).scalar() or 0
-    next_version = max_version + 1
+    return max_version + 1
 
-    # 批量更新：标记所有旧版本为非当前版本（使用单条 SQL 更高效）
-    PageImageVersion.query.filter_by(page_id=page_id).update({'is_current': False})
 
+def save_page_image_files(image, project_id: str, page_id: str, file_service,
+                          version_number: int, image_format: str = 'PNG') -> tuple[str, str]:
+    """
+    只写文件（原图 + 压缩缓存图），不写数据库；可在工作线程中调用
+    """
     # 保存原图到最终位置（使用版本号）
     image_path = file_service.save_generated_image(
         image, project_id, page_id,
-        version_number=next_version,
+        version_number=version_number,
         image_format=image_format
     )
 
     # 生成并保存压缩的缓存图片（用于前端快速显示）
     cached_image_path = file_service.save_cached_image(
         image, project_id, page_id,
-        version_number=next_version,
+        version_number=version_number,
         quality=85
     )
+    return image_path, cached_image_path
+
+
+def record_page_image_version(page_id: str, image_path: str, cached_image_path: str,
+                              version_number: int, page_obj=None) -> PageImageVersion:
+    """
+    创建版本记录并更新页面（不提交，由调用方统一 commit）
+    """
+    # 批量更新：标记所有旧版本为非当前版本（使用单条 SQL 更高效）
+    PageImageVersion.query.filter_by(page_id=page_id).update({'is_current': False})
 
     # 创建新版本记录
     new_version = PageImageVersion(
         page_id=page_id,
         image_path=image_path,
-        version_number=next_version,
+        version_number=version_number,
         is_current=True
     )
     db.session.add(new_version)
@@ -162,13 +191,7 @@ def save_image_with_version(image, project_id: str, page_id: str, file_service,
         page_obj.cached_image_path = cached_image_path
         page_obj.status = 'COMPLETED'
         page_obj.updated_at = datetime.utcnow()
-
-    # 提交事务
-    db.session.commit()
-
-    logger.debug(f"Page {page_id} image saved as version {next_version}: {image_path}, cached: {cached_image_path}")
-
-    return image_path, next_version
+    return new_version
 
 
 def save_xhs_card_version(project_id: str, card_index: int, material_id: str) -> XhsCardImageVersion:
@@ -199,6 +222,16 @@ def save_material_image_version(project_id: str, mode: str, page_id: str | None,
     用于信息图（infographic）这种“以 Material 为渲染对象”的产品。
     分组维度：project_id + mode + page_id（single 模式可为 None）
     """
+    version = record_material_image_version(project_id, mode, page_id, material_id)
+    db.session.commit()
+    return version
+
+
+def record_material_image_version(project_id: str, mode: str, page_id: str | None,
+                                  material_id: str) -> MaterialImageVersion:
+    """
+    save_material_image_version 的不提交版本（由调用方统一 commit）
+    """
     safe_mode = (mode or 'single').strip().lower()
     if safe_mode not in ['single', 'series']:
         safe_mode = 'single'
@@ -220,7 +253,6 @@ def save_material_image_version(project_id: str, mode: str, page_id: str | None,
         is_current=True
     )
     db.session.add(version)
-    db.session.commit()
     return version
 
 
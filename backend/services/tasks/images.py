@@ -1,16 +1,94 @@
+import asyncio
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
 from datetime import datetime
+from pathlib import Path
 from typing import Dict, List
 
 from models import db, Task, Page, Project
 from utils import get_filtered_pages
 
-from .helpers import infer_page_type, pick_template_for_page, save_image_with_version
+from .async_runner import generation_batch
+from .events import task_events
+from .helpers import (
+    infer_page_type, next_page_image_version, pick_template_for_page,
+    record_page_image_version, save_image_with_version, save_page_image_files
+)
+from .progress import ProgressAggregator
+from .queue import register_task_handler
 
 logger = logging.getLogger(__name__)
 
 
+def get_page_description_text(page_obj: Page) -> str | None:
+    """描述文本（可能是 text 字段或 text_content 数组）；没有描述内容时返回 None"""
+    desc_content = page_obj.get_description_content()
+    if not desc_content:
+        return None
+
+    desc_text = desc_content.get('text', '')
+    if not desc_text and desc_content.get('text_content'):
+        # 如果 text 字段不存在，尝试从 text_content 数组获取
+        text_content = desc_content.get('text_content', [])
+        if isinstance(text_content, list):
+            desc_text = '\n'.join(text_content)
+        else:
+            desc_text = str(text_content)
+    return desc_text
+
+
+def build_page_image_kwargs(ai_service, file_service, project_id: str, page_obj: Page, page_data: Dict,
+                            desc_text: str, outline: List[Dict], total_pages: int,
+                            use_template: bool = True, extra_requirements: str = None,
+                            language: str = None, aspect_ratio: str = "16:9",
+                            resolution: str = "2K") -> Dict:
+    """
+    Build generate_image kwargs for one page (prompt, template and material reference images).
+    Must run inside an app context; ``page_obj`` belongs to the caller's session.
+    """
+    logger.debug(f"Got description text for page {page_obj.id}: {desc_text[:100]}...")
+
+    # 从当前页面的描述内容中提取图片 URL
+    page_additional_ref_images = []
+    has_material_images = False
+
+    # 从描述文本中提取图片
+    if desc_text:
+        image_urls = ai_service.extract_image_urls_from_markdown(desc_text)
+        if image_urls:
+            logger.info(f"Found {len(image_urls)} image(s) in page {page_obj.id} description")
+            page_additional_ref_images = image_urls
+            has_material_images = True
+
+    # 在子线程中动态获取模板路径，确保使用最新模板
+    page_ref_image_path = None
+    project = Project.query.get(project_id)
+    if use_template and project:
+        page_ref_image_path = pick_template_for_page(
+            project, page_obj, total_pages, file_service
+        )
+
+    # Generate image prompt
+    inferred_page_type = infer_page_type(page_obj, total_pages)
+    prompt = ai_service.generate_image_prompt(
+        outline, page_data, desc_text, page_obj.order_index + 1,
+        has_material_images=has_material_images,
+        extra_requirements=extra_requirements,
+        language=language,
+        has_template=bool(page_ref_image_path),
+        page_type=inferred_page_type
+    )
+    logger.debug(f"Generated image prompt for page {page_obj.id}")
+
+    return dict(
+        prompt=prompt,
+        ref_image_path=page_ref_image_path,
+        aspect_ratio=aspect_ratio,
+        resolution=resolution,
+        additional_ref_images=page_additional_ref_images if page_additional_ref_images else None
+    )
+
+
 def generate_images_task(task_id: str, project_id: str, ai_service, file_service,
                         outline: List[Dict], use_template: bool = True,
                         max_workers: int = 8, aspect_ratio: str = "16:9",
@@ -37,144 +115,145 @@ def generate_images_task(task_id: str, project_id: str, ai_service, file_service
             # Get pages for this project (filtered by page_ids if provided)
             pages = get_filtered_pages(project_id, page_ids)
             pages_data = ai_service.flatten_outline(outline)
+            total_pages = len(pages)
+
+            # 断点续跑：跳过本任务之前的执行中已成功的页面
+            page_id_set = {p.id for p in pages}
+            completed_page_ids = [
+                pid for pid in (task.get_progress().get('completed_page_ids') or [])
+                if pid in page_id_set
+            ]
+            if completed_page_ids:
+                logger.info(f"Task {task_id} resuming: {len(completed_page_ids)}/{total_pages} pages already done")
 
             # Initialize progress
             task.set_progress({
-                "total": len(pages),
-                "completed": 0,
-                "failed": 0
+                "total": total_pages,
+                "completed": len(completed_page_ids),
+                "failed": 0,
+                "completed_page_ids": completed_page_ids
             })
             db.session.commit()
 
             # Generate images in parallel
-            completed = 0
+            completed = len(completed_page_ids)
             failed = 0
-            total_pages = len(pages)
 
-            def generate_single_image(page_id, page_data, page_index):
+            def prepare_single_image(page_id, page_data, page_index) -> Dict:
                 """
-                Generate image for a single page
+                Build generate_image kwargs for a single page
                 注意：只传递 page_id（字符串），不传递 ORM 对象，避免跨线程会话问题
                 """
                 # 关键修复：在子线程中也需要应用上下文
                 with app.app_context():
-                    try:
-                        logger.debug(f"Starting image generation for page {page_id}, index {page_index}")
-                        # Get page from database in this thread
-                        page_obj = Page.query.get(page_id)
-                        if not page_obj:
-                            raise ValueError(f"Page {page_id} not found")
-
-                        # Update page status
-                        page_obj.status = 'GENERATING'
-                        db.session.commit()
-                        logger.debug(f"Page {page_id} status updated to GENERATING")
-
-                        # Get description content
-                        desc_content = page_obj.get_description_content()
-                        if not desc_content:
-                            raise ValueError("No description content for page")
-
-                        # 获取描述文本（可能是 text 字段或 text_content 数组）
-                        desc_text = desc_content.get('text', '')
-                        if not desc_text and desc_content.get('text_content'):
-                            # 如果 text 字段不存在，尝试从 text_content 数组获取
-                            text_content = desc_content.get('text_content', [])
-                            if isinstance(text_content, list):
-                                desc_text = '\n'.join(text_content)
-                            else:
-                                desc_text = str(text_content)
-
-                        logger.debug(f"Got description text for page {page_id}: {desc_text[:100]}...")
-
-                        # 从当前页面的描述内容中提取图片 URL
-                        page_additional_ref_images = []
-                        has_material_images = False
-
-                        # 从描述文本中提取图片
-                        if desc_text:
-                            image_urls = ai_service.extract_image_urls_from_markdown(desc_text)
-                            if image_urls:
-                                logger.info(f"Found {len(image_urls)} image(s) in page {page_id} description")
-                                page_additional_ref_images = image_urls
-                                has_material_images = True
-
-                        # 在子线程中动态获取模板路径，确保使用最新模板
-                        page_ref_image_path = None
-                        project = Project.query.get(project_id)
-                        if use_template and project:
-                            page_ref_image_path = pick_template_for_page(
-                                project, page_obj, total_pages, file_service
-                            )
-
-                        # Generate image prompt
-                        inferred_page_type = infer_page_type(page_obj, total_pages)
-                        prompt = ai_service.generate_image_prompt(
-                            outline, page_data, desc_text, page_obj.order_index + 1,
-                            has_material_images=has_material_images,
-                            extra_requirements=extra_requirements,
-                            language=language,
-                            has_template=bool(page_ref_image_path),
-                            page_type=inferred_page_type
-                        )
-                        logger.debug(f"Generated image prompt for page {page_id}")
-
-                        # Generate image
-                        logger.info(f"🎨 Calling AI service to generate image for page {page_index}/{len(pages)}...")
-                        image = ai_service.generate_image(
-                            prompt, page_ref_image_path, aspect_ratio, resolution,
-                            additional_ref_images=page_additional_ref_images if page_additional_ref_images else None
-                        )
-                        logger.info(f"✅ Image generated successfully for page {page_index}")
-
-                        if not image:
-                            raise ValueError("Failed to generate image")
-
-                        # 优化：直接在子线程中计算版本号并保存到最终位置
-                        image_path, next_version = save_image_with_version(
-                            image, project_id, page_id, file_service, page_obj=page_obj
-                        )
-
-                        return (page_id, image_path, None)
-
-                    except Exception as e:
-                        import traceback
-                        error_detail = traceback.format_exc()
-                        logger.error(f"Failed to generate image for page {page_id}: {error_detail}")
-                        return (page_id, None, str(e))
-
-            # Use ThreadPoolExecutor for parallel generation
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                futures = [
-                    executor.submit(generate_single_image, page.id, page_data, i)
-                    for i, (page, page_data) in enumerate(zip(pages, pages_data), 1)
-                ]
-
-                # Process results as they complete
-                for future in as_completed(futures):
-                    page_id, image_path, error = future.result()
-
-                    db.session.expire_all()
-
-                    # Update page in database (主要是为了更新失败状态)
-                    page = Page.query.get(page_id)
-                    if page:
-                        if error:
-                            page.status = 'FAILED'
-                            failed += 1
-                            db.session.commit()
-                        else:
-                            # 图片已在子线程中保存并创建版本记录，这里只需要更新计数
-                            completed += 1
-                            # 刷新页面对象以获取最新状态
-                            db.session.refresh(page)
-
-                    # Update task progress
-                    task = Task.query.get(task_id)
-                    if task:
-                        task.update_progress(completed=completed, failed=failed)
-                        db.session.commit()
-                        logger.info(f"Image Progress: {completed}/{len(pages)} pages completed")
+                    logger.debug(f"Starting image generation for page {page_id}, index {page_index}")
+                    # Get page from database in this thread
+                    page_obj = Page.query.get(page_id)
+                    if not page_obj:
+                        raise ValueError(f"Page {page_id} not found")
+
+                    # Get description content
+                    desc_text = get_page_description_text(page_obj)
+                    if desc_text is None:
+                        raise ValueError("No description content for page")
+
+                    logger.info(f"🎨 Calling AI service to generate image for page {page_index}/{len(pages)}...")
+                    return build_page_image_kwargs(
+                        ai_service, file_service, project_id, page_obj, page_data, desc_text, outline,
+                        total_pages, use_template=use_template, extra_requirements=extra_requirements,
+                        language=language, aspect_ratio=aspect_ratio, resolution=resolution
+                    )
+
+            def save_single_image(page_id, page_index, image) -> Dict:
+                """Write the image files only; the version row is recorded by the progress aggregator"""
+                if not image:
+                    raise ValueError("Failed to generate image")
+                logger.info(f"✅ Image generated successfully for page {page_index}")
+
+                with app.app_context():
+                    version_number = next_page_image_version(page_id)
+                    image_path, cached_image_path = save_page_image_files(
+                        image, project_id, page_id, file_service, version_number
+                    )
+                    return dict(image_path=image_path, cached_image_path=cached_image_path,
+                                version_number=version_number)
+
+            def generate_single_image(page_id, page_data, page_index):
+                """Generate image for a single page (thread pool mode)"""
+                try:
+                    image = ai_service.generate_image(**prepare_single_image(page_id, page_data, page_index))
+                    return (page_id, save_single_image(page_id, page_index, image), None)
+                except Exception as e:
+                    import traceback
+                    error_detail = traceback.format_exc()
+                    logger.error(f"Failed to generate image for page {page_id}: {error_detail}")
+                    return (page_id, None, str(e))
+
+            async def agenerate_single_image(page_id, page_data, page_index):
+                """Generate image for a single page (asyncio mode, DB work runs in threads)"""
+                try:
+                    kwargs = await asyncio.to_thread(prepare_single_image, page_id, page_data, page_index)
+                    image = await ai_service.agenerate_image(**kwargs)
+                    saved = await asyncio.to_thread(save_single_image, page_id, page_index, image)
+                    return (page_id, saved, None)
+                except Exception as e:
+                    import traceback
+                    error_detail = traceback.format_exc()
+                    logger.error(f"Failed to generate image for page {page_id}: {error_detail}")
+                    return (page_id, None, str(e))
+
+            # Generate in parallel (thread pool, or asyncio when ASYNC_GENERATION is enabled)
+            pending_pages = [
+                (page.id, page_data, i)
+                for i, (page, page_data) in enumerate(zip(pages, pages_data), 1)
+                if page.id not in completed_page_ids
+            ]
+
+            # 一次性标记待生成页面为 GENERATING（不再每页单独提交）
+            pending_page_ids = [page_id for page_id, _, _ in pending_pages]
+            if pending_page_ids:
+                Page.query.filter(Page.id.in_(pending_page_ids)).update(
+                    {'status': 'GENERATING'}, synchronize_session=False
+                )
+                db.session.commit()
+
+            def _mark_failed(page_id):
+                Page.query.filter_by(id=page_id).update({'status': 'FAILED'})
+
+            def _record_version(page_id, saved):
+                record_page_image_version(page_id, page_obj=Page.query.get(page_id), **saved)
+
+            with ProgressAggregator(task_id) as progress, \
+                    generation_batch(app, generate_single_image, agenerate_single_image,
+                                     pending_pages, max_workers) as futures:
+                # Process results as they complete; DB writes are batched by the aggregator
+                for future in progress.as_completed(futures):
+                    page_id, saved, error = future.result()
+
+                    if error:
+                        failed += 1
+                        write = partial(_mark_failed, page_id)
+                        task_events.publish(task_id, 'page', {'page_id': page_id, 'status': 'FAILED', 'error': error})
+                    else:
+                        # 图片文件已在子线程中保存，版本记录随进度一起提交
+                        completed += 1
+                        completed_page_ids.append(page_id)
+                        write = partial(_record_version, page_id, saved)
+                        task_events.publish(task_id, 'page', {
+                            'page_id': page_id,
+                            'status': 'COMPLETED',
+                            'image_url': file_service.get_file_url(
+                                project_id, 'pages', Path(saved['cached_image_path'] or saved['image_path']).name
+                            ),
+                        })
+
+                    progress.update(
+                        write,
+                        completed=completed,
+                        failed=failed,
+                        completed_page_ids=list(completed_page_ids)
+                    )
+                    logger.info(f"Image Progress: {completed}/{len(pages)} pages completed")
 
             # Mark task as completed
             task = Task.query.get(task_id)
@@ -201,6 +280,29 @@ def generate_images_task(task_id: str, project_id: str, ai_service, file_service
                 db.session.commit()
 
 
+@register_task_handler('GENERATE_IMAGES')
+def _run_generate_images_task(task_id: str, app, payload: Dict):
+    """Durable entry point: rebuild services from config and (re)run generate_images_task"""
+    from services.ai_service_manager import get_ai_service
+    from services.file_service import FileService
+
+    with app.app_context():
+        ai_service = get_ai_service()
+        file_service = FileService(app.config['UPLOAD_FOLDER'])
+
+    generate_images_task(
+        task_id, payload['project_id'], ai_service, file_service, payload['outline'],
+        use_template=payload.get('use_template', True),
+        max_workers=payload.get('max_workers', 8),
+        aspect_ratio=payload.get('aspect_ratio', '16:9'),
+        resolution=payload.get('resolution', '2K'),
+        app=app,
+        extra_requirements=payload.get('extra_requirements'),
+        language=payload.get('language'),
+        page_ids=payload.get('page_ids'),
+    )
+
+
 def generate_single_page_image_task(task_id: str, project_id: str, page_id: str,
                                     ai_service, file_service, outline: List[Dict],
                                     use_template: bool = True, aspect_ratio: str = "16:9",
@@ -1,6 +1,7 @@
+import asyncio
 import json
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List
@@ -9,8 +10,11 @@ from models import db, Task, Page, Project, Material
 from services import ProjectContext
 from utils import get_filtered_pages
 
+from .async_runner import generation_batch
+from .events import task_events
 from .helpers import _get_project_reference_files_content
-from .helpers import save_material_image_version
+from .helpers import record_material_image_version, save_material_image_version
+from .progress import ProgressAggregator
 
 logger = logging.getLogger(__name__)
 
@@ -166,100 +170,128 @@ def generate_infographic_task(task_id: str, project_id: str, ai_service, file_se
                     desc_text = "\n".join([t for t in [title, points_text] if t])
                 return desc_text
 
+            def prepare_single_infographic(page_id: str) -> Dict:
+                with app.app_context():
+                    page_obj = Page.query.get(page_id)
+                    if not page_obj:
+                        raise ValueError(f"Page {page_id} not found")
+
+                    page_desc = _get_page_desc(page_obj)
+                    outline_content = page_obj.get_outline_content() or {}
+                    return {
+                        "page_desc": page_desc,
+                        "page_title": outline_content.get('title') or '',
+                        "ref_images": ai_service.extract_image_urls_from_markdown(page_desc or ""),
+                        "order_index": page_obj.order_index,
+                    }
+
+            def _blueprint_kwargs(page: Dict) -> Dict:
+                return dict(
+                    project_context=project_context,
+                    outline_text=outline_text,
+                    page_title=page["page_title"],
+                    page_desc=page["page_desc"],
+                    mode=mode,
+                    extra_requirements=extra_requirements,
+                    template_style=template_style,
+                    language=language
+                )
+
+            def _image_kwargs(page: Dict, blueprint: str) -> Dict:
+                prompt = ai_service.generate_infographic_image_prompt(
+                    blueprint=blueprint,
+                    mode=mode,
+                    page_title=page["page_title"],
+                    extra_requirements=extra_requirements,
+                    template_style=template_style,
+                    aspect_ratio=aspect_ratio,
+                    language=language
+                )
+                return dict(
+                    prompt=prompt,
+                    ref_image_path=template_ref_path,
+                    additional_ref_images=page["ref_images"] or None,
+                    aspect_ratio=aspect_ratio,
+                    resolution=resolution
+                )
+
+            def save_single_infographic(page_id: str, page: Dict, image) -> Dict:
+                """Write the image file only; the Material row is added by the progress aggregator"""
+                if not image:
+                    raise ValueError("Failed to generate infographic image")
+
+                with app.app_context():
+                    relative_path = file_service.save_material_image(image, project_id)
+                    relative = Path(relative_path)
+                    filename = relative.name
+                    image_url = file_service.get_file_url(project_id, 'materials', filename)
+
+                    note = json.dumps({
+                        "type": "infographic",
+                        "mode": "series",
+                        "source": "page",
+                        "page_id": page_id,
+                        "order_index": page["order_index"]
+                    }, ensure_ascii=False)
+
+                    return dict(
+                        project_id=project_id,
+                        filename=filename,
+                        relative_path=relative_path,
+                        url=image_url,
+                        note=note
+                    )
+
+            def _record_material(page_id: str, material_fields: Dict):
+                material = Material(**material_fields)
+                db.session.add(material)
+                db.session.flush()  # assign material.id for the version row
+                record_material_image_version(project_id, "series", page_id, material.id)
+
             def generate_single_infographic(page_id: str):
                 with app.app_context():
                     try:
-                        page_obj = Page.query.get(page_id)
-                        if not page_obj:
-                            raise ValueError(f"Page {page_id} not found")
-
-                        page_desc = _get_page_desc(page_obj)
-                        ref_images = ai_service.extract_image_urls_from_markdown(page_desc or "")
-                        outline_content = page_obj.get_outline_content() or {}
-                        page_title = outline_content.get('title') or ''
-
-                        blueprint = ai_service.generate_infographic_blueprint(
-                            project_context=project_context,
-                            outline_text=outline_text,
-                            page_title=page_title,
-                            page_desc=page_desc,
-                            mode=mode,
-                            extra_requirements=extra_requirements,
-                            template_style=template_style,
-                            language=language
-                        )
-                        prompt = ai_service.generate_infographic_image_prompt(
-                            blueprint=blueprint,
-                            mode=mode,
-                            page_title=page_title,
-                            extra_requirements=extra_requirements,
-                            template_style=template_style,
-                            aspect_ratio=aspect_ratio,
-                            language=language
-                        )
-
-                        image = ai_service.generate_image(
-                            prompt=prompt,
-                            ref_image_path=template_ref_path,
-                            additional_ref_images=ref_images or None,
-                            aspect_ratio=aspect_ratio,
-                            resolution=resolution
-                        )
-
-                        if not image:
-                            raise ValueError("Failed to generate infographic image")
-
-                        relative_path = file_service.save_material_image(image, project_id)
-                        relative = Path(relative_path)
-                        filename = relative.name
-                        image_url = file_service.get_file_url(project_id, 'materials', filename)
-
-                        note = json.dumps({
-                            "type": "infographic",
-                            "mode": "series",
-                            "source": "page",
-                            "page_id": page_id,
-                            "order_index": page_obj.order_index
-                        }, ensure_ascii=False)
-
-                        material = Material(
-                            project_id=project_id,
-                            filename=filename,
-                            relative_path=relative_path,
-                            url=image_url,
-                            note=note
-                        )
-                        db.session.add(material)
-                        db.session.commit()
-                        try:
-                            save_material_image_version(project_id, "series", page_id, material.id)
-                        except Exception as e:
-                            logger.warning(f"Failed to save material version (series): {e}")
-                        return (page_id, image_url, None)
+                        page = prepare_single_infographic(page_id)
+                        blueprint = ai_service.generate_infographic_blueprint(**_blueprint_kwargs(page))
+                        image = ai_service.generate_image(**_image_kwargs(page, blueprint))
+                        return (page_id, save_single_infographic(page_id, page, image), None)
 
                     except Exception as e:
                         import traceback
                         logger.error(f"Failed to generate infographic for page {page_id}: {traceback.format_exc()}")
                         return (page_id, None, str(e))
 
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                futures = [
-                    executor.submit(generate_single_infographic, page.id)
-                    for page in pages
-                    if page and page.id
-                ]
+            async def agenerate_single_infographic(page_id: str):
+                try:
+                    page = await asyncio.to_thread(prepare_single_infographic, page_id)
+                    blueprint = await ai_service.agenerate_infographic_blueprint(**_blueprint_kwargs(page))
+                    image = await ai_service.agenerate_image(**_image_kwargs(page, blueprint))
+                    material_fields = await asyncio.to_thread(save_single_infographic, page_id, page, image)
+                    return (page_id, material_fields, None)
 
-                for future in as_completed(futures):
-                    _, _, error = future.result()
+                except Exception as e:
+                    import traceback
+                    logger.error(f"Failed to generate infographic for page {page_id}: {traceback.format_exc()}")
+                    return (page_id, None, str(e))
+
+            with ProgressAggregator(task_id) as progress, generation_batch(
+                app, generate_single_infographic, agenerate_single_infographic,
+                [(page.id,) for page in pages if page and page.id],
+                max_workers
+            ) as futures:
+                for future in progress.as_completed(futures):
+                    page_id, material_fields, error = future.result()
                     if error:
                         failed += 1
+                        progress.update(completed=completed, failed=failed)
+                        task_events.publish(task_id, 'page', {'page_id': page_id, 'status': 'FAILED', 'error': error})
                     else:
                         completed += 1
-
-                    task = Task.query.get(task_id)
-                    if task:
-                        task.update_progress(completed=completed, failed=failed)
-                        db.session.commit()
+                        progress.update(partial(_record_material, page_id, material_fields),
+                                        completed=completed, failed=failed)
+                        task_events.publish(task_id, 'page', {
+                            'page_id': page_id, 'status': 'COMPLETED', 'image_url': material_fields['url']
+                        })
 
             task = Task.query.get(task_id)
             if task:
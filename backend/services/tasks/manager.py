@@ -1,29 +1,136 @@
 import logging
+import os
+import socket
 import threading
-from concurrent.futures import ThreadPoolExecutor
-from typing import Callable
+import uuid
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .queue import TaskQueue, get_task_handler
+from .scheduler import (
+    FairScheduler, LANE_BATCH, LANE_EXPORT, lane_for_task_type, parse_lane_concurrency, parse_project_weights
+)
 
 logger = logging.getLogger(__name__)
 
 
 class TaskManager:
-    """Simple task manager using ThreadPoolExecutor"""
+    """
+    Task manager running tasks on a per-lane fair scheduler, with durable leases.
+
+    Tasks are routed to a lane by ``task_type`` (see scheduler.py) and shared
+    fairly between projects within the lane. Every submitted task holds a
+    lease on its ``tasks`` row that is renewed by a heartbeat thread. Tasks
+    submitted with :meth:`submit_durable_task` are resumed by any live worker
+    (this process or ``worker.py``) when the lease expires; other tasks are
+    marked FAILED instead of hanging in PROCESSING.
+    """
 
-    def __init__(self, max_workers: int = 4):
+    def __init__(self, lane_concurrency: Optional[Dict[str, int]] = None,
+                 lease_seconds: int = 60, max_attempts: int = 3):
         """Initialize task manager"""
-        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.scheduler = FairScheduler(lane_concurrency)
         self.active_tasks = {}  # task_id -> Future
         self.lock = threading.Lock()
 
+        self.queue = TaskQueue(lease_seconds=lease_seconds, max_attempts=max_attempts)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        # 'local': this process also runs resumable tasks; 'external': only worker.py does
+        self.mode = 'local'
+        self.app = None
+        self._stop_event = threading.Event()
+        self._maintenance_thread = None
+
+    def init_app(self, app):
+        """Bind the Flask app used for lease bookkeeping (does not start any thread)"""
+        self.app = app
+        self.mode = app.config.get('TASK_QUEUE_MODE', 'local')
+        self.queue.lease_seconds = app.config.get('TASK_LEASE_SECONDS', self.queue.lease_seconds)
+        self.queue.max_attempts = app.config.get('TASK_MAX_ATTEMPTS', self.queue.max_attempts)
+        self.scheduler.configure(parse_lane_concurrency(app.config.get('TASK_LANE_CONCURRENCY', '')))
+        self.scheduler.set_weights(parse_project_weights(app.config.get('TASK_PROJECT_WEIGHTS', '')))
+
+    @property
+    def claims_durable_tasks(self) -> bool:
+        return self.mode != 'external'
+
     def submit_task(self, task_id: str, func: Callable, *args, **kwargs):
-        """Submit a background task"""
-        future = self.executor.submit(func, task_id, *args, **kwargs)
+        """Submit a background task (lane and project are read from its Task row)"""
+        lane, project_id = self._take_lease(task_id)
+        self._submit(task_id, lane, project_id, func, task_id, *args, **kwargs)
+
+    def submit_job(self, job_id: str, lane: str, project_id: Optional[str], func: Callable, *args, **kwargs):
+        """Submit work that has no Task row (e.g. reference file parsing) to a lane"""
+        self._submit(job_id, lane, project_id, func, *args, **kwargs)
+
+    def submit_durable_task(self, task_id: str, payload: Dict[str, Any]):
+        """
+        Submit a resumable task. ``payload`` must be JSON-serializable and is
+        passed to the handler registered for the task's ``task_type``.
+        """
+        from models import Task
+
+        task = Task.query.get(task_id)
+        if not task or get_task_handler(task.task_type) is None:
+            raise ValueError(f"No durable handler registered for task {task_id}")
+        lane, project_id = lane_for_task_type(task.task_type), task.project_id
+
+        self._ensure_app()
+        if not self.claims_durable_tasks:
+            # Just enqueue; an external worker picks it up
+            self.queue.enqueue(task_id, payload)
+            return
+
+        self.queue.enqueue(task_id, payload, worker_id=self.worker_id)
+        self._submit(task_id, lane, project_id, self._run_durable_task, task_id)
+
+    def _submit(self, task_id: str, lane: str, project_id: Optional[str], func: Callable, *args, **kwargs):
+        future = self.scheduler.submit(lane, project_id, func, *args, **kwargs)
 
         with self.lock:
             self.active_tasks[task_id] = future
 
         # Add callback to clean up when done and log exceptions
         future.add_done_callback(lambda f: self._task_done_callback(task_id, f))
+        self.start()
+
+    def _run_durable_task(self, task_id: str):
+        """Executor entry point for resumable tasks: dispatch by task_type"""
+        from models import Task
+
+        with self.app.app_context():
+            task = Task.query.get(task_id)
+            if not task:
+                return
+            handler = get_task_handler(task.task_type)
+            payload = task.get_payload()
+            logger.info(f"Running durable task {task_id} ({task.task_type}), attempt {task.attempts}")
+        handler(task_id, self.app, payload)
+
+    def _ensure_app(self):
+        if self.app is None:
+            from flask import current_app, has_app_context
+            if has_app_context():
+                self.init_app(current_app._get_current_object())
+
+    def _take_lease(self, task_id: str) -> Tuple[str, Optional[str]]:
+        """
+        Best-effort lease for plain tasks, so a crash marks them FAILED.
+        Returns the (lane, project_id) the task should be scheduled on.
+        """
+        from models import Task
+
+        self._ensure_app()
+        if self.app is None:
+            return LANE_BATCH, None
+        try:
+            with self.app.app_context():
+                self.queue.claim(task_id, self.worker_id)
+                row = Task.query.with_entities(Task.task_type, Task.project_id).filter_by(id=task_id).first()
+                if row:
+                    return lane_for_task_type(row.task_type), row.project_id
+        except Exception as e:
+            logger.warning(f"Could not take lease for task {task_id}: {e}")
+        return LANE_BATCH, None
 
     def _task_done_callback(self, task_id: str, future):
         """Handle task completion and log any exceptions"""
@@ -42,16 +149,82 @@ class TaskManager:
         with self.lock:
             if task_id in self.active_tasks:
                 del self.active_tasks[task_id]
+        if self.app is not None:
+            try:
+                with self.app.app_context():
+                    self.queue.release(task_id, self.worker_id)
+            except Exception as e:
+                logger.warning(f"Could not release lease for task {task_id}: {e}")
 
     def is_task_active(self, task_id: str) -> bool:
         """Check if task is still running"""
         with self.lock:
             return task_id in self.active_tasks
 
-    def shutdown(self):
-        """Shutdown the executor"""
-        self.executor.shutdown(wait=True)
+    def start(self):
+        """Start the heartbeat / recovery thread (idempotent)"""
+        if self.app is None:
+            return
+        with self.lock:
+            if self._maintenance_thread and self._maintenance_thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._maintenance_thread = threading.Thread(
+                target=self._maintenance_loop, name='task-manager-maintenance', daemon=True
+            )
+            self._maintenance_thread.start()
+
+    def _maintenance_loop(self):
+        interval = max(1, self.queue.lease_seconds // 3)
+        while True:
+            try:
+                self.run_maintenance()
+            except Exception as e:
+                logger.warning(f"Task maintenance failed: {e}")
+            if self._stop_event.wait(interval):
+                return
+
+    def run_maintenance(self):
+        """Renew own leases, fail abandoned tasks and pick up resumable ones"""
+        with self.app.app_context():
+            from models import Task
+
+            with self.lock:
+                active_ids = list(self.active_tasks.keys())
+            self.queue.heartbeat(self.worker_id, active_ids)
+            self.queue.fail_abandoned()
+
+            if not self.claims_durable_tasks:
+                return
+            # Only claim what can start right away, so idle workers can take the rest
+            free_slots = sum(self.scheduler.free_slots(lane) for lane in (LANE_BATCH, LANE_EXPORT))
+            if free_slots <= 0:
+                return
+            for task_id in self.queue.claim_next(self.worker_id, limit=free_slots):
+                row = Task.query.with_entities(Task.task_type, Task.project_id).filter_by(id=task_id).first()
+                logger.info(f"Resuming task {task_id} on worker {self.worker_id}")
+                self._submit(task_id, lane_for_task_type(row.task_type), row.project_id,
+                             self._run_durable_task, task_id)
+
+    def run_worker(self, app):
+        """Run as a standalone worker process until interrupted"""
+        self.init_app(app)
+        self.mode = 'local'
+        logger.info(f"Task worker {self.worker_id} started (lanes={self.scheduler.stats()})")
+        self.start()
+        try:
+            while not self._stop_event.wait(1):
+                pass
+        except KeyboardInterrupt:
+            logger.info("Task worker interrupted, shutting down")
+        finally:
+            self.shutdown()
+
+    def shutdown(self, wait: bool = True):
+        """Stop maintenance and drain the lanes (with ``wait``, until running jobs finish)"""
+        self._stop_event.set()
+        self.scheduler.shutdown(wait=wait)
 
 
 # Global task manager instance
-task_manager = TaskManager(max_workers=4)
+task_manager = TaskManager(parse_lane_concurrency(os.getenv('TASK_LANE_CONCURRENCY', '')))
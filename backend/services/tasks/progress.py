@@ -0,0 +1,116 @@
+"""
+Batched progress / result writes for batch generation tasks.
+
+Batch tasks used to commit several times per page (page status, version row,
+task progress), each a separate write transaction contending for the SQLite
+WAL lock. Workers now only produce results (generated text, files saved to
+disk); the task thread feeds them to a :class:`ProgressAggregator`, which
+applies the queued DB writes and the task progress in one commit every
+TASK_PROGRESS_FLUSH_EVERY results or TASK_PROGRESS_FLUSH_INTERVAL_MS.
+
+When results arrive slowly (the usual case for image generation) every
+result is flushed right away, so progress polling sees no extra delay. Queued
+results are also flushed once TASK_PROGRESS_FLUSH_INTERVAL_MS passes without a
+new result: the task thread waits on its futures through
+:meth:`ProgressAggregator.as_completed` (or with :meth:`wait_timeout`) instead
+of blocking until the next page finishes.
+"""
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from flask import current_app
+
+from models import db, Task
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressAggregator:
+    """
+    Coalesces per-result DB writes and task progress into periodic commits.
+
+    Use it only from the thread that owns the task's app context (the
+    ``as_completed`` loop), since queued writes run on that thread's session.
+    """
+
+    def __init__(self, task_id: str, flush_every: Optional[int] = None,
+                 flush_interval: Optional[float] = None):
+        config = current_app.config
+        self.task_id = task_id
+        self.flush_every = max(1, flush_every or config.get('TASK_PROGRESS_FLUSH_EVERY', 10))
+        if flush_interval is None:
+            flush_interval = config.get('TASK_PROGRESS_FLUSH_INTERVAL_MS', 500) / 1000.0
+        self.flush_interval = flush_interval
+        self._writes: List[Callable[[], Any]] = []
+        self._progress: Dict[str, Any] = {}
+        self._pending = 0
+        self._last_flush = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+            return False
+        # Keep what already succeeded (e.g. saved images) even if the task is failing
+        try:
+            self.flush()
+        except Exception as e:
+            logger.warning(f"Task {self.task_id}: could not flush pending results: {e}")
+        return False
+
+    def update(self, *writes: Callable[[], Any], **progress):
+        """
+        Queue DB writes for one result and merge ``progress`` into the task progress.
+        Writes run in order at the next flush, inside a single transaction.
+        """
+        self._writes.extend(writes)
+        self._progress.update(progress)
+        self._pending += 1
+        if self._pending >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def wait_timeout(self) -> Optional[float]:
+        """Seconds until queued results are due to be flushed (None if nothing is queued)"""
+        if not self._pending:
+            return None
+        return max(0.0, self._last_flush + self.flush_interval - time.monotonic())
+
+    def as_completed(self, futures: Iterable) -> Iterator:
+        """
+        Like ``concurrent.futures.as_completed``, but flushes queued results when
+        ``flush_interval`` passes before the next future completes.
+        """
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=self.wait_timeout(), return_when=FIRST_COMPLETED)
+            if not done:
+                self.flush()
+                continue
+            yield from done
+
+    def flush(self):
+        """Apply queued writes and progress in one commit"""
+        if not self._pending:
+            return
+        writes, self._writes = self._writes, []
+        progress, self._progress = self._progress, {}
+        count, self._pending = self._pending, 0
+        try:
+            for write in writes:
+                write()
+            task = Task.query.get(self.task_id)
+            if task and progress:
+                merged = task.get_progress()
+                merged.update(progress)
+                task.set_progress(merged)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        finally:
+            self._last_flush = time.monotonic()
+        logger.debug(f"Task {self.task_id}: flushed {count} result(s), {len(writes)} write(s)")
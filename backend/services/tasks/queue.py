@@ -0,0 +1,165 @@
+"""
+Durable task queue backed by the ``tasks`` table.
+
+Every task submitted through :class:`TaskManager` holds a lease
+(``worker_id`` + ``lease_expires_at``) that the owning worker renews with a
+heartbeat. When a process dies its leases expire:
+
+- tasks registered with :func:`register_task_handler` carry a JSON ``payload``
+  and are re-claimed by any live worker, which calls the handler again;
+- all other tasks are marked FAILED instead of staying PROCESSING forever.
+
+Claims are single conditional UPDATEs, so several worker processes can share
+one SQLite database safely.
+"""
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import or_
+
+from models import db, Task
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ('PENDING', 'PROCESSING')
+
+# task_type -> handler(task_id, app, payload)
+_task_handlers: Dict[str, Callable] = {}
+
+
+def register_task_handler(task_type: str):
+    """
+    Register a resumable handler for a task type.
+
+    The handler is called as ``handler(task_id, app, payload)`` and must
+    rebuild its service objects from the app config, since only the JSON
+    payload survives a restart.
+    """
+    def decorator(func: Callable) -> Callable:
+        _task_handlers[task_type] = func
+        return func
+    return decorator
+
+
+def get_task_handler(task_type: str) -> Optional[Callable]:
+    return _task_handlers.get(task_type)
+
+
+class TaskQueue:
+    """Lease bookkeeping on the tasks table (must be called inside an app context)"""
+
+    def __init__(self, lease_seconds: int = 60, max_attempts: int = 3):
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+    def _lease_deadline(self) -> datetime:
+        return datetime.utcnow() + timedelta(seconds=self.lease_seconds)
+
+    def _claimable(self, now: datetime):
+        return [
+            Task.status.in_(ACTIVE_STATUSES),
+            or_(Task.lease_expires_at.is_(None), Task.lease_expires_at < now),
+        ]
+
+    def enqueue(self, task_id: str, payload: Dict[str, Any], worker_id: Optional[str] = None) -> bool:
+        """
+        Persist the payload of a resumable task. If ``worker_id`` is given the
+        lease is taken in the same transaction, so no other worker can grab it
+        in between.
+        """
+        values = {'payload': json.dumps(payload, ensure_ascii=False)}
+        if worker_id:
+            values.update({
+                'worker_id': worker_id,
+                'lease_expires_at': self._lease_deadline(),
+                'attempts': Task.attempts + 1,
+            })
+        rows = Task.query.filter(Task.id == task_id).update(values, synchronize_session=False)
+        db.session.commit()
+        return rows == 1
+
+    def claim(self, task_id: str, worker_id: str) -> bool:
+        """Atomically take the lease of a task if nobody else holds a live one"""
+        now = datetime.utcnow()
+        rows = Task.query.filter(Task.id == task_id, *self._claimable(now)).update({
+            'worker_id': worker_id,
+            'lease_expires_at': self._lease_deadline(),
+            'attempts': Task.attempts + 1,
+        }, synchronize_session=False)
+        db.session.commit()
+        return rows == 1
+
+    def claim_next(self, worker_id: str, limit: int = 1) -> List[str]:
+        """Claim up to ``limit`` resumable tasks (oldest first)"""
+        now = datetime.utcnow()
+        candidates = Task.query.with_entities(Task.id, Task.task_type).filter(
+            Task.payload.isnot(None),
+            Task.attempts < self.max_attempts,
+            *self._claimable(now)
+        ).order_by(Task.created_at).limit(limit * 4).all()
+
+        claimed = []
+        for task_id, task_type in candidates:
+            if len(claimed) >= limit:
+                break
+            if get_task_handler(task_type) is None:
+                continue
+            if self.claim(task_id, worker_id):
+                claimed.append(task_id)
+        return claimed
+
+    def heartbeat(self, worker_id: str, task_ids: List[str]) -> int:
+        """Renew the leases this worker still holds"""
+        if not task_ids:
+            return 0
+        rows = Task.query.filter(
+            Task.id.in_(task_ids),
+            Task.worker_id == worker_id,
+        ).update({'lease_expires_at': self._lease_deadline()}, synchronize_session=False)
+        db.session.commit()
+        return rows
+
+    def release(self, task_id: str, worker_id: str):
+        """Drop the lease once the task function has returned"""
+        Task.query.filter(Task.id == task_id, Task.worker_id == worker_id).update({
+            'worker_id': None,
+            'lease_expires_at': None,
+        }, synchronize_session=False)
+        db.session.commit()
+
+    def fail_abandoned(self) -> int:
+        """
+        Mark tasks FAILED whose lease expired and that cannot be resumed
+        (no handler/payload, or out of attempts).
+        """
+        now = datetime.utcnow()
+        expired = Task.query.with_entities(Task.id, Task.task_type, Task.payload, Task.attempts).filter(
+            Task.status.in_(ACTIVE_STATUSES),
+            Task.lease_expires_at.isnot(None),
+            Task.lease_expires_at < now,
+        ).all()
+
+        failed = 0
+        for task_id, task_type, payload, attempts in expired:
+            resumable = payload and get_task_handler(task_type) is not None
+            if resumable and (attempts or 0) < self.max_attempts:
+                continue
+            reason = ('Task interrupted: worker lease expired' if not resumable
+                      else f'Task interrupted: gave up after {attempts} attempts')
+            failed += Task.query.filter(
+                Task.id == task_id,
+                Task.status.in_(ACTIVE_STATUSES),
+                Task.lease_expires_at < now,
+            ).update({
+                'status': 'FAILED',
+                'error_message': reason,
+                'completed_at': now,
+                'worker_id': None,
+                'lease_expires_at': None,
+            }, synchronize_session=False)
+        db.session.commit()
+        if failed:
+            logger.warning(f"Marked {failed} abandoned task(s) as FAILED")
+        return failed
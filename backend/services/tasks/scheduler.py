@@ -0,0 +1,251 @@
+"""
+Lane-based fair scheduler for background tasks.
+
+Each lane (interactive edits, batch generation, exports, file parsing) has its
+own worker threads, so a 60-page batch can never delay a single-page edit.
+Inside a lane, jobs are queued per fairness key (the project id) and the next
+job always comes from the key with the lowest ``running / weight`` ratio (ties
+go to the key served least recently), so one project cannot occupy every slot
+while another is waiting. Projects share equally unless TASK_PROJECT_WEIGHTS
+gives them a weight (e.g. ``"<project_id>=2"`` gets twice the share).
+"""
+import logging
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+LANE_INTERACTIVE = 'interactive'
+LANE_BATCH = 'batch'
+LANE_EXPORT = 'export'
+LANE_PARSE = 'parse'
+
+DEFAULT_LANE_CONCURRENCY = {
+    LANE_INTERACTIVE: 4,
+    LANE_BATCH: 2,
+    LANE_EXPORT: 1,
+    LANE_PARSE: 2,
+}
+
+# Task.task_type -> lane (unknown types go to the batch lane)
+TASK_TYPE_LANES = {
+    'GENERATE_PAGE_IMAGE': LANE_INTERACTIVE,
+    'EDIT_PAGE_IMAGE': LANE_INTERACTIVE,
+    'GENERATE_XHS_CARD': LANE_INTERACTIVE,
+    'EDIT_XHS_CARD_IMAGE': LANE_INTERACTIVE,
+    'GENERATE_MATERIAL': LANE_INTERACTIVE,
+    'EDIT_MATERIAL_IMAGE': LANE_INTERACTIVE,
+    'GENERATE_TEMPLATE_VARIANT': LANE_INTERACTIVE,
+    'GENERATE_DESCRIPTIONS': LANE_BATCH,
+    'GENERATE_IMAGES': LANE_BATCH,
+    'GENERATE_DECK': LANE_BATCH,
+    'GENERATE_INFOGRAPHIC': LANE_BATCH,
+    'GENERATE_XHS': LANE_BATCH,
+    'GENERATE_TEMPLATE_VARIANTS': LANE_BATCH,
+    'EXPORT_EDITABLE_PPTX': LANE_EXPORT,
+}
+
+
+def lane_for_task_type(task_type: Optional[str]) -> str:
+    return TASK_TYPE_LANES.get(task_type or '', LANE_BATCH)
+
+
+def parse_lane_concurrency(raw: str) -> Dict[str, int]:
+    """Parse ``"interactive=4,batch=2"`` into a dict (invalid entries are ignored)"""
+    result = {}
+    for item in (raw or '').split(','):
+        name, _, value = item.partition('=')
+        name = name.strip()
+        try:
+            count = int(value)
+        except ValueError:
+            continue
+        if name and count > 0:
+            result[name] = count
+    return result
+
+
+def parse_project_weights(raw: str) -> Dict[str, float]:
+    """Parse ``"<project_id>=2,<project_id>=0.5"`` into a dict (invalid entries are ignored)"""
+    result = {}
+    for item in (raw or '').split(','):
+        key, _, value = item.partition('=')
+        key = key.strip()
+        try:
+            weight = float(value)
+        except ValueError:
+            continue
+        if key and weight > 0:
+            result[key] = weight
+    return result
+
+
+class _Lane:
+    """One lane: per-key FIFO queues served by a fixed number of threads"""
+
+    def __init__(self, name: str, concurrency: int, weights: Dict[str, float]):
+        self.name = name
+        self.concurrency = concurrency
+        self.weights = weights
+        self.queues: "OrderedDict[str, deque]" = OrderedDict()
+        self.running: Dict[str, int] = {}
+        # key -> 最近一次取出任务的序号（有排队或运行中的 key 才保留）
+        self.last_served: Dict[str, int] = {}
+        self.served = 0
+        self.threads = 0
+        self.workers: List[threading.Thread] = []
+        self.closed = False
+        self.cond = threading.Condition()
+
+    def pending(self) -> int:
+        return sum(len(q) for q in self.queues.values())
+
+    def busy(self) -> int:
+        return sum(self.running.values())
+
+    def put(self, key: str, job):
+        with self.cond:
+            self.queues.setdefault(key, deque()).append(job)
+            self._spawn_threads()
+            self.cond.notify()
+
+    def set_concurrency(self, concurrency: int):
+        with self.cond:
+            self.concurrency = concurrency
+            self._spawn_threads()
+            self.cond.notify_all()
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def _spawn_threads(self):
+        self.workers = [t for t in self.workers if t.is_alive()]
+        while self.threads < self.concurrency:
+            self.threads += 1
+            worker = threading.Thread(
+                target=self._worker, name=f"task-lane-{self.name}-{self.threads}", daemon=True
+            )
+            worker.start()
+            self.workers.append(worker)
+
+    def _pick_key(self) -> str:
+        # Lowest running/weight wins; ties go to the key served least recently
+        # (never-served keys first, then OrderedDict order)
+        return min(
+            self.queues.keys(),
+            key=lambda k: (self.running.get(k, 0) / self.weights.get(k, 1.0), self.last_served.get(k, -1))
+        )
+
+    def _next_job(self):
+        with self.cond:
+            while True:
+                if self.threads > self.concurrency or (self.closed and not self.queues):
+                    self.threads -= 1
+                    return None, None
+                if self.queues:
+                    break
+                self.cond.wait()
+            key = self._pick_key()
+            queue = self.queues.pop(key)
+            job = queue.popleft()
+            if queue:
+                # Re-append at the end so equal-share keys take turns
+                self.queues[key] = queue
+            self.running[key] = self.running.get(key, 0) + 1
+            self.served += 1
+            self.last_served[key] = self.served
+            return key, job
+
+    def _worker(self):
+        while True:
+            key, job = self._next_job()
+            if job is None:
+                return
+            future, func, args, kwargs = job
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(func(*args, **kwargs))
+                    except BaseException as e:
+                        future.set_exception(e)
+            finally:
+                with self.cond:
+                    self.running[key] -= 1
+                    if not self.running[key]:
+                        del self.running[key]
+                        if key not in self.queues:
+                            self.last_served.pop(key, None)
+
+
+class FairScheduler:
+    """Executor-like front end over the lanes"""
+
+    def __init__(self, lane_concurrency: Optional[Dict[str, int]] = None):
+        self.weights: Dict[str, float] = {}
+        self.lanes: Dict[str, _Lane] = {}
+        self.lock = threading.Lock()
+        self.configure(lane_concurrency or {})
+
+    def configure(self, lane_concurrency: Dict[str, int]):
+        """Set per-lane concurrency (missing lanes keep their default)"""
+        merged = dict(DEFAULT_LANE_CONCURRENCY)
+        merged.update(lane_concurrency)
+        with self.lock:
+            for name, concurrency in merged.items():
+                lane = self.lanes.get(name)
+                if lane is None:
+                    self.lanes[name] = _Lane(name, concurrency, self.weights)
+                elif lane.concurrency != concurrency:
+                    lane.set_concurrency(concurrency)
+
+    def set_weights(self, weights: Dict[str, float]):
+        """Replace the per-key (project) weights; keys not listed get weight 1"""
+        # Lanes hold a reference to this dict, so update it in place
+        self.weights.clear()
+        self.weights.update({key: max(weight, 0.01) for key, weight in weights.items()})
+
+    def submit(self, lane: str, key: Optional[str], func: Callable, *args, **kwargs) -> Future:
+        with self.lock:
+            target = self.lanes.get(lane) or self.lanes[LANE_BATCH]
+        future = Future()
+        target.put(key or '', (future, func, args, kwargs))
+        return future
+
+    def free_slots(self, lane: str) -> int:
+        target = self.lanes.get(lane)
+        if target is None:
+            return 0
+        with target.cond:
+            return max(0, target.concurrency - target.busy() - target.pending())
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        result = {}
+        for name, lane in self.lanes.items():
+            with lane.cond:
+                result[name] = {
+                    'concurrency': lane.concurrency,
+                    'running': lane.busy(),
+                    'pending': lane.pending(),
+                }
+        return result
+
+    def shutdown(self, wait: bool = True):
+        """
+        Stop accepting work once the queues are empty; with ``wait``, block until
+        every queued and running job has finished (like Executor.shutdown(wait=True))
+        """
+        for lane in self.lanes.values():
+            lane.close()
+        if not wait:
+            return
+        current = threading.current_thread()
+        for lane in self.lanes.values():
+            with lane.cond:
+                workers = list(lane.workers)
+            for worker in workers:
+                if worker is not current:
+                    worker.join()
@@ -1,6 +1,7 @@
+import asyncio
 import json
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List
@@ -8,6 +9,8 @@ from typing import Any, Dict, List
 from models import db, Task, Page, Project
 from services import ProjectContext
 
+from .async_runner import generation_batch
+from .events import task_events
 from .helpers import (
     _get_project_reference_files_content,
     _get_material_plan_refs,
@@ -15,9 +18,13 @@ from .helpers import (
     _sync_material_plan_from_description_ref_images,
     get_current_xhs_material,
     infer_page_type,
+    next_page_image_version,
     pick_template_for_page,
+    record_page_image_version,
     save_image_with_version,
+    save_page_image_files,
 )
+from .progress import ProgressAggregator
 
 logger = logging.getLogger(__name__)
 
@@ -202,77 +209,108 @@ def generate_xhs_task(
             failed = 0
             results: List[Dict[str, Any]] = []
 
+            def _prepare_one(card: Dict[str, Any]) -> Dict[str, Any]:
+                with app.app_context():
+                    idx = int(card.get("index", 0) or 0)
+                    template_ref_path = None
+                    page_obj = None
+                    if page_ids and idx < len(page_ids):
+                        page_obj = Page.query.get(page_ids[idx])
+                    if resolved_use_template and page_obj:
+                        template_ref_path = pick_template_for_page(project, page_obj, total, file_service)
+                    prompt = ai_service.generate_xhs_image_prompt(
+                        card=card,
+                        style_pack=style_pack,
+                        aspect_ratio=aspect_ratio,
+                        total=total,
+                        language=language
+                    )
+                    base_ref_images = card.get("ref_images") if isinstance(card.get("ref_images"), list) else []
+                    plan_ref_images = material_plan_refs.get(idx, [])
+                    additional_ref_images = _merge_ref_images(plan_ref_images, base_ref_images)
+                    return dict(
+                        prompt=prompt,
+                        ref_image_path=template_ref_path,
+                        additional_ref_images=additional_ref_images or None,
+                        aspect_ratio=aspect_ratio,
+                        resolution=resolution
+                    )
+
+            def _save_one(card: Dict[str, Any], image) -> Dict[str, Any]:
+                """Write the image files only; the version row is recorded by the progress aggregator"""
+                if not image:
+                    raise ValueError("Failed to generate xhs image")
+
+                with app.app_context():
+                    idx = int(card.get("index", 0) or 0)
+                    page_obj = Page.query.get(page_ids[idx]) if page_ids and idx < len(page_ids) else None
+                    if not page_obj:
+                        raise ValueError("Page not found for xhs card")
+                    version_number = next_page_image_version(page_obj.id)
+                    image_path, cached_image_path = save_page_image_files(
+                        image, project_id, page_obj.id, file_service, version_number
+                    )
+                    display_path = cached_image_path or image_path
+                    image_url = None
+                    if display_path:
+                        image_url = file_service.get_file_url(
+                            project_id, 'pages', Path(display_path).name
+                        )
+
+                    return {
+                        "index": idx,
+                        "url": image_url,
+                        "page_id": page_obj.id,
+                        "card": card,
+                        "saved": dict(image_path=image_path, cached_image_path=cached_image_path,
+                                      version_number=version_number),
+                    }
+
+            def _record_version(page_id: str, saved: Dict[str, Any]):
+                record_page_image_version(page_id, page_obj=Page.query.get(page_id), **saved)
+
             def _generate_one(card: Dict[str, Any]) -> Dict[str, Any]:
                 with app.app_context():
                     idx = int(card.get("index", 0) or 0)
                     try:
-                        template_ref_path = None
-                        page_obj = None
-                        if page_ids and idx < len(page_ids):
-                            page_obj = Page.query.get(page_ids[idx])
-                        if resolved_use_template and page_obj:
-                            template_ref_path = pick_template_for_page(project, page_obj, total, file_service)
-                        prompt = ai_service.generate_xhs_image_prompt(
-                            card=card,
-                            style_pack=style_pack,
-                            aspect_ratio=aspect_ratio,
-                            total=total,
-                            language=language
-                        )
-                        base_ref_images = card.get("ref_images") if isinstance(card.get("ref_images"), list) else []
-                        plan_ref_images = material_plan_refs.get(idx, [])
-                        additional_ref_images = _merge_ref_images(plan_ref_images, base_ref_images)
-                        image = ai_service.generate_image(
-                            prompt=prompt,
-                            ref_image_path=template_ref_path,
-                            additional_ref_images=additional_ref_images or None,
-                            aspect_ratio=aspect_ratio,
-                            resolution=resolution
-                        )
-                        if not image:
-                            raise ValueError("Failed to generate xhs image")
-
-                        if not page_obj:
-                            raise ValueError("Page not found for xhs card")
-                        image_path, _ = save_image_with_version(
-                            image=image,
-                            project_id=project_id,
-                            page_id=page_obj.id,
-                            file_service=file_service,
-                            page_obj=page_obj
-                        )
-                        display_path = page_obj.cached_image_path or page_obj.generated_image_path or image_path
-                        image_url = None
-                        if display_path:
-                            image_url = file_service.get_file_url(
-                                project_id, 'pages', Path(display_path).name
-                            )
-
-                        return {
-                            "index": idx,
-                            "url": image_url,
-                            "page_id": page_obj.id,
-                            "card": card,
-                        }
+                        image = ai_service.generate_image(**_prepare_one(card))
+                        return _save_one(card, image)
                     except Exception as e:
                         import traceback
                         logger.error(f"Failed to generate xhs card {idx}: {traceback.format_exc()}")
                         return {"index": idx, "error": str(e), "card": card}
 
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                futures = [executor.submit(_generate_one, c) for c in normalized_cards]
-                for future in as_completed(futures):
+            async def _agenerate_one(card: Dict[str, Any]) -> Dict[str, Any]:
+                idx = int(card.get("index", 0) or 0)
+                try:
+                    kwargs = await asyncio.to_thread(_prepare_one, card)
+                    image = await ai_service.agenerate_image(**kwargs)
+                    return await asyncio.to_thread(_save_one, card, image)
+                except Exception as e:
+                    import traceback
+                    logger.error(f"Failed to generate xhs card {idx}: {traceback.format_exc()}")
+                    return {"index": idx, "error": str(e), "card": card}
+
+            with ProgressAggregator(task_id) as progress, generation_batch(
+                app, _generate_one, _agenerate_one, [(c,) for c in normalized_cards], max_workers
+            ) as futures:
+                for future in progress.as_completed(futures):
                     res = future.result()
                     if res.get("error"):
                         failed += 1
+                        progress.update(completed=completed, failed=failed)
+                        task_events.publish(task_id, 'page', {
+                            'index': res.get("index"), 'status': 'FAILED', 'error': res["error"]
+                        })
                     else:
                         completed += 1
                         results.append(res)
-
-                    t = Task.query.get(task_id)
-                    if t:
-                        t.update_progress(completed=completed, failed=failed)
-                        db.session.commit()
+                        progress.update(partial(_record_version, res["page_id"], res.pop("saved")),
+                                        completed=completed, failed=failed)
+                        task_events.publish(task_id, 'page', {
+                            'index': res["index"], 'page_id': res["page_id"], 'status': 'COMPLETED',
+                            'image_url': res["url"]
+                        })
 
             # Persist payload to project for history
             results_sorted = sorted(results, key=lambda r: int(r.get("index", 0) or 0))
@@ -0,0 +1,46 @@
+"""
+asyncio 批量执行器单元测试
+"""
+
+import asyncio
+from concurrent.futures import as_completed
+
+from services.tasks.async_runner import AsyncBatchRunner, generation_batch
+
+
+class _App:
+    def __init__(self, **config):
+        self.config = config
+
+
+class TestAsyncBatchRunner:
+    """事件循环批量执行测试"""
+
+    def test_map_limits_in_flight(self):
+        runner = AsyncBatchRunner()
+        state = {'running': 0, 'peak': 0}
+
+        async def work(i):
+            state['running'] += 1
+            state['peak'] = max(state['peak'], state['running'])
+            await asyncio.sleep(0.02)
+            state['running'] -= 1
+            return i * 2
+
+        futures = runner.map(work, [(i,) for i in range(10)], max_in_flight=3)
+        assert sorted(f.result(timeout=5) for f in futures) == [i * 2 for i in range(10)]
+        assert state['peak'] == 3
+        runner.shutdown()
+
+    def test_generation_batch_switches_mode(self):
+        def sync_func(x):
+            return ('sync', x)
+
+        async def async_func(x):
+            return ('async', x)
+
+        for enabled, expected in ((False, 'sync'), (True, 'async')):
+            app = _App(ASYNC_GENERATION=enabled, ASYNC_MAX_IN_FLIGHT=4)
+            with generation_batch(app, sync_func, async_func, [(1,), (2,)], max_workers=2) as futures:
+                results = sorted(f.result(timeout=5) for f in as_completed(futures))
+            assert results == [(expected, 1), (expected, 2)]
@@ -0,0 +1,61 @@
+"""
+bbox 空间索引（BBoxIndex）与基于索引的 bbox 合并单元测试
+"""
+
+import random
+
+from services.image_editability.helpers import BBoxIndex
+from utils.mask_utils import merge_overlapping_bboxes, merge_two_boxes
+
+
+def _random_boxes(rng, count, width=1920, height=1080):
+    boxes = []
+    for _ in range(count):
+        w, h = rng.randint(1, 400), rng.randint(1, 60)
+        x, y = rng.randint(0, width - w), rng.randint(0, height - h)
+        boxes.append((x, y, x + w, y + h))
+    return boxes
+
+
+def _pairwise_merge(boxes, threshold):
+    """旧的两两迭代合并"""
+    boxes = list(boxes)
+    merged = True
+    while merged:
+        merged, new_boxes, used = False, [], set()
+        for i, current in enumerate(boxes):
+            if i in used:
+                continue
+            for j in range(i + 1, len(boxes)):
+                other = boxes[j]
+                if j not in used and (current[0] - threshold <= other[2] and other[0] <= current[2] + threshold and
+                                      current[1] - threshold <= other[3] and other[1] <= current[3] + threshold):
+                    current = merge_two_boxes(current, other)
+                    used.add(j)
+                    merged = True
+            new_boxes.append(current)
+            used.add(i)
+        boxes = new_boxes
+    return boxes
+
+
+def test_query_matches_brute_force():
+    rng = random.Random(3)
+    boxes = _random_boxes(rng, 300) + [(0, 0, 1920, 1080), None, [1, 2]]
+    index = BBoxIndex(boxes)
+    assert len(index) == 301
+    for _ in range(200):
+        query = _random_boxes(rng, 1)[0]
+        margin = rng.choice([0, 10])
+        expected = [i for i, b in enumerate(boxes) if b and len(b) == 4 and
+                    b[0] <= query[2] + margin and b[2] >= query[0] - margin and
+                    b[1] <= query[3] + margin and b[3] >= query[1] - margin]
+        assert index.query(query, margin=margin) == expected
+
+
+def test_merge_overlapping_matches_pairwise_merge():
+    rng = random.Random(11)
+    for _ in range(30):
+        boxes = _random_boxes(rng, rng.randint(0, 150), width=800, height=600)
+        threshold = rng.choice([0, 5, 20])
+        assert merge_overlapping_bboxes(boxes, threshold) == _pairwise_merge(boxes, threshold)
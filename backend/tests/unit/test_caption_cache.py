@@ -0,0 +1,76 @@
+"""
+参考文件图片描述缓存单元测试
+"""
+
+from unittest.mock import MagicMock
+
+from PIL import Image, ImageDraw
+
+from services.caption_cache import CaptionCache, dhash
+from services.file_parser_service import FileParserService
+
+
+def _figure(path, size=(200, 120), fmt='PNG', chart=False):
+    image = Image.new('RGB', (200, 120), 'white')
+    draw = ImageDraw.Draw(image)
+    if chart:
+        for i, height in enumerate((30, 80, 50, 100, 20)):
+            draw.rectangle((10 + i * 38, 115 - height, 38 + i * 38, 115), fill='red')
+    else:
+        draw.rectangle((20, 20, 120, 100), fill='navy')
+        draw.ellipse((130, 30, 190, 90), fill='orange')
+    image.resize(size).save(path, format=fmt)
+    return str(path)
+
+
+def test_near_duplicates_share_phash_entry(tmp_path):
+    with Image.open(_figure(tmp_path / 'a.png')) as original, \
+            Image.open(_figure(tmp_path / 'b.jpg', size=(150, 90), fmt='JPEG')) as resized:
+        original.load()
+        resized.load()
+    assert (dhash(original) ^ dhash(resized)).bit_count() <= 4
+
+    cache = CaptionCache(str(tmp_path / 'captions.db'))
+    cache.put('m', 'sha-a', dhash(original), '一张图表')
+    assert cache.get('m', 'sha-b', dhash(resized)) == '一张图表'
+    assert cache.get('other-model', 'sha-a', dhash(original)) is None
+    different = Image.new('RGB', (200, 120), 'white')
+    ImageDraw.Draw(different).line((0, 0, 200, 120), fill='black', width=9)
+    assert cache.get('m', 'sha-c', dhash(different)) is None
+
+
+def test_duplicate_figures_cost_one_model_call(tmp_path, monkeypatch):
+    cache = CaptionCache(str(tmp_path / 'captions.db'))
+    monkeypatch.setattr('services.file_parser_service.get_caption_cache', lambda: cache)
+    logo = _figure(tmp_path / 'logo.png')
+    logo_copy = _figure(tmp_path / 'logo_copy.png')
+    logo_small = _figure(tmp_path / 'logo_small.jpg', size=(100, 60), fmt='JPEG')
+    chart = _figure(tmp_path / 'chart.png', chart=True)
+    urls = [logo, chart, logo_copy, logo, logo_small, str(tmp_path / 'missing.png')]
+
+    parser = FileParserService('token', google_api_key='key')
+    sizes = []
+
+    def caption(image, url):
+        sizes.append(image.size)  # 描述时图片已解码可用
+        return f'caption of {url.rsplit("/", 1)[-1]}'
+
+    parser._caption_image = MagicMock(side_effect=caption)
+    parser._load_caption_image = MagicMock(wraps=parser._load_caption_image)
+    captions, failed = parser._generate_captions_parallel(urls)
+
+    assert parser._caption_image.call_count == 2  # logo 系列 + chart
+    # 每个不同的 URL 只读取一次：指纹后只保留原始字节，描述时再解码代表图片
+    assert parser._load_caption_image.call_count == 5
+    assert sorted(sizes) == [(200, 120), (200, 120)]
+    assert failed == 1 and captions[-1] == ''
+    assert captions[0] == captions[2] == captions[3] == captions[4]
+    assert captions[1] == 'caption of chart.png'
+
+    # 其他参考文件 / 项目再次出现同样的图：不调用模型
+    other = FileParserService('token', google_api_key='key')
+    other._caption_image = MagicMock(return_value='unused')
+    captions2, failed2 = other._generate_captions_parallel([logo_copy, chart])
+    assert other._caption_image.call_count == 0 and failed2 == 0
+    assert captions2 == [captions[0], captions[1]]
+    assert other.caption_stats['hit_rate'] == 1.0 and other.caption_stats['cache_hits'] == 2
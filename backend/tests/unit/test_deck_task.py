@@ -0,0 +1,106 @@
+"""
+描述→图片流水线任务单元测试
+"""
+
+import threading
+from unittest.mock import MagicMock
+
+from PIL import Image
+
+
+def test_image_starts_before_all_descriptions_finish(app, client, sample_project):
+    from models import db, Task, Page, PageImageVersion
+    from services.file_service import FileService
+    from services.tasks import generate_deck_task
+
+    project_id = sample_project['project_id']
+    for i in range(2):
+        page = Page(project_id=project_id, order_index=i)
+        page.set_outline_content({'title': f'page {i}', 'points': []})
+        db.session.add(page)
+    task = Task(project_id=project_id, task_type='GENERATE_DECK', status='PENDING')
+    db.session.add(task)
+    db.session.commit()
+
+    first_image_done = threading.Event()
+
+    def describe(page_index, **kwargs):
+        # 第二页的描述要等第一页出图后才返回：只有流水线模式才能完成
+        if page_index == 2 and not first_image_done.wait(timeout=5):
+            raise RuntimeError('image stage did not start before descriptions finished')
+        return f'desc {page_index}'
+
+    def draw(**kwargs):
+        first_image_done.set()
+        return Image.new('RGB', (8, 8))
+
+    ai_service = MagicMock()
+    ai_service.flatten_outline.return_value = [{'title': 'page 0'}, {'title': 'page 1'}]
+    ai_service.generate_page_description.side_effect = describe
+    ai_service.extract_image_urls_from_markdown.return_value = []
+    ai_service.generate_image_prompt.return_value = 'prompt'
+    ai_service.generate_image.side_effect = draw
+
+    generate_deck_task(task.id, project_id, ai_service, FileService(app.config['UPLOAD_FOLDER']), [],
+                       use_template=False, max_description_workers=1, max_image_workers=1, app=app)
+
+    db.session.expire_all()
+    progress = Task.query.get(task.id).get_progress()
+    assert Task.query.get(task.id).status == 'COMPLETED'
+    assert progress['completed'] == 2 and progress['failed'] == 0
+    assert progress['stages'] == {
+        'descriptions': {'completed': 2, 'skipped': 0, 'failed': 0, 'failed_page_ids': []},
+        'images': {'completed': 2, 'failed': 0, 'failed_page_ids': []},
+    }
+    assert PageImageVersion.query.count() == 2
+    assert all(p.status == 'COMPLETED' for p in Page.query.filter_by(project_id=project_id))
+
+
+def test_existing_descriptions_are_reused_and_failures_reported_per_stage(app, client, sample_project):
+    from models import db, Task, Page
+    from services.file_service import FileService
+    from services.tasks import generate_deck_task
+
+    project_id = sample_project['project_id']
+    pages = []
+    for i in range(3):
+        page = Page(project_id=project_id, order_index=i)
+        page.set_outline_content({'title': f'page {i}', 'points': []})
+        if i == 0:
+            page.set_description_content({'text': 'existing desc'})
+        db.session.add(page)
+        pages.append(page)
+    task = Task(project_id=project_id, task_type='GENERATE_DECK', status='PENDING')
+    db.session.add(task)
+    db.session.commit()
+    page_ids = [page.id for page in pages]
+
+    def describe(page_index, **kwargs):
+        if page_index == 2:
+            raise RuntimeError('description failed')
+        return f'desc {page_index}'
+
+    def draw(prompt, **kwargs):
+        if prompt == 'prompt desc 3':
+            raise RuntimeError('image failed')
+        return Image.new('RGB', (8, 8))
+
+    ai_service = MagicMock()
+    ai_service.flatten_outline.return_value = [{'title': f'page {i}'} for i in range(3)]
+    ai_service.generate_page_description.side_effect = describe
+    ai_service.extract_image_urls_from_markdown.return_value = []
+    ai_service.generate_image_prompt.side_effect = lambda outline, page, desc, *a, **kw: f'prompt {desc}'
+    ai_service.generate_image.side_effect = draw
+
+    generate_deck_task(task.id, project_id, ai_service, FileService(app.config['UPLOAD_FOLDER']), [],
+                       use_template=False, max_description_workers=1, max_image_workers=1, app=app)
+
+    # 已有描述的第一页不再生成描述
+    assert [c.kwargs['page_index'] for c in ai_service.generate_page_description.call_args_list] == [2, 3]
+    db.session.expire_all()
+    progress = Task.query.get(task.id).get_progress()
+    assert progress['completed'] == 1 and progress['failed'] == 2
+    assert progress['stages'] == {
+        'descriptions': {'completed': 1, 'skipped': 1, 'failed': 1, 'failed_page_ids': [page_ids[1]]},
+        'images': {'completed': 1, 'failed': 1, 'failed_page_ids': [page_ids[2]]},
+    }
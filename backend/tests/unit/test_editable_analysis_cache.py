@@ -0,0 +1,100 @@
+"""
+可编辑PPTX导出：版面分析结果缓存单元测试
+"""
+
+import os
+import time
+from unittest.mock import MagicMock, patch
+
+from PIL import Image
+
+from services.image_editability import BBox, EditableElement, EditableImage
+from services.image_editability.analysis_cache import EditableImageCache
+
+
+def _fake_analysis(image_path, upload_folder):
+    out_dir = upload_folder / 'editable_images' / image_path.rsplit('/', 1)[-1]
+    out_dir.mkdir(parents=True, exist_ok=True)
+    background = out_dir / 'clean_background.png'
+    crop = out_dir / '0_text.png'
+    Image.new('RGB', (40, 20), 'white').save(background)
+    Image.new('RGB', (10, 5), 'black').save(crop)
+    bbox = BBox(2, 3, 12, 8)
+    element = EditableElement('e_0', 'text', bbox, bbox, content='hello', image_path=str(crop),
+                              children=[EditableElement('e_0_0', 'text', bbox, bbox)])
+    return EditableImage('img', image_path, 40, 20, elements=[element], clean_background=str(background))
+
+
+def test_cache_round_trip_and_invalidation(tmp_path):
+    image_path = tmp_path / 'page.png'
+    Image.new('RGB', (40, 20), 'red').save(image_path)
+    cache = EditableImageCache(tmp_path, 'hybrid', 'hybrid', 1)
+    original = _fake_analysis(str(image_path), tmp_path)
+
+    assert cache.get(str(image_path)) is None
+    cache.put(str(image_path), original)
+    assert cache.get(str(image_path)).to_dict() == original.to_dict()
+
+    # 导出设置不同不命中
+    assert EditableImageCache(tmp_path, 'mineru', 'hybrid', 1).get(str(image_path)) is None
+
+    # 引用的 clean background 丢失时视为未命中
+    (tmp_path / 'editable_images' / 'page.png' / 'clean_background.png').unlink()
+    assert cache.get(str(image_path)) is None
+
+
+def test_eviction_removes_entries_and_their_image_dirs(tmp_path):
+    pages = []
+    for i in range(3):
+        path = tmp_path / f'page_{i}.png'
+        Image.new('RGB', (40, 20), (i * 60, 0, 0)).save(path)
+        pages.append(str(path))
+    old = EditableImageCache(tmp_path, 'hybrid', 'hybrid', 1)
+    old.put(pages[0], _fake_analysis(pages[0], tmp_path))
+    old.put(pages[1], _fake_analysis(pages[1], tmp_path))
+    stale = tmp_path / 'editable_images' / '_analysis_cache' / f"{old.key_for(pages[0])}.json"
+    os.utime(stale, (time.time() - 60, time.time() - 60))
+
+    # 容量只够两个条目（留一点余量：缓存文件里的时间戳长度不固定）：
+    # 最久未使用的条目连同它的 editable_images/<id>/ 目录一起淘汰
+    size = sum(p.stat().st_size for p in (tmp_path / 'editable_images').rglob('*') if p.is_file())
+    cache = EditableImageCache(tmp_path, 'hybrid', 'hybrid', 1, max_bytes=int(size * 1.25))
+    cache.put(pages[2], _fake_analysis(pages[2], tmp_path))
+    assert cache.get(pages[0]) is None and not (tmp_path / 'editable_images' / 'page_0.png').exists()
+    assert cache.get(pages[1]) is not None and cache.get(pages[2]) is not None
+
+    # 超过保留时间的条目被淘汰，本次导出用过的条目保留
+    fresh = EditableImageCache(tmp_path, 'hybrid', 'hybrid', 1, max_age_seconds=0)
+    assert fresh.get(pages[2]) is not None
+    fresh.put(pages[0], _fake_analysis(pages[0], tmp_path))
+    assert fresh.get(pages[1]) is None and not (tmp_path / 'editable_images' / 'page_1.png').exists()
+    assert fresh.get(pages[0]) is not None and fresh.get(pages[2]) is not None
+
+
+def test_export_only_analyses_changed_pages(tmp_path):
+    from services.export_service import ExportService
+
+    paths = []
+    for i in range(3):
+        path = tmp_path / f'page_{i}.png'
+        Image.new('RGB', (40, 20), (i * 60, 0, 0)).save(path)
+        paths.append(str(path))
+
+    service = MagicMock()
+    service.make_image_editable.side_effect = lambda path: _fake_analysis(path, tmp_path)
+    with patch('services.image_editability.ServiceConfig.from_defaults',
+               return_value=MagicMock(upload_folder=tmp_path)), \
+            patch('services.image_editability.ImageEditabilityService', return_value=service):
+        def export():
+            ExportService.create_editable_pptx_with_recursive_analysis(
+                image_paths=paths, output_file=str(tmp_path / 'out.pptx'),
+                slide_width_pixels=40, slide_height_pixels=20, max_depth=1, max_workers=2
+            )
+
+        export()
+        assert service.make_image_editable.call_count == 3
+
+        Image.new('RGB', (40, 20), 'blue').save(paths[1])  # 只修改一页
+        service.make_image_editable.reset_mock()
+        export()
+        assert [c.args[0] for c in service.make_image_editable.call_args_list] == [paths[1]]
@@ -0,0 +1,60 @@
+"""
+导出文件缓存单元测试
+"""
+
+import os
+import time
+
+from PIL import Image
+
+from services.export_cache import ExportCache
+
+
+def test_export_reused_until_current_version_changes(app, client, sample_project):
+    from models import db, Page, PageImageVersion
+
+    project_id = sample_project['project_id']
+    pages_dir = os.path.join(app.config['UPLOAD_FOLDER'], project_id, 'pages')
+    os.makedirs(pages_dir, exist_ok=True)
+    Image.new('RGB', (64, 36), 'red').save(os.path.join(pages_dir, 'p_v1.png'))
+    page = Page(project_id=project_id, order_index=0, generated_image_path=f'{project_id}/pages/p_v1.png')
+    db.session.add(page)
+    db.session.flush()
+    v1 = PageImageVersion(page_id=page.id, image_path=page.generated_image_path, version_number=1, is_current=True)
+    db.session.add(v1)
+    db.session.commit()
+
+    url = f'/api/projects/{project_id}/export/pdf'
+    first = client.get(url).get_json()['data']
+    assert first['cached'] is False
+    export_path = os.path.join(app.config['UPLOAD_FOLDER'], project_id, 'exports', f'presentation_{project_id}.pdf')
+    mtime = os.stat(export_path).st_mtime_ns
+
+    second = client.get(url).get_json()['data']
+    assert second['cached'] is True
+    assert second['download_url'] == first['download_url']
+    assert os.stat(export_path).st_mtime_ns == mtime
+
+    # 换成新版本（is_current 翻转）后重新生成
+    Image.new('RGB', (64, 36), 'blue').save(os.path.join(pages_dir, 'p_v2.png'))
+    v1.is_current = False
+    page.generated_image_path = f'{project_id}/pages/p_v2.png'
+    db.session.add(PageImageVersion(page_id=page.id, image_path=page.generated_image_path,
+                                    version_number=2, is_current=True))
+    db.session.commit()
+    assert client.get(url).get_json()['data']['cached'] is False
+    assert client.get(f'{url}?page_ids={page.id}').get_json()['data']['cached'] is False
+
+
+def test_lru_collection_respects_quota(tmp_path):
+    cache = ExportCache(str(tmp_path), max_bytes=250, max_entries=10)
+    for name in ('a.pdf', 'b.pdf', 'c.pdf'):
+        (tmp_path / name).write_bytes(b'x' * 100)
+        cache.put(f'key-{name}', name)
+        time.sleep(0.01)
+        if name == 'b.pdf':
+            assert cache.get('key-a.pdf') == 'a.pdf'  # a 变为最近使用
+
+    assert sorted(p.name for p in tmp_path.iterdir() if not p.name.startswith('.')) == ['a.pdf', 'c.pdf']
+    assert cache.get('key-b.pdf') is None
+    assert cache.get('key-c.pdf') == 'c.pdf'
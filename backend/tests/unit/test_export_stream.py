@@ -0,0 +1,96 @@
+"""
+流式 PPTX/PDF 导出单元测试
+"""
+
+import io
+import os
+import zipfile
+
+from PIL import Image
+
+
+def _make_images(tmp_path):
+    paths = []
+    for i, (fmt, mode) in enumerate([('PNG', 'RGB'), ('JPEG', 'RGB'), ('PNG', 'RGBA')]):
+        path = tmp_path / f'slide_{i}.{fmt.lower()}'
+        Image.new(mode, (64, 36), (i * 40, 80, 120, 255)[:len(mode)]).save(path, fmt)
+        paths.append(str(path))
+    return paths
+
+
+def test_pptx_embeds_original_image_bytes_reproducibly(tmp_path):
+    from pptx import Presentation
+    from services.export_stream import write_pptx_from_images
+
+    paths = _make_images(tmp_path)
+    first, second = io.BytesIO(), io.BytesIO()
+    write_pptx_from_images(paths + [str(tmp_path / 'missing.png')], first)
+    write_pptx_from_images(paths, second)
+
+    assert first.getvalue() == second.getvalue()
+    assert zipfile.ZipFile(first).testzip() is None
+    slides = list(Presentation(first).slides)
+    assert len(slides) == 3
+    for slide, path in zip(slides, paths):
+        with open(path, 'rb') as f:
+            assert slide.shapes[0].image.blob == f.read()
+
+
+def test_pdf_has_one_page_per_image(tmp_path):
+    from services.export_stream import write_pdf_from_images
+
+    buffer = io.BytesIO()
+    write_pdf_from_images(_make_images(tmp_path), buffer)
+    data = buffer.getvalue()
+
+    assert data.startswith(b'%PDF-1.4') and data.rstrip().endswith(b'%%EOF')
+    assert data.count(b'/Type /Page ') == 3
+    assert b'/Filter /DCTDecode' in data and b'/Predictor 15' in data
+
+
+def test_stream_export_supports_range(app, client, sample_project):
+    from models import db, Page
+
+    project_id = sample_project['project_id']
+    pages_dir = os.path.join(app.config['UPLOAD_FOLDER'], project_id, 'pages')
+    os.makedirs(pages_dir, exist_ok=True)
+    for i in range(2):
+        Image.new('RGB', (64, 36), (i * 90, 10, 10)).save(os.path.join(pages_dir, f'p{i}.png'))
+        page = Page(project_id=project_id, order_index=i, generated_image_path=f'{project_id}/pages/p{i}.png')
+        db.session.add(page)
+    db.session.commit()
+
+    full = client.get(f'/api/projects/{project_id}/export/pdf?stream=true&filename=deck')
+    assert full.status_code == 200
+    assert full.headers['Content-Type'] == 'application/pdf'
+    assert 'deck.pdf' in full.headers['Content-Disposition']
+    assert full.headers['Accept-Ranges'] == 'bytes'
+
+    partial = client.get(f'/api/projects/{project_id}/export/pdf?stream=true',
+                         headers={'Range': 'bytes=0-99', 'If-Range': full.headers['ETag']})
+    assert partial.status_code == 206
+    assert partial.data == full.data[:100]
+
+
+def _strip_app14(data: bytes) -> bytes:
+    """去掉 JPEG 的 Adobe APP14 段（FF EE）"""
+    pos = data.index(b'\xff\xee')
+    length = int.from_bytes(data[pos + 2:pos + 4], 'big')
+    return data[:pos] + data[pos + 2 + length:]
+
+
+def test_pdf_inverts_cmyk_jpeg_only_with_adobe_marker(tmp_path):
+    from services.export_stream import write_pdf_from_images
+
+    adobe = tmp_path / 'adobe.jpg'
+    Image.new('CMYK', (64, 36), (0, 200, 200, 0)).save(adobe, 'JPEG')
+    plain = tmp_path / 'plain.jpg'
+    plain.write_bytes(_strip_app14(adobe.read_bytes()))
+    with Image.open(adobe) as a, Image.open(plain) as p:
+        assert 'adobe' in a.info and 'adobe' not in p.info and p.mode == 'CMYK'
+
+    for path, inverted in ((adobe, True), (plain, False)):
+        buffer = io.BytesIO()
+        write_pdf_from_images([str(path)], buffer)
+        assert b'/DeviceCMYK' in buffer.getvalue()
+        assert (b'/Decode [1 0 1 0 1 0 1 0]' in buffer.getvalue()) == inverted
@@ -0,0 +1,57 @@
+"""
+MinerU 结果 zip 流式下载/按需解压单元测试
+"""
+
+import io
+import json
+import zipfile
+from unittest.mock import MagicMock
+
+from services.file_parser_service import FileParserService
+
+
+def _result_zip():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as z:
+        z.writestr('full.md', '# Title\n\n![](images/used.jpg)\n')
+        z.writestr('layout.json', json.dumps({'pdf_info': [{'image_path': 'from_layout.jpg'}]}))
+        z.writestr('doc_content_list.json', '[]')
+        z.writestr('doc_origin.pdf', b'%PDF' * 1000)
+        for name in ('used.jpg', 'from_layout.jpg', 'unused.jpg'):
+            z.writestr(f'images/{name}', b'\xff\xd8' * 100)
+    return buffer.getvalue()
+
+
+def _mock_get(monkeypatch, payload, content_length=None):
+    response = MagicMock()
+    response.__enter__.return_value = response
+    response.iter_content.side_effect = lambda chunk_size: (
+        payload[i:i + chunk_size] for i in range(0, len(payload), chunk_size))
+    response.headers = {'Content-Length': str(content_length or len(payload))}
+    get = MagicMock(return_value=response)
+    monkeypatch.setattr('services.file_parser_service.requests.get', get)
+    return get
+
+
+def test_streams_and_extracts_only_referenced_files(tmp_path, monkeypatch):
+    parser = FileParserService('token')
+    parser.DOWNLOAD_CHUNK_SIZE = 256
+    monkeypatch.setattr(FileParserService, '_mineru_storage_root', staticmethod(lambda: tmp_path))
+    get = _mock_get(monkeypatch, _result_zip())
+
+    markdown, extract_id, error = parser._download_markdown('https://cdn/result.zip')
+
+    assert error is None and markdown.startswith('# Title')
+    assert get.call_args.kwargs['stream'] is True
+    files = sorted(str(p.relative_to(tmp_path / extract_id)) for p in (tmp_path / extract_id).rglob('*') if p.is_file())
+    assert files == ['doc_content_list.json', 'full.md', 'images/from_layout.jpg', 'images/used.jpg', 'layout.json']
+
+
+def test_truncated_download_is_an_error(tmp_path, monkeypatch):
+    parser = FileParserService('token')
+    monkeypatch.setattr(FileParserService, '_mineru_storage_root', staticmethod(lambda: tmp_path))
+    payload = _result_zip()
+    _mock_get(monkeypatch, payload[:-100], content_length=len(payload))
+
+    markdown, extract_id, error = parser._download_markdown('https://cdn/result.zip')
+    assert markdown is None and 'Incomplete download' in error
@@ -0,0 +1,104 @@
+"""
+ImageEditabilityService 图片 I/O 单元测试（假提取器 / 假重绘方法）
+"""
+
+import os
+from unittest.mock import patch
+
+from PIL import Image
+
+from services.image_editability import EditableImage, ImageEditabilityService, helpers
+from services.image_editability.extractors import (
+    ElementExtractor, ExtractionContext, ExtractionResult, ExtractorRegistry
+)
+from services.image_editability.factories import ServiceConfig
+from services.image_editability.inpaint_providers import InpaintProvider, InpaintProviderRegistry
+
+
+class _Extractor(ElementExtractor):
+    """根图片：一个文字行 + 一张图片；子图：一个文字行"""
+
+    def __init__(self):
+        self.seen = []
+
+    def supports_type(self, element_type):
+        return True
+
+    def extract(self, image_path, element_type=None, **kwargs):
+        with Image.open(image_path) as img:
+            self.seen.append((image_path, img.size, img.getpixel((0, 0))))
+        if kwargs.get('depth', 0) == 0:
+            elements = [{'bbox': [0, 0, 40, 10], 'type': 'text', 'content': 'title'},
+                        {'bbox': [100, 50, 300, 150], 'type': 'image'}]
+        else:
+            elements = [{'bbox': [5, 5, 60, 20], 'type': 'text', 'content': 'caption'}]
+        return ExtractionResult(elements, ExtractionContext())
+
+
+class _Inpaint(InpaintProvider):
+    def __init__(self):
+        self.full_pages = []
+
+    def inpaint_regions(self, image, bboxes, types=None, **kwargs):
+        self.full_pages.append(kwargs.get('full_page_image'))
+        return image.convert('RGB')
+
+
+def test_page_decoded_once_and_child_crop_passed_in_memory(tmp_path):
+    page = Image.new('RGB', (400, 200), (10, 20, 30))
+    page.paste((200, 100, 50), (100, 50, 300, 150))
+    page_path = str(tmp_path / 'page.png')
+    page.save(page_path)
+
+    extractor, inpaint = _Extractor(), _Inpaint()
+    service = ImageEditabilityService(ServiceConfig(
+        upload_folder=tmp_path,
+        extractor_registry=ExtractorRegistry().register_default(extractor),
+        inpaint_registry=InpaintProviderRegistry().register_default(inpaint),
+        max_depth=2, min_image_size=50, min_image_area=2500
+    ))
+
+    with patch('services.image_editability.service.load_image', wraps=helpers.load_image) as load:
+        result = service.make_image_editable(page_path)
+
+    assert load.call_count == 1
+    (_, root_size, _), (child_path, child_size, child_pixel) = extractor.seen
+    assert root_size == (400, 200) and child_size == (200, 100) and child_pixel == (200, 100, 50)
+    assert not os.path.exists(child_path)  # 子图临时文件处理完即删除
+    # 子图重绘拿到的是已解码的根图片
+    assert inpaint.full_pages[0] is None and inpaint.full_pages[1].size == (400, 200)
+    assert [c.content for c in result.elements[1].children] == ['caption']
+
+
+def _service(tmp_path, **kwargs):
+    return ImageEditabilityService(ServiceConfig(
+        upload_folder=tmp_path,
+        extractor_registry=ExtractorRegistry().register_default(_Extractor()),
+        inpaint_registry=InpaintProviderRegistry().register_default(_Inpaint()),
+        max_depth=2, min_image_size=50, min_image_area=2500, **kwargs
+    ))
+
+
+def test_element_crops_are_lazy(tmp_path):
+    page = Image.radial_gradient('L').resize((400, 200)).convert('RGB')
+    page_path = str(tmp_path / 'page.png')
+    page.save(page_path)
+
+    result = _service(tmp_path).make_image_editable(page_path)
+    assert not list((tmp_path / 'editable_images').glob('*/elements/*.png'))
+
+    title, picture = result.elements
+    caption = picture.children[0]
+    assert title.get_image().tobytes() == page.crop((0, 0, 40, 10)).tobytes()
+    # 子图元素的裁剪区域换算到根图片坐标
+    assert caption.get_image().tobytes() == page.crop((105, 55, 160, 70)).tobytes()
+
+    # 只有需要文件时才写出PNG；序列化后仍可按需裁剪
+    path = picture.get_image_path()
+    assert os.path.exists(path) and len(list((tmp_path / 'editable_images').glob('*/elements/*.png'))) == 1
+    restored = EditableImage.from_dict(result.to_dict())
+    assert restored.elements[1].children[0].get_image().tobytes() == caption.get_image().tobytes()
+
+    in_memory = _service(tmp_path, keep_element_images_in_memory=True).make_image_editable(page_path)
+    os.remove(page_path)
+    assert in_memory.elements[0].get_image().tobytes() == page.crop((0, 0, 40, 10)).tobytes()
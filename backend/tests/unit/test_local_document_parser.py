@@ -0,0 +1,92 @@
+"""
+参考文件本地快速解析单元测试
+"""
+
+import io
+import zipfile
+from unittest.mock import MagicMock
+
+from PIL import Image
+from pptx import Presentation
+from pptx.util import Inches
+
+from services.file_parser_service import FileParserService
+from local_document_parser import extract_document
+
+
+def _png_bytes(color='red'):
+    buffer = io.BytesIO()
+    Image.new('RGB', (32, 32), color).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def _make_pptx(path, with_text=True):
+    presentation = Presentation()
+    slide = presentation.slides.add_slide(presentation.slide_layouts[5 if with_text else 6])
+    if with_text:
+        slide.shapes.title.text = '季度总结'
+        body = slide.shapes.add_textbox(Inches(1), Inches(2), Inches(6), Inches(1)).text_frame
+        body.text = '收入同比增长 35%，主要来自海外市场和新产品线的快速放量。'
+        table = slide.shapes.add_table(2, 2, Inches(1), Inches(4), Inches(4), Inches(1)).table
+        for r, row in enumerate([['地区', '收入'], ['海外', '120']]):
+            for c, value in enumerate(row):
+                table.cell(r, c).text = value
+    slide.shapes.add_picture(io.BytesIO(_png_bytes()), Inches(7), Inches(5))
+    presentation.save(path)
+    return str(path)
+
+
+def _make_docx(path):
+    w = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+    document = f'''<w:document xmlns:w="{w}"
+        xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+        xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main"><w:body>
+      <w:p><w:pPr><w:pStyle w:val="Heading1"/></w:pPr><w:r><w:t>项目背景</w:t></w:r></w:p>
+      <w:p><w:r><w:t>本项目旨在降低参考文件解析的等待时间，让用户上传后几乎立即可用。</w:t></w:r></w:p>
+      <w:p><w:pPr><w:numPr><w:ilvl w:val="0"/></w:numPr></w:pPr><w:r><w:t>本地解析</w:t></w:r></w:p>
+      <w:p><w:r><w:drawing><a:blip r:embed="rId5"/></w:drawing></w:r></w:p>
+      <w:tbl><w:tr><w:tc><w:p><w:r><w:t>方式</w:t></w:r></w:p></w:tc><w:tc><w:p><w:r><w:t>耗时</w:t></w:r></w:p></w:tc></w:tr>
+        <w:tr><w:tc><w:p><w:r><w:t>本地</w:t></w:r></w:p></w:tc><w:tc><w:p><w:r><w:t>10ms</w:t></w:r></w:p></w:tc></w:tr></w:tbl>
+    </w:body></w:document>'''
+    rels = '''<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+      <Relationship Id="rId5" Type="image" Target="media/image1.png"/></Relationships>'''
+    with zipfile.ZipFile(path, 'w') as z:
+        z.writestr('word/document.xml', document)
+        z.writestr('word/_rels/document.xml.rels', rels)
+        z.writestr('word/media/image1.png', _png_bytes('blue'))
+    return str(path)
+
+
+def test_docx_and_pptx_extracted_to_markdown(tmp_path):
+    docx = extract_document(_make_docx(tmp_path / 'a.docx'), 'docx', str(tmp_path / 'docx_out'))
+    assert docx['needs_mineru'] is None and docx['images'] == 1
+    assert docx['markdown'].startswith('# 项目背景')
+    assert '- 本地解析' in docx['markdown'] and '| 本地 | 10ms |' in docx['markdown']
+    image_link = next(line for line in docx['markdown'].splitlines() if line.startswith('![]('))
+    assert (tmp_path / 'docx_out' / image_link[4:-1]).is_file()
+
+    pptx = extract_document(_make_pptx(tmp_path / 'a.pptx'), 'pptx', str(tmp_path / 'pptx_out'))
+    assert pptx['needs_mineru'] is None
+    assert pptx['markdown'].startswith('## 季度总结')
+    assert '| 海外 | 120 |' in pptx['markdown'] and '![](images/' in pptx['markdown']
+
+    # 只有图片的幻灯片交给 MinerU
+    pictures_only = extract_document(_make_pptx(tmp_path / 'b.pptx', with_text=False), 'pptx', str(tmp_path / 'b_out'))
+    assert pictures_only['needs_mineru'] and pictures_only['markdown'] is None
+
+
+def test_parse_file_skips_mineru_for_simple_documents(tmp_path, monkeypatch):
+    monkeypatch.setattr(FileParserService, '_mineru_storage_root', staticmethod(lambda: tmp_path))
+    parser = FileParserService('token')
+    parser._get_upload_url = MagicMock(return_value=(None, None, 'MinerU unavailable'))
+
+    batch_id, markdown, extract_id, error, failed = parser.parse_file(_make_pptx(tmp_path / 'deck.pptx'), 'deck.pptx')
+    assert error is None and batch_id is None and not parser._get_upload_url.called
+    assert f'/files/mineru/{extract_id}/images/' in markdown
+
+    # 扫描件（无文字层的图片 PDF）仍然走 MinerU
+    pdf_path = tmp_path / 'scan.pdf'
+    Image.new('RGB', (200, 100), 'white').save(pdf_path, format='PDF')
+    assert parser.parse_file(str(pdf_path), 'scan.pdf')[3] == 'MinerU unavailable'
+    assert parser._get_upload_url.called
+    assert sorted(p.name for p in tmp_path.iterdir() if p.is_dir()) == [extract_id]
@@ -0,0 +1,51 @@
+"""
+掩码生成（utils/mask_utils.py）单元测试
+"""
+
+import random
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from utils.mask_utils import create_mask_from_bboxes, visualize_mask_overlay
+
+
+def _drawn_mask(size, boxes, expand):
+    """逐个 ImageDraw.rectangle 绘制的参考掩码"""
+    mask = Image.new('L', size, 0)
+    draw = ImageDraw.Draw(mask)
+    for x1, y1, x2, y2 in boxes:
+        x1, y1, x2, y2 = x1 - expand, y1 - expand, x2 + expand, y2 + expand
+        if expand < 0 and (x2 <= x1 or y2 <= y1):
+            continue
+        x1, x2 = (min(max(v, 0), size[0]) for v in (x1, x2))
+        y1, y2 = (min(max(v, 0), size[1]) for v in (y1, y2))
+        if x2 > x1 and y2 > y1:
+            draw.rectangle([x1, y1, x2, y2], fill=255)
+    return np.asarray(mask)
+
+
+def test_vectorized_mask_matches_drawn_rectangles():
+    rng = random.Random(5)
+    for _ in range(100):
+        size = (rng.randint(20, 160), rng.randint(20, 120))
+        boxes = []
+        for _ in range(rng.randint(0, 6)):
+            x, y = rng.uniform(-10, size[0]), rng.uniform(-10, size[1])
+            boxes.append((x, y, x + rng.uniform(0, 60), y + rng.uniform(0, 40)))
+        expand = rng.choice([0, 3, -2])
+        mask = create_mask_from_bboxes(size, boxes, expand_pixels=expand)
+        assert mask.mode == 'L'
+        assert np.array_equal(np.asarray(mask), _drawn_mask(size, boxes, expand))
+
+    # dict 格式、非灰度颜色仍返回 RGB
+    colored = create_mask_from_bboxes((10, 10), [{'x': 2, 'y': 2, 'width': 3, 'height': 3}], mask_color=(255, 0, 0))
+    assert colored.mode == 'RGB' and colored.getpixel((3, 3)) == (255, 0, 0) and colored.getpixel((8, 8)) == (0, 0, 0)
+
+
+def test_overlay_darkens_only_masked_pixels():
+    image = Image.new('RGB', (20, 10), (200, 100, 50))
+    mask = create_mask_from_bboxes(image.size, [(0, 0, 9, 9)])
+    result = visualize_mask_overlay(image, mask, alpha=0.5)
+    assert result.getpixel((5, 5)) == (150, 75, 37)
+    assert result.getpixel((15, 5)) == (200, 100, 50)
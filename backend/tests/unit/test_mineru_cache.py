@@ -0,0 +1,102 @@
+"""
+MinerU 解析结果缓存单元测试
+"""
+
+import json
+import threading
+import time
+from unittest.mock import MagicMock
+
+from PIL import Image
+
+from services.image_editability.mineru_cache import MinerUResultCache
+
+
+def _write_result(root, extract_id, payload='x'):
+    result_dir = root / extract_id
+    result_dir.mkdir(parents=True)
+    (result_dir / 'layout.json').write_text(json.dumps({'pdf_info': []}))
+    (result_dir / 'doc_content_list.json').write_text(json.dumps([payload]))
+    return result_dir
+
+
+def test_identical_images_hit_mineru_once(tmp_path):
+    from services.image_editability.extractors import MinerUElementExtractor
+
+    a, b = tmp_path / 'a.png', tmp_path / 'sub' / 'crop.png'
+    b.parent.mkdir()
+    Image.new('RGB', (20, 10), 'green').save(a)
+    Image.new('RGB', (20, 10), 'green').save(b)  # 内容相同、路径不同
+
+    parser = MagicMock()
+    calls = []
+
+    def parse_file(pdf_path, filename, **kwargs):
+        calls.append(filename)
+        time.sleep(0.05)
+        _write_result(tmp_path / 'mineru_files', f'ext{len(calls)}')
+        return 'batch', '', f'ext{len(calls)}', None, 0
+
+    parser.parse_file.side_effect = parse_file
+    extractor = MinerUElementExtractor(parser, tmp_path)
+
+    threads = [threading.Thread(target=extractor.extract, args=(str(p),)) for p in (a, b, a)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert extractor.extract(str(b)).context.result_dir.endswith('ext1')
+
+
+def test_integrity_check_and_eviction(tmp_path):
+    cache = MinerUResultCache(tmp_path, max_age_seconds=3600, max_bytes=60)
+    first = _write_result(tmp_path, 'e1')
+    cache.put('k1', str(first))
+    assert cache.get('k1') == str(first.resolve())
+
+    # 文件被改动：校验失败，视为未命中
+    (first / 'doc_content_list.json').write_text('[]' * 20)
+    assert cache.get('k1') is None
+
+    cache.put('k1', str(first))
+    time.sleep(0.01)
+    cache.put('k2', str(_write_result(tmp_path, 'e2')))  # 超出容量：淘汰最久未使用的 e1
+    assert cache.get('k1') is None and not first.exists()
+    assert cache.get('k2') is not None
+
+
+def test_prefetch_parses_deck_once_and_splits_pages(tmp_path):
+    from services.image_editability.extractors import MinerUElementExtractor
+
+    paths = []
+    for i in range(3):
+        path = tmp_path / f'page_{i}.png'
+        Image.new('RGB', (40, 20), (i * 80, 0, 0)).save(path)
+        paths.append(str(path))
+
+    def parse_file(pdf_path, filename, **kwargs):
+        with open(pdf_path, 'rb') as f:
+            assert f.read().count(b'/Type /Page ') == 3
+        result_dir = tmp_path / 'mineru_files' / 'batch1'
+        (result_dir / 'images').mkdir(parents=True)
+        (result_dir / 'images' / 'fig1.jpg').write_bytes(b'jpg')
+        pdf_info = [{'page_idx': i, 'page_size': [720, 360], 'discarded_blocks': [],
+                     'para_blocks': [{'type': 'text', 'bbox': [0, 0, 72 * (i + 1), 36], 'lines': []}]}
+                    for i in range(3)]
+        pdf_info[2]['para_blocks'].append({'type': 'image', 'bbox': [0, 0, 72, 36], 'blocks': [
+            {'lines': [{'spans': [{'image_path': 'fig1.jpg'}]}]}]})
+        (result_dir / 'layout.json').write_text(json.dumps({'pdf_info': pdf_info}))
+        (result_dir / 'batch_content_list.json').write_text(json.dumps([{'page_idx': i} for i in range(3)]))
+        return 'batch', '', 'batch1', None, 0
+
+    parser = MagicMock()
+    parser.parse_file.side_effect = parse_file
+    extractor = MinerUElementExtractor(parser, tmp_path)
+
+    assert extractor.prefetch(paths + [paths[0]]) == 3
+    results = [extractor.extract(p) for p in paths]
+    assert parser.parse_file.call_count == 1
+    assert [r.elements[0]['bbox'][2] for r in results] == [4.0, 8.0, 12.0]  # 720pt 宽 -> 40px
+    assert results[2].elements[1]['image_path'].endswith('batch1_p3/images/fig1.jpg')
+    assert not (tmp_path / 'mineru_files' / 'batch1').exists()
@@ -0,0 +1,80 @@
+"""
+MinerU 结果轮询器单元测试
+"""
+
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from services.mineru_poller import MinerUPollError, MinerUResultPoller
+
+
+def _response(batch_id, state, **extra):
+    response = MagicMock()
+    response.json.return_value = {'code': 0, 'data': {'extract_result': [
+        {'state': state, 'full_zip_url': f'https://cdn/{batch_id}.zip', **extra}]}}
+    return response
+
+
+def test_many_batches_share_one_loop(monkeypatch):
+    poller = MinerUResultPoller('https://mineru.test', 'token', min_interval=0.01, max_interval=0.05)
+    polls = {}
+    threads = set()
+
+    def get(url, timeout):
+        batch_id = url.rsplit('/', 1)[-1]
+        polls[batch_id] = polls.get(batch_id, 0) + 1
+        threads.add(threading.current_thread().name.split('_')[0])
+        if batch_id == 'bad':
+            return _response(batch_id, 'failed', err_msg='broken pdf')
+        return _response(batch_id, 'done' if polls[batch_id] >= 3 else 'running')
+
+    monkeypatch.setattr(poller.session, 'get', get)
+    futures = {f'b{i}': poller.submit(f'b{i}') for i in range(20)}
+    assert poller.submit('b0') is futures['b0']
+    bad = poller.submit('bad')
+
+    for batch_id, future in futures.items():
+        assert future.result(timeout=5)['full_zip_url'] == f'https://cdn/{batch_id}.zip'
+    with pytest.raises(MinerUPollError, match='broken pdf'):
+        bad.result(timeout=5)
+    assert threads == {'mineru-poll'}
+    assert all(polls[f'b{i}'] == 3 for i in range(20))
+    assert poller.pending_count() == 0
+
+
+def test_timeout_and_backoff(monkeypatch):
+    poller = MinerUResultPoller('https://mineru.test', 'token', min_interval=0.01, max_interval=0.04)
+    monkeypatch.setattr(poller.session, 'get', lambda url, timeout: _response('slow', 'running'))
+    with pytest.raises(MinerUPollError, match='timeout'):
+        poller.wait('slow', max_wait_time=0.2)
+
+    intervals = [0.01]
+    for _ in range(10):
+        intervals.append(poller._next_interval(intervals[-1]))
+    assert intervals[3] > intervals[0] and max(intervals) <= 0.04 * 1.2
+
+
+def test_malformed_response_fails_batch_and_keeps_loop_alive(monkeypatch):
+    poller = MinerUResultPoller('https://mineru.test', 'token', min_interval=0.01, max_interval=0.05)
+    bodies = {
+        'empty': {'code': 0, 'data': {'extract_result': []}},
+        'no_data': {'code': 0},
+        'not_dict': ['unexpected'],
+    }
+
+    def get(url, timeout):
+        batch_id = url.rsplit('/', 1)[-1]
+        if batch_id == 'ok':
+            return _response(batch_id, 'done')
+        response = MagicMock()
+        response.json.return_value = bodies[batch_id]
+        return response
+
+    monkeypatch.setattr(poller.session, 'get', get)
+    for batch_id in bodies:
+        with pytest.raises(MinerUPollError, match='Malformed'):
+            poller.wait(batch_id, max_wait_time=5)
+    assert poller.wait('ok', max_wait_time=5)['state'] == 'done'
+    assert poller.pending_count() == 0
@@ -0,0 +1,53 @@
+"""
+逐页 prompt 共享前缀 / Gemini 上下文缓存单元测试
+"""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from services.ai_providers.text.genai_provider import GenAITextProvider
+from services.ai_service import ProjectContext
+from services.prompts import get_image_generation_prompt, get_page_description_prompt_parts
+
+OUTLINE = [{'title': '封面'}, {'title': '市场规模'}, {'title': '竞争格局'}]
+
+
+def test_page_prompts_share_project_prefix():
+    context = ProjectContext(
+        {'idea_prompt': '新能源汽车行业分析', 'creation_type': 'idea'},
+        [{'filename': 'notes.md', 'content': '行业渗透率数据'}]
+    )
+    prefix_1, suffix_1 = get_page_description_prompt_parts(context, OUTLINE, OUTLINE[1], 2, language='zh')
+    prefix_2, suffix_2 = get_page_description_prompt_parts(context, OUTLINE, OUTLINE[2], 3, language='zh')
+    assert prefix_1 == prefix_2
+    assert '行业渗透率数据' in prefix_1 and '新能源汽车行业分析' in prefix_1
+    assert '第 2 页' in suffix_1 and '第 3 页' in suffix_2
+    assert '第 2 页' not in prefix_1
+
+    image_1 = get_image_generation_prompt('市场规模页面', '1. 封面\n2. 市场规模', '市场规模', page_index=2)
+    image_2 = get_image_generation_prompt('竞争格局页面', '1. 封面\n2. 市场规模', '竞争格局', page_index=3)
+    shared = image_1.index('市场规模页面')
+    assert image_1[:image_1.index('<current_section>')] == image_2[:image_2.index('<current_section>')]
+    assert shared > image_1.index('</constraints>')
+
+
+def test_genai_context_cache_created_once_and_falls_back():
+    provider = GenAITextProvider(api_key='test-key', model='gemini-test')
+    provider.client = MagicMock()
+    provider.client.caches.create.return_value = SimpleNamespace(name='cachedContents/abc')
+    provider.client.models.generate_content.return_value = SimpleNamespace(text='ok')
+    provider._context_cache_enabled = True
+    provider._context_cache_min_chars = 10
+
+    prefix = '共享前缀' * 10
+    assert provider.generate_text_with_prefix(prefix, '第 1 页') == 'ok'
+    assert provider.generate_text_with_prefix(prefix, '第 2 页') == 'ok'
+    assert provider.client.caches.create.call_count == 1
+    call = provider.client.models.generate_content.call_args
+    assert call.kwargs['contents'] == '第 2 页'
+    assert call.kwargs['config'].cached_content == 'cachedContents/abc'
+
+    # 缓存不可用（如代理不支持）时发送完整 prompt
+    provider.client.caches.create.side_effect = RuntimeError('not supported')
+    assert provider.generate_text_with_prefix('另一个前缀' * 10, '第 1 页') == 'ok'
+    assert provider.client.models.generate_content.call_args.kwargs['contents'] == '另一个前缀' * 10 + '第 1 页'
@@ -0,0 +1,77 @@
+"""
+Provider 限流器单元测试
+"""
+
+import threading
+import time
+
+import requests
+
+from services.ai_providers.rate_limiter import (
+    ProviderLimiter, get_retry_after, is_rate_limit_error, parse_provider_limits
+)
+
+
+class _HttpError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class TestProviderLimiter:
+    """并发上限 / 429 退避测试"""
+
+    def test_parse_limits_and_detect_429(self):
+        assert parse_provider_limits('gemini/*=4:20, openai/gpt=2,bad=x') == {
+            'gemini/*': (4, 20),
+            'openai/gpt': (2, 0),
+        }
+        assert is_rate_limit_error(_HttpError(429))
+        assert is_rate_limit_error(Exception('429 RESOURCE_EXHAUSTED'))
+        assert not is_rate_limit_error(_HttpError(500))
+
+    def test_retry_after_from_requests_error(self):
+        response = requests.Response()
+        response.status_code = 429
+        response.headers['Retry-After'] = '7'
+        error = requests.HTTPError(response=response)
+        assert is_rate_limit_error(error)
+        assert get_retry_after(error) == 7.0
+        assert get_retry_after(_HttpError(429)) is None
+
+    def test_concurrency_is_capped(self):
+        limiter = ProviderLimiter('test/concurrency', max_concurrency=2)
+        peak = []
+        lock = threading.Lock()
+
+        def call():
+            with limiter.slot():
+                with lock:
+                    peak.append(limiter.stats()['in_flight'])
+                time.sleep(0.05)
+
+        threads = [threading.Thread(target=call) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert max(peak) <= 2
+        assert limiter.stats()['calls'] == 6
+
+    def test_throttle_pauses_and_slows_down(self):
+        limiter = ProviderLimiter('test/throttle', max_concurrency=4)
+        try:
+            with limiter.slot():
+                raise _HttpError(429)
+        except _HttpError:
+            pass
+
+        stats = limiter.stats()
+        assert stats['throttled'] == 1
+        assert stats['rate_factor'] == 0.5
+
+        limiter._blocked_until = 0.0  # 跳过退避等待
+        with limiter.slot():
+            pass
+        assert limiter.stats()['rate_factor'] == 0.55
@@ -0,0 +1,43 @@
+"""
+参考图缓存单元测试
+"""
+
+import os
+import time
+
+from PIL import Image
+
+from services.ai_providers.image.ref_image_cache import RefImageCache, is_cached_ref_image
+
+
+class TestRefImageCache:
+    """解码 / 编码复用与文件变更失效测试"""
+
+    def test_decode_and_encode_once_per_file_version(self, tmp_path):
+        path = str(tmp_path / 'template.png')
+        Image.new('RGB', (64, 32), 'red').save(path)
+        cache = RefImageCache(max_side=16)
+        calls = []
+
+        def encoder(img):
+            calls.append(img)
+            return 'encoded'
+
+        first = cache.load(path)
+        assert cache.load(path) is first
+        assert is_cached_ref_image(first) and first.size == (16, 8)
+        assert cache.encode(first, 'fmt', encoder) == 'encoded'
+        assert cache.encode(first, 'fmt', encoder) == 'encoded'
+        assert len(calls) == 1
+
+        # 覆盖写入后 mtime/大小变化，缓存失效
+        Image.new('RGB', (80, 40), 'blue').save(path)
+        os.utime(path, (time.time() + 5, time.time() + 5))
+        assert cache.load(path) is not first
+
+    def test_uncached_images_and_size_bound(self, tmp_path):
+        cache = RefImageCache(max_bytes=100)
+        image = Image.new('RGB', (4, 4))
+        assert not is_cached_ref_image(image)
+        assert cache.encode(image, 'fmt', lambda img: 'x' * 10) == 'x' * 10
+        assert cache.stats()['entries'] == 0
@@ -0,0 +1,75 @@
+"""
+参考文件分块检索单元测试
+"""
+
+import os
+
+from services.ai_service import ProjectContext
+from services.prompts import get_page_description_prompt
+from services.reference_index import ReferenceRetriever, chunk_markdown
+
+SECTIONS = {
+    '海外市场': '海外市场收入同比增长 35%，东南亚与中东贡献了主要增量，渠道合作伙伴数量翻倍。',
+    '研发投入': '研发投入占收入比例提升至 18%，新一代推理芯片完成流片，良率达到预期。',
+    '人才招聘': '全年新增员工 420 人，校园招聘占比 60%，核心岗位流失率下降到 4%。',
+}
+
+
+def _long_reference():
+    parts = []
+    for title, text in SECTIONS.items():
+        parts.append(f'## {title}\n\n' + '\n\n'.join([text] * 100))
+    return '\n\n'.join(parts)
+
+
+def test_chunks_follow_sections_and_bm25_ranks_relevant_chunk():
+    content = _long_reference()
+    chunks = chunk_markdown(content, max_chars=600)
+    assert all(len(chunk) <= 600 for chunk in chunks)
+    assert len(chunks) > 3
+
+    retriever = ReferenceRetriever([{'filename': 'report.md', 'content': content}], max_chars=600)
+    best = retriever.search('研发投入与芯片进展', top_k=1)[0]
+    assert '研发投入' in best[2] or '推理芯片' in best[2]
+    assert retriever.search('完全无关的 query zzz', top_k=3) == []
+
+
+def test_page_prompt_carries_only_relevant_chunks(app):
+    content = _long_reference()
+    files = [{'id': 'ref-1', 'filename': 'report.md', 'content': content}]
+    context = ProjectContext({'idea_prompt': '年度汇报', 'creation_type': 'idea'}, files)
+
+    with app.app_context():
+        prompt = get_page_description_prompt(
+            context, outline=[], page_outline={'title': '海外市场表现', 'points': ['收入增长', '渠道合作']},
+            page_index=2,
+        )
+    assert '海外市场收入同比增长' in prompt
+    assert '核心岗位流失率' not in prompt
+    assert len(prompt) < len(content)
+    # 索引持久化，供后续页面 / 任务复用
+    assert os.path.exists(os.path.join(app.config['UPLOAD_FOLDER'], 'reference_index', 'ref-1.json'))
+
+    # 参考文件较短时保持原行为：全文传入
+    short = ProjectContext({'idea_prompt': 'x'}, [{'filename': 'a.md', 'content': '短文本'}])
+    assert short.reference_files_for('任意') == short.reference_files_content
+
+
+def test_select_falls_back_to_leading_chunks_when_nothing_matches():
+    content = _long_reference()
+    other = '## Appendix\n\n' + '\n\n'.join(['Glossary of internal terms.'] * 50)
+    retriever = ReferenceRetriever(
+        [{'filename': 'report.md', 'content': content}, {'filename': 'appendix.md', 'content': other}],
+        max_chars=600,
+    )
+    assert retriever.search('Overseas market performance', top_k=4) == []
+
+    selected = retriever.select('Overseas market performance', top_k=4)
+    assert [f['filename'] for f in selected] == ['report.md', 'appendix.md']
+    assert selected[0]['content'].startswith('## 海外市场')
+    assert selected[1]['content'].startswith('## Appendix')
+    assert selected[0]['content'].count('[...]') + selected[1]['content'].count('[...]') <= 2
+
+    # 字符预算：至少保留一块
+    budgeted = retriever.select('Overseas market performance', top_k=4, fallback_chars=100)
+    assert [f['filename'] for f in budgeted] == ['report.md']
@@ -0,0 +1,116 @@
+"""
+文本响应缓存单元测试
+"""
+
+import json
+import threading
+import time
+
+import pytest
+
+from services.response_cache import (
+    MemoryLRUBackend, ResponseCache, SQLiteBackend, bypass_response_cache
+)
+
+
+class TestResponseCache:
+    """命中 / 淘汰 / 绕过测试"""
+
+    def test_hit_miss_and_bypass(self):
+        cache = ResponseCache(MemoryLRUBackend(), ttl=60)
+        calls = []
+        key = cache.make_key('model', 'text', 'prompt', 0)
+
+        def compute():
+            calls.append(1)
+            return f"result-{len(calls)}"
+
+        assert cache.get_or_compute(key, compute) == 'result-1'
+        assert cache.get_or_compute(key, compute) == 'result-1'
+        with bypass_response_cache():
+            assert cache.get_or_compute(key, compute) == 'result-2'
+        # 绕过后的新结果会替换缓存
+        assert cache.get_or_compute(key, compute) == 'result-2'
+
+        stats = cache.stats()
+        assert (stats['hits'], stats['misses'], stats['bypassed']) == (2, 1, 1)
+
+    def test_invalid_response_is_not_cached(self):
+        cache = ResponseCache(MemoryLRUBackend(), ttl=60)
+        key = cache.make_key('model', 'json', 'prompt', 0)
+
+        with pytest.raises(json.JSONDecodeError):
+            cache.get_or_compute(key, lambda: 'not json', validate=json.loads)
+        assert cache.get_or_compute(key, lambda: '{"a": 1}', validate=json.loads) == '{"a": 1}'
+
+    def test_concurrent_misses_compute_once(self):
+        cache = ResponseCache(MemoryLRUBackend(), ttl=60)
+        key = cache.make_key('model', 'text', 'style', 0)
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.05)
+            return 'style'
+
+        threads = [threading.Thread(target=cache.get_or_compute, args=(key, compute)) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(calls) == 1
+
+    def test_lru_and_ttl_eviction(self):
+        backend = MemoryLRUBackend(max_entries=2)
+        backend.set('a', '1', ttl=60)
+        backend.set('b', '2', ttl=60)
+        backend.get('a')
+        backend.set('c', '3', ttl=60)
+        assert backend.get('b') is None
+        assert backend.get('a') == '1'
+
+        backend.set('d', '4', ttl=-1)
+        assert backend.get('d') is None
+
+    def test_sqlite_backend(self, tmp_path):
+        backend = SQLiteBackend(str(tmp_path / 'cache.db'), max_entries=2)
+        backend.set('a', 'x' * 10, ttl=60)
+        backend.set('b', 'y', ttl=60)
+        backend.set('c', 'z', ttl=60)
+
+        assert backend.get('a') is None
+        assert backend.get('c') == 'z'
+        assert backend.size()['entries'] == 2
+
+
+def test_refined_template_style_shared_without_response_cache():
+    """关闭响应缓存时，批量内各页仍只整理一次风格描述；重新生成时绕过缓存，失败回退不写入缓存"""
+    from unittest.mock import MagicMock, patch
+    from services.ai_service import AIService, ProjectContext
+
+    text_provider = MagicMock()
+    text_provider.generate_text.side_effect = lambda prompt, **kwargs: f"refined-{text_provider.generate_text.call_count}"
+    service = AIService(text_provider=text_provider, image_provider=MagicMock())
+    context = ProjectContext({'idea_prompt': 'refine-memo-test'})
+
+    def refine(base='blue and white'):
+        return service.refine_template_style(context, base, outline_text='1. Intro', language='en')
+
+    with patch('services.ai_service.get_response_cache', return_value=None):
+        threads = [threading.Thread(target=refine) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert refine() == 'refined-1'
+        assert text_provider.generate_text.call_count == 1
+
+        with bypass_response_cache():
+            assert refine() == 'refined-2'
+        assert refine() == 'refined-2'
+
+        text_provider.generate_text.side_effect = RuntimeError('provider down')
+        assert refine('red') == 'red'
+        text_provider.generate_text.side_effect = None
+        text_provider.generate_text.return_value = 'refined-red'
+        assert refine('red') == 'refined-red'
@@ -0,0 +1,55 @@
+"""
+任务进度事件推送单元测试
+"""
+
+import threading
+
+from services.tasks.events import TaskEventBus
+
+
+class TestTaskEventBus:
+    """发布 / 等待 / 断线续传测试"""
+
+    def test_wait_wakes_on_publish_and_resumes_from_since(self):
+        bus = TaskEventBus()
+        timer = threading.Timer(0.05, bus.publish, args=('t1', 'task', {'status': 'PROCESSING'}))
+        timer.start()
+
+        events = bus.wait('t1', since=0, timeout=5)
+        assert [e['id'] for e in events] == [1]
+
+        bus.publish('t1', 'page', {'page_id': 'p1'})
+        bus.publish('t1', 'task', {'status': 'COMPLETED'})
+        assert [e['event'] for e in bus.wait('t1', since=1, timeout=0)] == ['page', 'task']
+        assert bus.wait('t1', since=3, timeout=0) == []
+        assert bus.snapshot('t1')['data'] == {'status': 'COMPLETED'}
+
+    def test_truncated_history_returns_snapshot(self):
+        bus = TaskEventBus(history_size=2)
+        for i in range(5):
+            bus.publish('t1', 'task', {'status': 'PROCESSING', 'n': i})
+        assert bus.wait('t1', since=1, timeout=0) == [{'id': 5, 'event': 'task', 'data': {'status': 'PROCESSING', 'n': 4}}]
+
+
+def test_long_poll_endpoint_uses_committed_task_snapshot(client, sample_project):
+    from models import db, Task
+
+    project_id = sample_project['project_id']
+    task = Task(project_id=project_id, task_type='GENERATE_IMAGES', status='PROCESSING')
+    db.session.add(task)
+    db.session.commit()
+
+    data = client.get(f'/api/projects/{project_id}/tasks/{task.id}/wait?since=0&timeout=0').get_json()['data']
+    assert data['task']['status'] == 'PROCESSING'
+    last_id = data['last_event_id']
+
+    task = Task.query.get(data['task']['task_id'])
+    task.status = 'COMPLETED'
+    db.session.commit()
+
+    data = client.get(f'/api/projects/{project_id}/tasks/{task.id}/wait?since={last_id}&timeout=5').get_json()['data']
+    assert [e['data']['status'] for e in data['events']] == ['COMPLETED']
+
+    response = client.get(f'/api/projects/{project_id}/tasks/{task.id}/events')
+    assert response.mimetype == 'text/event-stream'
+    assert '"status": "COMPLETED"' in response.get_data(as_text=True)
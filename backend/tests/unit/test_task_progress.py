@@ -0,0 +1,61 @@
+"""
+批量任务进度合并写库单元测试
+"""
+
+from unittest.mock import patch
+
+
+def test_progress_aggregator_batches_commits(client, sample_project):
+    from models import db, Task
+    from services.tasks.progress import ProgressAggregator
+
+    task = Task(project_id=sample_project['project_id'], task_type='GENERATE_IMAGES', status='PROCESSING')
+    task.set_progress({'total': 3, 'completed': 0, 'failed': 0})
+    db.session.add(task)
+    db.session.commit()
+    task_id = task.id
+
+    writes = []
+    with patch.object(db.session, 'commit', wraps=db.session.commit) as commit:
+        with ProgressAggregator(task_id, flush_every=2, flush_interval=60) as progress:
+            progress._last_flush = float('inf')  # 只按数量触发
+            progress.update(lambda: writes.append(1), completed=1)
+            assert commit.call_count == 0
+            progress.update(lambda: writes.append(2), completed=2)
+            assert commit.call_count == 1
+            progress.update(failed=1)
+        # 退出时提交剩余结果
+        assert commit.call_count == 2
+
+    assert writes == [1, 2]
+    db.session.expire_all()
+    assert Task.query.get(task_id).get_progress() == {'total': 3, 'completed': 2, 'failed': 1}
+
+
+
+def test_progress_aggregator_flushes_while_waiting_for_slow_results(client, sample_project):
+    import threading
+    import time
+    from concurrent.futures import Future
+    from models import db, Task
+    from services.tasks.progress import ProgressAggregator
+
+    task = Task(project_id=sample_project['project_id'], task_type='GENERATE_IMAGES', status='PROCESSING')
+    task.set_progress({'total': 2, 'completed': 0})
+    db.session.add(task)
+    db.session.commit()
+    task_id = task.id
+
+    fast, slow = Future(), Future()
+    fast.set_result(1)
+    threading.Timer(0.3, slow.set_result, args=(2,)).start()
+    seen = []
+    with ProgressAggregator(task_id, flush_every=10, flush_interval=0.05) as progress:
+        progress._last_flush = time.monotonic()  # 第一条结果不立即提交
+        for future in progress.as_completed([fast, slow]):
+            if future is slow:
+                # 等待下一页期间已按 flush_interval 提交了第一条结果
+                db.session.expire_all()
+                seen.append(Task.query.get(task_id).get_progress()['completed'])
+            progress.update(completed=future.result())
+    assert seen == [1]
@@ -0,0 +1,72 @@
+"""
+持久化任务队列单元测试
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+
+@pytest.fixture
+def make_task(client, sample_project):
+    """创建任务记录"""
+    from models import db, Task
+
+    def _make(task_type='GENERATE_IMAGES', status='PENDING'):
+        task = Task(project_id=sample_project['project_id'], task_type=task_type, status=status)
+        db.session.add(task)
+        db.session.commit()
+        return task.id
+
+    return _make
+
+
+class TestTaskQueue:
+    """租约 / 恢复测试"""
+
+    def test_claim_is_exclusive(self, make_task):
+        from services.tasks.queue import TaskQueue
+
+        queue = TaskQueue(lease_seconds=60)
+        task_id = make_task()
+
+        assert queue.claim(task_id, 'worker-a') is True
+        assert queue.claim(task_id, 'worker-b') is False
+
+    def test_expired_resumable_task_is_reclaimed(self, make_task):
+        from models import db, Task
+        from services.tasks.queue import TaskQueue
+
+        queue = TaskQueue(lease_seconds=60)
+        task_id = make_task(status='PROCESSING')
+        queue.enqueue(task_id, {'project_id': 'p'}, worker_id='dead-worker')
+
+        Task.query.filter_by(id=task_id).update(
+            {'lease_expires_at': datetime.utcnow() - timedelta(seconds=1)}
+        )
+        db.session.commit()
+
+        assert queue.fail_abandoned() == 0
+        assert queue.claim_next('worker-b') == [task_id]
+
+        db.session.expire_all()
+        task = Task.query.get(task_id)
+        assert task.worker_id == 'worker-b'
+        assert task.attempts == 2
+
+    def test_expired_plain_task_is_failed(self, make_task):
+        from models import db, Task
+        from services.tasks.queue import TaskQueue
+
+        queue = TaskQueue(lease_seconds=60)
+        task_id = make_task(task_type='GENERATE_DESCRIPTIONS', status='PROCESSING')
+        queue.claim(task_id, 'dead-worker')
+
+        Task.query.filter_by(id=task_id).update(
+            {'lease_expires_at': datetime.utcnow() - timedelta(seconds=1)}
+        )
+        db.session.commit()
+
+        assert queue.fail_abandoned() == 1
+        db.session.expire_all()
+        assert Task.query.get(task_id).status == 'FAILED'
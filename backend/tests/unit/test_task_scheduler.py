@@ -0,0 +1,105 @@
+"""
+任务调度通道 / 公平性单元测试
+"""
+
+import threading
+
+from services.tasks.scheduler import (
+    FairScheduler, lane_for_task_type, parse_lane_concurrency, parse_project_weights
+)
+
+
+class TestFairScheduler:
+    """通道隔离与项目间公平调度测试"""
+
+    def test_lane_mapping_and_config(self):
+        assert lane_for_task_type('EDIT_PAGE_IMAGE') == 'interactive'
+        assert lane_for_task_type('GENERATE_IMAGES') == 'batch'
+        assert lane_for_task_type('UNKNOWN') == 'batch'
+        assert parse_lane_concurrency('batch=3, export=x,parse=0') == {'batch': 3}
+        assert parse_project_weights('p1=2, p2=0.5,p3=x,p4=0') == {'p1': 2.0, 'p2': 0.5}
+
+    def test_projects_take_turns_within_lane(self):
+        scheduler = FairScheduler({'batch': 1})
+        gate = threading.Event()
+        started = threading.Event()
+        order = []
+
+        def block():
+            started.set()
+            gate.wait()
+
+        # 占住唯一的 worker，确保后续任务都在队列里排队
+        blocker = scheduler.submit('batch', 'project-a', block)
+        assert started.wait(timeout=5)
+        futures = [scheduler.submit('batch', 'project-a', order.append, f'a{i}') for i in range(3)]
+        futures.append(scheduler.submit('batch', 'project-b', order.append, 'b0'))
+
+        gate.set()
+        for f in [blocker] + futures:
+            f.result(timeout=5)
+
+        # 运行数相同时优先最久未被服务的项目：project-a 刚跑过 blocker，project-b 先执行
+        assert order == ['b0', 'a0', 'a1', 'a2']
+        scheduler.shutdown()
+
+    def test_interactive_lane_not_blocked_by_batch(self):
+        scheduler = FairScheduler({'batch': 1, 'interactive': 1})
+        gate = threading.Event()
+
+        blocker = scheduler.submit('batch', 'project-a', gate.wait)
+        edit = scheduler.submit('interactive', 'project-b', lambda: 'done')
+
+        assert edit.result(timeout=5) == 'done'
+        gate.set()
+        blocker.result(timeout=5)
+        scheduler.shutdown()
+
+    def test_weighted_projects_get_larger_share(self):
+        scheduler = FairScheduler({'batch': 4})
+        scheduler.set_weights({'project-a': 3})
+        release_blockers, release_jobs = threading.Event(), threading.Event()
+        started, lock = [], threading.Lock()
+
+        def job(name):
+            with lock:
+                started.append(name)
+            release_jobs.wait()
+
+        def wait_until(condition):
+            for _ in range(500):
+                if condition():
+                    return
+                threading.Event().wait(0.01)
+
+        # 四个 worker 都被占住后再排队，保证排队任务的取出顺序只由权重决定
+        blockers = [scheduler.submit('batch', 'other', release_blockers.wait) for _ in range(4)]
+        wait_until(lambda: scheduler.stats()['batch']['running'] == 4)
+        futures = [scheduler.submit('batch', p, job, p) for p in ('project-a', 'project-b') for _ in range(4)]
+        release_blockers.set()
+        wait_until(lambda: len(started) == 4)
+
+        # 权重 3 : 1 —— 四个空位中 project-a 占三个（等权重时为两个）
+        with lock:
+            assert sorted(started) == ['project-a'] * 3 + ['project-b']
+        release_jobs.set()
+        for f in blockers + futures:
+            f.result(timeout=5)
+        scheduler.shutdown()
+
+    def test_shutdown_waits_for_queued_and_running_jobs(self):
+        scheduler = FairScheduler({'parse': 1})
+        done = []
+        started = threading.Event()
+
+        def slow(name):
+            started.set()
+            threading.Event().wait(0.2)
+            done.append(name)
+
+        scheduler.submit('parse', 'project-a', slow, 'first')
+        scheduler.submit('parse', 'project-a', slow, 'second')
+        assert started.wait(timeout=5)
+        scheduler.shutdown()
+        assert done == ['first', 'second']
+
@@ -0,0 +1,31 @@
+"""
+可编辑 PPTX 字号计算（utils/text_fit.py）单元测试
+"""
+
+import math
+import random
+
+from utils.text_fit import TextFitter
+
+
+def _linear_scan(fitter, text, width_pt, height_pt, min_size=6, max_size=200):
+    for size in range(max_size, min_size - 1, -1):
+        lines = sum(1 if not line else max(1, math.ceil(fitter.line_width(line) * size / width_pt - 1e-9))
+                    for line in text.split('\n'))
+        if lines * size <= height_pt:
+            return float(size)
+    return float(min_size)
+
+
+def test_binary_search_matches_linear_scan_and_caches_widths():
+    fitter = TextFitter('/nonexistent/font.ttf')  # 字体不存在时按字符数估算宽度
+    rng = random.Random(3)
+    texts = ['市场规模持续增长', 'Quarterly revenue up 35%', '第一章\n\n背景介绍', '• 海外市场贡献主要增量，渠道合作伙伴数量翻倍']
+    for _ in range(200):
+        text = rng.choice(texts)
+        width, height = rng.uniform(5, 800), rng.uniform(3, 300)
+        assert fitter.fit_font_size(text, width, height, 6, 200) == _linear_scan(fitter, text, width, height)
+
+    # 每个不同的行只测量一次
+    assert set(fitter._widths) == {line for text in texts for line in text.split('\n') if line}
+    assert fitter.fit_font_size('很长的一段文字' * 50, 10, 5, 6, 200) == 6.0
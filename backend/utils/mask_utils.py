@@ -1,10 +1,15 @@
 """
 掩码图像生成工具
 用于从边界框（bbox）生成黑白掩码图像
+
+掩码基于 NumPy 生成：所有 bbox 的解析、扩展/收缩与裁剪在一次向量化计算中完成，
+随后按行列切片直接写入单通道数组；黑白掩码返回单通道 L 图像，叠加可视化使用数组混合。
 """
 import logging
-from typing import List, Tuple, Union, Callable
-from PIL import Image, ImageDraw
+from typing import List, Tuple, Union
+
+import numpy as np
+from PIL import Image
 
 logger = logging.getLogger(__name__)
 
@@ -56,54 +61,85 @@ def merge_two_boxes(box1: Tuple, box2: Tuple) -> Tuple[int, int, int, int]:
     )
 
 
-def _iterative_merge(
-    bboxes: List[Tuple[int, int, int, int]],
-    should_merge_fn: Callable[[Tuple, Tuple], bool]
-) -> List[Tuple[int, int, int, int]]:
+def bboxes_to_array(
+    image_size: Tuple[int, int],
+    bboxes: List[Union[Tuple[int, int, int, int], dict]],
+    expand_pixels: int = 0
+) -> np.ndarray:
     """
-    通用的迭代合并算法
+    解析 bbox 并应用扩展/收缩与裁剪（向量化）
     
     Args:
-        bboxes: 标准化后的bbox列表
-        should_merge_fn: 判断两个bbox是否应该合并的函数
-    
+        image_size: 图像尺寸 (width, height)
+        bboxes: 边界框列表（格式同 create_mask_from_bboxes）
+        expand_pixels: 扩展像素数，负数表示向内收缩
+        
     Returns:
-        合并后的bbox列表
+        (N, 4) int64 数组，每行为 (x1, y1, x2, y2)（右下角包含在内，与 ImageDraw.rectangle 一致），
+        无法识别 / 收缩或裁剪后无效的 bbox 已剔除
     """
-    if not bboxes:
-        return []
-    if len(bboxes) == 1:
-        return list(bboxes)
+    coords = []
+    for bbox in bboxes:
+        if isinstance(bbox, dict):
+            if 'x1' in bbox and 'y1' in bbox and 'x2' in bbox and 'y2' in bbox:
+                coords.append((bbox['x1'], bbox['y1'], bbox['x2'], bbox['y2']))
+            elif 'x' in bbox and 'y' in bbox and 'width' in bbox and 'height' in bbox:
+                coords.append((bbox['x'], bbox['y'], bbox['x'] + bbox['width'], bbox['y'] + bbox['height']))
+            else:
+                logger.warning(f"无法识别的 bbox 字典格式: {bbox}")
+        elif isinstance(bbox, (tuple, list)) and len(bbox) == 4:
+            coords.append(tuple(bbox))
+        else:
+            logger.warning(f"无法识别的 bbox 格式: {bbox}")
+    if not coords:
+        return np.zeros((0, 4), dtype=np.int64)
     
-    normalized = list(bboxes)
-    merged = True
+    width, height = image_size
+    boxes = np.asarray(coords, dtype=np.float64)
+    if expand_pixels > 0:
+        boxes[:, :2] -= expand_pixels
+        boxes[:, 2:] += expand_pixels
+    elif expand_pixels < 0:
+        # 收缩（向内收缩），收缩后宽高必须大于0
+        shrink = abs(expand_pixels)
+        boxes[:, :2] += shrink
+        boxes[:, 2:] -= shrink
+        valid = (boxes[:, 2] > boxes[:, 0]) & (boxes[:, 3] > boxes[:, 1])
+        if not valid.all():
+            logger.debug(f"{int((~valid).sum())} 个 bbox 收缩后无效，跳过")
+        boxes = boxes[valid]
     
-    while merged:
-        merged = False
-        new_boxes = []
-        used = set()
-        
-        for i, box1 in enumerate(normalized):
-            if i in used:
-                continue
-            
-            current_box = box1
-            
-            for j, box2 in enumerate(normalized):
-                if j <= i or j in used:
-                    continue
-                
-                if should_merge_fn(current_box, box2):
-                    current_box = merge_two_boxes(current_box, box2)
-                    used.add(j)
-                    merged = True
-            
-            new_boxes.append(current_box)
-            used.add(i)
-        
-        normalized = new_boxes
+    # 确保坐标在图像范围内
+    np.clip(boxes[:, 0::2], 0, width, out=boxes[:, 0::2])
+    np.clip(boxes[:, 1::2], 0, height, out=boxes[:, 1::2])
+    valid = (boxes[:, 2] > boxes[:, 0]) & (boxes[:, 3] > boxes[:, 1])
+    if not valid.all():
+        logger.debug(f"{int((~valid).sum())} 个 bbox 裁剪后无效，跳过")
+    # ImageDraw 对浮点坐标向下取整
+    return np.floor(boxes[valid]).astype(np.int64)
+
+
+def rasterize_bboxes(
+    image_size: Tuple[int, int],
+    bboxes: List[Union[Tuple[int, int, int, int], dict]],
+    expand_pixels: int = 0,
+    fill: int = 255,
+    background: int = 0
+) -> np.ndarray:
+    """
+    将所有 bbox 绘制到单通道 uint8 数组（形状为 (height, width)）
     
-    return normalized
+    每个矩形只是一次切片赋值（memset），比差分数组 + cumsum 在 4K 图像上更快
+    """
+    width, height = image_size
+    mask = np.full((height, width), background, dtype=np.uint8)
+    for x1, y1, x2, y2 in bboxes_to_array(image_size, bboxes, expand_pixels).tolist():
+        mask[y1:y2 + 1, x1:x2 + 1] = fill
+    return mask
+
+
+def _is_gray(color: Tuple[int, int, int]) -> bool:
+    return color[0] == color[1] == color[2]
 
 
 def create_mask_from_bboxes(
@@ -127,94 +163,20 @@ def create_mask_from_bboxes(
         expand_pixels: 扩展像素数，可以让掩码区域略微扩大（用于更好的消除效果）
         
     Returns:
-        PIL Image 对象，RGB 模式的掩码图像
+        PIL Image 对象：两种颜色均为灰度时为单通道 L 模式掩码，否则为 RGB 模式
     """
     try:
-        # 创建黑色背景图像
-        mask = Image.new('RGB', image_size, background_color)
-        draw = ImageDraw.Draw(mask)
-        
+        if _is_gray(mask_color) and _is_gray(background_color):
+            array = rasterize_bboxes(image_size, bboxes, expand_pixels, mask_color[0], background_color[0])
+            mask = Image.fromarray(array)
+        else:
+            coverage = Image.fromarray(rasterize_bboxes(image_size, bboxes, expand_pixels))
+            mask = Image.composite(
+                Image.new('RGB', image_size, mask_color),
+                Image.new('RGB', image_size, background_color),
+                coverage
+            )
         logger.info(f"创建掩码图像，尺寸: {image_size}, bbox数量: {len(bboxes)}")
-        
-        # 绘制每个 bbox 为白色区域
-        bbox_list = []  # 用于记录所有bbox坐标
-        for i, bbox in enumerate(bboxes):
-            # 解析不同格式的 bbox
-            if isinstance(bbox, dict):
-                if 'x1' in bbox and 'y1' in bbox and 'x2' in bbox and 'y2' in bbox:
-                    # 格式: {"x1": x1, "y1": y1, "x2": x2, "y2": y2}
-                    x1 = bbox['x1']
-                    y1 = bbox['y1']
-                    x2 = bbox['x2']
-                    y2 = bbox['y2']
-                elif 'x' in bbox and 'y' in bbox and 'width' in bbox and 'height' in bbox:
-                    # 格式: {"x": x, "y": y, "width": w, "height": h}
-                    x1 = bbox['x']
-                    y1 = bbox['y']
-                    x2 = x1 + bbox['width']
-                    y2 = y1 + bbox['height']
-                else:
-                    logger.warning(f"无法识别的 bbox 字典格式: {bbox}")
-                    continue
-            elif isinstance(bbox, (tuple, list)) and len(bbox) == 4:
-                # 格式: (x1, y1, x2, y2)
-                x1, y1, x2, y2 = bbox
-            else:
-                logger.warning(f"无法识别的 bbox 格式: {bbox}")
-                continue
-            
-            # 记录原始坐标
-            x1_orig, y1_orig, x2_orig, y2_orig = x1, y1, x2, y2
-            
-            # 应用扩展或收缩
-            if expand_pixels > 0:
-                # 扩展
-                x1 = max(0, x1 - expand_pixels)
-                y1 = max(0, y1 - expand_pixels)
-                x2 = min(image_size[0], x2 + expand_pixels)
-                y2 = min(image_size[1], y2 + expand_pixels)
-            elif expand_pixels < 0:
-                # 收缩（向内收缩）
-                shrink = abs(expand_pixels)
-                x1 = x1 + shrink
-                y1 = y1 + shrink
-                x2 = x2 - shrink
-                y2 = y2 - shrink
-                # 确保收缩后仍然有效（宽度和高度必须大于0）
-                if x2 <= x1 or y2 <= y1:
-                    logger.warning(f"bbox {i+1} 收缩后无效: ({x1}, {y1}, {x2}, {y2})，跳过")
-                    continue
-            
-            # 确保坐标在图像范围内
-            x1 = max(0, min(x1, image_size[0]))
-            y1 = max(0, min(y1, image_size[1]))
-            x2 = max(0, min(x2, image_size[0]))
-            y2 = max(0, min(y2, image_size[1]))
-            
-            # 再次检查有效性
-            if x2 <= x1 or y2 <= y1:
-                logger.warning(f"bbox {i+1} 最终坐标无效: ({x1}, {y1}, {x2}, {y2})，跳过")
-                continue
-            
-            # 绘制矩形
-            draw.rectangle([x1, y1, x2, y2], fill=mask_color)
-            width = x2 - x1
-            height = y2 - y1
-            if expand_pixels > 0:
-                bbox_list.append(f"  [{i+1}] 原始: ({x1_orig}, {y1_orig}, {x2_orig}, {y2_orig}) -> 扩展后: ({x1}, {y1}, {x2}, {y2}) 尺寸: {width}x{height}")
-            elif expand_pixels < 0:
-                bbox_list.append(f"  [{i+1}] 原始: ({x1_orig}, {y1_orig}, {x2_orig}, {y2_orig}) -> 收缩后: ({x1}, {y1}, {x2}, {y2}) 尺寸: {width}x{height}")
-            else:
-                bbox_list.append(f"  [{i+1}] ({x1}, {y1}, {x2}, {y2}) 尺寸: {width}x{height}")
-            logger.debug(f"bbox {i+1}: ({x1}, {y1}, {x2}, {y2}) 尺寸: {width}x{height}")
-        
-        # 输出所有bbox的详细信息
-        if bbox_list:
-            logger.info(f"添加了 {len(bbox_list)} 个bbox的mask:")
-            for bbox_info in bbox_list:
-                logger.info(bbox_info)
-        
-        logger.info(f"掩码图像创建完成")
         return mask
         
     except Exception as e:
@@ -293,35 +255,16 @@ def visualize_mask_overlay(
             logger.warning(f"图像尺寸不匹配，调整掩码尺寸: {mask_image.size} -> {original_image.size}")
             mask_image = mask_image.resize(original_image.size, Image.LANCZOS)
         
-        # 转换为 RGBA
-        if original_image.mode != 'RGBA':
-            original_rgba = original_image.convert('RGBA')
-        else:
-            original_rgba = original_image.copy()
-        
-        # 创建黑色半透明掩码用于可视化
-        mask_rgba = Image.new('RGBA', original_image.size, (0, 0, 0, 0))
-        draw = ImageDraw.Draw(mask_rgba)
-        
-        # 遍历掩码图像，将白色区域绘制为黑色半透明
-        mask_array = mask_image.load()
-        mask_rgba_array = mask_rgba.load()
+        # 白色（或接近白色，各通道平均亮度 > 200）区域叠加黑色半透明
+        mask_array = np.asarray(mask_image)
+        brightness = mask_array if mask_array.ndim == 2 else mask_array.mean(axis=2)
+        selected = Image.fromarray((brightness > 200).view(np.uint8) * np.uint8(255))
         
-        for y in range(mask_image.size[1]):
-            for x in range(mask_image.size[0]):
-                pixel = mask_array[x, y]
-                # 如果是白色（或接近白色），设置为黑色半透明
-                if isinstance(pixel, tuple):
-                    brightness = sum(pixel) / len(pixel)
-                else:
-                    brightness = pixel
-                
-                if brightness > 200:  # 接近白色
-                    mask_rgba_array[x, y] = (0, 0, 0, int(128 * alpha))
-        
-        # 叠加
-        result = Image.alpha_composite(original_rgba, mask_rgba)
-        return result.convert('RGB')
+        # 黑色、不透明度 a 的叠加层即 c * (255 - a) / 255：查表得到变暗的整图，再按选区混合
+        overlay_alpha = int(128 * alpha)
+        darken = (np.arange(256, dtype=np.uint32) * (255 - overlay_alpha) + 127) // 255
+        original = original_image.convert('RGB')
+        return Image.composite(original.point(darken.tolist() * 3), original, selected)
         
     except Exception as e:
         logger.error(f"可视化掩码叠加失败: {str(e)}", exc_info=True)
@@ -440,13 +383,38 @@ def merge_overlapping_bboxes(
     if not normalized:
         return []
     
-    def should_merge(box1, box2):
-        x1, y1, x2, y2 = box1
-        bx1, by1, bx2, by2 = box2
-        return (x1 - merge_threshold <= bx2 and bx1 <= x2 + merge_threshold and
-                y1 - merge_threshold <= by2 and by1 <= y2 + merge_threshold)
+    # 延迟导入：services.image_editability 包在导入时会加载 utils.mask_utils
+    from services.image_editability.helpers import BBoxIndex
+    
+    # 两个 bbox 距离不超过 merge_threshold 即合并；合并后的 bbox 变大可能触发新的合并，
+    # 因此按连通分量合并（空间索引只比较邻近的 bbox），重复直到数量不再变化。
+    # 合并关系对 bbox 扩大是单调的，结果与逐对迭代合并一致，分组按最小原始序号排列
+    result = list(normalized)
+    while len(result) > 1:
+        index = BBoxIndex(result)
+        parent = list(range(len(result)))
+        
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+        
+        for i, box in enumerate(result):
+            for j in index.query(box, margin=merge_threshold):
+                if j > i:
+                    root_i, root_j = find(i), find(j)
+                    if root_i != root_j:
+                        parent[max(root_i, root_j)] = min(root_i, root_j)
+        
+        groups = {}
+        for i, box in enumerate(result):
+            root = find(i)
+            groups[root] = merge_two_boxes(groups[root], box) if root in groups else box
+        if len(groups) == len(result):
+            break
+        result = [groups[root] for root in sorted(groups)]
     
-    result = _iterative_merge(normalized, should_merge)
     logger.info(f"合并边界框：{len(bboxes)} -> {len(result)}")
     return result
 
@@ -5,15 +5,17 @@ Based on OpenDCAI/DataFlow-Agent's implementation
 import os
 import logging
 from datetime import datetime, timezone
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Any, Tuple
 from pathlib import Path
 from pptx import Presentation
 from pptx.util import Inches, Pt
 from pptx.enum.text import PP_ALIGN
 from pptx.dml.color import RGBColor
-from PIL import Image, ImageFont, ImageDraw
+from PIL import Image, ImageDraw
 from html.parser import HTMLParser
 
+from .text_fit import get_text_fitter
+
 logger = logging.getLogger(__name__)
 
 
@@ -88,50 +90,6 @@ class PPTXBuilder:
     # 项目内置字体（Noto Sans CJK SC，支持中日韩文字）
     FONT_PATH = os.path.join(os.path.dirname(__file__), "..", "fonts", "NotoSansSC-Regular.ttf")
     
-    # Font cache: {size_pt: ImageFont}
-    _font_cache: Dict[float, ImageFont.FreeTypeFont] = {}
-    
-    @classmethod
-    def _get_font(cls, size_pt: float) -> Optional[ImageFont.FreeTypeFont]:
-        """Get font object for given size (with caching)"""
-        # Round to 0.5pt for cache efficiency
-        cache_key = round(size_pt * 2) / 2
-        
-        if cache_key not in cls._font_cache:
-            try:
-                cls._font_cache[cache_key] = ImageFont.truetype(cls.FONT_PATH, int(size_pt))
-            except Exception as e:
-                logger.warning(f"Failed to load font {cls.FONT_PATH}: {e}")
-                return None
-        
-        return cls._font_cache[cache_key]
-    
-    @classmethod
-    def _measure_text_width(cls, text: str, font_size_pt: float) -> Optional[float]:
-        """
-        Measure text width in points using the actual font
-        
-        Args:
-            text: Text to measure
-            font_size_pt: Font size in points
-            
-        Returns:
-            Text width in points, or None if measurement failed
-        """
-        font = cls._get_font(font_size_pt)
-        if font is None:
-            return None
-        
-        try:
-            # Get text bounding box: (left, top, right, bottom)
-            bbox = font.getbbox(text)
-            width_px = bbox[2] - bbox[0]
-            # Font is loaded at size=font_size_pt, so pixel width ≈ point width
-            return width_px
-        except Exception as e:
-            logger.warning(f"Failed to measure text: {e}")
-            return None
-    
     def __init__(self, slide_width_inches: float = None, slide_height_inches: float = None):
         """
         Initialize PPTX builder
@@ -250,8 +208,8 @@ class PPTXBuilder:
     def calculate_font_size(self, bbox: List[int], text: str, text_level: Any = None, dpi: int = None) -> float:
         """
         Calculate appropriate font size based on bounding box and text content.
-        Uses precise font measurement when available, falls back to estimation otherwise.
-        Supports both single-line and multi-line (auto-wrap) text.
+        Uses precise font measurement when available, falls back to estimation otherwise
+        (see utils/text_fit.py). Supports both single-line and multi-line (auto-wrap) text.
         
         Args:
             bbox: Bounding box [x0, y0, x1, y1] in pixels
@@ -286,50 +244,12 @@ class PPTXBuilder:
         # Line height ratio: 1.0 for tight bbox
         line_height_ratio = 1.0
         
-        # Try precise measurement first (check if font file exists)
-        use_precise = os.path.exists(self.FONT_PATH)
-        
-        # Binary search: find largest font size that fits
-        best_size = self.MIN_FONT_SIZE
-        
-        for font_size in range(int(self.MAX_FONT_SIZE), int(self.MIN_FONT_SIZE) - 1, -1):
-            font_size = float(font_size)
-            
-            # For text with explicit newlines, calculate each line's width separately
-            lines = text.split('\n')
-            total_required_lines = 0
-            
-            for line in lines:
-                if not line:
-                    total_required_lines += 1
-                    continue
-                    
-                # Measure line width (precise or estimated)
-                if use_precise:
-                    line_width_pt = self._measure_text_width(line, font_size)
-                    if line_width_pt is None:
-                        use_precise = False
-                
-                if not use_precise:
-                    # Fallback: estimate based on character count
-                    cjk_count = sum(1 for c in line if '\u4e00' <= c <= '\u9fff' or '\u3040' <= c <= '\u30ff' or '\uac00' <= c <= '\ud7af')
-                    non_cjk_count = len(line) - cjk_count
-                    line_width_pt = (cjk_count * 1.0 + non_cjk_count * 0.5) * font_size
-                
-                # How many lines does this explicit line need (auto-wrap)?
-                lines_needed = max(1, -(-int(line_width_pt) // int(usable_width_pt)))
-                total_required_lines += lines_needed
-            
-            required_lines = total_required_lines
-            
-            # Calculate total height needed
-            line_height_pt = font_size * line_height_ratio
-            total_height_pt = required_lines * line_height_pt
-            
-            # Check if it fits
-            if total_height_pt <= usable_height_pt:
-                best_size = font_size
-                break
+        # Binary search over cached per-line widths (precise font measurement when the
+        # font file is available, character-count estimation otherwise)
+        best_size = get_text_fitter(self.FONT_PATH).fit_font_size(
+            text, usable_width_pt, usable_height_pt,
+            self.MIN_FONT_SIZE, self.MAX_FONT_SIZE, line_height_ratio
+        )
         
         if best_size == self.MIN_FONT_SIZE and text_length > 3:
             logger.warning(f"Text may overflow: '{text[:50]}...' in bbox {width_px}x{height_px}px")
@@ -0,0 +1,121 @@
+"""
+Font size fitting for editable PPTX text boxes
+
+PPTXBuilder.calculate_font_size used to walk every integer size from 200 pt
+down to 6 pt and, at each size, load a FreeType font and re-measure every
+line: up to ~195 x lines measurements per text box.
+
+TextFitter measures each line once at a reference size (glyph advances scale
+linearly with the font size) and caches the per-pt width per string, so
+repeated strings (footers, bullets, table headers) are never re-measured.
+The number of wrapped lines at size s is sum(max(1, ceil(w * s / box_width))),
+and the required height lines(s) * s grows monotonically with s, so the
+largest integer size that fits is found by binary search (~8 evaluations of
+cached widths, no font work).
+
+One fitter (and FreeType face) is shared per font file; measurement is
+serialized by a lock, which also makes the width cache thread-safe.
+"""
+import logging
+import math
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from PIL import ImageFont
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_text_width(text: str) -> float:
+    """Width per pt of font size without a font: CJK ~1 em, others ~0.5 em"""
+    cjk_count = sum(1 for c in text if '\u4e00' <= c <= '\u9fff' or '\u3040' <= c <= '\u30ff' or '\uac00' <= c <= '\ud7af')
+    return cjk_count * 1.0 + (len(text) - cjk_count) * 0.5
+
+
+class TextFitter:
+    """Largest font size at which text (with auto-wrap) fits a box"""
+
+    def __init__(self, font_path: str, reference_size: int = 100, max_cached_widths: int = 20000):
+        self.font_path = font_path
+        self.reference_size = reference_size
+        self.max_cached_widths = max_cached_widths
+        self._font: Optional[ImageFont.FreeTypeFont] = None
+        self._font_failed = False
+        # 行文本 -> 每 pt 字号的宽度（pt）
+        self._widths: 'OrderedDict[str, float]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _load_font(self) -> Optional[ImageFont.FreeTypeFont]:
+        if self._font is None and not self._font_failed:
+            try:
+                if not os.path.exists(self.font_path):
+                    raise FileNotFoundError(self.font_path)
+                self._font = ImageFont.truetype(self.font_path, self.reference_size)
+            except Exception as e:
+                logger.warning(f"Failed to load font {self.font_path}, estimating text width: {e}")
+                self._font_failed = True
+        return self._font
+
+    def line_width(self, line: str) -> float:
+        """Width of one line in pt per 1 pt of font size (cached)"""
+        with self._lock:
+            width = self._widths.get(line)
+            if width is not None:
+                self._widths.move_to_end(line)
+                return width
+            font = self._load_font()
+            width = None
+            if font is not None:
+                try:
+                    left, _, right, _ = font.getbbox(line)
+                    width = (right - left) / self.reference_size
+                except Exception as e:
+                    logger.warning(f"Failed to measure text: {e}")
+            if width is None:
+                width = estimate_text_width(line)
+            self._widths[line] = width
+            if len(self._widths) > self.max_cached_widths:
+                self._widths.popitem(last=False)
+            return width
+
+    def fit_font_size(self, text: str, width_pt: float, height_pt: float,
+                      min_size: float, max_size: float, line_height_ratio: float = 1.0) -> float:
+        """
+        Largest integer size in [min_size, max_size] whose wrapped height fits
+        height_pt (min_size if none does). Explicit newlines start new lines;
+        empty lines take one line of height.
+        """
+        widths: List[Optional[float]] = [self.line_width(line) if line else None for line in text.split('\n')]
+
+        def fits(size: int) -> bool:
+            lines = 0
+            for width in widths:
+                # 1e-9：避免浮点误差把恰好占满的一行算成两行
+                lines += 1 if width is None else max(1, math.ceil(width * size / width_pt - 1e-9))
+            return lines * size * line_height_ratio <= height_pt
+
+        low, high = int(min_size), int(max_size)
+        if not fits(low):
+            return float(low)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if fits(mid):
+                low = mid
+            else:
+                high = mid - 1
+        return float(low)
+
+
+_fitters: Dict[str, TextFitter] = {}
+_fitters_lock = threading.Lock()
+
+
+def get_text_fitter(font_path: str) -> TextFitter:
+    """Shared fitter per font file"""
+    with _fitters_lock:
+        fitter = _fitters.get(font_path)
+        if fitter is None:
+            fitter = _fitters[font_path] = TextFitter(font_path)
+        return fitter
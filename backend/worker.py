@@ -0,0 +1,20 @@
+"""
+Standalone background task worker
+
+Runs resumable tasks (see services/tasks/queue.py) from the shared database,
+so workers can be scaled independently of the Flask process. Set
+TASK_QUEUE_MODE=external on the API server to leave all resumable tasks to
+these workers.
+
+Usage:
+    TASK_LANE_CONCURRENCY=batch=4,export=2 python worker.py
+"""
+import logging
+
+from app import app
+from services.task_manager import task_manager
+
+
+if __name__ == '__main__':
+    logging.info("Starting Banana Slides task worker")
+    task_manager.run_worker(app)
@@ -37,6 +37,10 @@ export {
 } from './generation';
 export type { OutputLanguage } from './types';
 
+// 从 task.ts 导出
+export { watchTask, waitTaskEvents } from './task';
+export type { TaskEvent, TaskWaitResult, WatchTaskHandlers } from './task';
+
 // 从 export.ts 导出
 export {
   exportPPTX,
@@ -25,11 +25,12 @@ export const getStoredOutputLanguage = async (): Promise<OutputLanguage> => {
  * 生成大纲
  * @param projectId 项目ID
  * @param language 输出语言（可选，默认从 sessionStorage 获取）
+ * @param options.forceRegenerate 跳过AI响应缓存（重新生成时使用，输入未变也重新调用模型）
  */
 export const generateOutline = async (
   projectId: string,
   language?: OutputLanguage,
-  options?: { pageCount?: number }
+  options?: { pageCount?: number; forceRegenerate?: boolean }
 ): Promise<ApiResponse> => {
   const lang = language || await getStoredOutputLanguage();
   const response = await apiClient.post<ApiResponse>(
@@ -37,6 +38,7 @@ export const generateOutline = async (
     {
       language: lang,
       ...(typeof options?.pageCount === 'number' ? { page_count: options.pageCount } : {}),
+      ...(options?.forceRegenerate ? { force_regenerate: true } : {}),
     }
   );
   return response.data;
@@ -66,12 +68,20 @@ export const generateFromDescription = async (projectId: string, descriptionText
  * 批量生成描述
  * @param projectId 项目ID
  * @param language 输出语言（可选，默认从 sessionStorage 获取）
+ * @param options.forceRegenerate 跳过AI响应缓存（重新生成时使用，输入未变也重新调用模型）
  */
-export const generateDescriptions = async (projectId: string, language?: OutputLanguage): Promise<ApiResponse> => {
+export const generateDescriptions = async (
+  projectId: string,
+  language?: OutputLanguage,
+  options?: { forceRegenerate?: boolean }
+): Promise<ApiResponse> => {
   const lang = language || await getStoredOutputLanguage();
   const response = await apiClient.post<ApiResponse>(
     `/api/projects/${projectId}/generate/descriptions`,
-    { language: lang }
+    {
+      language: lang,
+      ...(options?.forceRegenerate ? { force_regenerate: true } : {}),
+    }
   );
   return response.data;
 };
@@ -13,6 +13,9 @@ export * from './material';
 // Generation APIs
 export * from './generation';
 
+// Task APIs
+export * from './task';
+
 // Export APIs
 export * from './export';
 
@@ -0,0 +1,139 @@
+import { apiClient } from './client';
+import type { ApiResponse, Task } from '@/types';
+
+const TERMINAL_STATUSES = ['COMPLETED', 'FAILED', 'PARTIAL'];
+
+export interface TaskEvent {
+  id: number;
+  event: 'task' | 'page' | string;
+  data: any;
+}
+
+export interface TaskWaitResult {
+  task: Task;
+  events: TaskEvent[];
+  last_event_id: number;
+}
+
+/**
+ * 长轮询任务事件（SSE 不可用时的回退）：有新事件、任务已结束或超时后返回
+ * @param since 已收到的最后一个事件ID
+ * @param timeout 最长等待秒数（后端上限 60）
+ */
+export const waitTaskEvents = async (
+  projectId: string,
+  taskId: string,
+  since = 0,
+  timeout = 25
+): Promise<ApiResponse<TaskWaitResult>> => {
+  const response = await apiClient.get<ApiResponse<TaskWaitResult>>(
+    `/api/projects/${projectId}/tasks/${taskId}/wait`,
+    { params: { since, timeout } }
+  );
+  return response.data;
+};
+
+export interface WatchTaskHandlers {
+  /** 任务状态更新（与 GET /tasks/{id} 返回的结构一致）；同一任务的回调按顺序执行，不会并发 */
+  onUpdate: (task: Task) => void | Promise<void>;
+  /** 单页完成事件，如 { page_id, status, image_url } */
+  onPage?: (data: any) => void | Promise<void>;
+  /** 任务不存在、长轮询请求失败或回调抛出异常（之后不再推送） */
+  onError?: (error: any) => void;
+}
+
+/**
+ * 订阅任务进度：优先使用 SSE（EventSource），连接失败时回退到长轮询，任务结束后自动停止
+ *
+ * @returns 取消订阅函数
+ */
+export const watchTask = (
+  projectId: string,
+  taskId: string,
+  { onUpdate, onPage, onError }: WatchTaskHandlers
+): (() => void) => {
+  let stopped = false;
+  let lastEventId = 0;
+  let source: EventSource | null = null;
+  let queue: Promise<void> = Promise.resolve();
+
+  const stop = () => {
+    stopped = true;
+    source?.close();
+    source = null;
+  };
+
+  // 回调串行执行：上一次 syncProject 等异步处理结束后再处理下一个事件
+  const dispatch = (handler: () => void | Promise<void>) => {
+    queue = queue.then(async () => {
+      if (stopped) return;
+      try {
+        await handler();
+      } catch (error) {
+        console.error('[任务事件] 处理失败:', error);
+        stop();
+        onError?.(error);
+      }
+    });
+    return queue;
+  };
+
+  const handleTask = (task: Task) => {
+    if (task && TERMINAL_STATUSES.includes(task.status)) {
+      source?.close();
+      source = null;
+      return dispatch(() => onUpdate(task)).then(stop);
+    }
+    return dispatch(() => onUpdate(task));
+  };
+
+  const longPoll = async () => {
+    while (!stopped) {
+      try {
+        const response = await waitTaskEvents(projectId, taskId, lastEventId);
+        const result = response.data;
+        if (stopped || !result) return;
+        for (const event of result.events || []) {
+          if (event.event === 'page' && onPage) {
+            dispatch(() => onPage(event.data));
+          }
+        }
+        lastEventId = result.last_event_id || lastEventId;
+        await handleTask(result.task);
+      } catch (error) {
+        if (!stopped) {
+          stop();
+          onError?.(error);
+        }
+        return;
+      }
+    }
+  };
+
+  if (typeof EventSource === 'undefined') {
+    longPoll();
+    return stop;
+  }
+
+  source = new EventSource(`/api/projects/${projectId}/tasks/${taskId}/events`);
+  source.addEventListener('task', (e) => {
+    const message = e as MessageEvent;
+    lastEventId = Number(message.lastEventId) || lastEventId;
+    handleTask(JSON.parse(message.data));
+  });
+  source.addEventListener('page', (e) => {
+    const message = e as MessageEvent;
+    lastEventId = Number(message.lastEventId) || lastEventId;
+    if (onPage) dispatch(() => onPage(JSON.parse(message.data)));
+  });
+  source.onerror = () => {
+    if (stopped || !source) return;
+    // 连接中断（代理不支持 SSE、服务重启等）：改为长轮询，从最后收到的事件继续
+    console.warn(`[任务事件] SSE 连接失败，回退到长轮询: ${taskId}`);
+    source.close();
+    source = null;
+    longPoll();
+  };
+
+  return stop;
+};
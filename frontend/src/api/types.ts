@@ -73,6 +73,12 @@ export interface ReferenceFile {
   markdown_content: string | null;
   error_message: string | null;
   image_caption_failed_count?: number;  // Optional, calculated dynamically
+  caption_stats?: {  // Image caption dedup / cache statistics of the last parse
+    images: number;
+    model_calls: number;
+    cache_hits: number;
+    hit_rate: number;
+  } | null;
   created_at: string;
   updated_at: string;
 }
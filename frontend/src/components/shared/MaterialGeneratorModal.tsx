@@ -1,7 +1,7 @@
 import React, { useState, useEffect, useRef } from 'react';
 import { Image as ImageIcon, ImagePlus, Upload, X, FolderOpen } from 'lucide-react';
 import { Modal, Textarea, Button, useToast, MaterialSelector } from '@/components/shared';
-import { generateMaterialImage, getTaskStatus } from '@/api/endpoints';
+import { generateMaterialImage, watchTask } from '@/api/endpoints';
 import { getImageUrl } from '@/api/client';
 import { materialUrlToFile } from './MaterialSelector/index';
 import type { Material } from '@/api/endpoints';
@@ -93,7 +93,8 @@ export const MaterialGeneratorModal: React.FC<MaterialGeneratorModalProps> = ({
     }
   };
 
-  const pollingIntervalRef = useRef<NodeJS.Timeout | null>(null);
+  const stopWatchRef = useRef<(() => void) | null>(null);
+  const pollingTimeoutRef = useRef<NodeJS.Timeout | null>(null);
 
   const readStoredTask = () => {
     if (typeof window === 'undefined') return null;
@@ -127,11 +128,12 @@ export const MaterialGeneratorModal: React.FC<MaterialGeneratorModalProps> = ({
     }
   };
 
-  // 清理轮询
+  // 清理进度订阅
   useEffect(() => {
     return () => {
-      if (pollingIntervalRef.current) {
-        clearInterval(pollingIntervalRef.current);
+      stopWatchRef.current?.();
+      if (pollingTimeoutRef.current) {
+        clearTimeout(pollingTimeoutRef.current);
       }
     };
   }, []);
@@ -171,18 +173,31 @@ export const MaterialGeneratorModal: React.FC<MaterialGeneratorModalProps> = ({
     ? Math.floor((now - generatingStartedAt) / 1000)
     : 0;
 
+  const stopPolling = () => {
+    stopWatchRef.current?.();
+    stopWatchRef.current = null;
+    if (pollingTimeoutRef.current) {
+      clearTimeout(pollingTimeoutRef.current);
+      pollingTimeoutRef.current = null;
+    }
+  };
+
   const pollMaterialTask = async (taskId: string, targetProjectId?: string) => {
     const resolvedProjectId = targetProjectId || projectId || 'global'; // 使用'global'作为Task的project_id
     const isProjectScoped = resolvedProjectId !== 'global';
-    const maxAttempts = 60; // 最多轮询60次（约2分钟）
-    let attempts = 0;
+    const maxWaitMs = 120000; // 最多等待约2分钟
 
-    const poll = async () => {
-      try {
-        attempts++;
-        const response = await getTaskStatus(resolvedProjectId, taskId);
-        const task = response.data as Task;
+    const finish = () => {
+      setIsGenerating(false);
+      setGeneratingStartedAt(null);
+      clearStoredTask();
+      stopPolling();
+    };
 
+    stopPolling();
+    // 订阅任务进度（SSE，失败时回退到长轮询）
+    stopWatchRef.current = watchTask(resolvedProjectId, taskId, {
+      onUpdate: (task: Task) => {
         if (task.status === 'COMPLETED') {
           // 任务完成，从progress中获取结果
           const progress = (task.progress || {}) as { image_url?: string };
@@ -197,57 +212,25 @@ export const MaterialGeneratorModal: React.FC<MaterialGeneratorModalProps> = ({
           } else {
             show({ message: '素材生成完成，但未找到图片地址', type: 'error' });
           }
-          
-          setIsGenerating(false);
-          setGeneratingStartedAt(null);
-          clearStoredTask();
-          if (pollingIntervalRef.current) {
-            clearInterval(pollingIntervalRef.current);
-            pollingIntervalRef.current = null;
-          }
+          finish();
         } else if (task.status === 'FAILED') {
           show({
             message: task.error_message || '素材生成失败',
             type: 'error',
           });
-          setIsGenerating(false);
-          setGeneratingStartedAt(null);
-          clearStoredTask();
-          if (pollingIntervalRef.current) {
-            clearInterval(pollingIntervalRef.current);
-            pollingIntervalRef.current = null;
-          }
-        } else if (task.status === 'PENDING' || task.status === 'PROCESSING') {
-          // 继续轮询
-          if (attempts >= maxAttempts) {
-            show({ message: '素材生成超时，请稍后查看素材库', type: 'error' });
-            setIsGenerating(false);
-            setGeneratingStartedAt(null);
-            clearStoredTask();
-            if (pollingIntervalRef.current) {
-              clearInterval(pollingIntervalRef.current);
-              pollingIntervalRef.current = null;
-            }
-          }
-        }
-      } catch (error: any) {
-        console.error('轮询任务状态失败:', error);
-        if (attempts >= maxAttempts) {
-          show({ message: '轮询任务状态失败，请稍后查看素材库', type: 'error' });
-          setIsGenerating(false);
-          setGeneratingStartedAt(null);
-          clearStoredTask();
-          if (pollingIntervalRef.current) {
-            clearInterval(pollingIntervalRef.current);
-            pollingIntervalRef.current = null;
-          }
+          finish();
         }
-      }
-    };
-
-    // 立即执行一次，然后每2秒轮询一次
-    poll();
-    pollingIntervalRef.current = setInterval(poll, 2000);
+      },
+      onError: (error: any) => {
+        console.error('订阅任务进度失败:', error);
+        show({ message: '查询任务状态失败，请稍后查看素材库', type: 'error' });
+        finish();
+      },
+    });
+    pollingTimeoutRef.current = setTimeout(() => {
+      show({ message: '素材生成超时，请稍后查看素材库', type: 'error' });
+      finish();
+    }, maxWaitMs);
   };
 
   const handleGenerate = async () => {
@@ -1,5 +1,5 @@
 import { useState, useEffect, useMemo, useCallback } from 'react';
-import { listUserTemplates, uploadUserTemplate, deleteUserTemplate, generateTemplateVariants, getTaskStatus, uploadTemplateVariant, selectTemplateVariant, regenerateTemplateVariant, type UserTemplate } from '@/api/endpoints';
+import { listUserTemplates, uploadUserTemplate, deleteUserTemplate, generateTemplateVariants, watchTask, uploadTemplateVariant, selectTemplateVariant, regenerateTemplateVariant, type UserTemplate } from '@/api/endpoints';
 import type { Material } from '@/api/endpoints';
 import { materialUrlToFile } from '@/components/shared/MaterialSelector/index';
 
@@ -265,71 +265,69 @@ export function useTemplateManager({
     );
   };
 
-  // Polling functions
-  const pollTemplateTask = async (taskId: string) => {
+  // Task progress (SSE, falling back to long-poll)
+  const pollTemplateTask = (taskId: string) => {
     if (!projectId) return;
-    try {
-      const response = await getTaskStatus(projectId, taskId);
-      const task = response.data;
-      if (!task) return;
-
-      if (task.status === 'COMPLETED' || task.status === 'PARTIAL') {
-        setIsGeneratingVariants(false);
-        setVariantGenerateStartedAt(null);
-        clearStoredTask(templateVariantsTaskKey);
-        if (onTemplatesGenerated) {
-          await onTemplatesGenerated();
+    watchTask(projectId, taskId, {
+      onUpdate: async (task) => {
+        if (!task) return;
+
+        if (task.status === 'COMPLETED' || task.status === 'PARTIAL') {
+          setIsGeneratingVariants(false);
+          setVariantGenerateStartedAt(null);
+          clearStoredTask(templateVariantsTaskKey);
+          if (onTemplatesGenerated) {
+            await onTemplatesGenerated();
+          }
+          showToast({ message: '模板套装生成完成', type: 'success' });
+          return;
         }
-        showToast({ message: '模板套装生成完成', type: 'success' });
-        return;
-      }
-      if (task.status === 'FAILED') {
+        if (task.status === 'FAILED') {
+          setIsGeneratingVariants(false);
+          setVariantGenerateStartedAt(null);
+          clearStoredTask(templateVariantsTaskKey);
+          showToast({ message: task.error_message || '模板套装生成失败', type: 'error' });
+        }
+      },
+      onError: (error: any) => {
         setIsGeneratingVariants(false);
         setVariantGenerateStartedAt(null);
         clearStoredTask(templateVariantsTaskKey);
-        showToast({ message: task.error_message || '模板套装生成失败', type: 'error' });
-        return;
-      }
-      setTimeout(() => pollTemplateTask(taskId), 1500);
-    } catch (error: any) {
-      setIsGeneratingVariants(false);
-      setVariantGenerateStartedAt(null);
-      clearStoredTask(templateVariantsTaskKey);
-      showToast({ message: error.message || '模板套装生成失败', type: 'error' });
-    }
+        showToast({ message: error.message || '模板套装生成失败', type: 'error' });
+      },
+    });
   };
 
-  const pollVariantTask = async (taskId: string) => {
+  const pollVariantTask = (taskId: string) => {
     if (!projectId) return;
-    try {
-      const response = await getTaskStatus(projectId, taskId);
-      const task = response.data;
-      if (!task) return;
-
-      if (task.status === 'COMPLETED') {
-        setIsVariantRegenerating(false);
-        setVariantRegenerateStartedAt(null);
-        clearStoredTask(templateVariantRegenerateTaskKey);
-        showToast({ message: '模板单图生成完成', type: 'success' });
-        if (onTemplatesGenerated) {
-          await onTemplatesGenerated();
+    watchTask(projectId, taskId, {
+      onUpdate: async (task) => {
+        if (!task) return;
+
+        if (task.status === 'COMPLETED') {
+          setIsVariantRegenerating(false);
+          setVariantRegenerateStartedAt(null);
+          clearStoredTask(templateVariantRegenerateTaskKey);
+          showToast({ message: '模板单图生成完成', type: 'success' });
+          if (onTemplatesGenerated) {
+            await onTemplatesGenerated();
+          }
+          return;
         }
-        return;
-      }
-      if (task.status === 'FAILED') {
+        if (task.status === 'FAILED') {
+          setIsVariantRegenerating(false);
+          setVariantRegenerateStartedAt(null);
+          clearStoredTask(templateVariantRegenerateTaskKey);
+          showToast({ message: task.error_message || '模板单图生成失败', type: 'error' });
+        }
+      },
+      onError: (error: any) => {
         setIsVariantRegenerating(false);
         setVariantRegenerateStartedAt(null);
         clearStoredTask(templateVariantRegenerateTaskKey);
-        showToast({ message: task.error_message || '模板单图生成失败', type: 'error' });
-        return;
-      }
-      setTimeout(() => pollVariantTask(taskId), 1500);
-    } catch (error: any) {
-      setIsVariantRegenerating(false);
-      setVariantRegenerateStartedAt(null);
-      clearStoredTask(templateVariantRegenerateTaskKey);
-      showToast({ message: error.message || '模板单图生成失败', type: 'error' });
-    }
+        showToast({ message: error.message || '模板单图生成失败', type: 'error' });
+      },
+    });
   };
 
   const handleGenerateVariants = async () => {
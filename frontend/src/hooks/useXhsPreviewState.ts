@@ -7,7 +7,7 @@ import {
   generateXhsCard,
   getPageImageVersions,
   getSettings,
-  getTaskStatus,
+  watchTask,
   getXhsCardImageVersions,
   listMaterials,
   listUserTemplates,
@@ -378,10 +378,9 @@ export function useXhsPreviewState() {
     (taskId: string, index: number, onFinish?: (status: 'completed' | 'failed') => void) => {
       if (!projectId) return Promise.resolve('failed' as const);
       return new Promise<'completed' | 'failed'>((resolve) => {
-        const poll = async () => {
-          try {
-            const response = await getTaskStatus(projectId, taskId);
-            const task = response.data;
+        // 订阅任务进度（SSE，失败时回退到长轮询）
+        watchTask(projectId, taskId, {
+          onUpdate: async (task) => {
             if (task?.status === 'COMPLETED') {
               setRegeneratingIndex((prev) => ({ ...prev, [index]: false }));
               setRegeneratingStartedAt((prev) => {
@@ -406,10 +405,9 @@ export function useXhsPreviewState() {
               show({ message: task.error_message || task.error || '生成失败', type: 'error' });
               onFinish?.('failed');
               resolve('failed');
-              return;
             }
-            setTimeout(poll, 2000);
-          } catch (error: any) {
+          },
+          onError: (error: any) => {
             setRegeneratingIndex((prev) => ({ ...prev, [index]: false }));
             setRegeneratingStartedAt((prev) => {
               const next = { ...prev };
@@ -419,9 +417,8 @@ export function useXhsPreviewState() {
             show({ message: error.message || '任务查询失败', type: 'error' });
             onFinish?.('failed');
             resolve('failed');
-          }
-        };
-        poll();
+          },
+        });
       });
     },
     [projectId, loadMaterials, show, syncProject]
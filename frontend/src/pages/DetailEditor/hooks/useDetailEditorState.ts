@@ -100,7 +100,8 @@ export const useDetailEditorState = () => {
           await handleGenerateXhsBlueprint(false);
           return;
         }
-        await generateDescriptions();
+        // 已有描述时为重新生成：跳过响应缓存
+        await generateDescriptions({ forceRegenerate: hasDescriptions });
         show({ message: '已开始批量生成描述，请稍候…', type: 'info' });
       } catch (error: any) {
         show({ message: error?.message || '生成失败', type: 'error' });
@@ -4,7 +4,7 @@ import { useToast } from '@/components/shared';
 import {
   listMaterials,
   generateInfographic,
-  getTaskStatus,
+  watchTask,
   updateProject,
   getSettings,
   listUserTemplates,
@@ -269,10 +269,9 @@ export function useInfographicState() {
   const pollTask = useCallback(
     async (taskId: string) => {
       if (!projectId) return;
-      const poll = async () => {
-        try {
-          const response = await getTaskStatus(projectId, taskId);
-          const task = response.data;
+      // 订阅任务进度（SSE，失败时回退到长轮询）
+      watchTask(projectId, taskId, {
+        onUpdate: async (task) => {
           if (task?.progress) {
             setProgress(task.progress);
           }
@@ -287,16 +286,14 @@ export function useInfographicState() {
             setIsGenerating(false);
             setProgress(null);
             show({ message: task.error_message || task.error || '生成失败', type: 'error' });
-            return;
           }
-          setTimeout(poll, 2000);
-        } catch (error: any) {
+        },
+        onError: (error: any) => {
           setIsGenerating(false);
           setProgress(null);
           show({ message: error.message || '任务查询失败', type: 'error' });
-        }
-      };
-      poll();
+        },
+      });
     },
     [projectId, loadMaterials, show]
   );
@@ -436,10 +433,9 @@ export function useInfographicState() {
       setEditingMaterialIds((prev) => (prev.includes(editTargetMaterial.id) ? prev : [...prev, editTargetMaterial.id]));
       show({ message: '已开始生成（信息图编辑）…', type: 'info' });
 
-      const poll = async () => {
-        try {
-          const r = await getTaskStatus(projectId, taskId);
-          const task = r.data;
+      // 订阅任务进度（SSE，失败时回退到长轮询）
+      watchTask(projectId, taskId, {
+        onUpdate: async (task) => {
           if (task?.status === 'COMPLETED') {
             setEditingMaterialIds((prev) => prev.filter((id) => id !== editTargetMaterial.id));
             setIsEditingGenerating(false);
@@ -480,16 +476,14 @@ export function useInfographicState() {
             setEditingMaterialIds((prev) => prev.filter((id) => id !== editTargetMaterial.id));
             setIsEditingGenerating(false);
             show({ message: task.error_message || task.error || '编辑失败', type: 'error' });
-            return;
           }
-          setTimeout(poll, 2000);
-        } catch (e: any) {
+        },
+        onError: (e: any) => {
           setEditingMaterialIds((prev) => prev.filter((id) => id !== editTargetMaterial.id));
           setIsEditingGenerating(false);
           show({ message: e.message || '任务查询失败', type: 'error' });
-        }
-      };
-      poll();
+        },
+      });
     } catch (error: any) {
       setIsSubmittingEdit(false);
       // 404 场景：通常是后端没重启到最新代码或代理端口不对
@@ -508,7 +502,6 @@ export function useInfographicState() {
     editUploadedFiles,
     aspectRatio,
     resolution,
-    getTaskStatus,
     loadMaterials,
     show,
   ]);
@@ -217,7 +217,8 @@ export const useOutlineEditorState = () => {
         '已有大纲内容，重新生成将覆盖现有内容，确定继续吗？',
         async () => {
           try {
-            await generateOutline({ pageCount: desiredPageCount });
+            // 重新生成：跳过响应缓存，否则输入未变时会直接返回上次的大纲
+            await generateOutline({ pageCount: desiredPageCount, forceRegenerate: true });
           } catch (error) {
             console.error('生成大纲失败:', error);
           }
@@ -46,9 +46,9 @@ export interface GenerationState {
 
 // 生成相关的 actions
 export interface GenerationActions {
-  generateOutline: (options?: { pageCount?: number }) => Promise<void>;
+  generateOutline: (options?: { pageCount?: number; forceRegenerate?: boolean }) => Promise<void>;
   generateFromDescription: () => Promise<void>;
-  generateDescriptions: () => Promise<void>;
+  generateDescriptions: (options?: { forceRegenerate?: boolean }) => Promise<void>;
   generatePageDescription: (
     pageId: string,
     options?: { extraRequirements?: string; forceRegenerate?: boolean }
@@ -160,7 +160,7 @@ export const createGenerationSlice: StateCreator<CombinedState, [], [], Generati
   },
 
   // 生成描述（使用异步任务，实时显示进度）
-  generateDescriptions: async () => {
+  generateDescriptions: async (options) => {
     const { currentProject } = get();
     if (!currentProject || !currentProject.id) return;
 
@@ -185,81 +185,71 @@ export const createGenerationSlice: StateCreator<CombinedState, [], [], Generati
         throw new Error('项目ID不存在');
       }
 
-      const response = await api.generateDescriptions(projectId);
+      const response = await api.generateDescriptions(projectId, undefined, options);
       const taskId = response.data?.task_id;
 
       if (!taskId) {
         throw new Error('未收到任务ID');
       }
 
-      // 启动轮询任务状态和定期同步项目数据
-      const pollAndSync = async () => {
-        try {
-          // 轮询任务状态
-          const taskResponse = await api.getTaskStatus(projectId, taskId);
-          const task = taskResponse.data;
-
-          if (task) {
-            // 更新进度
-            if (task.progress) {
-              set({ taskProgress: task.progress });
-            }
+      // 订阅任务进度（SSE，失败时回退到长轮询），每次进度推送时同步项目数据
+      api.watchTask(projectId, taskId, {
+        onUpdate: async (task) => {
+          if (!task) return;
 
-            // 同步项目数据以获取最新的页面状态
-            await get().syncProject();
+          // 更新进度
+          if (task.progress) {
+            set({ taskProgress: task.progress });
+          }
+
+          // 同步项目数据以获取最新的页面状态
+          await get().syncProject();
 
-            // 根据项目数据更新每个页面的生成状态
-            const { currentProject: updatedProject } = get();
-            if (updatedProject) {
-              const updatedTasks: Record<string, boolean> = {};
-              updatedProject.pages.forEach((page) => {
-                if (page.id) {
-                  // 如果页面已有描述，说明已完成
-                  const hasDescription = !!page.description_content;
-                  // 如果状态是 GENERATING 或还没有描述，说明还在生成中
-                  const isGenerating =
-                    page.status === 'GENERATING' || (!hasDescription && initialTasks[page.id]);
-                  if (isGenerating) {
-                    updatedTasks[page.id] = true;
-                  }
+          // 根据项目数据更新每个页面的生成状态
+          const { currentProject: updatedProject } = get();
+          if (updatedProject) {
+            const updatedTasks: Record<string, boolean> = {};
+            updatedProject.pages.forEach((page) => {
+              if (page.id) {
+                // 如果页面已有描述，说明已完成
+                const hasDescription = !!page.description_content;
+                // 如果状态是 GENERATING 或还没有描述，说明还在生成中
+                const isGenerating =
+                  page.status === 'GENERATING' || (!hasDescription && initialTasks[page.id]);
+                if (isGenerating) {
+                  updatedTasks[page.id] = true;
                 }
-              });
-              set({ pageDescriptionGeneratingTasks: updatedTasks });
-            }
+              }
+            });
+            set({ pageDescriptionGeneratingTasks: updatedTasks });
+          }
 
-            // 检查任务是否完成
-            if (task.status === 'COMPLETED') {
-              // 清除所有生成状态
-              set({
-                pageDescriptionGeneratingTasks: {},
-                taskProgress: null,
-                activeTaskId: null,
-              });
-              // 最后同步一次确保数据最新
-              await get().syncProject();
-            } else if (task.status === 'FAILED') {
-              // 任务失败
-              set({
-                pageDescriptionGeneratingTasks: {},
-                taskProgress: null,
-                activeTaskId: null,
-                error: normalizeErrorMessage(task.error_message || task.error || '生成描述失败'),
-              });
-            } else if (task.status === 'PENDING' || task.status === 'PROCESSING') {
-              // 继续轮询
-              setTimeout(pollAndSync, 2000);
-            }
+          // 检查任务是否完成
+          if (task.status === 'COMPLETED') {
+            // 清除所有生成状态
+            set({
+              pageDescriptionGeneratingTasks: {},
+              taskProgress: null,
+              activeTaskId: null,
+            });
+            // 最后同步一次确保数据最新
+            await get().syncProject();
+          } else if (task.status === 'FAILED') {
+            // 任务失败
+            set({
+              pageDescriptionGeneratingTasks: {},
+              taskProgress: null,
+              activeTaskId: null,
+              error: normalizeErrorMessage(task.error_message || task.error || '生成描述失败'),
+            });
           }
-        } catch (error: any) {
-          console.error('[生成描述] 轮询错误:', error);
-          // 即使轮询出错，也继续尝试同步项目数据
+        },
+        onError: async (error: any) => {
+          console.error('[生成描述] 进度订阅错误:', error);
+          set({ pageDescriptionGeneratingTasks: {}, taskProgress: null, activeTaskId: null });
           await get().syncProject();
-          setTimeout(pollAndSync, 2000);
-        }
-      };
-
-      // 开始轮询
-      setTimeout(pollAndSync, 2000);
+        },
+      });
     } catch (error: any) {
       console.error('[生成描述] 启动任务失败:', error);
       set({
@@ -430,11 +420,9 @@ export const createGenerationSlice: StateCreator<CombinedState, [], [], Generati
       return;
     }
 
-    const poll = async () => {
-      try {
-        const response = await api.getTaskStatus(currentProject.id!, taskId);
-        const task = response.data;
-
+    // 订阅任务进度（SSE，失败时回退到长轮询）
+    api.watchTask(currentProject.id!, taskId, {
+      onUpdate: async (task) => {
         if (!task) {
           console.warn('[批量轮询] 响应中没有任务数据');
           return;
@@ -480,11 +468,9 @@ export const createGenerationSlice: StateCreator<CombinedState, [], [], Generati
           // 刷新项目数据以更新页面状态
           await get().syncProject();
         } else if (task.status === 'PENDING' || task.status === 'PROCESSING') {
-          // 继续轮询，同时同步项目数据以更新页面状态
+          // 处理中：同步项目数据以更新页面状态
           console.log(`[批量轮询] Task ${taskId} 处理中，同步项目数据...`);
           await get().syncProject();
-          console.log(`[批量轮询] Task ${taskId} 处理中，2秒后继续轮询...`);
-          setTimeout(poll, 2000);
         } else {
           // 未知状态，停止轮询
           console.warn(`[批量轮询] Task ${taskId} 未知状态: ${task.status}，停止轮询`);
@@ -500,7 +486,8 @@ export const createGenerationSlice: StateCreator<CombinedState, [], [], Generati
           savePageGeneratingStartedAt(newStartedAt);
           set({ pageGeneratingTasks: newTasks, pageGeneratingStartedAt: newStartedAt });
         }
-      } catch (error: any) {
+      },
+      onError: (error: any) => {
         console.error('[批量轮询] 轮询错误:', error);
         // 清除所有相关页面的任务记录
         const { pageGeneratingTasks, pageGeneratingStartedAt } = get();
@@ -514,11 +501,8 @@ export const createGenerationSlice: StateCreator<CombinedState, [], [], Generati
         });
         savePageGeneratingStartedAt(newStartedAt);
         set({ pageGeneratingTasks: newTasks, pageGeneratingStartedAt: newStartedAt });
-      }
-    };
-
-    // 开始轮询（不 await，立即返回让 UI 继续响应）
-    poll();
+      },
+    });
   },
 
   // 编辑页面图片（异步）
@@ -103,12 +103,9 @@ export const createTaskSlice: StateCreator<TaskSliceState, [], [], TaskSlice> =
       return;
     }
 
-    const poll = async () => {
-      try {
-        console.log(`[轮询] 查询任务状态: ${taskId}`);
-        const response = await api.getTaskStatus(currentProject.id!, taskId);
-        const task = response.data;
-
+    // 订阅任务进度（SSE，失败时回退到长轮询）
+    api.watchTask(currentProject.id!, taskId, {
+      onUpdate: async (task) => {
         if (!task) {
           console.warn('[轮询] 响应中没有任务数据');
           return;
@@ -159,9 +156,7 @@ export const createTaskSlice: StateCreator<TaskSliceState, [], [], TaskSlice> =
             isGlobalLoading: false
           } as Partial<TaskSliceState>);
         } else if (task.status === 'PENDING' || task.status === 'PROCESSING') {
-          // 继续轮询（PENDING 或 PROCESSING）
-          console.log(`[轮询] Task ${taskId} 处理中，2秒后继续轮询...`);
-          setTimeout(poll, 2000);
+          // 处理中（PENDING 或 PROCESSING）：等待下一次进度推送
         } else {
           // 未知状态，停止轮询
           console.warn(`[轮询] Task ${taskId} 未知状态: ${task.status}，停止轮询`);
@@ -172,17 +167,16 @@ export const createTaskSlice: StateCreator<TaskSliceState, [], [], TaskSlice> =
             isGlobalLoading: false
           } as Partial<TaskSliceState>);
         }
-      } catch (error: any) {
+      },
+      onError: (error: any) => {
         console.error('任务轮询错误:', error);
         set({
           error: normalizeErrorMessage(error.message || '任务查询失败'),
           activeTaskId: null,
           isGlobalLoading: false
         } as Partial<TaskSliceState>);
-      }
-    };
-
-    await poll();
+      },
+    });
   },
 
   // 轮询图片生成任务（非阻塞，支持单页和批量）
@@ -193,11 +187,9 @@ export const createTaskSlice: StateCreator<TaskSliceState, [], [], TaskSlice> =
       return;
     }
 
-    const poll = async () => {
-      try {
-        const response = await api.getTaskStatus(currentProject.id!, taskId);
-        const task = response.data;
-
+    // 订阅任务进度（SSE，失败时回退到长轮询）
+    api.watchTask(currentProject.id!, taskId, {
+      onUpdate: async (task) => {
         if (!task) {
           console.warn('[批量轮询] 响应中没有任务数据');
           return;
@@ -243,11 +235,9 @@ export const createTaskSlice: StateCreator<TaskSliceState, [], [], TaskSlice> =
           // 刷新项目数据以更新页面状态
           await get().syncProject();
         } else if (task.status === 'PENDING' || task.status === 'PROCESSING') {
-          // 继续轮询，同时同步项目数据以更新页面状态
+          // 处理中：同步项目数据以更新页面状态
           console.log(`[批量轮询] Task ${taskId} 处理中，同步项目数据...`);
           await get().syncProject();
-          console.log(`[批量轮询] Task ${taskId} 处理中，2秒后继续轮询...`);
-          setTimeout(poll, 2000);
         } else {
           // 未知状态，停止轮询
           console.warn(`[批量轮询] Task ${taskId} 未知状态: ${task.status}，停止轮询`);
@@ -263,7 +253,8 @@ export const createTaskSlice: StateCreator<TaskSliceState, [], [], TaskSlice> =
           savePageGeneratingStartedAt(newStartedAt);
           set({ pageGeneratingTasks: newTasks, pageGeneratingStartedAt: newStartedAt });
         }
-      } catch (error: any) {
+      },
+      onError: (error: any) => {
         console.error('[批量轮询] 轮询错误:', error);
         // 清除所有相关页面的任务记录
         const { pageGeneratingTasks, pageGeneratingStartedAt } = get();
@@ -277,11 +268,8 @@ export const createTaskSlice: StateCreator<TaskSliceState, [], [], TaskSlice> =
         });
         savePageGeneratingStartedAt(newStartedAt);
         set({ pageGeneratingTasks: newTasks, pageGeneratingStartedAt: newStartedAt });
-      }
-    };
-
-    // 开始轮询（不 await，立即返回让 UI 继续响应）
-    poll();
+      },
+    });
   },
 });
 
@@ -106,11 +106,9 @@ export const useExportTasksStore = create<ExportTasksState>()(
       },
 
       pollTask: async (id, projectId, taskId) => {
-        const poll = async () => {
-          try {
-            const response = await api.getTaskStatus(projectId, taskId);
-            const task = response.data;
-
+        // 订阅任务进度（SSE，失败时回退到长轮询）
+        api.watchTask(projectId, taskId, {
+          onUpdate: (task) => {
             if (!task) {
               console.warn('[ExportTasksStore] No task data in response');
               return;
@@ -151,20 +149,17 @@ export const useExportTasksStore = create<ExportTasksState>()(
               get().updateTask(id, updates);
             } else if (task.status === 'PENDING' || task.status === 'RUNNING' || task.status === 'PROCESSING') {
               get().updateTask(id, updates);
-              // Continue polling
-              setTimeout(poll, 2000);
             }
-          } catch (error: any) {
+          },
+          onError: (error: any) => {
             console.error('[ExportTasksStore] Poll error:', error);
             get().updateTask(id, {
               status: 'FAILED',
               errorMessage: error.message || '轮询失败',
               completedAt: new Date().toISOString(),
             });
-          }
-        };
-
-        await poll();
+          },
+        });
       },
 
       restoreActiveTasks: () => {
@@ -19,6 +19,7 @@ vi.mock('@/api/endpoints', () => ({
   generateDescriptions: vi.fn(),
   generateImages: vi.fn(),
   getTaskStatus: vi.fn(),
+  watchTask: vi.fn(),
   exportPPTX: vi.fn(),
   exportPDF: vi.fn(),
 }))
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+ImageEditabilityService 图片 I/O 基准：统计每页的解码次数、PNG 写入次数与耗时
+
+用本地假提取器 / 假重绘方法（不调用 MinerU、百度 OCR 或生成式模型）跑 make_image_editable，
+只衡量服务自身的图片 I/O：
+    - 根页面：N 行文字 + 若干图片 / 表格元素
+    - 递归（max_depth=2）：每个图片 / 表格子图再提取若干文字行
+解码次数按实际执行的像素解码（ImageFile.load 读取 tile）计；写入次数按 Image.save 计。
+
+使用方法:
+    python scripts/benchmark_editable_image_io.py
+
+    # 指定页数 / 每页文字行数 / 图片元素数 / 页面尺寸
+    python scripts/benchmark_editable_image_io.py --pages 10 --lines 150 --images 4 --width 3840 --height 2160
+"""
+
+import argparse
+import logging
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+BACKEND_DIR = PROJECT_ROOT / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ImageEditabilityService 图片 I/O 基准')
+    parser.add_argument('--pages', type=int, default=5)
+    parser.add_argument('--lines', type=int, default=150, help='每页文字行数')
+    parser.add_argument('--images', type=int, default=4, help='每页图片 / 表格元素数（递归处理）')
+    parser.add_argument('--width', type=int, default=1920)
+    parser.add_argument('--height', type=int, default=1080)
+    args = parser.parse_args()
+
+    from PIL import Image, ImageFile
+    from services.image_editability import ImageEditabilityService
+    from services.image_editability.extractors import (
+        ElementExtractor, ExtractionContext, ExtractionResult, ExtractorRegistry
+    )
+    from services.image_editability.factories import ServiceConfig
+    from services.image_editability.inpaint_providers import InpaintProvider, InpaintProviderRegistry
+
+    logging.basicConfig(level=logging.WARNING)
+    counts = Counter()
+
+    # 统计实际的像素解码与文件写入
+    original_load, original_save = ImageFile.ImageFile.load, Image.Image.save
+
+    def counting_load(self, *a, **kw):
+        if getattr(self, 'tile', None):
+            counts['decode'] += 1
+        return original_load(self, *a, **kw)
+
+    def counting_save(self, *a, **kw):
+        counts['write'] += 1
+        return original_save(self, *a, **kw)
+
+    ImageFile.ImageFile.load = counting_load
+    Image.Image.save = counting_save
+
+    class FakeExtractor(ElementExtractor):
+        """根页面：文字行 + 图片元素；子图：只有文字行"""
+
+        def supports_type(self, element_type):
+            return True
+
+        def extract(self, image_path, element_type=None, **kwargs):
+            with Image.open(image_path) as img:  # 提取器只读取文件头
+                width, height = img.size
+            rng = random.Random(f"{width}x{height}")
+            depth = kwargs.get('depth', 0)
+            elements = []
+            for _ in range(args.lines if depth == 0 else 8):
+                w, h = rng.randint(width // 10, width // 2), max(4, height // 40)
+                x, y = rng.randint(0, width - w), rng.randint(0, height - h)
+                elements.append({'bbox': [x, y, x + w, y + h], 'type': 'text', 'content': 'line'})
+            if depth == 0:
+                for i in range(args.images):
+                    x0 = (i % 2) * width // 2
+                    y0 = (i // 2 % 2) * height // 2
+                    elements.append({'bbox': [x0 + 10, y0 + 10, x0 + width // 2 - 10, y0 + height // 2 - 10],
+                                     'type': 'image' if i % 2 else 'table'})
+            return ExtractionResult(elements, ExtractionContext(metadata={'image_size': (width, height)}))
+
+    class FakeInpaint(InpaintProvider):
+        def inpaint_regions(self, image, bboxes, types=None, **kwargs):
+            return image.convert('RGB')
+
+    workdir = Path(tempfile.mkdtemp(prefix='editable_io_'))
+    config = ServiceConfig(
+        upload_folder=workdir,
+        extractor_registry=ExtractorRegistry().register_default(FakeExtractor()),
+        inpaint_registry=InpaintProviderRegistry().register_default(FakeInpaint()),
+        max_depth=2,
+        min_image_size=50,
+        min_image_area=2500
+    )
+    service = ImageEditabilityService(config)
+
+    pages = []
+    for i in range(args.pages):
+        path = workdir / f"page_{i}.png"
+        Image.effect_noise((args.width, args.height), 64).convert('RGB').save(path)
+        pages.append(str(path))
+    counts.clear()
+
+    start = time.perf_counter()
+    for path in pages:
+        service.make_image_editable(path)
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.pages} pages {args.width}x{args.height}, {args.lines} text lines + {args.images} images per page, max_depth=2")
+    print(f"per page: {counts['decode'] / args.pages:.1f} decodes, {counts['write'] / args.pages:.1f} PNG writes, "
+          f"{elapsed / args.pages * 1000:.0f} ms")
+    print(f"output dir: {workdir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+PPTX / PDF 导出内存与耗时基准
+
+生成 N 张 4K（3840x2160）测试图片，分别用流式导出（services/export_stream.py）
+和旧的整体内存导出（python-pptx add_picture + prs.save / img2pdf）各跑一次，
+每种方式在独立子进程中执行，报告峰值内存（ru_maxrss）与耗时。
+
+使用方法:
+    # 默认 100 页 PNG
+    python scripts/benchmark_export.py
+
+    # 指定页数 / 图片格式 / 只测部分模式
+    python scripts/benchmark_export.py --pages 50 --format jpeg
+    python scripts/benchmark_export.py --modes pptx pdf
+
+    # 复用已生成的图片目录
+    python scripts/benchmark_export.py --images-dir /tmp/bench_images
+
+pdf-legacy 模式需要另行安装 img2pdf（pip install img2pdf），项目本身不再依赖它。
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+BACKEND_DIR = PROJECT_ROOT / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+MODES = ['pptx', 'pdf', 'pptx-legacy', 'pdf-legacy']
+
+
+def generate_images(images_dir: Path, pages: int, image_format: str):
+    """生成测试图片（渐变 + 噪点，体积接近真实的生成页面）"""
+    from PIL import Image
+
+    images_dir.mkdir(parents=True, exist_ok=True)
+    ext = 'jpg' if image_format == 'jpeg' else 'png'
+    paths = []
+    base = Image.linear_gradient('L').resize((3840, 2160))
+    for i in range(pages):
+        path = images_dir / f'page_{i:03d}.{ext}'
+        if not path.exists():
+            noise = Image.effect_noise((3840, 2160), 40 + i % 20)
+            img = Image.merge('RGB', (base, noise, base.rotate(180)))
+            img.save(path, format=image_format.upper(), **({'quality': 95} if ext == 'jpg' else {}))
+        paths.append(str(path))
+    return paths
+
+
+def run_mode(mode: str, image_paths, output_path: str):
+    """在当前进程中执行一次导出（由子进程调用）"""
+    if mode == 'pptx':
+        from services.export_stream import write_pptx_from_images
+        with open(output_path, 'wb') as f:
+            write_pptx_from_images(image_paths, f)
+    elif mode == 'pdf':
+        from services.export_stream import write_pdf_from_images
+        with open(output_path, 'wb') as f:
+            write_pdf_from_images(image_paths, f)
+    elif mode == 'pptx-legacy':
+        from pptx import Presentation
+        from pptx.util import Inches
+        prs = Presentation()
+        prs.slide_width, prs.slide_height = Inches(10), Inches(5.625)
+        for path in image_paths:
+            slide = prs.slides.add_slide(prs.slide_layouts[6])
+            slide.shapes.add_picture(path, 0, 0, width=prs.slide_width, height=prs.slide_height)
+        prs.save(output_path)
+    elif mode == 'pdf-legacy':
+        import img2pdf
+        layout_fun = img2pdf.get_layout_fun(pagesize=(img2pdf.in_to_pt(10), img2pdf.in_to_pt(5.625)))
+        with open(output_path, 'wb') as f:
+            f.write(img2pdf.convert(image_paths, layout_fun=layout_fun))
+    else:
+        raise ValueError(f"Unknown mode: {mode}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='PPTX/PDF 导出基准测试')
+    parser.add_argument('--pages', type=int, default=100, help='页数（默认 100）')
+    parser.add_argument('--format', choices=['png', 'jpeg'], default='png', help='测试图片格式')
+    parser.add_argument('--images-dir', help='测试图片目录（默认使用临时目录，已存在的图片会复用）')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=MODES, help='要测试的导出方式')
+    parser.add_argument('--run-mode', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--output', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    images_dir = Path(args.images_dir or os.path.join(tempfile.gettempdir(), f'export_bench_{args.format}'))
+
+    if args.run_mode:
+        # 子进程：只执行一次导出，输出 峰值内存(KB) 与 耗时
+        image_paths = sorted(str(p) for p in images_dir.iterdir() if p.is_file())[:args.pages]
+        start = time.perf_counter()
+        run_mode(args.run_mode, image_paths, args.output)
+        elapsed = time.perf_counter() - start
+        print(f"{resource.getrusage(resource.RUSAGE_SELF).ru_maxrss} {elapsed:.3f}")
+        return
+
+    print(f"准备 {args.pages} 张 4K {args.format.upper()} 图片: {images_dir}")
+    image_paths = generate_images(images_dir, args.pages, args.format)
+    input_mb = sum(os.path.getsize(p) for p in image_paths) / 1024 / 1024
+    print(f"输入图片总大小: {input_mb:.1f} MB\n")
+
+    print(f"{'mode':<14}{'peak RSS (MB)':>15}{'time (s)':>11}{'output (MB)':>14}")
+    with tempfile.TemporaryDirectory() as out_dir:
+        for mode in args.modes:
+            output = os.path.join(out_dir, f"bench.{mode.split('-')[0]}")
+            result = subprocess.run(
+                [sys.executable, __file__, '--run-mode', mode, '--output', output,
+                 '--pages', str(args.pages), '--images-dir', str(images_dir)],
+                capture_output=True, text=True
+            )
+            if result.returncode != 0:
+                print(f"{mode:<14}failed: {result.stderr.strip().splitlines()[-1:]}")
+                continue
+            max_rss_kb, elapsed = result.stdout.split()[-2:]
+            output_mb = os.path.getsize(output) / 1024 / 1024
+            print(f"{mode:<14}{int(max_rss_kb) / 1024:>15.1f}{float(elapsed):>11.2f}{output_mb:>14.1f}")
+            os.remove(output)
+
+
+if __name__ == '__main__':
+    main()
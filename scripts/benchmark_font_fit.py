@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+可编辑 PPTX 字号计算基准：逐字号线性扫描（旧实现） vs TextFitter 二分查找
+
+对一份 MinerU 元素导出（每页的文本元素 bbox + 文字）逐个计算字号：
+    - legacy：从 200pt 到 6pt 逐个字号加载字体并测量每一行（旧的 calculate_font_size）
+    - fitter：PPTXBuilder.calculate_font_size（utils/text_fit.py，参考字号测量一次 + 缓存 + 二分）
+报告总耗时、单个元素耗时，以及两者结果不同的元素数量（线性缩放与整数字号 hinting 的差异，通常为 ±1pt）。
+
+使用方法:
+    # 默认生成 30 页的示例元素导出（1920x1080，标题/正文/要点/表格单元格）
+    python scripts/benchmark_font_fit.py
+
+    # 使用真实的导出：JSON 列表，每页为 [{"bbox": [x0, y0, x1, y1], "text": "...", "type": "title"}, ...]
+    python scripts/benchmark_font_fit.py --dump elements.json
+
+    # 保存生成的示例导出 / 指定字体文件
+    python scripts/benchmark_font_fit.py --save-dump /tmp/elements.json --font /path/to/font.ttf
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+BACKEND_DIR = PROJECT_ROOT / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+TITLES = ['市场规模与增长趋势', '核心竞争优势', 'Product Roadmap 2025', '用户增长与留存分析', '财务概览', '总结与展望']
+BODY = [
+    '海外市场收入同比增长 35%，东南亚与中东贡献了主要增量。',
+    '研发投入占收入比例提升至 18%，新一代推理芯片完成流片。',
+    'Gross margin improved to 42% driven by product mix and lower unit costs.',
+    '渠道合作伙伴数量翻倍，覆盖 120 个城市的线下门店。',
+    '核心岗位流失率下降到 4%，校园招聘占比达到 60%。',
+]
+CELLS = ['2023', '2024', '同比', '收入（亿元）', '12.4', '16.8', '+35%', 'DAU', '1.2M']
+
+# 旧实现按字号缓存字体对象（PPTXBuilder._font_cache）
+_legacy_fonts = {}
+
+
+def generate_dump(slides: int = 30, seed: int = 7):
+    """模拟 MinerU 在 1920x1080 页面上的文本元素：1 个标题、2-4 段正文、3-5 条要点、部分页面含表格"""
+    rng = random.Random(seed)
+    dump = []
+    for index in range(slides):
+        elements = [{'type': 'title', 'text': rng.choice(TITLES), 'bbox': [120, 80, 120 + rng.randint(600, 1400), 160]}]
+        y = 220
+        for _ in range(rng.randint(2, 4)):
+            text = rng.choice(BODY) + (rng.choice(BODY) if rng.random() < 0.4 else '')
+            height = rng.randint(40, 110)
+            elements.append({'type': 'text', 'text': text, 'bbox': [120, y, 120 + rng.randint(700, 1100), y + height]})
+            y += height + 20
+        for _ in range(rng.randint(3, 5)):
+            elements.append({'type': 'text', 'text': '• ' + rng.choice(BODY)[:rng.randint(8, 24)],
+                             'bbox': [1300, y % 900, 1300 + rng.randint(300, 500), y % 900 + 40]})
+            y += 50
+        if index % 3 == 0:
+            for row in range(3):
+                for col in range(3):
+                    x0, y0 = 1200 + col * 200, 700 + row * 60
+                    elements.append({'type': 'table_cell', 'text': CELLS[row * 3 + col], 'bbox': [x0, y0, x0 + 190, y0 + 50]})
+        dump.append(elements)
+    return dump
+
+
+def legacy_font_size(font_path: str, bbox, text: str, min_size: int = 6, max_size: int = 200, dpi: int = 96) -> float:
+    """旧的 calculate_font_size：逐字号加载字体并测量每一行"""
+    from PIL import ImageFont
+    width_pt = (bbox[2] - bbox[0]) / dpi * 72
+    height_pt = (bbox[3] - bbox[1]) / dpi * 72
+    use_precise = os.path.exists(font_path)
+    for size in range(max_size, min_size - 1, -1):
+        total_lines = 0
+        for line in text.split('\n'):
+            if not line:
+                total_lines += 1
+                continue
+            if use_precise:
+                font = _legacy_fonts.get(size) or _legacy_fonts.setdefault(size, ImageFont.truetype(font_path, size))
+                left, _, right, _ = font.getbbox(line)
+                line_width = right - left
+            else:
+                cjk = sum(1 for c in line if '\u4e00' <= c <= '\u9fff')
+                line_width = (cjk + (len(line) - cjk) * 0.5) * size
+            total_lines += max(1, -(-int(line_width) // int(width_pt)))
+        if total_lines * size <= height_pt:
+            return float(size)
+    return float(min_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='可编辑 PPTX 字号计算基准')
+    parser.add_argument('--dump', help='元素导出 JSON（默认生成 30 页示例）')
+    parser.add_argument('--slides', type=int, default=30, help='生成示例时的页数')
+    parser.add_argument('--save-dump', help='保存生成的示例导出')
+    parser.add_argument('--font', help='字体文件（默认 PPTXBuilder.FONT_PATH）')
+    args = parser.parse_args()
+
+    from utils.pptx_builder import PPTXBuilder
+
+    if args.dump:
+        with open(args.dump, 'r', encoding='utf-8') as f:
+            dump = json.load(f)
+    else:
+        dump = generate_dump(args.slides)
+        if args.save_dump:
+            with open(args.save_dump, 'w', encoding='utf-8') as f:
+                json.dump(dump, f, ensure_ascii=False, indent=1)
+    if args.font:
+        PPTXBuilder.FONT_PATH = args.font
+    font_path = PPTXBuilder.FONT_PATH
+    elements = [e for page in dump for e in page if (e.get('text') or '').strip()]
+    print(f"{len(dump)} slides, {len(elements)} text elements, font: "
+          f"{font_path if os.path.exists(font_path) else 'not found (width estimation)'}")
+
+    start = time.perf_counter()
+    legacy = [legacy_font_size(font_path, e['bbox'], e['text']) for e in elements]
+    legacy_time = time.perf_counter() - start
+
+    builder = PPTXBuilder()
+    start = time.perf_counter()
+    fitted = [builder.calculate_font_size(e['bbox'], e['text']) for e in elements]
+    fitter_time = time.perf_counter() - start
+
+    # 第二遍：宽度缓存全部命中（同一 deck 重复导出 / 重复出现的文字）
+    start = time.perf_counter()
+    for e in elements:
+        builder.calculate_font_size(e['bbox'], e['text'])
+    warm_time = time.perf_counter() - start
+
+    diffs = [abs(a - b) for a, b in zip(legacy, fitted) if a != b]
+    print(f"\n{'mode':<16}{'total (ms)':>12}{'per element (us)':>18}")
+    for name, elapsed in (('legacy', legacy_time), ('fitter', fitter_time), ('fitter (warm)', warm_time)):
+        print(f"{name:<16}{elapsed * 1000:>12.1f}{elapsed / len(elements) * 1e6:>18.1f}")
+    print(f"\nspeedup: {legacy_time / fitter_time:.0f}x; "
+          f"different sizes: {len(diffs)}/{len(elements)} (max diff {max(diffs, default=0):.0f}pt)")
+
+
+if __name__ == '__main__':
+    main()
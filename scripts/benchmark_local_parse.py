@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+参考文件解析耗时基准：本地快速解析 vs MinerU
+
+对语料目录中的每个 docx / pptx / pdf 文件：
+    - 运行本地解析（backend/local_document_parser.py），记录选择结果（本地 / 交给 MinerU 的原因）与耗时
+    - 加 --mineru 时再走一次完整的 MinerU 流程（上传、轮询、下载，不生成图片描述）对比耗时
+
+使用方法:
+    # 不指定语料目录时生成一组示例 pptx / docx（不同页数）
+    python scripts/benchmark_local_parse.py
+
+    # 使用自己的样本文件
+    python scripts/benchmark_local_parse.py --corpus-dir ~/samples
+
+    # 同时测 MinerU（需要 .env 中配置 MINERU_TOKEN）
+    python scripts/benchmark_local_parse.py --corpus-dir ~/samples --mineru
+"""
+
+import argparse
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+BACKEND_DIR = PROJECT_ROOT / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+EXTENSIONS = ('docx', 'pptx', 'pdf')
+
+
+def _png_bytes(seed: int) -> bytes:
+    from PIL import Image
+    buffer = io.BytesIO()
+    Image.effect_noise((640, 360), 30 + seed % 50).convert('RGB').save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def generate_corpus(corpus_dir: Path):
+    """生成示例 pptx（10/50 页）与 docx（20/200 段）"""
+    from pptx import Presentation
+    from pptx.util import Inches
+
+    corpus_dir.mkdir(parents=True, exist_ok=True)
+    for slides in (10, 50):
+        path = corpus_dir / f'deck_{slides}.pptx'
+        if path.exists():
+            continue
+        prs = Presentation()
+        for i in range(slides):
+            slide = prs.slides.add_slide(prs.slide_layouts[5])
+            slide.shapes.title.text = f'第 {i + 1} 页：市场分析'
+            body = slide.shapes.add_textbox(Inches(0.5), Inches(1.5), Inches(6), Inches(3)).text_frame
+            body.text = '本季度收入同比增长，主要来自海外市场与新产品线。' * 3
+            if i % 3 == 0:
+                slide.shapes.add_picture(io.BytesIO(_png_bytes(i)), Inches(6.5), Inches(1.5), width=Inches(3))
+        prs.save(path)
+
+    w = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+    for paragraphs in (20, 200):
+        path = corpus_dir / f'report_{paragraphs}.docx'
+        if path.exists():
+            continue
+        body = ''.join(
+            f'<w:p><w:r><w:t>第 {i + 1} 段：参考资料正文，描述项目背景、目标与关键数据。</w:t></w:r></w:p>'
+            for i in range(paragraphs)
+        )
+        with zipfile.ZipFile(path, 'w') as z:
+            z.writestr('word/document.xml', f'<w:document xmlns:w="{w}"><w:body>{body}</w:body></w:document>')
+
+
+def bench_local(path: Path, out_dir: Path):
+    from local_document_parser import extract_document
+    start = time.perf_counter()
+    result = extract_document(str(path), path.suffix[1:].lower(), str(out_dir))
+    return time.perf_counter() - start, result
+
+
+def bench_mineru(path: Path):
+    from config import get_config
+    from services.file_parser_service import FileParserService
+    config = get_config()
+    parser = FileParserService(mineru_token=config.MINERU_TOKEN, mineru_api_base=config.MINERU_API_BASE)
+    start = time.perf_counter()
+    _, _, extract_id, error, _ = parser.parse_file(str(path), path.name, local_fast_path=False)
+    elapsed = time.perf_counter() - start
+    if extract_id:
+        shutil.rmtree(parser._mineru_storage_root() / extract_id, ignore_errors=True)
+    return elapsed, error
+
+
+def main():
+    parser = argparse.ArgumentParser(description='参考文件解析基准：本地快速解析 vs MinerU')
+    parser.add_argument('--corpus-dir', help='样本文件目录（默认生成示例文件到临时目录）')
+    parser.add_argument('--mineru', action='store_true', help='同时测试 MinerU 远程解析（需要 MINERU_TOKEN）')
+    args = parser.parse_args()
+
+    if args.mineru:
+        from dotenv import load_dotenv
+        load_dotenv(PROJECT_ROOT / '.env')
+
+    corpus_dir = Path(args.corpus_dir or os.path.join(tempfile.gettempdir(), 'local_parse_bench'))
+    if not args.corpus_dir:
+        print(f"生成示例语料: {corpus_dir}")
+        generate_corpus(corpus_dir)
+    files = sorted(p for p in corpus_dir.iterdir() if p.suffix[1:].lower() in EXTENSIONS)
+    if not files:
+        print(f"{corpus_dir} 中没有 docx / pptx / pdf 文件")
+        return
+
+    print(f"\n{'file':<28}{'size (KB)':>10}{'local (s)':>11}{'mineru (s)':>12}  selector")
+    with tempfile.TemporaryDirectory() as out_root:
+        for index, path in enumerate(files):
+            local_time, result = bench_local(path, Path(out_root) / str(index))
+            decision = f"MinerU: {result['needs_mineru']}" if result['needs_mineru'] else \
+                f"local ({result['pages']} pages, {result['chars']} chars, {result['images']} images)"
+            mineru_col = '-'
+            if args.mineru:
+                mineru_time, error = bench_mineru(path)
+                mineru_col = 'error' if error else f"{mineru_time:.2f}"
+            print(f"{path.name[:27]:<28}{path.stat().st_size / 1024:>10.0f}{local_time:>11.3f}{mineru_col:>12}  {decision}")
+
+
+if __name__ == '__main__':
+    main()
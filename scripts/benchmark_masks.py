@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+掩码生成 / 叠加可视化基准：逐个绘制（旧实现） vs NumPy 向量化（utils/mask_utils.py）
+
+在 4K（3840x2160）图像上随机生成 N 个 bbox（默认 200 个，含扩展像素），对比：
+    - mask：ImageDraw 逐个绘制 RGB 掩码 + 每个 bbox 一条 INFO 日志 vs create_mask_from_bboxes（单通道 L）
+    - overlay：逐像素 Python 双重循环 vs visualize_mask_overlay（数组混合）
+并校验两者像素一致。
+
+使用方法:
+    python scripts/benchmark_masks.py
+
+    # 指定尺寸 / bbox 数量 / 重复次数；旧的逐像素叠加很慢（4K 约数十秒），可跳过
+    python scripts/benchmark_masks.py --width 1920 --height 1080 --boxes 500 --repeat 5
+    python scripts/benchmark_masks.py --skip-legacy-overlay
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+BACKEND_DIR = PROJECT_ROOT / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+logger = logging.getLogger('benchmark_masks')
+
+
+def random_bboxes(width: int, height: int, count: int, seed: int = 0):
+    """模拟文字行 / 图标的 bbox：宽 40-900、高 20-160"""
+    rng = random.Random(seed)
+    boxes = []
+    for _ in range(count):
+        w, h = rng.randint(40, 900), rng.randint(20, 160)
+        x, y = rng.randint(0, width - w), rng.randint(0, height - h)
+        boxes.append((x, y, x + w, y + h))
+    return boxes
+
+
+def legacy_mask(image_size, bboxes, expand_pixels: int = 0):
+    """旧实现：RGB 掩码，逐个 ImageDraw.rectangle，每个 bbox 一条 INFO 日志"""
+    from PIL import Image, ImageDraw
+    mask = Image.new('RGB', image_size, (0, 0, 0))
+    draw = ImageDraw.Draw(mask)
+    for i, (x1, y1, x2, y2) in enumerate(bboxes):
+        x1, y1 = max(0, x1 - expand_pixels), max(0, y1 - expand_pixels)
+        x2, y2 = min(image_size[0], x2 + expand_pixels), min(image_size[1], y2 + expand_pixels)
+        draw.rectangle([x1, y1, x2, y2], fill=(255, 255, 255))
+        logger.info(f"  [{i + 1}] ({x1}, {y1}, {x2}, {y2}) 尺寸: {x2 - x1}x{y2 - y1}")
+    return mask
+
+
+def legacy_overlay(original_image, mask_image, alpha: float = 0.5):
+    """旧实现：逐像素读取掩码并写入 RGBA 叠加层"""
+    from PIL import Image
+    original_rgba = original_image.convert('RGBA')
+    mask_rgba = Image.new('RGBA', original_image.size, (0, 0, 0, 0))
+    mask_array = mask_image.load()
+    mask_rgba_array = mask_rgba.load()
+    for y in range(mask_image.size[1]):
+        for x in range(mask_image.size[0]):
+            pixel = mask_array[x, y]
+            brightness = sum(pixel) / len(pixel) if isinstance(pixel, tuple) else pixel
+            if brightness > 200:
+                mask_rgba_array[x, y] = (0, 0, 0, int(128 * alpha))
+    return Image.alpha_composite(original_rgba, mask_rgba).convert('RGB')
+
+
+def timed(fn, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='掩码生成 / 叠加可视化基准')
+    parser.add_argument('--width', type=int, default=3840)
+    parser.add_argument('--height', type=int, default=2160)
+    parser.add_argument('--boxes', type=int, default=200)
+    parser.add_argument('--expand', type=int, default=4, help='扩展像素数')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--skip-legacy-overlay', action='store_true', help='跳过旧的逐像素叠加')
+    args = parser.parse_args()
+
+    import numpy as np
+    from PIL import Image
+    from utils.mask_utils import create_mask_from_bboxes, visualize_mask_overlay
+
+    # 与应用一致输出 INFO 日志（写入空设备，只计格式化与 handler 开销）
+    logging.basicConfig(level=logging.INFO, stream=open(os.devnull, 'w'))
+
+    size = (args.width, args.height)
+    bboxes = random_bboxes(args.width, args.height, args.boxes)
+    image = Image.linear_gradient('L').resize(size).convert('RGB')
+    print(f"image {size[0]}x{size[1]}, {len(bboxes)} bboxes, expand {args.expand}px")
+
+    legacy_time, old_mask = timed(lambda: legacy_mask(size, bboxes, args.expand), args.repeat)
+    new_time, new_mask = timed(lambda: create_mask_from_bboxes(size, bboxes, expand_pixels=args.expand), args.repeat)
+    same = np.array_equal(np.asarray(old_mask)[:, :, 0], np.asarray(new_mask))
+    print(f"\n{'step':<10}{'legacy (ms)':>14}{'numpy (ms)':>14}{'speedup':>10}  identical")
+    print(f"{'mask':<10}{legacy_time * 1000:>14.1f}{new_time * 1000:>14.1f}{legacy_time / new_time:>9.1f}x  {same} "
+          f"({old_mask.mode} {len(old_mask.tobytes()) // 1024} KB -> {new_mask.mode} {len(new_mask.tobytes()) // 1024} KB)")
+
+    new_time, new_overlay = timed(lambda: visualize_mask_overlay(image, new_mask), args.repeat)
+    if args.skip_legacy_overlay:
+        print(f"{'overlay':<10}{'-':>14}{new_time * 1000:>14.1f}{'-':>10}")
+    else:
+        legacy_time, old_overlay = timed(lambda: legacy_overlay(image, old_mask), 1)
+        same = np.array_equal(np.asarray(old_overlay), np.asarray(new_overlay))
+        print(f"{'overlay':<10}{legacy_time * 1000:>14.1f}{new_time * 1000:>14.1f}{legacy_time / new_time:>9.0f}x  {same}")
+
+
+if __name__ == '__main__':
+    main()